@@ -31,6 +31,7 @@ from ironic.api.controllers.v1 import utils as api_utils
 from ironic.api import expose
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common import lookup_cache
 from ironic.common import policy
 from ironic import objects
 
@@ -424,6 +425,7 @@ class PortsController(rest.RestController):
                                 **pdict)
 
         new_port.create()
+        lookup_cache.invalidate()
         # Set the HTTP Location Header
         pecan.response.location = link.build_url('ports', new_port.uuid)
         return Port.convert_with_links(new_port)
@@ -478,8 +480,13 @@ class PortsController(rest.RestController):
                                           rpc_port.node_id)
         topic = pecan.request.rpcapi.get_topic_for(rpc_node)
 
+        # The nodes found by the ramdisk lookup depend on these fields
+        invalidate = bool({'address', 'node_id'} &
+                          rpc_port.obj_what_changed())
         new_port = pecan.request.rpcapi.update_port(
             pecan.request.context, rpc_port, topic)
+        if invalidate:
+            lookup_cache.invalidate()
 
         return Port.convert_with_links(new_port)
 
@@ -502,3 +509,4 @@ class PortsController(rest.RestController):
         topic = pecan.request.rpcapi.get_topic_for(rpc_node)
         pecan.request.rpcapi.destroy_port(pecan.request.context,
                                           rpc_port, topic)
+        lookup_cache.invalidate()
@@ -24,6 +24,8 @@ from ironic.api.controllers.v1 import types
 from ironic.api.controllers.v1 import utils as api_utils
 from ironic.api import expose
 from ironic.common import exception
+from ironic.common.i18n import _
+from ironic.common import lookup_cache
 from ironic.common import policy
 from ironic.common import states
 from ironic import objects
@@ -75,6 +77,26 @@ class LookupResult(base.APIBase):
         return cls(node=node, config=config())
 
 
+def _get_node_by_addresses(addresses):
+    """Get a node by its MAC addresses, using the lookup cache.
+
+    :param addresses: list of MAC addresses for a node.
+    :raises: NodeNotFound if the node was not found.
+    :returns: a :class:`ironic.objects.Node` object.
+    """
+    context = pecan.request.context
+    node_uuid = lookup_cache.get(addresses)
+    if node_uuid is not None:
+        try:
+            return objects.Node.get_by_uuid(context, node_uuid)
+        except exception.NodeNotFound:
+            lookup_cache.invalidate()
+
+    node = objects.Node.get_by_port_addresses(context, addresses)
+    lookup_cache.add(addresses, node.uuid)
+    return node
+
+
 class LookupController(rest.RestController):
     """Controller handling node lookup for a deploy ramdisk."""
 
@@ -105,8 +127,7 @@ class LookupController(rest.RestController):
                 node = objects.Node.get_by_uuid(
                     pecan.request.context, node_uuid)
             else:
-                node = objects.Node.get_by_port_addresses(
-                    pecan.request.context, addresses)
+                node = _get_node_by_addresses(addresses)
         except exception.NotFound:
             # NOTE(dtantsur): we are reraising the same exception to make sure
             # we don't disclose the difference between nodes that are not found
@@ -123,17 +144,27 @@ class LookupController(rest.RestController):
 class HeartbeatController(rest.RestController):
     """Controller handling heartbeats from deploy ramdisk."""
 
-    @expose.expose(None, types.uuid_or_name, wtypes.text,
+    @expose.expose(None, types.uuid_or_name, wtypes.text, types.jsontype,
                    status_code=http_client.ACCEPTED)
-    def post(self, node_ident, callback_url):
+    def post(self, node_ident, callback_url, commands_status=None):
         """Process a heartbeat from the deploy ramdisk.
 
         :param node_ident: the UUID or logical name of a node.
         :param callback_url: the URL to reach back to the ramdisk.
+        :param commands_status: optional list with the status of the agent
+            commands, as returned by the agent's commands endpoint.
         """
         if not api_utils.allow_ramdisk_endpoints():
             raise exception.NotFound()
 
+        if commands_status is not None:
+            if not api_utils.allow_heartbeat_commands_status():
+                raise exception.NotAcceptable()
+            if not isinstance(commands_status, list):
+                raise exception.InvalidParameterValue(
+                    _('commands_status must be a list, got %s') %
+                    commands_status)
+
         cdict = pecan.request.context.to_dict()
         policy.authorize('baremetal:node:ipa_heartbeat', cdict, cdict)
 
@@ -147,4 +178,5 @@ class HeartbeatController(rest.RestController):
 
         pecan.request.rpcapi.heartbeat(pecan.request.context,
                                        rpc_node.uuid, callback_url,
+                                       commands_status=commands_status,
                                        topic=topic)
@@ -391,6 +391,15 @@ def allow_ramdisk_endpoints():
     return pecan.request.version.minor >= versions.MINOR_22_LOOKUP_HEARTBEAT
 
 
+def allow_heartbeat_commands_status():
+    """Check if the heartbeat endpoint accepts the agent commands status.
+
+    Version 1.23 of the API added support for it.
+    """
+    return (pecan.request.version.minor >=
+            versions.MINOR_23_HEARTBEAT_COMMANDS_STATUS)
+
+
 def get_controller_reserved_names(cls):
     """Get reserved names for a given controller.
 
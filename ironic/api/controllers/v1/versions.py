@@ -52,6 +52,7 @@ BASE_VERSION = 1
 # v1.20: Add node.network_interface
 # v1.21: Add node.resource_class
 # v1.22: Ramdisk lookup and heartbeat endpoints.
+# v1.23: Add commands_status to the heartbeat endpoint.
 
 MINOR_0_JUNO = 0
 MINOR_1_INITIAL_VERSION = 1
@@ -76,11 +77,12 @@ MINOR_19_PORT_ADVANCED_NET_FIELDS = 19
 MINOR_20_NETWORK_INTERFACE = 20
 MINOR_21_RESOURCE_CLASS = 21
 MINOR_22_LOOKUP_HEARTBEAT = 22
+MINOR_23_HEARTBEAT_COMMANDS_STATUS = 23
 
 # When adding another version, update MINOR_MAX_VERSION and also update
 # doc/source/dev/webapi-version-history.rst with a detailed explanation of
 # what the version has changed.
-MINOR_MAX_VERSION = MINOR_22_LOOKUP_HEARTBEAT
+MINOR_MAX_VERSION = MINOR_23_HEARTBEAT_COMMANDS_STATUS
 
 # String representations of the minor and maximum versions
 MIN_VERSION_STRING = '{}.{}'.format(BASE_VERSION, MINOR_1_INITIAL_VERSION)
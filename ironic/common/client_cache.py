@@ -0,0 +1,270 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Cache of the management clients of the vendor drivers.
+
+Building a client of a BMC or of a management controller usually costs a
+TLS handshake and a login. Drivers opting in keep their clients in this
+process-wide cache for [DEFAULT]management_client_cache_ttl seconds, keyed
+by the kind of client and the connection parameters parsed from the node's
+driver_info, so that a change of the driver_info gives a new client.
+
+Two kinds of clients are handled:
+
+* shared clients, which are stateless or thread-safe and are used by any
+  number of callers at once (see :func:`get_client`);
+* sessions, which are used by a single caller at a time and are returned to
+  the cache once the caller is done with them (see :func:`session`).
+
+Drivers drop their shared clients with :func:`invalidate_client` when an
+operation fails with them. The idle sessions are logged out once expired,
+even if their management controller is not used anymore.
+"""
+
+import collections
+import contextlib
+import threading
+import time
+
+import eventlet
+from oslo_log import log as logging
+from oslo_utils import excutils
+
+from ironic.common import utils
+from ironic.conf import CONF
+
+LOG = logging.getLogger(__name__)
+
+CachedClient = collections.namedtuple('CachedClient',
+                                      ['client', 'expires_at'])
+
+# Shared clients in format {(<kind>, <params>): CachedClient}.
+_SHARED_CLIENTS = {}
+
+IdleSession = collections.namedtuple('IdleSession',
+                                     ['client', 'expires_at', 'close'])
+
+# Idle sessions in format {(<kind>, <params>): [IdleSession, ...]}.
+_IDLE_SESSIONS = {}
+
+# Timer of the next purge of the expired idle sessions, if any.
+_PURGE_TIMER = None
+
+_LOCK = threading.Lock()
+
+# Expired shared clients are purged when the cache grows beyond this size.
+_PURGE_THRESHOLD = 1000
+
+
+def _close(kind, client, close):
+    if close is None:
+        return
+    try:
+        close(client)
+    except Exception as e:
+        LOG.debug('Failed to close a %(kind)s client: %(error)s',
+                  {'kind': kind, 'error': e})
+
+
+def get_client(kind, params, create, check=None, ttl=None):
+    """Return a shared client, creating it if it is not cached.
+
+    :param kind: the kind of client, for example the name of the driver.
+    :param params: a tuple of the parameters used to connect the client,
+        such as the address and the credentials of the BMC.
+    :param create: a callable without arguments creating a new client.
+    :param check: an optional callable taking a cached client and returning
+        whether it can still be used. It should not send any request.
+    :param ttl: the time (in seconds) for which the client is cached,
+        [DEFAULT]management_client_cache_ttl by default.
+    :returns: the client.
+    """
+    if ttl is None:
+        ttl = CONF.management_client_cache_ttl
+    if not ttl:
+        return create()
+
+    key = (kind, tuple(params))
+    with _LOCK:
+        cached = _SHARED_CLIENTS.get(key)
+    if (cached is not None and cached.expires_at > time.time() and
+            (check is None or check(cached.client))):
+        return cached.client
+
+    client = create()
+    now = time.time()
+    with _LOCK:
+        if len(_SHARED_CLIENTS) >= _PURGE_THRESHOLD:
+            _purge_shared_clients(now)
+        _SHARED_CLIENTS[key] = CachedClient(client, now + ttl)
+    return client
+
+
+def _purge_shared_clients(now):
+    """Drop the expired shared clients. To be called with _LOCK held."""
+    for key, cached in list(_SHARED_CLIENTS.items()):
+        if cached.expires_at < now:
+            _SHARED_CLIENTS.pop(key, None)
+
+
+def invalidate_client(kind, params):
+    """Drop a shared client from the cache.
+
+    To be called when the client was found to be broken.
+
+    :param kind: the kind of client.
+    :param params: the tuple of the parameters used to connect the client.
+    """
+    with _LOCK:
+        _SHARED_CLIENTS.pop((kind, tuple(params)), None)
+
+
+def _pop_idle_session(key):
+    """Pop an unexpired idle session, closing the expired ones."""
+    expired = []
+    client = None
+    now = time.time()
+    with _LOCK:
+        idle = _IDLE_SESSIONS.get(key, [])
+        while idle:
+            cached = idle.pop()
+            if cached.expires_at > now:
+                client = cached.client
+                break
+            expired.append(cached)
+        if not idle:
+            _IDLE_SESSIONS.pop(key, None)
+
+    for old in expired:
+        _close(key[0], old.client, old.close)
+    return client
+
+
+def acquire_session(kind, params, create, close=None, check=None):
+    """Take an idle session from the cache, or create a new one.
+
+    The session must be handed back with :func:`release_session`.
+
+    :param kind: the kind of session, for example the name of the driver.
+    :param params: a tuple of the parameters used to log in, such as the
+        address and the credentials of the management controller.
+    :param create: a callable without arguments creating a new session.
+    :param close: an optional callable taking a session and logging it out.
+    :param check: an optional callable taking an idle session and returning
+        whether it can still be used. It should not send any request.
+    :returns: the session.
+    """
+    key = (kind, tuple(params))
+    while True:
+        client = _pop_idle_session(key)
+        if client is None:
+            return create()
+        if check is None or check(client):
+            return client
+        _close(kind, client, close)
+
+
+def release_session(kind, params, client, close=None, discard=False):
+    """Hand a session back to the cache.
+
+    The session is logged out instead if caching is disabled or if it is
+    discarded.
+
+    :param kind: the kind of session.
+    :param params: the tuple of the parameters used to log in.
+    :param client: the session.
+    :param close: an optional callable taking a session and logging it out.
+    :param discard: whether the session must not be reused, for example
+        because an operation failed with it.
+    """
+    ttl = CONF.management_client_cache_ttl
+    if discard or not ttl:
+        _close(kind, client, close)
+        return
+
+    cached = IdleSession(client, time.time() + ttl, close)
+    with _LOCK:
+        _IDLE_SESSIONS.setdefault((kind, tuple(params)), []).append(cached)
+    _schedule_purge(ttl)
+
+
+def _schedule_purge(delay):
+    """Purge the expired idle sessions in delay seconds, unless pending."""
+    global _PURGE_TIMER
+    with _LOCK:
+        if _PURGE_TIMER is not None:
+            return
+        _PURGE_TIMER = eventlet.spawn_after(delay, _purge)
+
+
+def _purge():
+    """Log out the expired idle sessions and drop the expired clients.
+
+    Runs once the first idle session expires, and again for as long as
+    sessions are idle, so that the sessions of the management controllers
+    which are not used anymore do not stay logged in.
+    """
+    global _PURGE_TIMER
+    expired = []
+    now = time.time()
+    with _LOCK:
+        _PURGE_TIMER = None
+        for key, idle in list(_IDLE_SESSIONS.items()):
+            expired.extend((key[0], cached) for cached in idle
+                           if cached.expires_at <= now)
+            idle[:] = [cached for cached in idle if cached.expires_at > now]
+            if not idle:
+                del _IDLE_SESSIONS[key]
+        _purge_shared_clients(now)
+        expiries = [cached.expires_at for idle in _IDLE_SESSIONS.values()
+                    for cached in idle]
+
+    for kind, cached in expired:
+        _close(kind, cached.client, cached.close)
+    if expiries:
+        _schedule_purge(max(min(expiries) - now, 0))
+
+
+@contextlib.contextmanager
+def session(kind, params, create, close=None, check=None):
+    """Context manager borrowing a session from the cache.
+
+    The session is handed back to the cache on exit, or logged out if an
+    exception was raised, as it may be broken.
+
+    :param kind: the kind of session, for example the name of the driver.
+    :param params: a tuple of the parameters used to log in.
+    :param create: a callable without arguments creating a new session.
+    :param close: an optional callable taking a session and logging it out.
+    :param check: an optional callable taking an idle session and returning
+        whether it can still be used.
+    :yields: the session.
+    """
+    client = acquire_session(kind, params, create, close=close, check=check)
+    try:
+        yield client
+    except Exception:
+        with excutils.save_and_reraise_exception():
+            release_session(kind, params, client, close=close, discard=True)
+    release_session(kind, params, client, close=close)
+
+
+@utils.register_reset
+def clear():
+    """Drop all the cached clients, logging out no session."""
+    global _PURGE_TIMER
+    with _LOCK:
+        _SHARED_CLIENTS.clear()
+        _IDLE_SESSIONS.clear()
+        if _PURGE_TIMER is not None:
+            _PURGE_TIMER.cancel()
+            _PURGE_TIMER = None
@@ -54,6 +54,9 @@ class RequestContext(context.RequestContext):
         # we should pass roles in __init__ above instead of setting the
         # value here once the minimum version of oslo.context is updated.
         self.roles = roles or []
+        # NOTE: metadata of the images looked up while processing this
+        # request, see ironic.common.image_service.get_cached_metadata().
+        self.image_metadata_cache = {}
 
     def to_dict(self):
         return {'auth_token': self.auth_token,
@@ -94,4 +97,7 @@ def get_admin_context():
                              tenant=None,
                              is_admin=True,
                              overwrite=False)
+    # The conductor uses its admin context for the whole life of the
+    # process, so it does not get a request-scoped image metadata cache.
+    context.image_metadata_cache = None
     return context
@@ -30,6 +30,7 @@ import six.moves.urllib.parse as urlparse
 from ironic.common import exception
 from ironic.common.glance_service import service_utils
 from ironic.common.i18n import _LE
+from ironic.common import image_service
 
 
 LOG = log.getLogger(__name__)
@@ -178,19 +179,38 @@ class BaseImageService(object):
 
         :raises: ImageNotFound
         """
-        LOG.debug("Getting image metadata from glance. Image: %s"
-                  % image_href)
         (image_id, self.glance_host,
          self.glance_port, use_ssl) = service_utils.parse_image_ref(image_href)
 
+        cache_key = self._metadata_cache_key(image_id)
+        base_image_meta, _element = image_service.get_cached_metadata(
+            cache_key, self.context)
+        if base_image_meta is not None:
+            return base_image_meta
+
+        LOG.debug("Getting image metadata from glance. Image: %s"
+                  % image_href)
         image = self.call(method, image_id)
 
         if not service_utils.is_image_available(self.context, image):
             raise exception.ImageNotFound(image_id=image_id)
 
         base_image_meta = service_utils.translate_from_glance(image)
+        image_service.cache_metadata(cache_key, base_image_meta, self.context)
         return base_image_meta
 
+    def _metadata_cache_key(self, image_id):
+        # Metadata is only shared by the contexts which
+        # service_utils.is_image_available() treats alike: with a token,
+        # Glance checks the visibility for the project, without one it
+        # depends on the admin flag and on the user.
+        context = self.context
+        has_token = bool(getattr(context, 'auth_token', None))
+        user = None if has_token else getattr(context, 'user_id', None)
+        return ('glance', self.version, getattr(context, 'tenant', None),
+                has_token, bool(getattr(context, 'is_admin', False)), user,
+                image_id)
+
     @check_image_service
     def _download(self, image_id, data=None, method='data'):
         """Calls out to Glance for data and writes data.
@@ -266,6 +286,8 @@ class BaseImageService(object):
         image_meta.pop('id', None)
 
         image_meta = self.call(method, image_id, **image_meta)
+        image_service.invalidate_metadata(
+            self._metadata_cache_key(image_id), self.context)
 
         if self.version == 2 and data:
             self.call('upload', image_id, data)
@@ -288,3 +310,5 @@ class BaseImageService(object):
          glance_port, use_ssl) = service_utils.parse_image_ref(image_id)
 
         self.call(method, image_id)
+        image_service.invalidate_metadata(
+            self._metadata_cache_key(image_id), self.context)
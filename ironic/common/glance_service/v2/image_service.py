@@ -14,10 +14,14 @@
 #    under the License.
 
 import collections
+import heapq
+import os
+import tempfile
 import time
 
+from ironic_lib import metrics_utils
+from oslo_log import log
 from oslo_utils import uuidutils
-import six
 from six.moves.urllib import parse as urlparse
 from swiftclient import utils as swift_utils
 
@@ -26,24 +30,204 @@ from ironic.common.glance_service import base_image_service
 from ironic.common.glance_service import service
 from ironic.common.glance_service import service_utils
 from ironic.common.i18n import _
+from ironic.common.i18n import _LW
 from ironic.conf import CONF
 
+LOG = log.getLogger(__name__)
+
+METRICS = metrics_utils.get_metrics_logger(__name__)
+
 TempUrlCacheElement = collections.namedtuple('TempUrlCacheElement',
                                              ['url', 'url_expires_at'])
 
 
+class TempUrlCache(object):
+    """Bounded LRU cache of Swift temporary URLs.
+
+    Once [glance]swift_temp_url_cache_max_size URLs are cached, the least
+    recently used ones are evicted. Expiration times are kept in a heap, so
+    that removing the expired URLs does not require scanning the whole
+    cache. If [glance]swift_temp_url_cache_dir is set, URLs are also stored
+    in that directory, one file per image, to share them with the other
+    ironic processes running on the host.
+    """
+
+    def __init__(self):
+        self._items = collections.OrderedDict()
+        # Heap of (url_expires_at, image_id) tuples. Elements replaced or
+        # evicted from the cache are left in it and skipped when popped.
+        self._expiry_heap = []
+        self._next_store_prune = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, image_id):
+        return image_id in self._items
+
+    def __getitem__(self, image_id):
+        return self._items[image_id]
+
+    def __setitem__(self, image_id, element):
+        self._items.pop(image_id, None)
+        self._items[image_id] = element
+        heapq.heappush(self._expiry_heap, (element.url_expires_at, image_id))
+        self._evict()
+
+    def _evict(self):
+        """Evict the least recently used URLs above the maximum size."""
+        while len(self._items) > CONF.glance.swift_temp_url_cache_max_size:
+            self._items.popitem(last=False)
+        if len(self._expiry_heap) > 2 * len(self._items) + 16:
+            self._expiry_heap = [(v.url_expires_at, k)
+                                 for k, v in self._items.items()]
+            heapq.heapify(self._expiry_heap)
+
+    def __len__(self):
+        return len(self._items)
+
+    def update(self, items):
+        for image_id, element in items.items():
+            self[image_id] = element
+
+    def clear(self):
+        self._items.clear()
+        self._expiry_heap = []
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self):
+        """Ratio of lookups answered from the cache, None if no lookup."""
+        lookups = self.hits + self.misses
+        return float(self.hits) / lookups if lookups else None
+
+    def get(self, image_id, max_valid_time):
+        """Get the cached temporary URL of an image.
+
+        :param image_id: UUID of a Glance image.
+        :param max_valid_time: URLs expiring before this time are ignored.
+        :returns: a TempUrlCacheElement, or None if no valid URL is cached.
+        """
+        element = self._items.pop(image_id, None)
+        loaded = element is None
+        if loaded:
+            element = self._load(image_id)
+        if element is not None and element.url_expires_at < max_valid_time:
+            element = None
+
+        if element is None:
+            self.misses += 1
+            METRICS.send_counter('GlanceImageService.temp_url_cache.miss', 1)
+        else:
+            if loaded:
+                # NOTE: a URL loaded from the store directory is new to
+                # this cache, which may need to evict another one.
+                self[image_id] = element
+            else:
+                # NOTE: re-inserting marks the element as the most recently
+                # used.
+                self._items[image_id] = element
+            self.hits += 1
+            METRICS.send_counter('GlanceImageService.temp_url_cache.hit', 1)
+        return element
+
+    def set(self, image_id, element):
+        """Cache the temporary URL of an image.
+
+        :param image_id: UUID of a Glance image.
+        :param element: a TempUrlCacheElement.
+        """
+        self[image_id] = element
+        self._store(image_id, element)
+
+    def remove_expired(self, max_valid_time):
+        """Remove the URLs expiring before max_valid_time."""
+        while (self._expiry_heap and
+               self._expiry_heap[0][0] < max_valid_time):
+            expires_at, image_id = heapq.heappop(self._expiry_heap)
+            element = self._items.get(image_id)
+            if element is not None and element.url_expires_at == expires_at:
+                del self._items[image_id]
+
+    def _load(self, image_id):
+        cache_dir = CONF.glance.swift_temp_url_cache_dir
+        if not cache_dir:
+            return
+        try:
+            with open(os.path.join(cache_dir, image_id)) as f:
+                expires_at, url = f.read().split(' ', 1)
+            return TempUrlCacheElement(url=url,
+                                       url_expires_at=int(expires_at))
+        except (IOError, OSError, ValueError):
+            return
+
+    def _store(self, image_id, element):
+        cache_dir = CONF.glance.swift_temp_url_cache_dir
+        if not cache_dir:
+            return
+        try:
+            with tempfile.NamedTemporaryFile(mode='w', dir=cache_dir,
+                                             prefix='.', delete=False) as f:
+                f.write('%d %s' % (element.url_expires_at, element.url))
+            # NOTE: rename is atomic, other processes never read a
+            # partially written file.
+            os.rename(f.name, os.path.join(cache_dir, image_id))
+        except (IOError, OSError) as e:
+            LOG.warning(_LW('Failed to store the Swift temporary URL of '
+                            'image %(image)s in %(dir)s: %(error)s'),
+                        {'image': image_id, 'dir': cache_dir, 'error': e})
+            return
+
+        now = time.time()
+        if now >= self._next_store_prune:
+            # NOTE: URLs cannot expire faster than they are generated, no
+            # need to prune the directory more often than that.
+            self._next_store_prune = (now +
+                                      CONF.glance.swift_temp_url_duration)
+            self._prune_store(cache_dir, now)
+
+    def _prune_store(self, cache_dir, now):
+        files = []
+        for name in os.listdir(cache_dir):
+            path = os.path.join(cache_dir, name)
+            try:
+                mtime = os.path.getmtime(path)
+                if name.startswith('.'):
+                    # Leftover of an interrupted write
+                    if mtime < now - 60:
+                        os.unlink(path)
+                    continue
+                with open(path) as f:
+                    expires_at = int(f.read().split(' ', 1)[0])
+                if expires_at <= now:
+                    os.unlink(path)
+                else:
+                    files.append((mtime, path))
+            except (IOError, OSError, ValueError):
+                continue
+
+        excess = len(files) - CONF.glance.swift_temp_url_cache_max_size
+        if excess > 0:
+            files.sort()
+            for _mtime, path in files[:excess]:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+
 class GlanceImageService(base_image_service.BaseImageService,
                          service.ImageService):
 
-    # A dictionary containing cached temp URLs in namedtuples
-    # in format:
+    # A process-wide cache of the generated temp URLs, mapping image IDs
+    # to TempUrlCacheElement namedtuples:
     # {
     #     <image_id> : (
     #          url=<temp_url>,
     #          url_expires_at=<expiration_time>
     #     )
     # }
-    _cache = {}
+    _cache = TempUrlCache()
 
     def detail(self, **kwargs):
         return self._detail(method='list', **kwargs)
@@ -87,8 +271,9 @@ class GlanceImageService(base_image_service.BaseImageService,
 
         if CONF.glance.swift_temp_url_cache_enabled:
             self._remove_expired_items_from_cache()
-            if image_id in self._cache:
-                return self._cache[image_id].url
+            cached = self._cache.get(image_id, self._get_max_valid_time())
+            if cached is not None:
+                return cached.url
 
         path = swift_utils.generate_temp_url(
             path=path, seconds=seconds, key=key, method=method)
@@ -99,9 +284,9 @@ class GlanceImageService(base_image_service.BaseImageService,
         if CONF.glance.swift_temp_url_cache_enabled:
             query = urlparse.urlparse(temp_url).query
             exp_time_str = dict(urlparse.parse_qsl(query))['temp_url_expires']
-            self._cache[image_id] = TempUrlCacheElement(
+            self._cache.set(image_id, TempUrlCacheElement(
                 url=temp_url, url_expires_at=int(exp_time_str)
-            )
+            ))
 
         return temp_url
 
@@ -256,11 +441,8 @@ class GlanceImageService(base_image_service.BaseImageService,
         This function removes entries that will expire before the expected
         usage time.
         """
-        max_valid_time = (
-            int(time.time()) +
-            CONF.glance.swift_temp_url_expected_download_start_delay)
-        keys_to_remove = [
-            k for k, v in six.iteritems(self._cache)
-            if (v.url_expires_at < max_valid_time)]
-        for k in keys_to_remove:
-            del self._cache[k]
+        self._cache.remove_expired(self._get_max_valid_time())
+
+    def _get_max_valid_time(self):
+        return (int(time.time()) +
+                CONF.glance.swift_temp_url_expected_download_start_delay)
@@ -16,9 +16,12 @@
 
 
 import abc
+import collections
+import copy
 import datetime
 import os
 import shutil
+import time
 
 from oslo_utils import importutils
 import requests
@@ -37,6 +40,28 @@ IMAGE_CHUNK_SIZE = 1024 * 1024  # 1mb
 
 _GLANCE_SESSION = None
 
+MetadataCacheElement = collections.namedtuple(
+    'MetadataCacheElement', ['metadata', 'expires_at', 'validators'])
+
+# A process-wide dictionary containing the cached image metadata in format:
+# {
+#     <cache key> : (
+#          metadata=<dict of image properties>,
+#          expires_at=<expiration time>,
+#          validators=<dict of HTTP cache validators>
+#     )
+# }
+_METADATA_CACHE = {}
+
+# Number of cached elements above which expired ones are purged.
+_METADATA_CACHE_PURGE_THRESHOLD = 1024
+
+
+@utils.register_reset
+def _reset():
+    """Drop the cached image metadata."""
+    _METADATA_CACHE.clear()
+
 
 def _get_glance_session():
     global _GLANCE_SESSION
@@ -45,6 +70,83 @@ def _get_glance_session():
     return _GLANCE_SESSION
 
 
+def _get_request_metadata_cache(context):
+    """Get the image metadata cache scoped to the request being processed."""
+    return getattr(context, 'image_metadata_cache', None)
+
+
+def _purge_expired_metadata():
+    now = time.time()
+    for key, element in list(_METADATA_CACHE.items()):
+        if element.expires_at <= now:
+            _METADATA_CACHE.pop(key, None)
+
+
+def get_cached_metadata(key, context=None):
+    """Look image metadata up in the request and process-wide caches.
+
+    :param key: cache key of the image, built from its href.
+    :param context: request context, if any.
+    :returns: a tuple (metadata, element). metadata is a copy of the cached
+        image properties, or None if they are not cached or have expired.
+        element is the process-wide cache element, possibly expired, which
+        can be used to revalidate the metadata; None if there is none.
+    """
+    request_cache = _get_request_metadata_cache(context)
+    if request_cache is not None and key in request_cache:
+        return copy.deepcopy(request_cache[key]), None
+
+    element = _METADATA_CACHE.get(key)
+    if element is None:
+        return None, None
+    if element.expires_at <= time.time():
+        return None, element
+
+    if request_cache is not None:
+        request_cache[key] = element.metadata
+    return copy.deepcopy(element.metadata), element
+
+
+def cache_metadata(key, metadata, context=None, validators=None):
+    """Store image metadata in the request and process-wide caches.
+
+    The metadata is kept in the process-wide cache for
+    [DEFAULT]image_metadata_cache_ttl seconds, it is not kept at all
+    if this option is set to 0.
+
+    :param key: cache key of the image, built from its href.
+    :param metadata: dictionary of image properties.
+    :param context: request context, if any.
+    :param validators: (Optional) dictionary of HTTP cache validators of
+        the image, with 'etag' and 'last_modified' keys.
+    """
+    metadata = copy.deepcopy(metadata)
+    request_cache = _get_request_metadata_cache(context)
+    if request_cache is not None:
+        request_cache[key] = metadata
+
+    ttl = CONF.image_metadata_cache_ttl
+    if ttl <= 0:
+        return
+    if len(_METADATA_CACHE) >= _METADATA_CACHE_PURGE_THRESHOLD:
+        _purge_expired_metadata()
+    _METADATA_CACHE[key] = MetadataCacheElement(
+        metadata=metadata, expires_at=time.time() + ttl,
+        validators=validators or {})
+
+
+def invalidate_metadata(key, context=None):
+    """Drop image metadata from the request and process-wide caches.
+
+    :param key: cache key of the image, built from its href.
+    :param context: request context, if any.
+    """
+    request_cache = _get_request_metadata_cache(context)
+    if request_cache is not None:
+        request_cache.pop(key, None)
+    _METADATA_CACHE.pop(key, None)
+
+
 def import_versioned_module(version, submodule=None):
     module = 'ironic.common.glance_service.v%s' % version
     if submodule:
@@ -100,17 +202,28 @@ class BaseImageService(object):
 class HttpImageService(BaseImageService):
     """Provides retrieval of disk images using HTTP."""
 
-    def validate_href(self, image_href):
+    def __init__(self, context=None):
+        self.context = context
+
+    def validate_href(self, image_href, headers=None):
         """Validate HTTP image reference.
 
         :param image_href: Image reference.
+        :param headers: (Optional) dictionary of conditional request headers
+            (If-None-Match, If-Modified-Since) to send with the request.
         :raises: exception.ImageRefValidationFailed if HEAD request failed or
-            returned response code not equal to 200.
+            returned response code not equal to 200 (or 304 if conditional
+            headers were sent).
         :returns: Response to HEAD request.
         """
+        expected_codes = (http_client.OK,)
+        kwargs = {}
+        if headers:
+            expected_codes += (http_client.NOT_MODIFIED,)
+            kwargs['headers'] = headers
         try:
-            response = requests.head(image_href)
-            if response.status_code != http_client.OK:
+            response = requests.head(image_href, **kwargs)
+            if response.status_code not in expected_codes:
                 raise exception.ImageRefValidationFailed(
                     image_href=image_href,
                     reason=_("Got HTTP code %s instead of 200 in response to "
@@ -156,7 +269,35 @@ class HttpImageService(BaseImageService):
             'updated_at' and 'properties'. 'updated_at' attribute is a naive
             UTC datetime object.
         """
-        response = self.validate_href(image_href)
+        key = ('http', image_href)
+        metadata, element = get_cached_metadata(key, self.context)
+        if metadata is not None:
+            return metadata
+
+        # NOTE: revalidate the expired metadata with a conditional request,
+        # a 304 response means it is still accurate.
+        headers = {}
+        validators = element.validators if element else {}
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+
+        response = self.validate_href(image_href, headers=headers)
+        if response.status_code == http_client.NOT_MODIFIED:
+            metadata = element.metadata
+        else:
+            metadata = self._parse_show_response(image_href, response)
+            validators = {}
+        validators = {
+            'etag': response.headers.get('ETag', validators.get('etag')),
+            'last_modified': response.headers.get(
+                'Last-Modified', validators.get('last_modified')),
+        }
+        cache_metadata(key, metadata, self.context, validators=validators)
+        return copy.deepcopy(metadata)
+
+    def _parse_show_response(self, image_href, response):
         image_size = response.headers.get('Content-Length')
         if image_size is None:
             raise exception.ImageRefValidationFailed(
@@ -289,4 +430,6 @@ def get_image_service(image_href, client=None, version=1, context=None):
 
     if cls == GlanceImageService:
         return cls(client, version, context)
+    if cls == HttpImageService:
+        return cls(context=context)
     return cls()
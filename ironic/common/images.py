@@ -19,15 +19,23 @@
 Handling of VM disk images.
 """
 
+import functools
+import hashlib
 import os
 import shutil
+import tempfile
+import time
 
 from ironic_lib import disk_utils
 from ironic_lib import utils as ironic_utils
 import jinja2
+from oslo_concurrency import lockutils
 from oslo_concurrency import processutils
 from oslo_log import log as logging
+from oslo_serialization import jsonutils
+from oslo_utils import excutils
 from oslo_utils import fileutils
+from oslo_utils import uuidutils
 
 from ironic.common import exception
 from ironic.common.glance_service import service_utils as glance_utils
@@ -38,6 +46,24 @@ from ironic.conf import CONF
 
 LOG = logging.getLogger(__name__)
 
+# Block size used to align writes going to a block device.
+_DEVICE_BLOCK_SIZE = 4096
+
+# Image headers of the formats that can not be written sequentially to a
+# block device as is. Compressed images are not streamed either: the size
+# of the data written to the device must be known before streaming them.
+_NON_STREAMABLE_MAGIC = {
+    b'QFI\xfb': 'qcow2',
+    b'KDMV': 'vmdk',
+    b'\x1f\x8b': 'gzip',
+}
+_MAGIC_LENGTH = 4
+
+# Report streaming progress every 10 percent (or every GiB when the total
+# size of the image is unknown).
+_PROGRESS_PERCENT_STEP = 10
+_PROGRESS_BYTES_STEP = 1024 * 1024 * 1024
+
 
 def _create_root_fs(root_directory, files_info):
     """Creates a filesystem root in given directory.
@@ -73,6 +99,130 @@ def _umount_without_raise(mount_dir):
         pass
 
 
+def _get_cache_key(image_type, inputs):
+    """Get the name of a generated image in the boot image cache.
+
+    :param image_type: type of the generated image, e.g. 'iso'.
+    :param inputs: a JSON serializable object describing everything the
+        content of the image depends on.
+    :returns: the name of the cached image.
+    """
+    data = jsonutils.dumps(inputs, sort_keys=True)
+    return '%s-%s' % (image_type,
+                      hashlib.sha256(data.encode('utf-8')).hexdigest())
+
+
+def link_or_copy(source, dest):
+    """Hard-link a file to a destination, copying it if that fails.
+
+    An existing destination file is replaced.
+
+    :param source: the path of the file to link.
+    :param dest: the path of the destination file.
+    :raises: IOError or OSError if copying the file failed.
+    """
+    tmp_dest = '%s.%s' % (dest, uuidutils.generate_uuid())
+    try:
+        os.link(source, tmp_dest)
+    except OSError as e:
+        # NOTE: the destination is probably on another file system (e.g.
+        # a NFS or CIFS share), hard links can not be used.
+        LOG.debug('Unable to hard-link %(source)s to %(dest)s, copying it '
+                  'instead: %(error)s',
+                  {'source': source, 'dest': dest, 'error': e})
+        shutil.copyfile(source, dest)
+        return
+    try:
+        os.rename(tmp_dest, dest)
+    except Exception:
+        with excutils.save_and_reraise_exception():
+            ironic_utils.unlink_without_raise(tmp_dest)
+
+
+def _cache_lock(cache_dir, name):
+    """Lock a cached boot image, across the conductors sharing the cache.
+
+    :param cache_dir: the boot image cache directory.
+    :param name: the name of the cached image.
+    :returns: a context manager holding the lock.
+    """
+    return lockutils.lock('boot-image:%s' % name, 'ironic-', external=True,
+                          lock_path=os.path.join(cache_dir, '.locks'))
+
+
+def _create_cached_image(output_file, image_type, inputs, create):
+    """Create an image, re-using it from the boot image cache if possible.
+
+    If [DEFAULT]boot_image_cache_dir is set, images are generated once for
+    given inputs in this directory and hard-linked to the output files.
+    The number of links of a cached image is the number of nodes using it,
+    it is deleted [DEFAULT]boot_image_cache_ttl seconds after the last node
+    stopped using it. Only images which do not depend on node specific
+    data should be cached.
+
+    :param output_file: the path of the image to create.
+    :param image_type: type of the generated image, e.g. 'iso'.
+    :param inputs: a JSON serializable object describing everything the
+        content of the image depends on.
+    :param create: a function creating the image at the path passed as its
+        only argument.
+    """
+    cache_dir = CONF.boot_image_cache_dir
+    if not cache_dir:
+        create(output_file)
+        return
+
+    fileutils.ensure_tree(cache_dir)
+    name = _get_cache_key(image_type, inputs)
+    cached_path = os.path.join(cache_dir, name)
+    with _cache_lock(cache_dir, name):
+        if os.path.exists(cached_path):
+            LOG.debug('Boot image cache hit for %(type)s image %(name)s',
+                      {'type': image_type, 'name': name})
+            # NOTE: the modification time is the time of last use
+            os.utime(cached_path, None)
+        else:
+            # NOTE: the name of the temporary file is unique, in case the
+            # cache directory is shared by several conductors.
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix='.tmp')
+            os.close(fd)
+            try:
+                create(tmp_path)
+                os.rename(tmp_path, cached_path)
+            finally:
+                ironic_utils.unlink_without_raise(tmp_path)
+        link_or_copy(cached_path, output_file)
+
+    clean_up_boot_image_cache()
+
+
+def clean_up_boot_image_cache():
+    """Delete the cached boot images that are not used anymore.
+
+    Cached images only linked from the cache directory and not used for
+    [DEFAULT]boot_image_cache_ttl seconds are deleted.
+    """
+    cache_dir = CONF.boot_image_cache_dir
+    if not cache_dir or not os.path.isdir(cache_dir):
+        return
+
+    threshold = time.time() - CONF.boot_image_cache_ttl
+    for name in os.listdir(cache_dir):
+        if name.startswith('.'):
+            # The locks and the images being generated
+            continue
+        path = os.path.join(cache_dir, name)
+        with _cache_lock(cache_dir, name):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if stat.st_nlink == 1 and stat.st_mtime < threshold:
+                LOG.debug('Removing unused boot image %s from the cache',
+                          name)
+                ironic_utils.unlink_without_raise(path)
+
+
 def create_vfat_image(output_file, files_info=None, parameters=None,
                       parameters_file='parameters.txt', fs_size_kib=100):
     """Creates the fat fs image on the desired file.
@@ -348,6 +498,139 @@ def image_to_raw(image_href, path, path_tmp):
             os.rename(path_tmp, path)
 
 
+class _BlockDeviceWriter(object):
+    """File-like object streaming image data onto a block device.
+
+    Data is accumulated into buffers aligned on the device block size, each
+    of them being written to the device by ``dd`` with direct I/O.
+    """
+
+    def __init__(self, image_href, device, block_size, total_size=None):
+        self.image_href = image_href
+        self.device = device
+        self.total_size = total_size
+        self.bytes_written = 0
+        self._block_size = max(block_size - block_size % _DEVICE_BLOCK_SIZE,
+                               _DEVICE_BLOCK_SIZE)
+        self._buffer = bytearray()
+        self._header = b''
+        self._next_progress = 0
+        self._done = False
+
+    def _check_format(self, header):
+        for magic, fmt in _NON_STREAMABLE_MAGIC.items():
+            if header.startswith(magic):
+                raise exception.ImageUnacceptable(
+                    image_id=self.image_href,
+                    reason=_("images in %s format can not be streamed to "
+                             "the disk, only raw images are supported") % fmt)
+
+    def _check_size(self):
+        size = self.bytes_written + len(self._buffer)
+        if self.total_size and size > self.total_size:
+            raise exception.ImageUnacceptable(
+                image_id=self.image_href,
+                reason=_("the image is larger than its size in the image "
+                         "service, %d bytes") % self.total_size)
+
+    def _report_progress(self):
+        if self.bytes_written < self._next_progress:
+            return
+        if self.total_size:
+            percent = min(100, self.bytes_written * 100 // self.total_size)
+            LOG.debug("Streamed %(written)d bytes (%(percent)d%%) of image "
+                      "%(image)s to %(dev)s.",
+                      {'written': self.bytes_written, 'percent': percent,
+                       'image': self.image_href, 'dev': self.device})
+            step = self.total_size * _PROGRESS_PERCENT_STEP // 100
+        else:
+            LOG.debug("Streamed %(written)d bytes of image %(image)s to "
+                      "%(dev)s.", {'written': self.bytes_written,
+                                   'image': self.image_href,
+                                   'dev': self.device})
+            step = _PROGRESS_BYTES_STEP
+        self._next_progress = self.bytes_written + max(step, 1)
+
+    def _flush(self, final=False):
+        length = len(self._buffer)
+        if not final:
+            length -= length % self._block_size
+        if not length:
+            return
+        chunk = bytes(self._buffer[:length])
+        del self._buffer[:length]
+        # NOTE: only the last write may not be a multiple of the block
+        # size, so the offset of the others is a whole number of blocks.
+        utils.execute('dd', 'of=%s' % self.device,
+                      'bs=%d' % self._block_size,
+                      'seek=%d' % (self.bytes_written // self._block_size),
+                      'oflag=direct', 'iflag=fullblock', 'conv=notrunc',
+                      process_input=chunk, run_as_root=True)
+        self.bytes_written += length
+        self._report_progress()
+
+    def write(self, data):
+        if self._header is not None:
+            self._header += data
+            if len(self._header) < _MAGIC_LENGTH:
+                return
+            data, self._header = self._header, None
+            self._check_format(data)
+
+        self._buffer.extend(data)
+        self._check_size()
+        if len(self._buffer) >= self._block_size:
+            self._flush()
+
+    def close(self):
+        """Write the remaining data to the device.
+
+        :raises: ProcessExecutionError if ``dd`` failed.
+        """
+        if self._done:
+            return
+        self._done = True
+        if self._header:
+            self._buffer.extend(self._header)
+        self._header = None
+        self._flush(final=True)
+
+
+def stream_to_device(context, image_href, device, block_size,
+                     image_service=None):
+    """Download an image directly onto a block device.
+
+    Unlike :func:`fetch`, the image is never staged on the local disk. Only
+    uncompressed raw images can be streamed, the size of the image in the
+    image service being the size of the data written to the device.
+
+    :param context: context
+    :param image_href: href of the image to write.
+    :param device: path to the block device to write the image to.
+    :param block_size: size in bytes of the writes issued to the device.
+    :param image_service: image service to download the image from, it is
+        looked up from the href if not specified.
+    :raises: ImageUnacceptable if the image is not in a streamable format,
+        or is larger than its size in the image service.
+    :raises: ImageDownloadFailed if the image can not be downloaded.
+    :raises: ProcessExecutionError if writing to the device failed.
+    :returns: the number of bytes written to the device.
+    """
+    if image_service is None:
+        image_service = service.get_image_service(image_href,
+                                                  context=context)
+    total_size = download_size(context, image_href, image_service)
+
+    LOG.debug("Streaming image %(image)s to %(dev)s using %(service)s.",
+              {'image': image_href, 'dev': device,
+               'service': image_service.__class__})
+    writer = _BlockDeviceWriter(image_href, device, block_size,
+                                total_size=total_size)
+    image_service.download(image_href, writer)
+    writer.close()
+    return writer.bytes_written
+
+
 def image_show(context, image_href, image_service=None):
     if image_service is None:
         image_service = service.get_image_service(image_href, context=context)
@@ -428,6 +711,39 @@ def create_boot_iso(context, output_filename, kernel_href,
     :boot_mode: the boot mode in which the deploy is to happen.
     :raises: ImageCreationFailed, if creating boot ISO failed.
     """
+    create = functools.partial(_create_boot_iso, context,
+                               kernel_href=kernel_href,
+                               ramdisk_href=ramdisk_href,
+                               deploy_iso_href=deploy_iso_href,
+                               root_uuid=root_uuid,
+                               kernel_params=kernel_params,
+                               boot_mode=boot_mode)
+    if not CONF.boot_image_cache_dir:
+        create(output_filename)
+        return
+
+    hrefs = [kernel_href, ramdisk_href]
+    if boot_mode == 'uefi':
+        hrefs.append(deploy_iso_href)
+    inputs = {'images': [], 'root_uuid': root_uuid,
+              'kernel_params': kernel_params, 'boot_mode': boot_mode}
+    for href in hrefs:
+        # NOTE: the content behind a href may change, e.g. an image
+        # uploaded again to the same HTTP URL.
+        properties = image_show(context, href)
+        inputs['images'].append((href, str(properties.get('updated_at')),
+                                 properties.get('size'),
+                                 properties.get('checksum')))
+    _create_cached_image(output_filename, 'iso', inputs, create)
+
+
+def _create_boot_iso(context, output_filename, kernel_href,
+                     ramdisk_href, deploy_iso_href, root_uuid=None,
+                     kernel_params=None, boot_mode=None):
+    """Creates a bootable ISO image for a node, bypassing the cache.
+
+    See create_boot_iso() for the parameters.
+    """
     with utils.tempdir() as tmpdir:
         kernel_path = os.path.join(tmpdir, kernel_href.split('/')[-1])
         ramdisk_path = os.path.join(tmpdir, ramdisk_href.split('/')[-1])
@@ -0,0 +1,76 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Cache of the nodes found by the ramdisk lookup.
+
+When many nodes are powered on at once, their ramdisks look themselves up
+by the MAC addresses of their NICs, usually several times in a row. The
+UUID of the node found for a set of MAC addresses is kept for
+[api]lookup_cache_ttl seconds, so that the following lookups only have to
+load the node by its UUID. The node itself is not cached, as its provision
+state matters for the lookup.
+"""
+
+import collections
+import time
+
+from ironic.common import utils
+from ironic.conf import CONF
+
+CachedNode = collections.namedtuple('CachedNode',
+                                    ['node_uuid', 'expires_at'])
+
+# Nodes found by lookup in format {<sorted MAC addresses>: CachedNode}.
+_CACHE = {}
+
+# Expired entries are purged when the cache grows beyond this size.
+_PURGE_THRESHOLD = 1000
+
+
+def _key(addresses):
+    return tuple(sorted(set(address.lower() for address in addresses)))
+
+
+def get(addresses):
+    """Return the UUID of the node cached for the MAC addresses.
+
+    :param addresses: a list of MAC addresses.
+    :returns: the node UUID, or None if it is not cached or has expired.
+    """
+    cached = _CACHE.get(_key(addresses))
+    if cached is None or cached.expires_at < time.time():
+        return None
+    return cached.node_uuid
+
+
+def add(addresses, node_uuid):
+    """Cache the UUID of the node found for the MAC addresses.
+
+    :param addresses: a list of MAC addresses.
+    :param node_uuid: the UUID of the node.
+    """
+    ttl = CONF.api.lookup_cache_ttl
+    if not ttl:
+        return
+
+    now = time.time()
+    if len(_CACHE) >= _PURGE_THRESHOLD:
+        for key, cached in list(_CACHE.items()):
+            if cached.expires_at < now:
+                _CACHE.pop(key, None)
+    _CACHE[_key(addresses)] = CachedNode(node_uuid, now + ttl)
+
+
+@utils.register_reset
+def invalidate():
+    """Drop all the cached nodes, e.g. because ports were changed."""
+    _CACHE.clear()
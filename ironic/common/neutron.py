@@ -10,10 +10,12 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import eventlet
 from neutronclient.common import exceptions as neutron_exceptions
 from neutronclient.v2_0 import client as clientv20
 from oslo_log import log
 
+from ironic.common import client_cache
 from ironic.common import exception
 from ironic.common.i18n import _, _LE, _LI, _LW
 from ironic.common import keystone
@@ -34,6 +36,21 @@ def _get_neutron_session():
 
 
 def get_client(token=None):
+    """Return a Neutron client, reused for [neutron]client_cache_ttl seconds.
+
+    Clients are cached per auth token, so that the calls made on behalf of
+    the same request, e.g. one for each VIF of a node, share a client and
+    its endpoint instead of building and discovering them every time.
+
+    :param token: optional auth token.
+    :returns: a Neutron client.
+    """
+    return client_cache.get_client('neutron', (token,),
+                                   lambda: _create_client(token),
+                                   ttl=CONF.neutron.client_cache_ttl)
+
+
+def _create_client(token):
     params = {'retries': CONF.neutron.retries}
     url = CONF.neutron.url
     if CONF.neutron.auth_strategy == 'noauth':
@@ -68,6 +85,73 @@ def get_client(token=None):
     return clientv20.Client(**params)
 
 
+def _call_concurrently(func, args_list):
+    """Call a neutron client method once for each set of arguments.
+
+    The calls are made concurrently by up to [neutron]port_request_workers
+    green threads.
+
+    :param func: a neutron client method.
+    :param args_list: a list of tuples of positional arguments.
+    :returns: a list of (result, exception) tuples in the order of
+        args_list, where exception is the NeutronClientException raised
+        by the call, or None if it succeeded.
+    """
+    def _call(args):
+        try:
+            return func(*args), None
+        except neutron_exceptions.NeutronClientException as e:
+            return None, e
+
+    if not args_list:
+        return []
+    pool = eventlet.GreenPool(
+        min(len(args_list), CONF.neutron.port_request_workers))
+    return list(pool.imap(_call, args_list))
+
+
+def _create_ports(client, port_bodies):
+    """Create neutron ports, with a single bulk request if possible.
+
+    Neutron creates the ports of a bulk request all or none, so if it
+    fails they are created one by one to find out which ones can be
+    created.
+
+    :param client: a neutron client.
+    :param port_bodies: a list of the dicts of the ports to create.
+    :returns: a list of (neutron port, exception) tuples in the order of
+        port_bodies, as returned by :func:`_call_concurrently`.
+    """
+    if len(port_bodies) > 1:
+        try:
+            created = client.create_port({'ports': port_bodies})['ports']
+        except neutron_exceptions.NeutronClientException as e:
+            LOG.debug('Bulk creation of %(count)d neutron ports failed, '
+                      'creating them one by one. %(exc)s',
+                      {'count': len(port_bodies), 'exc': e})
+        else:
+            return [(port, None) for port in created]
+
+    results = _call_concurrently(client.create_port,
+                                 [({'port': body},) for body in port_bodies])
+    return [(port and port['port'], exc) for port, exc in results]
+
+
+def update_ports(client, updates):
+    """Update neutron ports concurrently.
+
+    Neutron has no bulk update of ports, so the updates are sent
+    concurrently instead.
+
+    :param client: a neutron client.
+    :param updates: a list of (neutron port id, body) tuples.
+    :returns: a list of (response, exception) tuples in the order of
+        updates, where exception is the NeutronClientException raised by
+        the update, or None if it succeeded.
+    """
+    return _call_concurrently(client.update_port, updates)
+
+
 def add_ports_to_network(task, network_uuid, is_flat=False):
     """Create neutron ports to boot the ramdisk.
 
@@ -88,13 +172,11 @@ def add_ports_to_network(task, network_uuid, is_flat=False):
               '%(network_uuid)s using %(net_iface)s network interface.',
               {'net_iface': task.driver.network.__class__.__name__,
                'node': node.uuid, 'network_uuid': network_uuid})
-    body = {
-        'port': {
-            'network_id': network_uuid,
-            'admin_state_up': True,
-            'binding:vnic_type': 'baremetal',
-            'device_owner': 'baremetal:none',
-        }
+    base_body = {
+        'network_id': network_uuid,
+        'admin_state_up': True,
+        'binding:vnic_type': 'baremetal',
+        'device_owner': 'baremetal:none',
     }
 
     if not is_flat:
@@ -102,39 +184,41 @@ def add_ports_to_network(task, network_uuid, is_flat=False):
         # I437290affd8eb87177d0626bf7935a165859cbdd to neutron broke the
         # possibility to always bind port. Set binding:host_id only in
         # case of non flat network.
-        body['port']['binding:host_id'] = node.uuid
+        base_body['binding:host_id'] = node.uuid
 
     # Since instance_uuid will not be available during cleaning
     # operations, we need to check that and populate them only when
     # available
-    body['port']['device_id'] = node.instance_uuid or node.uuid
+    base_body['device_id'] = node.instance_uuid or node.uuid
 
     ports = {}
     failures = []
     portmap = get_node_portmap(task)
     pxe_enabled_ports = [p for p in task.ports if p.pxe_enabled]
+    port_bodies = []
     for ironic_port in pxe_enabled_ports:
-        body['port']['mac_address'] = ironic_port.address
+        body = dict(base_body)
+        body['mac_address'] = ironic_port.address
         binding_profile = {'local_link_information':
                            [portmap[ironic_port.uuid]]}
-        body['port']['binding:profile'] = binding_profile
+        body['binding:profile'] = binding_profile
         client_id = ironic_port.extra.get('client-id')
         if client_id:
             client_id_opt = {'opt_name': 'client-id', 'opt_value': client_id}
-            extra_dhcp_opts = body['port'].get('extra_dhcp_opts', [])
-            extra_dhcp_opts.append(client_id_opt)
-            body['port']['extra_dhcp_opts'] = extra_dhcp_opts
-        try:
-            port = client.create_port(body)
-        except neutron_exceptions.NeutronClientException as e:
+            body['extra_dhcp_opts'] = [client_id_opt]
+        port_bodies.append(body)
+
+    results = _create_ports(client, port_bodies)
+    for ironic_port, (port, e) in zip(pxe_enabled_ports, results):
+        if e is not None:
             failures.append(ironic_port.uuid)
             LOG.warning(_LW("Could not create neutron port for node's "
-                            "%(node)s port %(ir-port) on the neutron "
+                            "%(node)s port %(ir-port)s on the neutron "
                             "network %(net)s. %(exc)s"),
                         {'net': network_uuid, 'node': node.uuid,
                          'ir-port': ironic_port.uuid, 'exc': e})
         else:
-            ports[ironic_port.uuid] = port['port']['id']
+            ports[ironic_port.uuid] = port['id']
 
     if failures:
         if len(failures) == len(pxe_enabled_ports):
@@ -198,19 +282,24 @@ def remove_neutron_ports(task, params):
         LOG.debug('No ports to remove for node %s', node_uuid)
         return
 
-    for port in ports:
-        LOG.debug('Deleting neutron port %(vif_port_id)s of node '
-                  '%(node_id)s.',
-                  {'vif_port_id': port['id'], 'node_id': node_uuid})
-
-        try:
-            client.delete_port(port['id'])
-        except neutron_exceptions.NeutronClientException as e:
+    LOG.debug('Deleting neutron ports %(vif_port_ids)s of node '
+              '%(node_id)s.',
+              {'vif_port_ids': [port['id'] for port in ports],
+               'node_id': node_uuid})
+
+    # Neutron has no bulk deletion of ports, delete them concurrently
+    results = _call_concurrently(client.delete_port,
+                                 [(port['id'],) for port in ports])
+    errors = []
+    for port, (_result, e) in zip(ports, results):
+        if e is not None:
             msg = (_('Could not remove VIF %(vif)s of node %(node)s, possibly '
                      'a network issue: %(exc)s') %
                    {'vif': port['id'], 'node': node_uuid, 'exc': e})
-            LOG.exception(msg)
-            raise exception.NetworkError(msg)
+            LOG.error(msg)
+            errors.append(msg)
+    if errors:
+        raise exception.NetworkError(errors[0])
 
     LOG.info(_LI('Successfully removed node %(node_uuid)s neutron ports.'),
              {'node_uuid': node_uuid})
@@ -305,9 +305,10 @@ def dhcp_options_for_instance(task):
         dhcp_provider_name = dhcp_factory.CONF.dhcp.dhcp_provider
         # if the request comes from dumb firmware send them the iPXE
         # boot image.
-        if dhcp_provider_name == 'neutron':
+        if dhcp_provider_name in ('neutron', 'dnsmasq'):
             # Neutron use dnsmasq as default DHCP agent, add extra config
-            # to neutron "dhcp-match=set:ipxe,175" and use below option
+            # to neutron (or to the local dnsmasq)
+            # "dhcp-match=set:ipxe,175" and use below option
             dhcp_opts.append({'opt_name': 'tag:!ipxe,bootfile-name',
                               'opt_value': boot_file})
             dhcp_opts.append({'opt_name': 'tag:ipxe,bootfile-name',
@@ -42,6 +42,10 @@ from ironic.conf import CONF
 
 LOG = logging.getLogger(__name__)
 
+# Functions resetting the process-wide state of the modules, see
+# register_reset().
+_RESET_FUNCTIONS = []
+
 
 def _get_root_helper():
     # NOTE(jlvillal): This function has been moved to ironic-lib. And is
@@ -675,3 +679,23 @@ def validate_network_port(port, port_name="Port"):
             'numbers must be between 1 and 65535.') %
             {'port_name': port_name, 'port': port})
     return port
+
+
+def register_reset(func):
+    """Register a function resetting the process-wide state of a module.
+
+    Modules keeping caches or connections in module-level variables
+    register a function dropping them, so that they can be reset without
+    knowing about every module, e.g. between unit tests.
+
+    :param func: a function taking no argument.
+    :returns: func, so that it can be used as a decorator.
+    """
+    _RESET_FUNCTIONS.append(func)
+    return func
+
+
+def reset_state():
+    """Reset the process-wide state of the modules, see register_reset()."""
+    for func in list(_RESET_FUNCTIONS):
+        func()
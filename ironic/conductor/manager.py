@@ -44,14 +44,17 @@ a change, etc.
 import collections
 import datetime
 import tempfile
+import time
 
 import eventlet
 from futurist import periodics
+from futurist import waiters
 from ironic_lib import metrics_utils
 from oslo_log import log
 import oslo_messaging as messaging
 from oslo_utils import excutils
 from oslo_utils import uuidutils
+from six.moves import queue
 
 from ironic.common import dhcp_factory
 from ironic.common import driver_factory
@@ -81,13 +84,19 @@ class ConductorManager(base_manager.BaseConductorManager):
     """Ironic Conductor manager main class."""
 
     # NOTE(rloo): This must be in sync with rpcapi.ConductorAPI's.
-    RPC_API_VERSION = '1.34'
+    RPC_API_VERSION = '1.35'
 
     target = messaging.Target(version=RPC_API_VERSION)
 
     def __init__(self, host, topic):
         super(ConductorManager, self).__init__(host, topic)
         self.power_state_sync_count = collections.defaultdict(int)
+        # Sensors data last sent for each node, used to send the changes only
+        self._last_sensors_data = {}
+        # Nodes with a heartbeat being processed, mapped to the callback URL
+        # of the heartbeat merged into it (None if there is none yet)
+        self._heartbeats = {}
+        self.heartbeat_counters = collections.defaultdict(int)
 
     @METRICS.timer('ConductorManager.update_node')
     @messaging.expected_exceptions(exception.InvalidParameterValue,
@@ -1862,6 +1871,120 @@ class ConductorManager(base_manager.BaseConductorManager):
         driver = driver_factory.get_driver(driver_name)
         return driver.get_properties()
 
+    def _get_sensors_data_message(self, context, node_uuid, driver,
+                                  instance_uuid):
+        """Collects the sensors data of a node.
+
+        :param context: request context.
+        :param node_uuid: UUID of the node.
+        :param driver: name of the driver of the node.
+        :param instance_uuid: UUID of the instance deployed on the node.
+        :returns: the message to send to Ceilometer, or None if there is
+            no sensor data to send for this node.
+        """
+        # populate the message which will be sent to ceilometer
+        message = {'message_id': uuidutils.generate_uuid(),
+                   'instance_uuid': instance_uuid,
+                   'node_uuid': node_uuid,
+                   'timestamp': datetime.datetime.utcnow(),
+                   'event_type': 'hardware.ipmi.metrics.update'}
+
+        try:
+            lock_purpose = 'getting sensors data'
+            with task_manager.acquire(context,
+                                      node_uuid,
+                                      shared=True,
+                                      purpose=lock_purpose) as task:
+                if not getattr(task.driver, 'management', None):
+                    return
+                task.driver.management.validate(task)
+                sensors_data = task.driver.management.get_sensors_data(
+                    task)
+        except NotImplementedError:
+            LOG.warning(_LW(
+                'get_sensors_data is not implemented for driver'
+                ' %(driver)s, node_uuid is %(node)s'),
+                {'node': node_uuid, 'driver': driver})
+        except exception.FailedToParseSensorData as fps:
+            LOG.warning(_LW(
+                "During get_sensors_data, could not parse "
+                "sensor data for node %(node)s. Error: %(err)s."),
+                {'node': node_uuid, 'err': str(fps)})
+        except exception.FailedToGetSensorData as fgs:
+            LOG.warning(_LW(
+                "During get_sensors_data, could not get "
+                "sensor data for node %(node)s. Error: %(err)s."),
+                {'node': node_uuid, 'err': str(fgs)})
+        except exception.NodeNotFound:
+            LOG.warning(_LW(
+                "During send_sensor_data, node %(node)s was not "
+                "found and presumed deleted by another process."),
+                {'node': node_uuid})
+        except Exception as e:
+            LOG.warning(_LW(
+                "Failed to get sensor data for node %(node)s. "
+                "Error: %(error)s"), {'node': node_uuid, 'error': str(e)})
+        else:
+            payload = self._filter_out_unsupported_types(sensors_data)
+            if CONF.conductor.send_sensor_data_changes_only:
+                payload = self._filter_out_unchanged_sensors(node_uuid,
+                                                             payload)
+            if payload:
+                message['payload'] = payload
+                return message
+
+    def _send_sensors_data_messages(self, context, messages):
+        """Sends messages holding sensors data to Ceilometer.
+
+        A single message is sent as is. Several messages are sent in a
+        single notification, with the 'hardware.ipmi.metrics.batch_update'
+        event type and the list of the messages as payload.
+
+        :param context: request context.
+        :param messages: a list of messages built by
+            _get_sensors_data_message.
+        """
+        if len(messages) == 1:
+            message = messages[0]
+        else:
+            message = {'message_id': uuidutils.generate_uuid(),
+                       'timestamp': datetime.datetime.utcnow(),
+                       'event_type': 'hardware.ipmi.metrics.batch_update',
+                       'payload': messages}
+        self.sensors_notifier.info(context, "hardware.ipmi.metrics", message)
+
+    def _sensors_nodes_task(self, context, nodes):
+        """Sends sensors data for the nodes taken from a queue.
+
+        The messages are sent by batches of
+        CONF.conductor.send_sensor_data_batch_size nodes.
+
+        :param context: request context.
+        :param nodes: a queue of (node UUID, driver, instance UUID) tuples,
+            shared by all the workers of the current pass.
+        """
+        batch = []
+        while True:
+            try:
+                node_uuid, driver, instance_uuid = nodes.get_nowait()
+            except queue.Empty:
+                break
+
+            try:
+                message = self._get_sensors_data_message(
+                    context, node_uuid, driver, instance_uuid)
+                if message is not None:
+                    batch.append(message)
+                if len(batch) >= CONF.conductor.send_sensor_data_batch_size:
+                    self._send_sensors_data_messages(context, batch)
+                    batch = []
+            finally:
+                # Yield on every iteration
+                eventlet.sleep(0)
+
+        if batch:
+            self._send_sensors_data_messages(context, batch)
+
     @METRICS.timer('ConductorManager._send_sensor_data')
     @periodics.periodic(spacing=CONF.conductor.send_sensor_data_interval)
     def _send_sensor_data(self, context):
@@ -1871,61 +1994,77 @@ class ConductorManager(base_manager.BaseConductorManager):
             return
 
         filters = {'associated': True}
-        node_iter = self.iter_nodes(fields=['instance_uuid'],
-                                    filters=filters)
-
-        for (node_uuid, driver, instance_uuid) in node_iter:
-            # populate the message which will be sent to ceilometer
-            message = {'message_id': uuidutils.generate_uuid(),
-                       'instance_uuid': instance_uuid,
-                       'node_uuid': node_uuid,
-                       'timestamp': datetime.datetime.utcnow(),
-                       'event_type': 'hardware.ipmi.metrics.update'}
+        nodes = queue.Queue()
+        node_uuids = set()
+        for node_info in self.iter_nodes(fields=['instance_uuid'],
+                                         filters=filters):
+            nodes.put_nowait(node_info)
+            node_uuids.add(node_info[0])
+
+        if CONF.conductor.send_sensor_data_changes_only:
+            # Forget the sensors data of the nodes which are gone
+            for node_uuid in list(self._last_sensors_data):
+                if node_uuid not in node_uuids:
+                    del self._last_sensors_data[node_uuid]
+        else:
+            self._last_sensors_data.clear()
 
+        number_of_workers = min(CONF.conductor.send_sensor_data_workers,
+                                CONF.conductor.periodic_max_workers,
+                                nodes.qsize())
+        futures = []
+        for worker_number in range(number_of_workers):
             try:
-                lock_purpose = 'getting sensors data'
-                with task_manager.acquire(context,
-                                          node_uuid,
-                                          shared=True,
-                                          purpose=lock_purpose) as task:
-                    if not getattr(task.driver, 'management', None):
-                        continue
-                    task.driver.management.validate(task)
-                    sensors_data = task.driver.management.get_sensors_data(
-                        task)
-            except NotImplementedError:
-                LOG.warning(_LW(
-                    'get_sensors_data is not implemented for driver'
-                    ' %(driver)s, node_uuid is %(node)s'),
-                    {'node': node_uuid, 'driver': driver})
-            except exception.FailedToParseSensorData as fps:
-                LOG.warning(_LW(
-                    "During get_sensors_data, could not parse "
-                    "sensor data for node %(node)s. Error: %(err)s."),
-                    {'node': node_uuid, 'err': str(fps)})
-            except exception.FailedToGetSensorData as fgs:
-                LOG.warning(_LW(
-                    "During get_sensors_data, could not get "
-                    "sensor data for node %(node)s. Error: %(err)s."),
-                    {'node': node_uuid, 'err': str(fgs)})
-            except exception.NodeNotFound:
-                LOG.warning(_LW(
-                    "During send_sensor_data, node %(node)s was not "
-                    "found and presumed deleted by another process."),
-                    {'node': node_uuid})
-            except Exception as e:
-                LOG.warning(_LW(
-                    "Failed to get sensor data for node %(node)s. "
-                    "Error: %(error)s"), {'node': node_uuid, 'error': str(e)})
-            else:
-                message['payload'] = (
-                    self._filter_out_unsupported_types(sensors_data))
-                if message['payload']:
-                    self.sensors_notifier.info(
-                        context, "hardware.ipmi.metrics", message)
-            finally:
-                # Yield on every iteration
-                eventlet.sleep(0)
+                futures.append(self._spawn_worker(self._sensors_nodes_task,
+                                                  context, nodes))
+            except exception.NoFreeConductorWorker:
+                LOG.warning(_LW('There are no more conductor workers for '
+                                'the sensor data collection. %(workers)d '
+                                'workers have been already spawned.'),
+                            {'workers': worker_number})
+                break
+
+        if not futures:
+            # Collect the sensors data from this thread instead
+            self._sensors_nodes_task(context, nodes)
+            return
+
+        done, not_done = waiters.wait_for_all(
+            futures, timeout=CONF.conductor.send_sensor_data_wait_timeout)
+        if not_done:
+            LOG.warning(_LW('%(not_done)d of %(total)d workers collecting '
+                            'the sensor data have not finished after '
+                            '%(timeout)d seconds.'),
+                        {'not_done': len(not_done), 'total': len(futures),
+                         'timeout':
+                             CONF.conductor.send_sensor_data_wait_timeout})
+
+    def _filter_out_unchanged_sensors(self, node_uuid, sensors_data):
+        """Filters out the sensors whose reading has not changed.
+
+        Removes the sensors whose data is the same as in the previous
+        message sent for the node, and remembers the new data of the node.
+
+        :param node_uuid: UUID of the node.
+        :param sensors_data: dict containing sensor types and the associated
+               data
+        :returns: dict with unchanged sensors removed
+        """
+        last_sensors_data = self._last_sensors_data.get(node_uuid, {})
+        self._last_sensors_data[node_uuid] = sensors_data
+
+        changed = {}
+        for sensor_type, sensors in sensors_data.items():
+            last_sensors = last_sensors_data.get(sensor_type)
+            if sensors == last_sensors:
+                continue
+            if isinstance(sensors, dict) and isinstance(last_sensors, dict):
+                sensors = dict((name, value) for (name, value)
+                               in sensors.items()
+                               if last_sensors.get(name) != value)
+            if sensors:
+                changed[sensor_type] = sensors
+        return changed
 
     def _filter_out_unsupported_types(self, sensors_data):
         """Filters out sensor data types that aren't specified in the config.
@@ -2188,23 +2327,83 @@ class ConductorManager(base_manager.BaseConductorManager):
 
     @METRICS.timer('ConductorManager.heartbeat')
     @messaging.expected_exceptions(exception.NoFreeConductorWorker)
-    def heartbeat(self, context, node_id, callback_url):
+    def heartbeat(self, context, node_id, callback_url, commands_status=None):
         """Process a heartbeat from the ramdisk.
 
+        At most one heartbeat is processed at a time for a given node.
+        Heartbeats arriving in the meantime are merged: only the latest
+        one is processed once the current one is done.
+
         :param context: request context.
         :param node_id: node id or uuid.
         :param callback_url: URL to reach back to the ramdisk.
+        :param commands_status: optional list with the status of the agent
+            commands, passed to the deploy interface if provided.
         :raises: NoFreeConductorWorker if there are no conductors to process
             this heartbeat request.
         """
         LOG.debug('RPC heartbeat called for node %s', node_id)
+        # The time the commands status was reported at, a merged heartbeat
+        # being processed later.
+        received_at = time.time()
+
+        if node_id in self._heartbeats:
+            # A heartbeat is already being processed for this node, the
+            # latest one will be processed as soon as it is done.
+            if self._heartbeats[node_id] is None:
+                counter = 'merged'
+            else:
+                counter = 'dropped'
+            self._heartbeats[node_id] = (callback_url, commands_status,
+                                         received_at)
+            self.heartbeat_counters[counter] += 1
+            METRICS.send_counter('ConductorManager.heartbeat.%s' % counter, 1)
+            LOG.debug('Heartbeat for node %(node)s %(counter)s, a previous '
+                      'one is still being processed.',
+                      {'node': node_id, 'counter': counter})
+            return
 
-        # NOTE(dtantsur): we acquire a shared lock to begin with, drivers are
-        # free to promote it to an exclusive one.
-        with task_manager.acquire(context, node_id, shared=True,
-                                  purpose='heartbeat') as task:
-            task.spawn_after(self._spawn_worker, task.driver.deploy.heartbeat,
-                             task, callback_url)
+        self._heartbeats[node_id] = None
+        try:
+            # NOTE(dtantsur): we acquire a shared lock to begin with, drivers
+            # are free to promote it to an exclusive one.
+            with task_manager.acquire(context, node_id, shared=True,
+                                      purpose='heartbeat') as task:
+                task.spawn_after(self._spawn_worker, self._process_heartbeats,
+                                 node_id, task, callback_url, commands_status,
+                                 received_at)
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                self._heartbeats.pop(node_id, None)
+
+    def _process_heartbeats(self, node_id, task, callback_url,
+                            commands_status=None, received_at=None):
+        """Process a heartbeat and then the heartbeats merged into it.
+
+        :param node_id: node id or uuid, as passed to heartbeat().
+        :param task: a TaskManager instance with a shared lock.
+        :param callback_url: URL to reach back to the ramdisk.
+        :param commands_status: optional list with the status of the agent
+            commands.
+        :param received_at: the time the heartbeat was received at.
+        """
+        context = task.context
+        try:
+            _do_heartbeat(task, callback_url, commands_status, received_at)
+            pending = self._heartbeats[node_id]
+            while pending is not None:
+                callback_url, commands_status, received_at = pending
+                # Release the lock of the previous heartbeat, the driver may
+                # have upgraded it to an exclusive one.
+                task.release_resources()
+                self._heartbeats[node_id] = None
+                with task_manager.acquire(context, node_id, shared=True,
+                                          purpose='heartbeat') as task:
+                    _do_heartbeat(task, callback_url, commands_status,
+                                  received_at)
+                pending = self._heartbeats[node_id]
+        finally:
+            self._heartbeats.pop(node_id, None)
 
     def _object_dispatch(self, target, method, context, args, kwargs):
         """Dispatch a call to an object method.
@@ -2611,3 +2810,19 @@ def _do_inspect_hardware(task):
                    "state %(state)s") % {'state': new_state})
         handle_failure(error)
         raise exception.HardwareInspectionFailure(error=error)
+
+
+def _do_heartbeat(task, callback_url, commands_status=None,
+                  received_at=None):
+    """Pass a heartbeat to the deploy interface of the node.
+
+    The commands status, and the time the heartbeat was received at, are
+    only passed when the ramdisk reported it, so that deploy interfaces not
+    accepting it keep working with older ramdisks.
+    """
+    if commands_status is None:
+        task.driver.deploy.heartbeat(task, callback_url)
+    else:
+        task.driver.deploy.heartbeat(task, callback_url,
+                                     commands_status=commands_status,
+                                     received_at=received_at)
@@ -81,11 +81,12 @@ class ConductorAPI(object):
     |    1.32 - Add do_node_clean
     |    1.33 - Added update and destroy portgroup.
     |    1.34 - Added heartbeat
+    |    1.35 - Added commands_status to heartbeat
 
     """
 
     # NOTE(rloo): This must be in sync with manager.ConductorManager's.
-    RPC_API_VERSION = '1.34'
+    RPC_API_VERSION = '1.35'
 
     def __init__(self, topic=None):
         super(ConductorAPI, self).__init__()
@@ -647,17 +648,26 @@ class ConductorAPI(object):
         return cctxt.call(context, 'do_node_clean',
                           node_id=node_id, clean_steps=clean_steps)
 
-    def heartbeat(self, context, node_id, callback_url, topic=None):
+    def heartbeat(self, context, node_id, callback_url, commands_status=None,
+                  topic=None):
         """Process a node heartbeat.
 
         :param context: request context.
         :param node_id: node ID or UUID.
         :param callback_url: URL to reach back to the ramdisk.
+        :param commands_status: optional list with the status of the agent
+            commands. It is not sent to conductors that do not support it.
         :param topic: RPC topic. Defaults to self.topic.
         """
-        cctxt = self.client.prepare(topic=topic or self.topic, version='1.34')
+        new_kws = {}
+        version = '1.34'
+        if (commands_status is not None and
+                self.client.can_send_version('1.35')):
+            version = '1.35'
+            new_kws['commands_status'] = commands_status
+        cctxt = self.client.prepare(topic=topic or self.topic, version=version)
         return cctxt.call(context, 'heartbeat', node_id=node_id,
-                          callback_url=callback_url)
+                          callback_url=callback_url, **new_kws)
 
     def object_class_action_versions(self, context, objname, objmethod,
                                      object_versions, args, kwargs):
@@ -44,6 +44,20 @@ opts = [
                        'to the disk. Unless the disk where the image will be '
                        'copied to is really slow, this option should be set '
                        'to True. Defaults to True.')),
+    cfg.StrOpt('image_download_source',
+               choices=['swift', 'http'],
+               default='swift',
+               help=_('Specifies whether the agent ramdisk downloads the '
+                      'instance image from its source or from the conductor. '
+                      'If set to "swift", Glance images are downloaded from '
+                      'Swift temporary URLs and other images from their '
+                      'HTTP(S) URL. If set to "http", the conductor caches '
+                      'the image in its master image cache (see '
+                      '[pxe]instance_master_path) and the agent downloads '
+                      'it from the HTTP server of the conductor, configured '
+                      'with [deploy]http_url and [deploy]http_root, so that '
+                      'the image source is only accessed once per '
+                      'conductor.')),
     cfg.IntOpt('post_deploy_get_power_state_retries',
                default=6,
                help=_('Number of times to retry getting power state to check '
@@ -84,6 +98,52 @@ opts = [
                       'forever or until manually deleted. Used when the '
                       'deploy_logs_storage_backend is configured to '
                       '"swift".')),
+    cfg.IntOpt('commands_status_max_age',
+               default=10,
+               min=0,
+               help=_('Maximum age (in seconds) of the status of the agent '
+                      'commands reported with a heartbeat for it to be used '
+                      'instead of fetching the status from the agent. Set '
+                      'to 0 to always fetch the status from the agent.')),
+    cfg.IntOpt('connect_timeout',
+               default=10,
+               min=1,
+               help=_('Timeout (in seconds) for establishing a connection to '
+                      'the ramdisk agent.')),
+    cfg.IntOpt('read_timeout',
+               default=300,
+               min=1,
+               help=_('Timeout (in seconds) for waiting for the response of '
+                      'the ramdisk agent, once the connection is '
+                      'established.')),
+    cfg.IntOpt('max_command_attempts',
+               default=3,
+               min=1,
+               help=_('Maximum number of attempts to send a request to the '
+                      'ramdisk agent when the connection to it fails.')),
+    cfg.IntOpt('command_retry_interval',
+               default=2,
+               min=0,
+               help=_('Interval (in seconds) between the attempts to send a '
+                      'request to the ramdisk agent. A random delay of up '
+                      'to the same amount is added to it, so that requests '
+                      'to many agents are spread over time.')),
+    cfg.IntOpt('connection_pool_size',
+               default=4,
+               min=1,
+               help=_('Maximum number of connections kept open to each '
+                      'ramdisk agent by a conductor.')),
+    cfg.IntOpt('max_connection_pools',
+               default=100,
+               min=1,
+               help=_('Maximum number of ramdisk agents a conductor keeps '
+                      'connections open to.')),
+    cfg.IntOpt('batch_command_workers',
+               default=16,
+               min=1,
+               help=_('Maximum number of ramdisk agents a request is sent to '
+                      'concurrently when the same request is sent to several '
+                      'agents.')),
 ]
 
 
@@ -57,6 +57,13 @@ opts = [
                default=300,
                deprecated_group='agent', deprecated_name='heartbeat_timeout',
                help=_('Maximum interval (in seconds) for agent heartbeats.')),
+    cfg.IntOpt('lookup_cache_ttl',
+               default=10,
+               min=0,
+               help=_('Time (in seconds) to cache the node found by the '
+                      'ramdisk lookup API for a set of MAC addresses. The '
+                      'cache is cleared when ports are changed through the '
+                      'same API service. Set to 0 to disable the cache.')),
 ]
 
 opt_group = cfg.OptGroup(name='api',
@@ -85,6 +85,33 @@ opts = [
                 help=_('List of comma separated meter types which need to be'
                        ' sent to Ceilometer. The default value, "ALL", is a '
                        'special value meaning send all the sensor data.')),
+    cfg.IntOpt('send_sensor_data_workers',
+               default=4,
+               min=1,
+               help=_('The maximum number of workers that can be started '
+                      'simultaneously for the sensor data collection, each '
+                      'of them collecting the data of one node at a '
+                      'time.')),
+    cfg.IntOpt('send_sensor_data_wait_timeout',
+               default=300,
+               min=1,
+               help=_('The time in seconds to wait for the workers to '
+                      'collect the sensor data of all the nodes. It should '
+                      'be lower than send_sensor_data_interval.')),
+    cfg.IntOpt('send_sensor_data_batch_size',
+               default=1,
+               min=1,
+               help=_('The number of nodes whose sensor data is sent in a '
+                      'single notification. With a value greater than 1, '
+                      'the notifications have the '
+                      '"hardware.ipmi.metrics.batch_update" event type and '
+                      'a list of "hardware.ipmi.metrics.update" messages as '
+                      'payload, which the consumers must support.')),
+    cfg.BoolOpt('send_sensor_data_changes_only',
+                default=False,
+                help=_('Only send the sensors whose data has changed since '
+                       'the previous message sent for the node. Nodes '
+                       'without any such sensor are not notified at all.')),
     cfg.IntOpt('sync_local_state_interval',
                default=180,
                help=_('When conductors join or leave the cluster, existing '
@@ -39,6 +39,23 @@ opts = [
                default=10,
                help=_('Time (in seconds) to wait for the console subprocess '
                       'to start.')),
+    cfg.PortOpt('proxy_port',
+                help=_('TCP port on which the conductor serves the socat '
+                       'consoles of all the nodes, instead of running a '
+                       'socat process listening on the '
+                       'ipmi_terminal_port of each node. The console of '
+                       'a node is only opened when a client connects to '
+                       'it. Used only by the socat console of the '
+                       'ipmitool drivers. Not set by default, which runs '
+                       'a socat process per node.')),
+    cfg.IntOpt('proxy_token_ttl',
+               default=600,
+               min=1,
+               help=_('Time (in seconds) during which the token returned '
+                      'with the console information of a node gives access '
+                      'to its console on proxy_port. A new token is issued '
+                      'when the console information is requested after '
+                      'that.')),
 ]
 
 
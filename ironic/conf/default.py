@@ -77,7 +77,28 @@ driver_opts = [
                       'do not have network_interface field set. A complete '
                       'list of network interfaces present on your system may '
                       'be found by enumerating the '
-                      '"ironic.hardware.interfaces.network" entrypoint.'))
+                      '"ironic.hardware.interfaces.network" entrypoint.')),
+    cfg.IntOpt('management_client_cache_ttl',
+               default=300,
+               min=0,
+               help=_('Time (in seconds) for which the clients and the '
+                      'logged in sessions of the BMCs and management '
+                      'controllers are reused by the vendor drivers '
+                      'supporting it, saving a connection and a login for '
+                      'every operation. The cached clients are replaced '
+                      'when the driver_info of the node changes. Setting '
+                      'this to 0 disables the cache.')),
+    cfg.IntOpt('driver_info_cache_ttl',
+               default=60,
+               min=0,
+               help=_('Time (in seconds) for which the driver_info of a '
+                      'node, once parsed and validated by a driver, is '
+                      'reused by the following operations on the node, as '
+                      'long as the driver_info does not change. Checks '
+                      'depending on the conductor, like the existence of '
+                      'the files referenced by the driver_info, are done '
+                      'again once this time has elapsed. Setting this to '
+                      '0 disables the cache.')),
 ]
 
 exc_log_opts = [
@@ -118,6 +139,20 @@ hash_opts = [
 ]
 
 image_opts = [
+    cfg.StrOpt('boot_image_cache_dir',
+               help=_('Directory in which the boot ISO images generated for '
+                      'virtual media deployments are cached. Images '
+                      'generated from the same inputs (kernel, ramdisk, '
+                      'kernel parameters, etc.) are then shared by the nodes '
+                      'using them, by hard-linking them from this '
+                      'directory, which can be shared by several '
+                      'conductors. If not set, an image is generated for '
+                      'every node.')),
+    cfg.IntOpt('boot_image_cache_ttl',
+               default=60 * 60,
+               min=0,
+               help=_('Time (in seconds) for which a cached boot ISO image '
+                      'is kept after no node uses it anymore.')),
     cfg.BoolOpt('force_raw_images',
                 default=True,
                 help=_('If True, convert backing images to "raw" disk image '
@@ -133,6 +168,15 @@ image_opts = [
                default=os.path.join('$pybasedir',
                                     'common/grub_conf.template'),
                help=_('Template file for grub configuration file.')),
+    cfg.IntOpt('image_metadata_cache_ttl',
+               default=60,
+               min=0,
+               help=_('Time (in seconds) for which the metadata of Glance '
+                      'and HTTP(S) images is cached by each ironic process. '
+                      'Expired metadata of HTTP(S) images is revalidated '
+                      'with conditional requests. Setting this to 0 disables '
+                      'the cache; the metadata is still reused while '
+                      'processing the same request.')),
 ]
 
 img_cache_opts = [
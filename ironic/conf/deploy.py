@@ -26,6 +26,16 @@ opts = [
     cfg.StrOpt('http_root',
                default='/httpboot',
                help=_("ironic-conductor node's HTTP root path.")),
+    cfg.StrOpt('http_image_subdir',
+               default='agent_images',
+               help=_('The name of the directory under [deploy]http_root '
+                      'in which the instance images are published for the '
+                      'agent ramdisk, when [agent]image_download_source is '
+                      'set to "http". Images are hard-linked from the master '
+                      'image cache of the conductor, so this directory '
+                      'should be on the same file system as '
+                      '[pxe]instance_master_path, otherwise images are '
+                      'copied.')),
     cfg.IntOpt('erase_devices_priority',
                help=_('Priority to run in-band erase devices via the Ironic '
                       'Python Agent ramdisk. If unset, will use the priority '
@@ -20,8 +20,9 @@ from ironic.common.i18n import _
 opts = [
     cfg.StrOpt('dhcp_provider',
                default='neutron',
-               help=_('DHCP provider to use. "neutron" uses Neutron, and '
-                      '"none" uses a no-op provider.')),
+               help=_('DHCP provider to use. "neutron" uses Neutron, '
+                      '"dnsmasq" manages the host and option files of a '
+                      'local dnsmasq, and "none" uses a no-op provider.')),
 ]
 
 
@@ -0,0 +1,50 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslo_config import cfg
+
+from ironic.common.i18n import _
+
+opts = [
+    cfg.StrOpt('dhcp_hostsdir',
+               default='$state_path/dnsmasq/hosts',
+               help=_('Directory in which the "dnsmasq" DHCP provider '
+                      'writes a host file for each MAC address. dnsmasq '
+                      'must be started with --dhcp-hostsdir pointing to '
+                      'it.')),
+    cfg.StrOpt('dhcp_optsdir',
+               default='$state_path/dnsmasq/opts',
+               help=_('Directory in which the "dnsmasq" DHCP provider '
+                      'writes the DHCP options of each MAC address. dnsmasq '
+                      'must be started with --dhcp-optsdir pointing to '
+                      'it.')),
+    cfg.StrOpt('dhcp_leasefile',
+               default='/var/lib/misc/dnsmasq.leases',
+               help=_('Lease file of dnsmasq, from which the "dnsmasq" DHCP '
+                      'provider gets the IP addresses of the nodes.')),
+    cfg.StrOpt('pid_file',
+               default='/var/run/dnsmasq.pid',
+               help=_('PID file of dnsmasq, used by the "dnsmasq" DHCP '
+                      'provider to send it SIGHUP when the DHCP options '
+                      'change.')),
+    cfg.IntOpt('reload_delay',
+               default=1,
+               min=0,
+               help=_('Time (in seconds) for which the "dnsmasq" DHCP '
+                      'provider waits before reloading dnsmasq after the '
+                      'DHCP options change. The changes made during this '
+                      'time are applied by a single reload.')),
+]
+
+
+def register_opts(conf):
+    conf.register_opts(opts, group='dnsmasq')
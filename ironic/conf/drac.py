@@ -20,7 +20,13 @@ opts = [
                default=120,
                help=_('Interval (in seconds) between periodic RAID job status '
                       'checks to determine whether the asynchronous RAID '
-                      'configuration was successfully finished or not.'))
+                      'configuration was successfully finished or not.')),
+    cfg.IntOpt('query_raid_config_job_status_workers',
+               default=8,
+               min=1,
+               help=_('Maximum number of nodes whose RAID job status is '
+                      'checked concurrently by the periodic RAID job status '
+                      'check.')),
 ]
 
 
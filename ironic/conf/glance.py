@@ -49,6 +49,20 @@ opts = [
                 help=_('Whether to cache generated Swift temporary URLs. '
                        'Setting it to true is only useful when an image '
                        'caching proxy is used. Defaults to False.')),
+    cfg.IntOpt('swift_temp_url_cache_max_size',
+               default=10000, min=1,
+               help=_('Maximum number of Swift temporary URLs cached by '
+                      'each ironic process when swift_temp_url_cache_enabled '
+                      'is True. The least recently used URLs are evicted '
+                      'first. Defaults to 10000.')),
+    cfg.StrOpt('swift_temp_url_cache_dir',
+               help=_('Directory in which cached Swift temporary URLs are '
+                      'stored, so that they are shared between the ironic '
+                      'processes running on the same host, for example '
+                      'conductor and API workers. A directory on a memory '
+                      'backed file system such as /dev/shm is recommended. '
+                      'Only used if swift_temp_url_cache_enabled is True. '
+                      'If not set, each process keeps its own cache.')),
     cfg.IntOpt('swift_temp_url_expected_download_start_delay',
                default=0, min=0,
                help=_('This is the delay (in seconds) from the time of the '
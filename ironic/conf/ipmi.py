@@ -34,6 +34,36 @@ opts = [
                       'sent to a server. There is a risk with some hardware '
                       'that setting this too low may cause the BMC to crash. '
                       'Recommended setting is 5 seconds.')),
+    cfg.BoolOpt('use_persistent_sessions',
+                default=False,
+                help=_('Whether the ipmitool power and management interfaces '
+                       'send power and raw commands through persistent '
+                       'RMCP+ sessions, kept open to each BMC by the pyghmi '
+                       'library, instead of running a new ipmitool process '
+                       'and establishing a new session for every command. '
+                       'Other commands, IPMI v1.5, bridged BMCs and '
+                       'privilege levels other than ADMINISTRATOR still use '
+                       'ipmitool. Requires the pyghmi library.')),
+    cfg.BoolOpt('sdr_cache_enabled',
+                default=True,
+                help=_('Whether the Sensor Data Record (SDR) repository of '
+                       'each BMC is dumped to a file once and reused when '
+                       'collecting sensor data, instead of being read from '
+                       'the BMC every time. The file is dumped again when '
+                       'the SDR repository of the BMC changes.')),
+    cfg.IntOpt('sdr_cache_check_interval',
+               default=60 * 60,
+               min=0,
+               help=_('Interval (in seconds) between checks of the SDR '
+                      'repository of a BMC for changes, when the SDR '
+                      'repositories are cached. Set to 0 to check it every '
+                      'time sensor data is collected. It is checked again '
+                      'anyway if reading the sensors using the cached SDR '
+                      'fails.')),
+    cfg.StrOpt('sdr_cache_dir',
+               help=_('Directory where the SDR repositories of the BMCs '
+                      'are cached. Defaults to the "ipmi_sdr" subdirectory '
+                      'of [DEFAULT]tempdir.')),
 ]
 
 
@@ -23,6 +23,21 @@ opts = [
                 default=3260,
                 help=_('The port number on which the iSCSI portal listens '
                        'for incoming connections.')),
+    cfg.BoolOpt('stream_raw_images',
+                default=False,
+                help=_('Whether the conductor should stream raw whole disk '
+                       'images from the image service directly onto the '
+                       'exported iSCSI target, instead of caching them on '
+                       'the conductor before writing them. Images in other '
+                       'formats are still cached and converted to raw '
+                       'first. Defaults to False.')),
+    cfg.IntOpt('stream_block_size',
+               default=64,
+               min=1,
+               help=_('Size (in MiB) of the aligned blocks written to the '
+                      'iSCSI target when streaming images. Each block is '
+                      'written by a dd command run as root. Only used if '
+                      '[iscsi]stream_raw_images is True.')),
 ]
 
 
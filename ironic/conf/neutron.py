@@ -32,11 +32,41 @@ opts = [
     cfg.IntOpt('port_setup_delay',
                default=0,
                min=0,
-               help=_('Delay value to wait for Neutron agents to setup '
-                      'sufficient DHCP configuration for port.')),
+               help=_('Maximum time (in seconds) to wait for Neutron '
+                      'agents to setup sufficient DHCP configuration for '
+                      'port. The wait ends as soon as all the ports of the '
+                      'node are reported active by Neutron, unless '
+                      'port_status_poll_interval is 0.')),
+    cfg.IntOpt('port_status_poll_interval',
+               default=2,
+               min=0,
+               help=_('Interval (in seconds) between checks of the status '
+                      'of the Neutron ports while waiting up to '
+                      'port_setup_delay seconds for them to become active. '
+                      'Setting this to 0 always waits port_setup_delay '
+                      'seconds.')),
     cfg.IntOpt('retries',
                default=3,
                help=_('Client retries in the case of a failed request.')),
+    cfg.IntOpt('client_cache_ttl',
+               default=60,
+               min=0,
+               help=_('Time (in seconds) for which a neutron client is '
+                      'reused by the conductor for the same auth token. '
+                      'Setting this to 0 creates a new client for every '
+                      'request.')),
+    cfg.IntOpt('dhcp_update_workers',
+               default=8,
+               min=1,
+               help=_('Maximum number of neutron ports of a node whose '
+                      'DHCP options are updated concurrently.')),
+    cfg.IntOpt('port_request_workers',
+               default=8,
+               min=1,
+               help=_('Maximum number of requests sent concurrently to '
+                      'neutron to create, update or delete the ports of a '
+                      'node, when they cannot be sent as a single bulk '
+                      'request.')),
     cfg.StrOpt('auth_strategy',
                default='keystone',
                choices=['keystone', 'noauth'],
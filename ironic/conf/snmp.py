@@ -29,7 +29,15 @@ opts = [
                default=0,
                min=0,
                help=_('Time (in seconds) to sleep between when rebooting '
-                      '(powering off and on again)'))
+                      '(powering off and on again)')),
+    cfg.IntOpt('power_state_cache_ttl',
+               default=5,
+               min=0,
+               help=_('Time (in seconds) for which the power states of all '
+                      'the outlets of a PDU, read at once, are reused to '
+                      'answer the power state queries of the nodes powered '
+                      'by the PDU. Setting this to 0 reads the power state '
+                      'of every outlet with its own request.')),
 ]
 
 
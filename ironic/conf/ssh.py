@@ -31,6 +31,25 @@ opts = [
                help=_("Number of seconds to wait between attempts to get "
                       "VM name used by the host that corresponds to a "
                       "node's MAC address.")),
+    cfg.IntOpt('running_vms_cache_ttl',
+               default=10,
+               min=0,
+               help=_('Time (in seconds) for which the list of the VMs '
+                      'running on a host is cached, and used to get the '
+                      'power state of all the nodes on this host. This '
+                      'allows a single command per host to be run by the '
+                      'power state synchronization. The list is refreshed '
+                      'before and after changing the power state of a node. '
+                      'Setting this to 0 disables the cache.')),
+    cfg.IntOpt('vm_name_cache_ttl',
+               default=300,
+               min=0,
+               help=_('Time (in seconds) for which the name of the VM '
+                      'which has a given MAC address is cached, to avoid '
+                      'listing all the VMs of the host and their MAC '
+                      'addresses for every operation. A cached name is '
+                      'forgotten if an operation using it fails. Setting '
+                      'this to 0 disables the cache.')),
 ]
 
 
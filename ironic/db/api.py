@@ -248,6 +248,14 @@ class Connection(object):
                          (asc, desc)
         """
 
+    @abc.abstractmethod
+    def get_ports_by_addresses(self, addresses):
+        """Return the ports with any of the given MAC addresses.
+
+        :param addresses: A list of MAC addresses.
+        :returns: A list of ports.
+        """
+
     @abc.abstractmethod
     def get_ports_by_node_id(self, node_id, limit=None, marker=None,
                              sort_key=None, sort_dir=None):
@@ -545,6 +553,26 @@ class Connection(object):
         :raises: NodeNotFound
         """
 
+    @abc.abstractmethod
+    def record_node_heartbeat(self, node_id, driver_internal_info,
+                              touch_provisioning=False):
+        """Record an agent heartbeat for a node.
+
+        Merges the given keys into the node's driver_internal_info and
+        optionally updates its 'provision_updated_at' property, all in
+        a single database update. Keys that are not given are kept
+        intact, so this is safe to call without holding an exclusive
+        lock on the node.
+
+        :param node_id: The id of a node.
+        :param driver_internal_info: A dict of keys to merge into the
+                                     node's driver_internal_info.
+        :param touch_provisioning: Whether to also mark the node's
+                                   provisioning as running.
+        :returns: A node.
+        :raises: NodeNotFound
+        """
+
     @abc.abstractmethod
     def set_node_tags(self, node_id, tags):
         """Replace all of the node tags with specified list of tags.
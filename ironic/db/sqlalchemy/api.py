@@ -460,6 +460,11 @@ class Connection(api.Connection):
         return _paginate_query(models.Port, limit, marker,
                                sort_key, sort_dir)
 
+    def get_ports_by_addresses(self, addresses):
+        query = model_query(models.Port)
+        query = query.filter(models.Port.address.in_(addresses))
+        return query.all()
+
     def get_ports_by_node_id(self, node_id, limit=None, marker=None,
                              sort_key=None, sort_dir=None):
         query = model_query(models.Port)
@@ -801,6 +806,24 @@ class Connection(api.Connection):
             if count == 0:
                 raise exception.NodeNotFound(node_id)
 
+    def record_node_heartbeat(self, node_id, driver_internal_info,
+                              touch_provisioning=False):
+        with _session_for_write():
+            query = model_query(models.Node)
+            query = add_identity_filter(query, node_id)
+            try:
+                ref = query.with_lockmode('update').one()
+            except NoResultFound:
+                raise exception.NodeNotFound(node=node_id)
+
+            info = dict(ref.driver_internal_info or {})
+            info.update(driver_internal_info)
+            values = {'driver_internal_info': info}
+            if touch_provisioning:
+                values['provision_updated_at'] = timeutils.utcnow()
+            ref.update(values)
+        return ref
+
     def _check_node_exists(self, node_id):
         if not model_query(models.Node).filter_by(id=node_id).scalar():
             raise exception.NodeNotFound(node=node_id)
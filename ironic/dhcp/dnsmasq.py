@@ -0,0 +1,270 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""DHCP provider managing a local dnsmasq.
+
+dnsmasq must be started with the --dhcp-hostsdir, --dhcp-optsdir and
+--dhcp-leasefile options pointing to the [dnsmasq]dhcp_hostsdir,
+[dnsmasq]dhcp_optsdir and [dnsmasq]dhcp_leasefile paths. For every MAC
+address of a node, a host file tags the MAC address and an options file
+holds the DHCP options of this tag. dnsmasq picks up new files by itself,
+but only re-reads changed or deleted ones on SIGHUP, which is sent at most
+once every [dnsmasq]reload_delay seconds.
+"""
+
+import errno
+import os
+import signal
+import tempfile
+import threading
+
+import eventlet
+from ironic_lib import utils as ironic_utils
+from oslo_log import log as logging
+from oslo_utils import excutils
+from oslo_utils import netutils
+
+from ironic.common import exception
+from ironic.common.i18n import _, _LE, _LW
+from ironic.conf import CONF
+from ironic.dhcp import base
+
+LOG = logging.getLogger(__name__)
+
+_RELOAD_LOCK = threading.Lock()
+_RELOAD_PENDING = False
+
+
+def _reload():
+    """Send SIGHUP to dnsmasq for it to re-read the hosts and options."""
+    global _RELOAD_PENDING
+    with _RELOAD_LOCK:
+        _RELOAD_PENDING = False
+
+    try:
+        with open(CONF.dnsmasq.pid_file) as f:
+            pid = int(f.read().strip())
+        os.kill(pid, signal.SIGHUP)
+    except (IOError, OSError, ValueError) as e:
+        LOG.warning(_LW('Failed to reload dnsmasq using the PID file '
+                        '%(pid_file)s: %(error)s'),
+                    {'pid_file': CONF.dnsmasq.pid_file, 'error': e})
+
+
+def _schedule_reload():
+    """Reload dnsmasq after [dnsmasq]reload_delay seconds.
+
+    The reloads requested while one is pending are coalesced into it, so
+    that updating many nodes at once only sends a few signals to dnsmasq.
+    """
+    global _RELOAD_PENDING
+    with _RELOAD_LOCK:
+        if _RELOAD_PENDING:
+            return
+        _RELOAD_PENDING = True
+    eventlet.spawn_after(CONF.dnsmasq.reload_delay, _reload)
+
+
+def _tag(address):
+    """Return the dnsmasq tag of a MAC address."""
+    return 'ironic-%s' % address.lower().replace(':', '')
+
+
+def _format_option(tag, opt):
+    """Format an ironic DHCP option as a line of a dnsmasq options file.
+
+    :param tag: the dnsmasq tag of the MAC address.
+    :param opt: a dict with the opt_name, the opt_value and optionally the
+        ip_version of the option. The opt_name may be prefixed with tags,
+        e.g. 'tag:!ipxe,bootfile-name'.
+    :returns: the line, e.g.
+        'tag:ironic-525400cf2d32,tag:!ipxe,option:bootfile-name,pxelinux.0'
+    """
+    parts = opt['opt_name'].split(',')
+    name = parts.pop()
+    if not name.isdigit():
+        name = ('option6:%s' if opt.get('ip_version') == 6
+                else 'option:%s') % name
+    return ','.join(['tag:%s' % tag] + parts + [name, str(opt['opt_value'])])
+
+
+def _write_file(path, contents):
+    """Atomically write a file, unless it already has the contents.
+
+    :returns: whether the file was written.
+    """
+    try:
+        with open(path) as f:
+            if f.read() == contents:
+                return False
+    except IOError as e:
+        if e.errno != errno.ENOENT:
+            raise
+
+    # dnsmasq ignores the dotfiles of the directories it watches, so the
+    # temporary file is never read half written.
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(contents)
+        os.chmod(tmp_path, 0o644)
+        os.rename(tmp_path, path)
+    except Exception:
+        with excutils.save_and_reraise_exception():
+            ironic_utils.unlink_without_raise(tmp_path)
+    return True
+
+
+def _remove_file(path):
+    """Remove a file if it exists.
+
+    :returns: whether the file was removed.
+    """
+    try:
+        os.remove(path)
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            raise
+        return False
+    return True
+
+
+def _get_addresses(task):
+    """Get the MAC addresses of the node to serve DHCP options to."""
+    return ([p.address for p in task.ports if p.pxe_enabled] +
+            [pg.address for pg in task.portgroups if pg.address])
+
+
+class DnsmasqDHCPApi(base.BaseDHCP):
+    """DHCP provider writing the host and option files of a local dnsmasq.
+
+    The node's MAC addresses are used instead of the Neutron ports handled
+    by the other providers, so the methods updating a single port do
+    nothing.
+    """
+
+    def update_port_dhcp_opts(self, port_id, dhcp_options, token=None):
+        pass
+
+    def update_port_address(self, port_id, address, token=None):
+        pass
+
+    def update_dhcp_opts(self, task, options, vifs=None):
+        """Send or update the DHCP BOOT options for this node.
+
+        :param task: A TaskManager instance.
+        :param options: this will be a list of dicts, e.g.
+
+                        ::
+
+                         [{'opt_name': 'bootfile-name',
+                           'opt_value': 'pxelinux.0'},
+                          {'opt_name': 'server-ip-address',
+                           'opt_value': '123.123.123.456'},
+                          {'opt_name': 'tftp-server',
+                           'opt_value': '123.123.123.123'}]
+        :param vifs: ignored, the options are set for the MAC addresses of
+                     the PXE enabled ports and of the portgroups of the node.
+        :raises: FailedToUpdateDHCPOptOnPort
+        """
+        addresses = _get_addresses(task)
+        if not addresses:
+            raise exception.FailedToUpdateDHCPOptOnPort(
+                _("No PXE enabled ports found for node %(node)s when "
+                  "attempting to update DHCP BOOT options.") %
+                {'node': task.node.uuid})
+
+        changed = False
+        try:
+            for address in addresses:
+                tag = _tag(address)
+                filename = address.lower()
+                opts = ''.join('%s\n' % _format_option(tag, opt)
+                               for opt in options
+                               if opt.get('opt_value') is not None)
+                changed |= _write_file(
+                    os.path.join(CONF.dnsmasq.dhcp_optsdir, filename), opts)
+                changed |= _write_file(
+                    os.path.join(CONF.dnsmasq.dhcp_hostsdir, filename),
+                    '%s,set:%s\n' % (address.lower(), tag))
+        except (IOError, OSError) as e:
+            raise exception.FailedToUpdateDHCPOptOnPort(
+                _("Failed to write the dnsmasq DHCP options of node "
+                  "%(node)s: %(error)s") %
+                {'node': task.node.uuid, 'error': e})
+        finally:
+            if changed:
+                _schedule_reload()
+
+    def clean_dhcp_opts(self, task):
+        """Clean up the DHCP BOOT options for all ports in `task`.
+
+        :param task: A TaskManager instance.
+        :raises: FailedToCleanDHCPOpts
+        """
+        changed = False
+        try:
+            for address in _get_addresses(task):
+                filename = address.lower()
+                changed |= _remove_file(
+                    os.path.join(CONF.dnsmasq.dhcp_hostsdir, filename))
+                changed |= _remove_file(
+                    os.path.join(CONF.dnsmasq.dhcp_optsdir, filename))
+        except OSError as e:
+            LOG.error(_LE('Failed to remove the dnsmasq DHCP options of '
+                          'node %(node)s: %(error)s'),
+                      {'node': task.node.uuid, 'error': e})
+            raise exception.FailedToCleanDHCPOpts(node=task.node.uuid)
+        finally:
+            if changed:
+                _schedule_reload()
+
+    def get_ip_addresses(self, task):
+        """Get IP addresses for all ports/portgroups in `task`.
+
+        The addresses are read from the dnsmasq lease file.
+
+        :param task: a TaskManager instance.
+        :returns: List of IP addresses associated with
+                  task's ports/portgroups.
+        """
+        leases = {}
+        try:
+            with open(CONF.dnsmasq.dhcp_leasefile) as f:
+                for line in f:
+                    # <expiry time> <MAC address> <IP address> ...
+                    fields = line.split()
+                    if len(fields) >= 3 and netutils.is_valid_ipv4(
+                            fields[2]):
+                        leases[fields[1].lower()] = fields[2]
+        except IOError as e:
+            LOG.warning(_LW('Failed to read the dnsmasq lease file '
+                            '%(path)s: %(error)s'),
+                        {'path': CONF.dnsmasq.dhcp_leasefile, 'error': e})
+            return []
+
+        ip_addresses = []
+        failures = []
+        for address in _get_addresses(task):
+            ip_address = leases.get(address.lower())
+            if ip_address:
+                ip_addresses.append(ip_address)
+            else:
+                failures.append(address)
+
+        if failures:
+            LOG.warning(_LW("No dnsmasq lease found for node %(node)s on "
+                            "the following MAC addresses: %(failures)s."),
+                        {'node': task.node.uuid, 'failures': failures})
+
+        return ip_addresses
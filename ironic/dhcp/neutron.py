@@ -16,6 +16,7 @@
 
 import time
 
+import eventlet
 from neutronclient.common import exceptions as neutron_client_exc
 from oslo_log import log as logging
 from oslo_utils import netutils
@@ -60,10 +61,12 @@ class NeutronDHCPApi(base.BaseDHCP):
         :param token: optional auth token.
 
         :raises: FailedToUpdateDHCPOptOnPort
+        :returns: the updated Neutron port dict.
         """
         port_req_body = {'port': {'extra_dhcp_opts': dhcp_options}}
         try:
-            neutron.get_client(token).update_port(port_id, port_req_body)
+            return neutron.get_client(token).update_port(
+                port_id, port_req_body).get('port', {})
         except neutron_client_exc.NeutronClientException:
             LOG.exception(_LE("Failed to update Neutron port %s."), port_id)
             raise exception.FailedToUpdateDHCPOptOnPort(port_id=port_id)
@@ -143,14 +146,26 @@ class NeutronDHCPApi(base.BaseDHCP):
                   "to update DHCP BOOT options.") %
                 {'node': task.node.uuid})
 
-        failures = []
         vif_list = [vif for pdict in vifs.values() for vif in pdict.values()]
-        for vif in vif_list:
+        token = task.context.auth_token
+
+        # Ports which were already active when their options were set
+        active = set()
+
+        def _update(vif):
             try:
-                self.update_port_dhcp_opts(vif, options,
-                                           token=task.context.auth_token)
+                port = self.update_port_dhcp_opts(vif, options, token=token)
             except exception.FailedToUpdateDHCPOptOnPort:
-                failures.append(vif)
+                return vif
+            if port and port.get('status') == 'ACTIVE':
+                active.add(vif)
+
+        # The ports of a node with several NICs are updated concurrently,
+        # sharing the neutron client cached for the token.
+        pool = eventlet.GreenPool(
+            min(len(vif_list), CONF.neutron.dhcp_update_workers))
+        failures = [vif for vif in pool.imap(_update, vif_list)
+                    if vif is not None]
 
         if failures:
             if len(failures) == len(vif_list):
@@ -164,7 +179,7 @@ class NeutronDHCPApi(base.BaseDHCP):
                             {'node': task.node.uuid, 'ports': failures})
 
         # TODO(adam_g): Hack to workaround bug 1334447 until we have a
-        # mechanism for synchronizing events with Neutron. We need to sleep
+        # mechanism for synchronizing events with Neutron. We need to wait
         # only if server gets to PXE faster than Neutron agents have setup
         # sufficient DHCP config for netboot. It may occur when we are using
         # VMs or hardware server with fast boot enabled.
@@ -177,9 +192,75 @@ class NeutronDHCPApi(base.BaseDHCP):
                             "Ocata release. Please set configuration "
                             "parameter port_setup_delay to 15."))
             port_delay = 15
-        if port_delay != 0:
-            LOG.debug("Waiting %d seconds for Neutron.", port_delay)
+        if port_delay == 0:
+            return
+        # NOTE: Neutron does not report when the DHCP agent has applied
+        # the new options of a port that is already active, the whole
+        # delay is waited for then. The wait on ports being set up ends as
+        # soon as they are active, the DHCP agent being done with them.
+        if active:
+            LOG.debug("Waiting %(delay)d seconds for Neutron to set up the "
+                      "DHCP options of the active ports of node %(node)s.",
+                      {'delay': port_delay, 'node': task.node.uuid})
             time.sleep(port_delay)
+        else:
+            self._wait_for_ports_active(
+                task, [vif for vif in vif_list if vif not in failures],
+                port_delay)
+
+    def _wait_for_ports_active(self, task, vifs, timeout):
+        """Wait for Neutron to finish setting up the new ports of a node.
+
+        Neutron only reports a port as ACTIVE once its agents, including
+        the DHCP agent, are done provisioning it, so this is only meaningful
+        for ports that were not active when their DHCP options were set. The
+        ports are polled every [neutron]port_status_poll_interval seconds
+        until they are all active or until the timeout expires, in which
+        case the deployment goes on anyway, as some network setups never
+        activate the ports.
+
+        :param task: a TaskManager instance.
+        :param vifs: a list of Neutron port ids.
+        :param timeout: the maximum time to wait, in seconds.
+        """
+        interval = CONF.neutron.port_status_poll_interval
+        if not interval:
+            LOG.debug("Waiting %d seconds for Neutron.", timeout)
+            time.sleep(timeout)
+            return
+
+        LOG.debug("Waiting up to %(timeout)d seconds for the Neutron ports "
+                  "%(vifs)s of node %(node)s to become active.",
+                  {'timeout': timeout, 'vifs': vifs, 'node': task.node.uuid})
+        client = neutron.get_client(task.context.auth_token)
+        deadline = time.time() + timeout
+        pending = set(vifs)
+        while True:
+            try:
+                ports = client.list_ports(id=list(pending)).get('ports', [])
+            except neutron_client_exc.NeutronClientException as e:
+                LOG.warning(_LW("Failed to get the status of the Neutron "
+                                "ports %(vifs)s of node %(node)s: "
+                                "%(error)s"),
+                            {'vifs': list(pending), 'node': task.node.uuid,
+                             'error': e})
+            else:
+                pending -= {port['id'] for port in ports
+                            if port.get('status') == 'ACTIVE'}
+                if not pending:
+                    LOG.debug("The Neutron ports of node %s are active.",
+                              task.node.uuid)
+                    return
+
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                LOG.debug("The Neutron ports %(vifs)s of node %(node)s are "
+                          "still not active after %(timeout)d seconds, "
+                          "proceeding.",
+                          {'vifs': list(pending), 'node': task.node.uuid,
+                           'timeout': timeout})
+                return
+            time.sleep(min(interval, remaining))
 
     def _get_fixed_ip_address(self, port_uuid, client):
         """Get a Neutron port's fixed ip address.
@@ -190,7 +271,6 @@ class NeutronDHCPApi(base.BaseDHCP):
         :raises: FailedToGetIPAddressOnPort
         :raises: InvalidIPv4Address
         """
-        ip_address = None
         try:
             neutron_port = client.show_port(port_uuid).get('port')
         except neutron_client_exc.NeutronClientException:
@@ -198,6 +278,18 @@ class NeutronDHCPApi(base.BaseDHCP):
                           port_uuid)
             raise exception.FailedToGetIPAddressOnPort(port_id=port_uuid)
 
+        return self._parse_fixed_ip_address(port_uuid, neutron_port)
+
+    def _parse_fixed_ip_address(self, port_uuid, neutron_port):
+        """Get the fixed ip address out of a Neutron port dict.
+
+        :param port_uuid: Neutron port id.
+        :param neutron_port: Neutron port dict.
+        :returns: Neutron port ip address.
+        :raises: FailedToGetIPAddressOnPort
+        :raises: InvalidIPv4Address
+        """
+        ip_address = None
         fixed_ips = neutron_port.get('fixed_ips')
 
         # NOTE(faizan) At present only the first fixed_ip assigned to this
@@ -218,25 +310,36 @@ class NeutronDHCPApi(base.BaseDHCP):
                       port_uuid)
             raise exception.FailedToGetIPAddressOnPort(port_id=port_uuid)
 
-    def _get_port_ip_address(self, task, p_obj, client):
+    def _get_vif(self, p_obj):
+        """Get the VIF of an ironic port/portgroup the node boots from.
+
+        :param p_obj: Ironic port or portgroup object.
+        :returns: Neutron port id, or None.
+        """
+        # NOTE(vdrok): We are booting the node only in one network at a time,
+        # and presence of cleaning_vif_port_id means we're doing cleaning, of
+        # provisioning_vif_port_id - provisioning. Otherwise it's a tenant
+        # network
+        return (p_obj.internal_info.get('cleaning_vif_port_id') or
+                p_obj.internal_info.get('provisioning_vif_port_id') or
+                p_obj.extra.get('vif_port_id'))
+
+    def _get_port_ip_address(self, task, p_obj, client, neutron_ports=None):
         """Get ip address of ironic port/portgroup assigned by Neutron.
 
         :param task: a TaskManager instance.
         :param p_obj: Ironic port or portgroup object.
         :param client: Neutron client instance.
+        :param neutron_ports: optional dict of the Neutron port dicts
+                              already fetched, keyed by their ids. The
+                              Neutron port is fetched with the client
+                              if this is None.
         :returns: List of Neutron vif ip address associated with
                   Node's port/portgroup.
         :raises: FailedToGetIPAddressOnPort
         :raises: InvalidIPv4Address
         """
-
-        # NOTE(vdrok): We are booting the node only in one network at a time,
-        # and presence of cleaning_vif_port_id means we're doing cleaning, of
-        # provisioning_vif_port_id - provisioning. Otherwise it's a tenant
-        # network
-        vif = (p_obj.internal_info.get('cleaning_vif_port_id') or
-               p_obj.internal_info.get('provisioning_vif_port_id') or
-               p_obj.extra.get('vif_port_id'))
+        vif = self._get_vif(p_obj)
         if not vif:
             obj_name = 'portgroup'
             if isinstance(p_obj, objects.Port):
@@ -247,15 +350,23 @@ class NeutronDHCPApi(base.BaseDHCP):
                         'obj_id': p_obj.uuid})
             raise exception.FailedToGetIPAddressOnPort(port_id=p_obj.uuid)
 
-        vif_ip_address = self._get_fixed_ip_address(vif, client)
-        return vif_ip_address
+        if neutron_ports is None:
+            return self._get_fixed_ip_address(vif, client)
+
+        neutron_port = neutron_ports.get(vif)
+        if neutron_port is None:
+            LOG.error(_LE("Neutron port %s was not found."), vif)
+            raise exception.FailedToGetIPAddressOnPort(port_id=vif)
+        return self._parse_fixed_ip_address(vif, neutron_port)
 
-    def _get_ip_addresses(self, task, pobj_list, client):
+    def _get_ip_addresses(self, task, pobj_list, client, neutron_ports=None):
         """Get IP addresses for all ports/portgroups.
 
         :param task: a TaskManager instance.
         :param pobj_list: List of port or portgroup objects.
         :param client: Neutron client instance.
+        :param neutron_ports: optional dict of the Neutron port dicts
+                              already fetched, keyed by their ids.
         :returns: List of IP addresses associated with
                   task's ports/portgroups.
         """
@@ -263,8 +374,8 @@ class NeutronDHCPApi(base.BaseDHCP):
         ip_addresses = []
         for obj in pobj_list:
             try:
-                vif_ip_address = self._get_port_ip_address(task, obj,
-                                                           client)
+                vif_ip_address = self._get_port_ip_address(
+                    task, obj, client, neutron_ports=neutron_ports)
                 ip_addresses.append(vif_ip_address)
             except (exception.FailedToGetIPAddressOnPort,
                     exception.InvalidIPv4Address):
@@ -284,6 +395,30 @@ class NeutronDHCPApi(base.BaseDHCP):
 
         return ip_addresses
 
+    def _list_neutron_ports(self, task, client):
+        """Fetch the Neutron ports of all ports/portgroups in one request.
+
+        :param task: a TaskManager instance.
+        :param client: Neutron client instance.
+        :returns: dict of the Neutron port dicts keyed by their ids, or
+                  None if they could not be listed.
+        """
+        vifs = [vif for vif in map(self._get_vif,
+                                   task.ports + task.portgroups) if vif]
+        if not vifs:
+            return {}
+
+        try:
+            neutron_ports = client.list_ports(id=vifs).get('ports', [])
+        except neutron_client_exc.NeutronClientException as e:
+            LOG.warning(_LW("Failed to list the Neutron ports %(vifs)s of "
+                            "node %(node)s, getting them one by one "
+                            "instead. Error: %(error)s"),
+                        {'vifs': vifs, 'node': task.node.uuid, 'error': e})
+            return None
+
+        return {port['id']: port for port in neutron_ports}
+
     def get_ip_addresses(self, task):
         """Get IP addresses for all ports/portgroups in `task`.
 
@@ -292,10 +427,12 @@ class NeutronDHCPApi(base.BaseDHCP):
                   task's ports/portgroups.
         """
         client = neutron.get_client(task.context.auth_token)
+        neutron_ports = self._list_neutron_ports(task, client)
 
-        port_ip_addresses = self._get_ip_addresses(task, task.ports, client)
+        port_ip_addresses = self._get_ip_addresses(
+            task, task.ports, client, neutron_ports=neutron_ports)
         portgroup_ip_addresses = self._get_ip_addresses(
-            task, task.portgroups, client)
+            task, task.portgroups, client, neutron_ports=neutron_ports)
 
         return port_ip_addresses + portgroup_ip_addresses
 
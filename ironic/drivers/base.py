@@ -375,11 +375,17 @@ class DeployInterface(BaseInterface):
         """
         pass
 
-    def heartbeat(self, task, callback_url):
+    def heartbeat(self, task, callback_url, commands_status=None,
+                  received_at=None):
         """Record a heartbeat for the node.
 
         :param task: a TaskManager instance containing the node to act on.
         :param callback_url: a URL to use to call to the ramdisk.
+        :param commands_status: optional list with the status of the
+            commands, as reported by the ramdisk with the heartbeat.
+        :param received_at: optional time (as returned by time.time()) the
+            heartbeat was received at by the conductor, passed with
+            commands_status.
         :return: None
         """
         LOG.warning(_LW('Got heartbeat message from node %(node)s, but '
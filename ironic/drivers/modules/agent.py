@@ -12,9 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+
 from ironic_lib import metrics_utils
+from ironic_lib import utils as ironic_utils
 from oslo_log import log
 from oslo_utils import excutils
+from oslo_utils import fileutils
 from oslo_utils import units
 import six.moves.urllib_parse as urlparse
 
@@ -33,6 +37,7 @@ from ironic.conf import CONF
 from ironic.drivers import base
 from ironic.drivers.modules import agent_base_vendor
 from ironic.drivers.modules import deploy_utils
+from ironic.drivers.modules import iscsi_deploy
 
 
 LOG = log.getLogger(__name__)
@@ -67,6 +72,85 @@ PARTITION_IMAGE_LABELS = ('kernel', 'ramdisk', 'root_gb', 'root_mb', 'swap_mb',
                           'preserve_ephemeral', 'image_type',
                           'deploy_boot_mode')
 
+# Checksums of the instance images converted to raw format by the conductor
+# before being published over HTTP, so that they are not computed for each
+# node deployed with the same image:
+# {(<device>, <inode>, <size>, <modification time>): <MD5 checksum>}
+_HTTP_IMAGE_CHECKSUMS = {}
+
+# Number of checksums above which the checksums of images no longer cached
+# are forgotten.
+_HTTP_IMAGE_CHECKSUMS_MAX_SIZE = 128
+
+
+@utils.register_reset
+def _reset():
+    """Forget the checksums of the images published over HTTP."""
+    _HTTP_IMAGE_CHECKSUMS.clear()
+
+
+def _get_http_image_path(node_uuid):
+    """Get the path of the instance image published over HTTP."""
+    return os.path.join(CONF.deploy.http_root,
+                        CONF.deploy.http_image_subdir, node_uuid)
+
+
+def _get_http_image_checksum(image_path):
+    """Get the MD5 checksum of a cached instance image.
+
+    :param image_path: path of the cached instance image.
+    :returns: the MD5 checksum of the image.
+    """
+    stat = os.stat(image_path)
+    key = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime)
+    checksum = _HTTP_IMAGE_CHECKSUMS.get(key)
+    if checksum is None:
+        # NOTE: the image can be several GiB big, hash it in a child process
+        # rather than blocking all the green threads of the conductor.
+        out, _err = utils.execute('md5sum', image_path)
+        checksum = out.split()[0]
+        if len(_HTTP_IMAGE_CHECKSUMS) >= _HTTP_IMAGE_CHECKSUMS_MAX_SIZE:
+            _HTTP_IMAGE_CHECKSUMS.clear()
+        _HTTP_IMAGE_CHECKSUMS[key] = checksum
+    return checksum
+
+
+def _publish_instance_image(task):
+    """Publish the instance image on the HTTP server of the conductor.
+
+    The image is fetched in the master image cache of the conductor, if it
+    is not there yet, and hard-linked under [deploy]http_root.
+
+    :param task: a TaskManager instance containing the node to act on.
+    :returns: a tuple containing the URL of the published image and the
+        path of the cached image.
+    """
+    node = task.node
+    image_href, image_path = iscsi_deploy.cache_instance_image(task.context,
+                                                               node)
+    http_path = _get_http_image_path(node.uuid)
+    fileutils.ensure_tree(os.path.dirname(http_path))
+    images.link_or_copy(image_path, http_path)
+    # NOTE: the image must be readable by the web server
+    os.chmod(http_path, 0o644)
+
+    url = '/'.join([CONF.deploy.http_url.rstrip('/'),
+                    CONF.deploy.http_image_subdir, node.uuid])
+    LOG.debug('Published image %(image)s for node %(node)s at %(url)s',
+              {'image': image_href, 'node': node.uuid, 'url': url})
+    return url, image_path
+
+
+def _destroy_published_image(node):
+    """Remove the instance image published on the conductor, if any.
+
+    :param node: an ironic node object.
+    """
+    if CONF.agent.image_download_source != 'http':
+        return
+    ironic_utils.unlink_without_raise(_get_http_image_path(node.uuid))
+    iscsi_deploy.destroy_images(node.uuid)
+
 
 @METRICS.timer('build_instance_info_for_deploy')
 def build_instance_info_for_deploy(task):
@@ -77,6 +161,9 @@ def build_instance_info_for_deploy(task):
         in instance_info
     :raises: exception.ImageRefValidationFailed if image_source is not
         Glance href and is not HTTP(S) URL.
+    :raises: ImageDownloadFailed, ImageConvertFailed, if caching the image
+        on the conductor failed, when [agent]image_download_source is set
+        to "http".
     """
     node = task.node
     instance_info = node.instance_info
@@ -86,10 +173,10 @@ def build_instance_info_for_deploy(task):
         glance = image_service.GlanceImageService(version=2,
                                                   context=task.context)
         image_info = glance.show(image_source)
-        swift_temp_url = glance.swift_temp_url(image_info)
         LOG.debug('Got image info: %(info)s for node %(node)s.',
                   {'info': image_info, 'node': node.uuid})
-        instance_info['image_url'] = swift_temp_url
+        if CONF.agent.image_download_source == 'swift':
+            instance_info['image_url'] = glance.swift_temp_url(image_info)
         instance_info['image_checksum'] = image_info['checksum']
         instance_info['image_disk_format'] = image_info['disk_format']
         instance_info['image_container_format'] = (
@@ -115,6 +202,16 @@ def build_instance_info_for_deploy(task):
         instance_info.update(i_info)
     else:
         instance_info['image_type'] = 'whole-disk-image'
+
+    if CONF.agent.image_download_source == 'http':
+        instance_info['image_url'], image_path = _publish_instance_image(task)
+        if (CONF.force_raw_images and
+                instance_info.get('image_disk_format') != 'raw'):
+            # NOTE: the cached image has been converted to raw, the
+            # checksum of the source image does not match it anymore.
+            instance_info['image_checksum'] = _get_http_image_checksum(
+                image_path)
+            instance_info['image_disk_format'] = 'raw'
     return instance_info
 
 
@@ -322,6 +419,8 @@ class AgentDeployMixin(agent_base_vendor.AgentDeployMixin):
             LOG.error(msg)
             deploy_utils.set_failed_state(task, msg)
             return
+        # NOTE: the agent has written the image, it can be unpublished
+        _destroy_published_image(node)
         if not iwdi:
             root_uuid = self._get_uuid_from_result(task, 'root_uuid')
             if deploy_utils.get_boot_mode_for_deploy(node) == 'uefi':
@@ -377,6 +476,12 @@ class AgentDeploy(AgentDeployMixin, base.DeployInterface):
         if CONF.agent.manage_agent_boot:
             task.driver.boot.validate(task)
 
+        if (CONF.agent.image_download_source == 'http' and
+                (not CONF.deploy.http_url or not CONF.deploy.http_root)):
+            raise exception.MissingParameterValue(_(
+                "[agent]image_download_source is set to 'http' but no HTTP "
+                "URL or HTTP root was specified."))
+
         node = task.node
         params = {}
         image_source = node.instance_info.get('image_source')
@@ -490,6 +595,7 @@ class AgentDeploy(AgentDeployMixin, base.DeployInterface):
             task.driver.boot.clean_up_ramdisk(task)
         provider = dhcp_factory.DHCPFactory()
         provider.clean_dhcp(task)
+        _destroy_published_image(task.node)
 
     def take_over(self, task):
         """Take over management of this node from a dead conductor.
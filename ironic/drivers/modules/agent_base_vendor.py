@@ -77,8 +77,7 @@ VENDOR_PROPERTIES = {
 
 
 def _get_client():
-    client = agent_client.AgentClient()
-    return client
+    return agent_client.get_client()
 
 
 @METRICS.timer('post_clean_step_hook')
@@ -167,6 +166,31 @@ def _notify_conductor_resume_clean(task):
     rpc.continue_node_clean(task.context, uuid, topic=topic)
 
 
+def _upgrade_lock(task, expected_state):
+    """Upgrade the lock of a heartbeat task before acting on the node.
+
+    Heartbeats are processed under a shared lock, so the node may have
+    changed its state before the exclusive lock was acquired and the node
+    reloaded.
+
+    :param task: a TaskManager instance to act on.
+    :param expected_state: the provision state the action is meant for.
+    :returns: False if the node has moved out of the expected state while
+              upgrading the lock, True otherwise.
+    """
+    if not task.shared:
+        return True
+
+    task.upgrade_lock()
+    if task.node.provision_state != expected_state:
+        LOG.debug('Node %(node)s moved to %(state)s while processing '
+                  'a heartbeat, not taking any action.',
+                  {'node': task.node.uuid,
+                   'state': task.node.provision_state})
+        return False
+    return True
+
+
 def _get_completed_cleaning_command(task, commands):
     """Returns None or a completed cleaning command from the agent.
 
@@ -331,6 +355,8 @@ class AgentDeployMixin(object):
             if task.node.driver_internal_info.get('cleaning_reboot'):
                 # Node finished a cleaning step that requested a reboot, and
                 # this is the first heartbeat after booting. Continue cleaning.
+                if not _upgrade_lock(task, states.CLEANWAIT):
+                    return
                 info = task.node.driver_internal_info
                 info.pop('cleaning_reboot', None)
                 task.node.driver_internal_info = info
@@ -350,6 +376,11 @@ class AgentDeployMixin(object):
             # Agent command in progress
             return
 
+        # Every outcome below changes the node, so we need an exclusive lock
+        if not _upgrade_lock(task, states.CLEANWAIT):
+            return
+        node = task.node
+
         if command.get('command_status') == 'FAILED':
             msg = (_('Agent returned error for clean step %(step)s on node '
                      '%(node)s : %(err)s.') %
@@ -440,32 +471,40 @@ class AgentDeployMixin(object):
             return manager_utils.cleaning_error_handler(task, msg)
 
     @METRICS.timer('AgentDeployMixin.heartbeat')
-    def heartbeat(self, task, callback_url):
+    def heartbeat(self, task, callback_url, commands_status=None,
+                  received_at=None):
         """Process a heartbeat.
 
         :param task: task to work with.
         :param callback_url: agent HTTP API URL.
+        :param commands_status: optional list with the status of the agent
+            commands. When provided, it is used instead of fetching the
+            status from the agent while processing the heartbeat.
+        :param received_at: the time the heartbeat was received at by the
+            conductor, the current time if not provided.
         """
-        # TODO(dtantsur): upgrade lock only if we actually take action other
-        # than updating the last timestamp.
-        task.upgrade_lock()
-
         node = task.node
+        if commands_status is not None:
+            agent_client.record_commands_status(node, commands_status,
+                                                received_at)
         driver_internal_info = node.driver_internal_info
         LOG.debug(
             'Heartbeat from %(node)s, last heartbeat at %(heartbeat)s.',
             {'node': node.uuid,
              'heartbeat': driver_internal_info.get('agent_last_heartbeat')})
-        driver_internal_info['agent_last_heartbeat'] = int(time.time())
-        try:
-            driver_internal_info['agent_url'] = callback_url
-        except KeyError:
-            raise exception.MissingParameterValue(_('For heartbeat operation, '
-                                                    '"agent_url" must be '
-                                                    'specified.'))
-
-        node.driver_internal_info = driver_internal_info
-        node.save()
+        if driver_internal_info.get('agent_url') != callback_url:
+            # The agent has just booted (or moved), make sure that nobody
+            # overwrites the new URL with a stale copy of the node.
+            task.upgrade_lock()
+            node = task.node
+
+        # Record the heartbeat and keep the provisioning alive in one
+        # database update, without an exclusive lock in the common case.
+        node.record_heartbeat(
+            callback_url, int(time.time()),
+            touch_provisioning=(not node.maintenance and
+                                node.provision_state in (states.DEPLOYWAIT,
+                                                         states.CLEANWAIT)))
 
         # Async call backs don't set error state on their own
         # TODO(jimrollenhagen) improve error messages here
@@ -479,22 +518,22 @@ class AgentDeployMixin(object):
             elif (node.provision_state == states.DEPLOYWAIT and
                   not self.deploy_has_started(task)):
                 msg = _('Node failed to get image for deploy.')
-                self.continue_deploy(task)
+                if _upgrade_lock(task, states.DEPLOYWAIT):
+                    self.continue_deploy(task)
             elif (node.provision_state == states.DEPLOYWAIT and
                   self.deploy_is_done(task)):
                 msg = _('Node failed to move to active state.')
-                self.reboot_to_instance(task)
-            elif (node.provision_state == states.DEPLOYWAIT and
-                  self.deploy_has_started(task)):
-                node.touch_provisioning()
+                if _upgrade_lock(task, states.DEPLOYWAIT):
+                    self.reboot_to_instance(task)
             elif node.provision_state == states.CLEANWAIT:
-                node.touch_provisioning()
                 try:
                     if not node.clean_step:
                         LOG.debug('Node %s just booted to start cleaning.',
                                   node.uuid)
                         msg = _('Node failed to start the first cleaning '
                                 'step.')
+                        if not _upgrade_lock(task, states.CLEANWAIT):
+                            return
                         # First, cache the clean steps
                         self._refresh_clean_steps(task)
                         # Then set/verify node clean steps and start cleaning
@@ -509,10 +548,23 @@ class AgentDeployMixin(object):
                     pass
 
         except Exception as e:
+            # The node may have been reloaded when upgrading the lock
+            node = task.node
             err_info = {'node': node.uuid, 'msg': msg, 'e': e}
             last_error = _('Asynchronous exception for node %(node)s: '
                            '%(msg)s Exception: %(e)s') % err_info
             LOG.exception(last_error)
+            if task.shared:
+                # Moving the node to a failed state needs an exclusive lock
+                try:
+                    task.upgrade_lock()
+                except exception.NodeLocked:
+                    LOG.warning(_LW('Node %(node)s is locked, not moving it '
+                                    'to a failed state after the error; the '
+                                    'next heartbeat or the timeout will.'),
+                                {'node': node.uuid})
+                    return
+                node = task.node
             if node.provision_state in (states.CLEANING, states.CLEANWAIT):
                 manager_utils.cleaning_error_handler(task, last_error)
             elif node.provision_state in (states.DEPLOYING, states.DEPLOYWAIT):
@@ -872,14 +924,10 @@ class BaseAgentVendor(AgentDeployMixin, base.VendorInterface):
         and return them as a list of Port objects, or an empty list if there
         are no matches
         """
-        ports = []
+        ports = objects.Port.list_by_addresses(context, mac_addresses)
+        found = set(port_ob.address for port_ob in ports)
         for mac in mac_addresses:
-            # Will do a search by mac if the mac isn't malformed
-            try:
-                port_ob = objects.Port.get_by_address(context, mac)
-                ports.append(port_ob)
-
-            except exception.PortNotFound:
+            if mac.lower() not in found:
                 LOG.warning(_LW('MAC address %s not found in database'), mac)
 
         return ports
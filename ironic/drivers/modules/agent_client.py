@@ -12,13 +12,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
+import time
+
+import eventlet
 from ironic_lib import metrics_utils
 from oslo_log import log
 from oslo_serialization import jsonutils
 import requests
+from requests import adapters
+from requests.packages.urllib3 import exceptions as urllib3_exceptions
+import retrying
 
 from ironic.common import exception
 from ironic.common.i18n import _, _LE, _LW
+from ironic.common import utils
 from ironic.conf import CONF
 
 LOG = log.getLogger(__name__)
@@ -27,6 +35,109 @@ METRICS = metrics_utils.get_metrics_logger(__name__)
 
 DEFAULT_IPA_PORTAL_PORT = 3260
 
+# Status of the agent commands reported with the heartbeats, keyed by node
+# UUID, as (commands status, time it was reported) tuples.
+_COMMANDS_STATUS = {}
+
+# Time the last command was sent to the agent of a node, keyed by node UUID.
+_LAST_COMMAND_SENT = {}
+
+# Time after which the expired status of the nodes which stopped sending
+# heartbeats, e.g. once deployed or cleaned, is removed.
+_COMMANDS_STATUS_NEXT_PRUNE = 0
+
+
+def _prune_commands_status(now):
+    global _COMMANDS_STATUS_NEXT_PRUNE
+    max_age = CONF.agent.commands_status_max_age
+    if now < _COMMANDS_STATUS_NEXT_PRUNE:
+        return
+    _COMMANDS_STATUS_NEXT_PRUNE = now + max_age
+    for node_uuid, (_status, reported_at) in list(_COMMANDS_STATUS.items()):
+        if now - reported_at > max_age:
+            _COMMANDS_STATUS.pop(node_uuid, None)
+    # A status reported before these commands is too old to be used anyway
+    for node_uuid, sent_at in list(_LAST_COMMAND_SENT.items()):
+        if now - sent_at > max_age:
+            _LAST_COMMAND_SENT.pop(node_uuid, None)
+
+
+def record_commands_status(node, commands_status, received_at=None):
+    """Record the status of the agent commands reported with a heartbeat.
+
+    The recorded status is used by AgentClient.get_commands_status()
+    instead of calling the agent, as long as it is not older than
+    [agent]commands_status_max_age seconds and no command was sent to
+    the agent since.
+
+    :param node: A Node object.
+    :param commands_status: A list with the status of the agent commands.
+    :param received_at: the time the heartbeat was received at, which can be
+        well before it is processed. Defaults to the current time.
+    """
+    now = time.time()
+    if received_at is None:
+        received_at = now
+    _prune_commands_status(now)
+    if not CONF.agent.commands_status_max_age:
+        return
+    if received_at <= _LAST_COMMAND_SENT.get(node.uuid, 0):
+        # The status does not include the last command sent to the agent
+        LOG.debug('Ignoring the status of the agent commands of node %s '
+                  'reported before the last command was sent.', node.uuid)
+        return
+    _COMMANDS_STATUS[node.uuid] = (commands_status, received_at)
+
+
+# The AgentClient shared by the whole conductor, see get_client()
+_CLIENT = None
+
+
+@utils.register_reset
+def _reset():
+    """Drop the shared client and the recorded commands status."""
+    global _CLIENT, _COMMANDS_STATUS_NEXT_PRUNE
+    _CLIENT = None
+    _COMMANDS_STATUS.clear()
+    _LAST_COMMAND_SENT.clear()
+    _COMMANDS_STATUS_NEXT_PRUNE = 0
+
+
+def get_client():
+    """Return the AgentClient shared by the whole conductor.
+
+    Sharing the client lets the connections to the agents be reused.
+    """
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = AgentClient()
+    return _CLIENT
+
+
+def _is_connection_error(exc, idempotent=False):
+    """Whether a request to the agent should be retried after an error.
+
+    Non-idempotent requests are only retried if the connection to the agent
+    could not be established. A request failing once it was sent, because
+    the connection was reset or timed out waiting for the response, may
+    have been processed by the agent already.
+
+    :param exc: the exception raised by the request.
+    :param idempotent: whether the request can be sent again in any case,
+        in which case all connection errors are retried.
+    """
+    if isinstance(exc, requests.ConnectTimeout):
+        retry = True
+    elif isinstance(exc, requests.ConnectionError):
+        reason = getattr(exc.args[0] if exc.args else None, 'reason', None)
+        retry = idempotent or isinstance(
+            reason, urllib3_exceptions.NewConnectionError)
+    else:
+        retry = False
+    if retry:
+        LOG.debug('Failed to connect to the agent: %s', exc)
+    return retry
+
 
 class AgentClient(object):
     """Client for interacting with nodes via a REST API."""
@@ -34,6 +145,64 @@ class AgentClient(object):
     def __init__(self):
         self.session = requests.Session()
         self.session.headers.update({'Content-Type': 'application/json'})
+        adapter = adapters.HTTPAdapter(
+            pool_connections=CONF.agent.max_connection_pools,
+            pool_maxsize=CONF.agent.connection_pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _request(self, method, url, **kwargs):
+        """Send a request to the agent, retrying on connection errors.
+
+        Only GET requests are retried on all connection errors, other
+        requests only if the connection to the agent was not established.
+
+        :param method: the HTTP method, e.g. 'get' or 'post'.
+        :param url: the URL of the request.
+        :param kwargs: additional arguments for the request.
+        :raises: requests.RequestException on failure.
+        :returns: the response.
+        """
+        interval = CONF.agent.command_retry_interval * 1000
+        idempotent = method == 'get'
+
+        @retrying.retry(
+            retry_on_exception=lambda e: _is_connection_error(e, idempotent),
+            stop_max_attempt_number=CONF.agent.max_command_attempts,
+            wait_fixed=interval,
+            wait_jitter_max=interval)
+        def _send():
+            return getattr(self.session, method)(
+                url, timeout=(CONF.agent.connect_timeout,
+                              CONF.agent.read_timeout),
+                **kwargs)
+
+        return _send()
+
+    def batch(self, method, calls):
+        """Call a method of this client concurrently for several nodes.
+
+        This is meant for sending the same request to many agents at once,
+        for example getting the clean steps of all the nodes being cleaned.
+        At most [agent]batch_command_workers calls run at the same time.
+
+        :param method: the name of the method, e.g. 'get_clean_steps'.
+        :param calls: an iterable of tuples with the positional arguments
+            of each call, e.g. [(node1, ports1), (node2, ports2)].
+        :returns: a list with a (result, exception) tuple for each call, in
+            the same order. Exception is None if the call succeeded, result
+            is None otherwise.
+        """
+        func = getattr(self, method)
+
+        def _call(args):
+            try:
+                return func(*args), None
+            except Exception as e:
+                return None, e
+
+        pool = eventlet.GreenPool(size=CONF.agent.batch_command_workers)
+        return list(pool.imap(_call, calls))
 
     def _get_command_url(self, node):
         agent_url = node.driver_internal_info.get('agent_url')
@@ -53,6 +222,10 @@ class AgentClient(object):
 
     @METRICS.timer('AgentClient._command')
     def _command(self, node, method, params, wait=False):
+        # The status reported with the last heartbeat does not include the
+        # new command, fetch it from the agent from now on.
+        _COMMANDS_STATUS.pop(node.uuid, None)
+        _LAST_COMMAND_SENT[node.uuid] = time.time()
         url = self._get_command_url(node)
         body = self._get_command_body(method, params)
         request_params = {
@@ -62,7 +235,8 @@ class AgentClient(object):
                   {'node': node.uuid, 'method': method})
 
         try:
-            response = self.session.post(url, params=request_params, data=body)
+            response = self._request('post', url, params=request_params,
+                                     data=body)
         except requests.RequestException as e:
             msg = (_('Error invoking agent command %(method)s for node '
                      '%(node)s. Error: %(error)s') %
@@ -94,9 +268,18 @@ class AgentClient(object):
 
     @METRICS.timer('AgentClient.get_commands_status')
     def get_commands_status(self, node):
+        reported = _COMMANDS_STATUS.get(node.uuid)
+        if reported is not None:
+            if (time.time() - reported[1] <=
+                    CONF.agent.commands_status_max_age):
+                LOG.debug('Using the status of agent commands reported with '
+                          'the heartbeat of node %s', node.uuid)
+                return copy.deepcopy(reported[0])
+            _COMMANDS_STATUS.pop(node.uuid, None)
+
         url = self._get_command_url(node)
         LOG.debug('Fetching status of agent commands for node %s', node.uuid)
-        resp = self.session.get(url)
+        resp = self._request('get', url)
         result = resp.json()['commands']
         status = '; '.join('%(cmd)s: result "%(res)s", error "%(err)s"' %
                            {'cmd': r.get('command_name'),
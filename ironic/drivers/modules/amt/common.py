@@ -22,6 +22,7 @@ from oslo_utils import importutils
 import six
 
 from ironic.common import boot_devices
+from ironic.common import client_cache
 from ironic.common import exception
 from ironic.common.i18n import _, _LE
 from ironic.common import utils
@@ -169,17 +170,43 @@ def parse_driver_info(node):
 def get_wsman_client(node):
     """Return a AMT Client object
 
+    The object is shared with the other operations on the same AMT interface
+    for [DEFAULT]management_client_cache_ttl seconds.
+
     :param node: an Ironic node object.
     :returns: a Client object
     :raises: MissingParameterValue if any required parameters are missing.
     :raises: InvalidParameterValue if any parameters have invalid values.
     """
     driver_info = parse_driver_info(node)
-    client = Client(address=driver_info['address'],
-                    protocol=driver_info['protocol'],
-                    username=driver_info['username'],
-                    password=driver_info['password'])
-    return client
+
+    def _create():
+        return Client(address=driver_info['address'],
+                      protocol=driver_info['protocol'],
+                      username=driver_info['username'],
+                      password=driver_info['password'])
+
+    return client_cache.get_client('amt', _client_params(driver_info),
+                                   _create)
+
+
+def _client_params(driver_info):
+    return (driver_info['address'],
+            driver_info['protocol'],
+            driver_info['username'],
+            driver_info['password'])
+
+
+def invalidate_wsman_client(node):
+    """Drop the cached AMT Client object of a node.
+
+    To be called when an operation on the AMT interface failed, as the
+    failure may come from a broken connection of the client.
+
+    :param node: an Ironic node object.
+    """
+    client_cache.invalidate_client(
+        'amt', _client_params(parse_driver_info(node)))
 
 
 def xml_find(doc, namespace, item):
@@ -85,6 +85,7 @@ def _set_boot_device_order(node, boot_device):
                             method, doc)
     except (exception.AMTFailure, exception.AMTConnectFailure) as e:
         with excutils.save_and_reraise_exception():
+            amt_common.invalidate_wsman_client(node)
             LOG.exception(_LE("Failed to set boot device %(boot_device)s for "
                               "node %(node_id)s with error: %(error)s."),
                           {'boot_device': boot_device, 'node_id': node.uuid,
@@ -139,6 +140,7 @@ def _enable_boot_config(node):
                             method, doc)
     except (exception.AMTFailure, exception.AMTConnectFailure) as e:
         with excutils.save_and_reraise_exception():
+            amt_common.invalidate_wsman_client(node)
             LOG.exception(_LE("Failed to enable boot config for node "
                               "%(node_id)s with error: %(error)s."),
                           {'node_id': node.uuid, 'error': e})
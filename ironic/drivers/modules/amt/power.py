@@ -93,6 +93,7 @@ def _set_power_state(node, target_state):
                             method, doc)
     except (exception.AMTFailure, exception.AMTConnectFailure) as e:
         with excutils.save_and_reraise_exception():
+            amt_common.invalidate_wsman_client(node)
             LOG.exception(_LE("Failed to set power state %(state)s for "
                               "node %(node_id)s with error: %(error)s."),
                           {'state': target_state, 'node_id': node.uuid,
@@ -117,6 +118,7 @@ def _power_status(node):
         doc = client.wsman_get(namespace)
     except (exception.AMTFailure, exception.AMTConnectFailure) as e:
         with excutils.save_and_reraise_exception():
+            amt_common.invalidate_wsman_client(node)
             LOG.exception(_LE("Failed to get power state for node %(node_id)s "
                               "with error: %(error)s."),
                           {'node_id': node.uuid, 'error': e})
@@ -16,6 +16,7 @@ from contextlib import contextmanager
 
 from oslo_utils import importutils
 
+from ironic.common import client_cache
 from ironic.common import exception
 from ironic.common.i18n import _
 from ironic.drivers.modules import deploy_utils
@@ -71,15 +72,26 @@ def handle_login(task, handle, info):
 def cimc_handle(task):
     """Context manager for creating a CIMC handle and logging into it.
 
+    Handles logged in are reused for [DEFAULT]management_client_cache_ttl
+    seconds, unless an exception was raised while using them.
+
     :param task: The current task object.
     :raises: CIMCException if login fails
     :yields: A CIMC Handle for the node in the task.
     """
     info = parse_driver_info(task.node)
-    handle = imcsdk.ImcHandle()
+    params = (info['cimc_address'], info['cimc_username'],
+              info['cimc_password'])
 
-    handle_login(task, handle, info)
-    try:
+    def _login():
+        handle = imcsdk.ImcHandle()
+        handle_login(task, handle, info)
+        return handle
+
+    with client_cache.session('cimc', params, _login,
+                              close=_logout) as handle:
         yield handle
-    finally:
-        handle.logout()
+
+
+def _logout(handle):
+    handle.logout()
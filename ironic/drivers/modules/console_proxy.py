@@ -0,0 +1,370 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Console proxy serving the serial consoles of all nodes on one port.
+
+Instead of a socat process listening on a port for each node whose console
+is enabled, the conductor listens on [console]proxy_port. A client first
+sends a line with the UUID of the node and the token returned with the
+console information, e.g.::
+
+    (echo "<node uuid> <token>"; cat) | socat - TCP:<host>:<proxy_port>
+
+The token is random, stored in the driver_internal_info of the node when
+its console is enabled, and dropped when the console is disabled. It only
+gives access to the console for [console]proxy_token_ttl seconds, after
+which a new one is issued with the console information.
+
+The console command of the node is only started once a client connects,
+and is stopped when the client disconnects, freeing the SOL session of the
+BMC. A client connecting to a node whose console is in use takes it over
+from the previous client.
+"""
+
+import binascii
+import errno
+import hmac
+import os
+import socket
+import subprocess
+import time
+
+import eventlet
+from eventlet.green import os as green_os
+from oslo_concurrency import lockutils
+from oslo_log import log as logging
+from oslo_utils import netutils
+from oslo_utils import uuidutils
+
+from ironic.common import context as ironic_context
+from ironic.common import exception
+from ironic.common.i18n import _, _LE, _LI, _LW
+from ironic.common import utils
+from ironic.conductor import task_manager
+from ironic.conf import CONF
+
+LOG = logging.getLogger(__name__)
+
+# Maximum time (in seconds) for a client to send its node and token.
+_HANDSHAKE_TIMEOUT = 10
+
+# Maximum length of the line holding the node and token.
+_HANDSHAKE_MAX_LENGTH = 256
+
+_BUFFER_SIZE = 4096
+
+_SERVER = None
+
+# Open console sessions in format {<node UUID>: _Session}.
+_SESSIONS = {}
+
+
+@utils.register_reset
+def _reset():
+    """Forget the open console sessions."""
+    _SESSIONS.clear()
+
+
+def _lock(node_uuid):
+    """Lock serializing the changes to the console session of a node."""
+    return lockutils.lock('console-proxy:%s' % node_uuid, 'ironic-')
+
+
+def issue_token(task):
+    """Issue a new token giving access to the console of a node.
+
+    The previous token of the node, if any, is revoked.
+
+    :param task: a TaskManager instance with an exclusive lock.
+    :returns: the token, as a string.
+    """
+    token = binascii.hexlify(os.urandom(16)).decode('ascii')
+    node = task.node
+    info = node.driver_internal_info
+    info['console_proxy_token'] = token
+    info['console_proxy_token_expires_at'] = (
+        time.time() + CONF.console.proxy_token_ttl)
+    node.driver_internal_info = info
+    node.save()
+    return token
+
+
+def revoke_token(task):
+    """Revoke the token giving access to the console of a node.
+
+    :param task: a TaskManager instance with an exclusive lock.
+    """
+    node = task.node
+    info = node.driver_internal_info
+    if info.pop('console_proxy_token', None) is None:
+        return
+    info.pop('console_proxy_token_expires_at', None)
+    node.driver_internal_info = info
+    node.save()
+
+
+def _get_valid_token(node):
+    info = node.driver_internal_info
+    if info.get('console_proxy_token_expires_at', 0) > time.time():
+        return info.get('console_proxy_token')
+
+
+def get_token(task):
+    """Return the token giving access to the console of a node.
+
+    A new token is issued if the current one has expired, upgrading the lock
+    of the task to an exclusive one.
+
+    :param task: a TaskManager instance.
+    :returns: the token, as a string.
+    :raises: NodeLocked if a new token must be issued but the node is locked.
+    """
+    token = _get_valid_token(task.node)
+    if token:
+        return token
+    task.upgrade_lock()
+    return issue_token(task)
+
+
+def get_console_url():
+    """Return the URL of the console proxy of this conductor."""
+    console_host = CONF.my_ip
+    if netutils.is_valid_ipv6(console_host):
+        console_host = '[%s]' % console_host
+    return 'tcp://%(host)s:%(port)s' % {'host': console_host,
+                                        'port': CONF.console.proxy_port}
+
+
+def ensure_started():
+    """Start listening on [console]proxy_port unless already done.
+
+    :raises: ConsoleError if the port cannot be listened on.
+    """
+    global _SERVER
+    if _SERVER is not None:
+        return
+
+    family = (socket.AF_INET6 if netutils.is_valid_ipv6(CONF.my_ip)
+              else socket.AF_INET)
+    try:
+        sock = eventlet.listen((CONF.my_ip, CONF.console.proxy_port),
+                               family=family)
+    except socket.error as e:
+        msg = (_("Could not listen on port %(port)s for the console proxy. "
+                 "Reason: %(err)s.") %
+               {'port': CONF.console.proxy_port, 'err': e})
+        LOG.error(msg)
+        raise exception.ConsoleError(message=msg)
+
+    _SERVER = eventlet.spawn(_serve, sock)
+    LOG.info(_LI('Console proxy listening on %s.'), get_console_url())
+
+
+def stop_session(node_uuid):
+    """Stop the console session of a node, if any.
+
+    Waits for a session being opened by a client to be open.
+
+    :param node_uuid: the UUID of the node.
+    """
+    with _lock(node_uuid):
+        session = _SESSIONS.pop(node_uuid, None)
+    if session is not None:
+        session.stop()
+
+
+def _serve(sock):
+    while True:
+        try:
+            conn, _addr = sock.accept()
+        except socket.error as e:
+            LOG.warning(_LW('Console proxy failed to accept a connection: '
+                            '%s'), e)
+            continue
+        eventlet.spawn_n(_handle, conn)
+
+
+def _read_handshake(conn):
+    """Read the line holding the node UUID and the token."""
+    line = b''
+    while not line.endswith(b'\n'):
+        if len(line) > _HANDSHAKE_MAX_LENGTH:
+            raise ValueError(_('handshake too long'))
+        # Read a byte at a time to leave the console input in the socket
+        data = conn.recv(1)
+        if not data:
+            raise ValueError(_('connection closed'))
+        line += data
+    node_uuid, token = line.decode('utf-8').split()
+    return node_uuid, token
+
+
+def _get_command(node_uuid, token):
+    """Get the console command of a node from its console interface.
+
+    :param node_uuid: the UUID of the node.
+    :param token: the token sent by the client.
+    :returns: a tuple with the list of arguments of the command and the
+        dict of its environment variables.
+    :raises: NodeConsoleNotEnabled if the console of the node is not enabled.
+    :raises: NotAuthorized if the token is not the valid token of the node.
+    :raises: UnsupportedDriverExtension if the console interface of the node
+        cannot be proxied.
+    """
+    context = ironic_context.get_admin_context()
+    with task_manager.acquire(context, node_uuid, shared=True,
+                              purpose='connecting to console') as task:
+        if not task.node.console_enabled:
+            raise exception.NodeConsoleNotEnabled(node=node_uuid)
+        expected = _get_valid_token(task.node)
+        if not expected or not hmac.compare_digest(expected, token):
+            raise exception.NotAuthorized()
+        console = getattr(task.driver, 'console', None)
+        if not getattr(console, 'get_proxy_command', None):
+            raise exception.UnsupportedDriverExtension(
+                driver=task.node.driver, extension='console proxy')
+        return console.get_proxy_command(task)
+
+
+def _close(conn, message=None):
+    try:
+        if message:
+            conn.sendall(message.encode('utf-8') + b'\r\n')
+        conn.close()
+    except socket.error:
+        pass
+
+
+def _handle(conn):
+    """Authenticate a client and connect it to the console of its node."""
+    try:
+        with eventlet.Timeout(_HANDSHAKE_TIMEOUT):
+            node_uuid, token = _read_handshake(conn)
+    except (eventlet.Timeout, ValueError, UnicodeDecodeError,
+            socket.error) as e:
+        LOG.debug('Console proxy rejected a client: %s', e)
+        _close(conn, _('Expected "<node UUID> <token>".'))
+        return
+
+    if not uuidutils.is_uuid_like(node_uuid):
+        _close(conn, _('Invalid node or token.'))
+        return
+
+    # Two clients connecting at once must not start two consoles
+    with _lock(node_uuid):
+        try:
+            args, env = _get_command(node_uuid, token)
+            session = _SESSIONS.get(node_uuid)
+            if session is None or not session.running:
+                session = _Session(node_uuid, args, env)
+                _SESSIONS[node_uuid] = session
+        except exception.NotAuthorized:
+            LOG.warning(_LW('Console proxy rejected a client with an invalid '
+                            'token for node %s.'), node_uuid)
+            _close(conn, _('Invalid node or token.'))
+            return
+        except exception.IronicException as e:
+            LOG.warning(_LW('Console proxy could not open the console of '
+                            'node %(node)s: %(err)s'),
+                        {'node': node_uuid, 'err': e})
+            _close(conn, str(e))
+            return
+
+    session.attach(conn)
+
+
+class _Session(object):
+    """Console command of a node, connected to the current client."""
+
+    def __init__(self, node_uuid, args, env):
+        self.node_uuid = node_uuid
+        self.client = None
+        LOG.debug('Starting the console of node %(node)s: %(cmd)s',
+                  {'node': node_uuid, 'cmd': ' '.join(args)})
+        try:
+            self.process = subprocess.Popen(args, env=env,
+                                            stdin=subprocess.PIPE,
+                                            stdout=subprocess.PIPE,
+                                            stderr=subprocess.STDOUT)
+        except (OSError, ValueError) as e:
+            error = _("%(exec_error)s\n"
+                      "Command: %(command)s") % {'exec_error': str(e),
+                                                 'command': ' '.join(args)}
+            LOG.exception(_LE('Unable to start the console of node %s'),
+                          node_uuid)
+            raise exception.ConsoleSubprocessFailed(error=error)
+        eventlet.spawn_n(self._forward_output)
+
+    @property
+    def running(self):
+        return self.process.poll() is None
+
+    def attach(self, conn):
+        """Connect a client to the console, disconnecting the previous one."""
+        previous, self.client = self.client, conn
+        if previous is not None:
+            _close(previous, _('Console taken over by another client.'))
+        eventlet.spawn_n(self._forward_input, conn)
+
+    def stop(self):
+        """Stop the console command and disconnect the client."""
+        if self.running:
+            try:
+                self.process.terminate()
+            except OSError as e:
+                if e.errno != errno.ESRCH:
+                    LOG.warning(_LW('Could not stop the console of node '
+                                    '%(node)s: %(err)s'),
+                                {'node': self.node_uuid, 'err': e})
+        if self.client is not None:
+            _close(self.client)
+            self.client = None
+
+    def _forward_output(self):
+        fd = self.process.stdout.fileno()
+        while True:
+            try:
+                data = green_os.read(fd, _BUFFER_SIZE)
+            except OSError:
+                data = b''
+            if not data:
+                break
+            client = self.client
+            if client is not None:
+                try:
+                    client.sendall(data)
+                except socket.error:
+                    pass
+        self.process.wait()
+        LOG.debug('The console of node %s exited.', self.node_uuid)
+        if _SESSIONS.get(self.node_uuid) is self:
+            del _SESSIONS[self.node_uuid]
+        self.stop()
+
+    def _forward_input(self, conn):
+        fd = self.process.stdin.fileno()
+        while True:
+            try:
+                data = conn.recv(_BUFFER_SIZE)
+            except socket.error:
+                data = b''
+            if not data or self.client is not conn:
+                break
+            try:
+                green_os.write(fd, data)
+            except OSError:
+                break
+        if self.client is conn:
+            # The client went away, free the SOL session of the BMC
+            LOG.debug('Client of the console of node %s disconnected.',
+                      self.node_uuid)
+            stop_session(self.node_uuid)
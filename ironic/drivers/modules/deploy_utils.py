@@ -25,14 +25,16 @@ from oslo_log import log as logging
 from oslo_serialization import jsonutils
 from oslo_utils import excutils
 from oslo_utils import strutils
+from oslo_utils import units
 import six
 from six.moves.urllib import parse
 
 from ironic.common import dhcp_factory
 from ironic.common import exception
 from ironic.common.glance_service import service_utils
-from ironic.common.i18n import _, _LE, _LW
+from ironic.common.i18n import _, _LE, _LI, _LW
 from ironic.common import image_service
+from ironic.common import images
 from ironic.common import keystone
 from ironic.common import states
 from ironic.common import utils
@@ -384,6 +386,39 @@ def deploy_disk_image(address, port, iqn, lun,
     return {'disk identifier': disk_identifier}
 
 
+def stream_disk_image(context, address, port, iqn, lun,
+                      image_href, node_uuid):
+    """Deploy a whole disk image by streaming it straight to a node's disk.
+
+    The image is downloaded from the image service and written to the
+    iSCSI target while being downloaded, without being cached on the
+    conductor beforehand.
+
+    :param context: context
+    :param address: The iSCSI IP address.
+    :param port: The iSCSI port number.
+    :param iqn: The iSCSI qualified name.
+    :param lun: The iSCSI logical unit number.
+    :param image_href: href of the instance's raw disk image.
+    :param node_uuid: node's uuid. Used for logging.
+    :raises: ImageUnacceptable if the image is not a raw image.
+    :raises: ImageDownloadFailed if the image can not be downloaded.
+    :returns: a dictionary containing the key 'disk identifier' to identify
+        the disk which was used for deployment.
+    """
+    with _iscsi_setup_and_handle_errors(address, port, iqn,
+                                        lun) as dev:
+        written = images.stream_to_device(
+            context, image_href, dev,
+            CONF.iscsi.stream_block_size * units.Mi)
+        LOG.info(_LI("Streamed %(bytes)d bytes of image %(image)s to the "
+                     "disk of node %(node)s."),
+                 {'bytes': written, 'image': image_href, 'node': node_uuid})
+        disk_identifier = disk_utils.get_disk_identifier(dev)
+
+    return {'disk identifier': disk_identifier}
+
+
 @contextlib.contextmanager
 def _iscsi_setup_and_handle_errors(address, port, iqn, lun):
     """Function that yields an iSCSI target device to work on.
@@ -612,7 +647,7 @@ def agent_execute_clean_step(task, step):
     :raises: NodeCleaningFailure if the agent does not return a command status
     :returns: states.CLEANWAIT to signify the step will be completed async
     """
-    client = agent_client.AgentClient()
+    client = agent_client.get_client()
     ports = objects.Port.list_by_node_id(
         task.context, task.node.id)
     result = client.execute_clean_step(step, task.node, ports)
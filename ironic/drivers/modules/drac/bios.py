@@ -90,6 +90,7 @@ def get_config(node):
     try:
         return client.list_bios_settings()
     except drac_exceptions.BaseClientException as exc:
+        drac_common.invalidate_drac_client(node)
         LOG.error(_LE('DRAC driver failed to get the BIOS settings for node '
                       '%(node_uuid)s. Reason: %(error)s.'),
                   {'node_uuid': node.uuid,
@@ -117,6 +118,7 @@ def set_config(task, **kwargs):
     try:
         return client.set_bios_settings(kwargs)
     except drac_exceptions.BaseClientException as exc:
+        drac_common.invalidate_drac_client(node)
         LOG.error(_LE('DRAC driver failed to set the BIOS settings for node '
                       '%(node_uuid)s. Reason: %(error)s.'),
                   {'node_uuid': node.uuid,
@@ -141,6 +143,7 @@ def commit_config(task, reboot=False):
     try:
         return client.commit_pending_bios_changes(reboot)
     except drac_exceptions.BaseClientException as exc:
+        drac_common.invalidate_drac_client(node)
         LOG.error(_LE('DRAC driver failed to commit the pending BIOS changes '
                       'for node %(node_uuid)s. Reason: %(error)s.'),
                   {'node_uuid': node.uuid,
@@ -160,6 +163,7 @@ def abandon_config(task):
     try:
         client.abandon_pending_bios_changes()
     except drac_exceptions.BaseClientException as exc:
+        drac_common.invalidate_drac_client(node)
         LOG.error(_LE('DRAC driver failed to delete the pending BIOS '
                       'settings for node %(node_uuid)s. Reason: %(error)s.'),
                   {'node_uuid': node.uuid,
@@ -17,6 +17,7 @@ Common functionalities shared between different DRAC modules.
 
 from oslo_utils import importutils
 
+from ironic.common import client_cache
 from ironic.common import exception
 from ironic.common.i18n import _
 from ironic.common import utils
@@ -98,17 +99,35 @@ def parse_driver_info(node):
 def get_drac_client(node):
     """Returns a DRACClient object from python-dracclient library.
 
+    The object is shared with the other operations on the same DRAC for
+    [DEFAULT]management_client_cache_ttl seconds.
+
     :param node: an ironic node object.
     :returns: a DRACClient object.
     :raises: InvalidParameterValue if mandatory information is missing on the
              node or on invalid input.
     """
-    driver_info = parse_driver_info(node)
-    client = drac_client.DRACClient(driver_info['drac_host'],
-                                    driver_info['drac_username'],
-                                    driver_info['drac_password'],
-                                    driver_info['drac_port'],
-                                    driver_info['drac_path'],
-                                    driver_info['drac_protocol'])
-
-    return client
+    params = _client_params(parse_driver_info(node))
+    return client_cache.get_client(
+        'drac', params, lambda: drac_client.DRACClient(*params))
+
+
+def _client_params(driver_info):
+    return (driver_info['drac_host'],
+            driver_info['drac_username'],
+            driver_info['drac_password'],
+            driver_info['drac_port'],
+            driver_info['drac_path'],
+            driver_info['drac_protocol'])
+
+
+def invalidate_drac_client(node):
+    """Drops the cached DRACClient object of a node.
+
+    To be called when an operation on the DRAC failed, as the failure may
+    come from a broken connection of the client.
+
+    :param node: an ironic node object.
+    """
+    client_cache.invalidate_client(
+        'drac', _client_params(parse_driver_info(node)))
@@ -56,6 +56,7 @@ def get_job(node, job_id):
     try:
         return client.get_job(job_id)
     except drac_exceptions.BaseClientException as exc:
+        drac_common.invalidate_drac_client(node)
         LOG.error(_LE('DRAC driver failed to get the job %(job_id)s '
                       'for node %(node_uuid)s. Reason: %(error)s.'),
                   {'node_uuid': node.uuid,
@@ -75,6 +76,7 @@ def list_unfinished_jobs(node):
     try:
         return client.list_jobs(only_unfinished=True)
     except drac_exceptions.BaseClientException as exc:
+        drac_common.invalidate_drac_client(node)
         LOG.error(_LE('DRAC driver failed to get the list of unfinished jobs '
                       'for node %(node_uuid)s. Reason: %(error)s.'),
                   {'node_uuid': node.uuid,
@@ -111,6 +111,7 @@ def set_boot_device(node, device, persistent=False):
         client.change_boot_device_order(boot_list, drac_boot_device)
         client.commit_pending_bios_changes()
     except drac_exceptions.BaseClientException as exc:
+        drac_common.invalidate_drac_client(node)
         LOG.error(_LE('DRAC driver failed to change boot device order for '
                       'node %(node_uuid)s. Reason: %(error)s.'),
                   {'node_uuid': node.uuid, 'error': exc})
@@ -55,6 +55,7 @@ def _get_power_state(node):
     try:
         drac_power_state = client.get_power_state()
     except drac_exceptions.BaseClientException as exc:
+        drac_common.invalidate_drac_client(node)
         LOG.error(_LE('DRAC driver failed to get power state for node '
                       '%(node_uuid)s. Reason: %(error)s.'),
                   {'node_uuid': node.uuid, 'error': exc})
@@ -103,6 +104,7 @@ def _set_power_state(node, power_state):
     try:
         client.set_power_state(target_power_state)
     except drac_exceptions.BaseClientException as exc:
+        drac_common.invalidate_drac_client(node)
         LOG.error(_LE('DRAC driver failed to set power state for node '
                       '%(node_uuid)s to %(power_state)s. '
                       'Reason: %(error)s.'),
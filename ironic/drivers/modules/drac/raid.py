@@ -18,14 +18,16 @@ DRAC RAID specific methods
 import math
 
 from futurist import periodics
+from futurist import waiters
 from oslo_log import log as logging
 from oslo_utils import importutils
 from oslo_utils import units
+from six.moves import queue
 
 from ironic.common import exception
 from ironic.common import raid as raid_common
 from ironic.common import states
-from ironic.common.i18n import _, _LE, _LI
+from ironic.common.i18n import _, _LE, _LI, _LW
 from ironic.conductor import task_manager
 from ironic.conf import CONF
 from ironic.drivers import base
@@ -89,6 +91,7 @@ def list_raid_controllers(node):
     try:
         return client.list_raid_controllers()
     except drac_exceptions.BaseClientException as exc:
+        drac_common.invalidate_drac_client(node)
         LOG.error(_LE('DRAC driver failed to get the list of RAID controllers '
                       'for node %(node_uuid)s. Reason: %(error)s.'),
                   {'node_uuid': node.uuid, 'error': exc})
@@ -107,6 +110,7 @@ def list_virtual_disks(node):
     try:
         return client.list_virtual_disks()
     except drac_exceptions.BaseClientException as exc:
+        drac_common.invalidate_drac_client(node)
         LOG.error(_LE('DRAC driver failed to get the list of virtual disks '
                       'for node %(node_uuid)s. Reason: %(error)s.'),
                   {'node_uuid': node.uuid, 'error': exc})
@@ -125,6 +129,7 @@ def list_physical_disks(node):
     try:
         return client.list_physical_disks()
     except drac_exceptions.BaseClientException as exc:
+        drac_common.invalidate_drac_client(node)
         LOG.error(_LE('DRAC driver failed to get the list of physical disks '
                       'for node %(node_uuid)s. Reason: %(error)s.'),
                   {'node_uuid': node.uuid, 'error': exc})
@@ -162,6 +167,7 @@ def create_virtual_disk(node, raid_controller, physical_disks, raid_level,
                                           raid_level, size_mb, disk_name,
                                           span_length, span_depth)
     except drac_exceptions.BaseClientException as exc:
+        drac_common.invalidate_drac_client(node)
         LOG.error(_LE('DRAC driver failed to create virtual disk for node '
                       '%(node_uuid)s. Reason: %(error)s.'),
                   {'node_uuid': node.uuid,
@@ -190,6 +196,7 @@ def delete_virtual_disk(node, virtual_disk):
     try:
         return client.delete_virtual_disk(virtual_disk)
     except drac_exceptions.BaseClientException as exc:
+        drac_common.invalidate_drac_client(node)
         LOG.error(_LE('DRAC driver failed to delete virtual disk '
                       '%(virtual_disk_fqdd)s for node %(node_uuid)s. '
                       'Reason: %(error)s.'),
@@ -214,6 +221,7 @@ def commit_config(node, raid_controller, reboot=False):
     try:
         return client.commit_pending_raid_changes(raid_controller, reboot)
     except drac_exceptions.BaseClientException as exc:
+        drac_common.invalidate_drac_client(node)
         LOG.error(_LE('DRAC driver failed to commit pending RAID config for'
                       ' controller %(raid_controller_fqdd)s on node '
                       '%(node_uuid)s. Reason: %(error)s.'),
@@ -235,6 +243,7 @@ def abandon_config(node, raid_controller):
     try:
         client.abandon_pending_raid_changes(raid_controller)
     except drac_exceptions.BaseClientException as exc:
+        drac_common.invalidate_drac_client(node)
         LOG.error(_LE('DRAC driver failed to delete pending RAID config '
                       'for controller %(raid_controller_fqdd)s on node '
                       '%(node_uuid)s. Reason: %(error)s.'),
@@ -482,8 +491,9 @@ def _find_configuration(logical_disks, physical_disks):
 
 
 def _calculate_volume_props(logical_disk, physical_disks, free_space_mb):
+    selected_disk_ids = set(logical_disk['physical_disks'])
     selected_disks = [disk for disk in physical_disks
-                      if disk.id in logical_disk['physical_disks']]
+                      if disk.id in selected_disk_ids]
 
     spans_count = _calculate_spans(
         logical_disk['raid_level'], len(selected_disks))
@@ -529,8 +539,48 @@ def _calculate_volume_props(logical_disk, physical_disks, free_space_mb):
         logical_disk['controller'] = selected_disks[0].controller
 
 
+def _disks_state(logical_disks, physical_disks_by_type, free_space_mb):
+    """Identify a state of the search of _assign_disks_to_volume.
+
+    The outcome of the search only depends on the volumes left to assign
+    and on the free space of the disks at each position of the lists of
+    disks of each type, not on which disks they are. Volumes which do not
+    share physical disks only see the disks which are still entirely free,
+    so when none of the volumes left shares them, the other disks are left
+    out of the state.
+
+    :param logical_disks: the volumes left to assign.
+    :param physical_disks_by_type: the disks grouped by type.
+    :param free_space_mb: the free space of each disk.
+    :returns: a hashable identifying the state.
+    """
+    if any(volume.get('share_physical_disks', False)
+           for volume in logical_disks):
+        disks_state = tuple(
+            (disk_type, tuple((disk.free_size_mb, free_space_mb[disk])
+                              for disk in disks))
+            for disk_type, disks in physical_disks_by_type.items())
+    else:
+        disks_state = tuple(
+            (disk_type, tuple(disk.free_size_mb for disk in disks
+                              if 0 < free_space_mb[disk] == disk.free_size_mb))
+            for disk_type, disks in physical_disks_by_type.items())
+
+    return (len(logical_disks), disks_state)
+
+
 def _assign_disks_to_volume(logical_disks, physical_disks_by_type,
-                            free_space_mb):
+                            free_space_mb, failed_states=None):
+    if failed_states is None:
+        # states already known not to lead to a solution, shared by the
+        # recursive calls of the current search
+        failed_states = set()
+
+    state = _disks_state(logical_disks, physical_disks_by_type,
+                         free_space_mb)
+    if state in failed_states:
+        return (False, free_space_mb)
+
     logical_disk = logical_disks.pop(0)
     raid_level = logical_disk['raid_level']
 
@@ -595,7 +645,8 @@ def _assign_disks_to_volume(logical_disks, physical_disks_by_type,
                 result, candidate_free_space_mb = (
                     _assign_disks_to_volume(logical_disks,
                                             physical_disks_by_type,
-                                            candidate_free_space_mb))
+                                            candidate_free_space_mb,
+                                            failed_states))
                 if result:
                     logical_disks.append(candidate_volume)
                     return (True, candidate_free_space_mb)
@@ -605,6 +656,7 @@ def _assign_disks_to_volume(logical_disks, physical_disks_by_type,
     else:
         # put back the logical_disk to queue
         logical_disks.insert(0, logical_disk)
+        failed_states.add(state)
         return (False, free_space_mb)
 
 
@@ -786,44 +838,105 @@ class DracRAID(base.RAIDInterface):
     @periodics.periodic(
         spacing=CONF.drac.query_raid_config_job_status_interval)
     def _query_raid_config_job_status(self, manager, context):
-        """Periodic task to check the progress of running RAID config jobs."""
+        """Periodic task to check the progress of running RAID config jobs.
+
+        The nodes are checked concurrently, by at most
+        CONF.drac.query_raid_config_job_status_workers workers of the
+        conductor taking them from a shared queue.
+        """
 
         filters = {'reserved': False, 'maintenance': False}
         fields = ['driver_internal_info']
 
+        nodes = queue.Queue()
         node_list = manager.iter_nodes(fields=fields, filters=filters)
         for (node_uuid, driver, driver_internal_info) in node_list:
+            job_ids = driver_internal_info.get('raid_config_job_ids')
+            if job_ids:
+                nodes.put_nowait(node_uuid)
+
+        number_of_workers = min(
+            CONF.drac.query_raid_config_job_status_workers,
+            CONF.conductor.periodic_max_workers,
+            nodes.qsize())
+        futures = []
+        for worker_number in range(number_of_workers):
             try:
-                lock_purpose = 'checking async raid configuration jobs'
-                with task_manager.acquire(context, node_uuid,
-                                          purpose=lock_purpose,
-                                          shared=True) as task:
-                    if not isinstance(task.driver.raid, DracRAID):
-                        continue
-
-                    job_ids = driver_internal_info.get('raid_config_job_ids')
-                    if not job_ids:
-                        continue
-
-                    self._check_node_raid_jobs(task)
-
-            except exception.NodeNotFound:
-                LOG.info(_LI("During query_raid_config_job_status, node "
-                             "%(node)s was not found and presumed deleted by "
-                             "another process."), {'node': node_uuid})
-            except exception.NodeLocked:
-                LOG.info(_LI("During query_raid_config_job_status, node "
-                             "%(node)s was already locked by another process. "
-                             "Skip."), {'node': node_uuid})
+                futures.append(manager._spawn_worker(
+                    self._query_raid_config_job_status_task, context,
+                    nodes))
+            except exception.NoFreeConductorWorker:
+                LOG.warning(_LW('There are no more conductor workers for '
+                                'checking the RAID config jobs. %(workers)d '
+                                'workers have been already spawned.'),
+                            {'workers': worker_number})
+                break
+
+        if not futures:
+            # Check the nodes from this thread instead
+            self._query_raid_config_job_status_task(context, nodes)
+            return
 
-    def _check_node_raid_jobs(self, task):
+        waiters.wait_for_all(futures)
+
+    def _query_raid_config_job_status_task(self, context, nodes):
+        """Check the RAID config jobs of the nodes taken from a queue.
+
+        :param context: request context.
+        :param nodes: a queue of node UUIDs, shared by all the workers of
+            the current pass.
+        """
+        while True:
+            try:
+                node_uuid = nodes.get_nowait()
+            except queue.Empty:
+                break
+            self._query_node_raid_config_job_status(context, node_uuid)
+
+    def _query_node_raid_config_job_status(self, context, node_uuid):
         """Check the progress of running RAID config jobs of a node."""
 
+        try:
+            lock_purpose = 'checking async raid configuration jobs'
+            with task_manager.acquire(context, node_uuid,
+                                      purpose=lock_purpose,
+                                      shared=True) as task:
+                if not isinstance(task.driver.raid, DracRAID):
+                    return
+
+                self._check_node_raid_jobs(task)
+
+        except exception.NodeNotFound:
+            LOG.info(_LI("During query_raid_config_job_status, node "
+                         "%(node)s was not found and presumed deleted by "
+                         "another process."), {'node': node_uuid})
+        except exception.NodeLocked:
+            LOG.info(_LI("During query_raid_config_job_status, node "
+                         "%(node)s was already locked by another process. "
+                         "Skip."), {'node': node_uuid})
+        except Exception:
+            LOG.exception(_LE("During query_raid_config_job_status, "
+                              "checking the RAID config jobs of node "
+                              "%(node)s failed."), {'node': node_uuid})
+
+    def _check_node_raid_jobs(self, task):
+        """Check the progress of running RAID config jobs of a node.
+
+        The unfinished jobs of the node are listed with a single request.
+        Only the jobs which are not in this list anymore are then fetched,
+        to find out whether they were completed or failed.
+        """
+
         node = task.node
         raid_config_job_ids = node.driver_internal_info['raid_config_job_ids']
+        unfinished_job_ids = set(
+            job.id for job in drac_job.list_unfinished_jobs(node))
         finished_job_ids = []
 
         for config_job_id in raid_config_job_ids:
+            if config_job_id in unfinished_job_ids:
+                continue
+
             config_job = drac_job.get_job(node, job_id=config_job_id)
 
             if config_job.state == 'Completed':
@@ -164,6 +164,8 @@ def _get_boot_iso(task, root_uuid):
     # not implemented as of now. Creation/Deletion of such a shared boot ISO
     # will require synchronisation across conductor nodes for the shared boot
     # ISO.  Such a synchronisation mechanism doesn't exist in ironic as of now.
+    # Within a conductor, boot ISOs generated from the same inputs are shared
+    # through the boot image cache, see [DEFAULT]boot_image_cache_dir.
 
     # Option 3 - Create boot_iso from kernel/ramdisk, upload to Swift
     # or web server and provide its name.
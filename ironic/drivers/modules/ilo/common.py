@@ -28,6 +28,7 @@ import six.moves.urllib.parse as urlparse
 from six.moves.urllib.parse import urljoin
 
 from ironic.common import boot_devices
+from ironic.common import client_cache
 from ironic.common import exception
 from ironic.common.glance_service import service_utils
 from ironic.common.i18n import _, _LE, _LI, _LW
@@ -37,6 +38,7 @@ from ironic.common import utils
 from ironic.conductor import utils as manager_utils
 from ironic.conf import CONF
 from ironic.drivers.modules import deploy_utils
+from ironic.drivers import utils as driver_utils
 
 ilo_client = importutils.try_import('proliantutils.ilo.client')
 ilo_error = importutils.try_import('proliantutils.exception')
@@ -97,8 +99,13 @@ def copy_image_to_web_server(source_file_path, destination):
     image_url = urljoin(CONF.deploy.http_url, destination)
     image_path = os.path.join(CONF.deploy.http_root, destination)
     try:
-        shutil.copyfile(source_file_path, image_path)
-    except IOError as exc:
+        if CONF.boot_image_cache_dir:
+            # NOTE: boot ISOs come from the boot image cache, share them
+            # with the other nodes instead of copying them.
+            images.link_or_copy(source_file_path, image_path)
+        else:
+            shutil.copyfile(source_file_path, image_path)
+    except (IOError, OSError) as exc:
         raise exception.ImageUploadFailed(image_name=destination,
                                           web_server=CONF.deploy.http_url,
                                           reason=exc)
@@ -177,6 +184,7 @@ def remove_image_from_swift(object_name, associated_with=None):
                                      if associated_with else ""), 'err': e})
 
 
+@driver_utils.cache_driver_info
 def parse_driver_info(node):
     """Gets the driver specific Node info.
 
@@ -241,7 +249,9 @@ def get_ilo_object(node):
     """Gets an IloClient object from proliantutils library.
 
     Given an ironic node object, this method gives back a IloClient object
-    to do operations on the iLO.
+    to do operations on the iLO. The object is shared with the other
+    operations on the same iLO for [DEFAULT]management_client_cache_ttl
+    seconds.
 
     :param node: an ironic node object.
     :returns: an IloClient object.
@@ -250,13 +260,38 @@ def get_ilo_object(node):
         is missing on the node
     """
     driver_info = parse_driver_info(node)
-    ilo_object = ilo_client.IloClient(driver_info['ilo_address'],
-                                      driver_info['ilo_username'],
-                                      driver_info['ilo_password'],
-                                      driver_info['client_timeout'],
-                                      driver_info['client_port'],
-                                      cacert=driver_info.get('ca_file'))
-    return ilo_object
+
+    def _create():
+        return ilo_client.IloClient(driver_info['ilo_address'],
+                                    driver_info['ilo_username'],
+                                    driver_info['ilo_password'],
+                                    driver_info['client_timeout'],
+                                    driver_info['client_port'],
+                                    cacert=driver_info.get('ca_file'))
+
+    return client_cache.get_client('ilo', _client_params(driver_info),
+                                   _create)
+
+
+def _client_params(driver_info):
+    return (driver_info['ilo_address'],
+            driver_info['ilo_username'],
+            driver_info['ilo_password'],
+            driver_info['client_timeout'],
+            driver_info['client_port'],
+            driver_info.get('ca_file'))
+
+
+def invalidate_ilo_object(node):
+    """Drops the cached IloClient object of a node.
+
+    To be called when an operation on the iLO failed, as the failure may
+    come from a broken connection or an expired session of the client.
+
+    :param node: an ironic node object.
+    """
+    client_cache.invalidate_client(
+        'ilo', _client_params(parse_driver_info(node)))
 
 
 def get_ilo_license(node):
@@ -279,6 +314,7 @@ def get_ilo_license(node):
     try:
         license_info = ilo_object.get_all_licenses()
     except ilo_error.IloError as ilo_exception:
+        invalidate_ilo_object(node)
         raise exception.IloOperationError(operation=_('iLO license check'),
                                           error=str(ilo_exception))
 
@@ -382,6 +418,7 @@ def attach_vmedia(node, device, url):
         ilo_object.set_vm_status(
             device=device, boot_option='CONNECT', write_protect='YES')
     except ilo_error.IloError as ilo_exception:
+        invalidate_ilo_object(node)
         operation = _("Inserting virtual media %s") % device
         raise exception.IloOperationError(
             operation=operation, error=ilo_exception)
@@ -412,6 +449,7 @@ def set_boot_mode(node, boot_mode):
         ilo_object.set_pending_boot_mode(
             BOOT_MODE_GENERIC_TO_ILO[boot_mode].upper())
     except ilo_error.IloError as ilo_exception:
+        invalidate_ilo_object(node)
         operation = _("Setting %s as boot mode") % boot_mode
         raise exception.IloOperationError(
             operation=operation, error=ilo_exception)
@@ -471,6 +509,7 @@ def update_boot_mode(task):
             ilo_object.set_pending_boot_mode(
                 BOOT_MODE_GENERIC_TO_ILO[boot_mode].upper())
         except ilo_error.IloError as ilo_exception:
+            invalidate_ilo_object(node)
             operation = _("Setting %s as boot mode") % boot_mode
             raise exception.IloOperationError(operation=operation,
                                               error=ilo_exception)
@@ -573,6 +612,7 @@ def eject_vmedia_devices(task):
         try:
             ilo_object.eject_virtual_media(device)
         except ilo_error.IloError as ilo_exception:
+            invalidate_ilo_object(task.node)
             LOG.error(_LE("Error while ejecting virtual media %(device)s "
                           "from node %(uuid)s. Error: %(error)s"),
                       {'device': device, 'uuid': task.node.uuid,
@@ -627,6 +667,7 @@ def get_secure_boot_mode(task):
         raise exception.IloOperationNotSupported(operation=operation,
                                                  error=ilo_exception)
     except ilo_error.IloError as ilo_exception:
+        invalidate_ilo_object(task.node)
         raise exception.IloOperationError(operation=operation,
                                           error=ilo_exception)
 
@@ -660,6 +701,7 @@ def set_secure_boot_mode(task, flag):
                                                  error=ilo_exception)
 
     except ilo_error.IloError as ilo_exception:
+        invalidate_ilo_object(task.node)
         raise exception.IloOperationError(operation=operation,
                                           error=ilo_exception)
 
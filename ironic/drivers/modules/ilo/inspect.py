@@ -77,6 +77,7 @@ def _get_essential_properties(node, ilo_object):
         # Retrieve the mandatory properties from hardware
         result = ilo_object.get_essential_properties()
     except ilo_error.IloError as e:
+        ilo_common.invalidate_ilo_object(node)
         raise exception.HardwareInspectionFailure(error=e)
     _validate(node, result)
     return result
@@ -75,6 +75,7 @@ def _execute_ilo_clean_step(node, step, *args, **kwargs):
                         "%(uuid)s. Skipping the clean step."),
                     {'step': step, 'uuid': node.uuid})
     except ilo_error.IloError as ilo_exception:
+        ilo_common.invalidate_ilo_object(node)
         raise exception.NodeCleaningFailure(_(
             "Clean step %(step)s failed "
             "on node %(node)s with error: %(err)s") %
@@ -141,6 +142,7 @@ class IloManagement(base.ManagementInterface):
                 next_boot = ilo_object.get_persistent_boot_device()
 
         except ilo_error.IloError as ilo_exception:
+            ilo_common.invalidate_ilo_object(task.node)
             operation = _("Get boot device")
             raise exception.IloOperationError(operation=operation,
                                               error=ilo_exception)
@@ -184,6 +186,7 @@ class IloManagement(base.ManagementInterface):
                 ilo_object.update_persistent_boot([boot_device])
 
         except ilo_error.IloError as ilo_exception:
+            ilo_common.invalidate_ilo_object(task.node)
             operation = _("Setting %s as boot device") % device
             raise exception.IloOperationError(operation=operation,
                                               error=ilo_exception)
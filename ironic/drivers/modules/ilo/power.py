@@ -76,6 +76,7 @@ def _get_power_state(node):
         power_status = ilo_object.get_host_power_status()
 
     except ilo_error.IloError as ilo_exception:
+        ilo_common.invalidate_ilo_object(node)
         LOG.error(_LE("iLO get_power_state failed for node %(node_id)s with "
                       "error: %(error)s."),
                   {'node_id': node.uuid, 'error': ilo_exception})
@@ -148,6 +149,7 @@ def _set_power_state(task, target_state):
             raise exception.InvalidParameterValue(msg)
 
     except ilo_error.IloError as ilo_exception:
+        ilo_common.invalidate_ilo_object(node)
         LOG.error(_LE("iLO set_power_state failed to set state to %(tstate)s "
                       " for node %(node_id)s with error: %(error)s"),
                   {'tstate': target_state, 'node_id': node.uuid,
@@ -30,10 +30,13 @@ DRIVER.
 """
 
 import contextlib
+import functools
+import glob
 import os
 import re
 import subprocess
 import tempfile
+import threading
 import time
 
 from ironic_lib import metrics_utils
@@ -42,6 +45,8 @@ from oslo_concurrency import processutils
 from oslo_log import log as logging
 from oslo_service import loopingcall
 from oslo_utils import excutils
+from oslo_utils import fileutils
+from oslo_utils import importutils
 from oslo_utils import strutils
 import six
 
@@ -53,10 +58,16 @@ from ironic.common import utils
 from ironic.conductor import task_manager
 from ironic.conf import CONF
 from ironic.drivers import base
+from ironic.drivers.modules import console_proxy
 from ironic.drivers.modules import console_utils
 from ironic.drivers.modules import deploy_utils
 from ironic.drivers import utils as driver_utils
 
+pyghmi = importutils.try_import('pyghmi')
+if pyghmi:
+    from pyghmi import exceptions as pyghmi_exception
+    from pyghmi.ipmi import command as ipmi_command
+
 
 LOG = logging.getLogger(__name__)
 
@@ -109,7 +120,6 @@ BRIDGING_OPTIONS = [('local_address', '-m'),
                     ('transit_channel', '-B'), ('transit_address', '-T'),
                     ('target_channel', '-b'), ('target_address', '-t')]
 
-LAST_CMD_TIME = {}
 TIMING_SUPPORT = None
 SINGLE_BRIDGE_SUPPORT = None
 DUAL_BRIDGE_SUPPORT = None
@@ -128,6 +138,57 @@ ipmitool_command_options = {
 # form regardless of locale.
 IPMITOOL_RETRYABLE_FAILURES = ['insufficient resources for session']
 
+# Chassis Control request data (IPMI v2.0 section 28.3) and the output of
+# ipmitool for the "power" commands sent through persistent sessions.
+SESSION_POWER_COMMANDS = {'off': (0x00, 'Down/Off'),
+                          'on': (0x01, 'Up/On'),
+                          'cycle': (0x02, 'Cycle'),
+                          'reset': (0x03, 'Reset'),
+                          'soft': (0x05, 'Soft')}
+
+# Persistent IPMI sessions, keyed by the BMC address, port and credentials.
+IPMI_SESSIONS = {}
+
+# Get SDR Repository Info (IPMI v2.0 section 33.9). The response holds the
+# SDR version, the number of records and the time of the most recent
+# addition and erase, which identify the content of the repository.
+SDR_REPOSITORY_INFO_COMMAND = 'raw 0x0a 0x20'
+
+# Content of the SDR repositories of the BMCs, keyed by node UUID, as
+# (BMC address, repository key, time it was checked at) tuples.
+SDR_REPOSITORY_KEYS = {}
+
+# SDR dumps not used for this long, e.g. of deleted nodes, are removed.
+_SDR_CACHE_MAX_UNUSED = 24 * 60 * 60
+_SDR_CACHE_PRUNE_INTERVAL = 60 * 60
+_SDR_CACHE_NEXT_PRUNE = 0
+
+# Command queues, keyed by the BMC address.
+BMC_COMMAND_QUEUES = {}
+
+
+@utils.register_reset
+def _reset():
+    """Forget the IPMI sessions, command queues and SDR repositories."""
+    global _SDR_CACHE_NEXT_PRUNE
+    IPMI_SESSIONS.clear()
+    BMC_COMMAND_QUEUES.clear()
+    SDR_REPOSITORY_KEYS.clear()
+    _SDR_CACHE_NEXT_PRUNE = 0
+
+
+# Prefixes of the ipmitool commands which only read the state of the BMC.
+# Identical read commands sent concurrently to a BMC are coalesced.
+IPMITOOL_READ_COMMANDS = ('power status', 'chassis status',
+                          'chassis bootparam get ', 'sdr -v',
+                          SDR_REPOSITORY_INFO_COMMAND)
+
+# Parameters of driver_info which identify the target of an IPMI request.
+_REQUEST_TARGET_PARAMS = ('dest_port', 'username', 'password', 'priv_level',
+                          'protocol_version', 'local_address',
+                          'transit_channel', 'transit_address',
+                          'target_channel', 'target_address')
+
 # NOTE(lucasagomes): A mapping for the boot devices and their hexadecimal
 # value. For more information about these values see the "Set System Boot
 # Options Command" section of the link below (page 418)
@@ -243,6 +304,7 @@ def _make_password_file(password):
             f.close()
 
 
+@driver_utils.cache_driver_info
 def _parse_driver_info(node):
     """Gets the parameters required for ipmitool to access the node.
 
@@ -360,9 +422,274 @@ def _parse_driver_info(node):
     }
 
 
+class _PendingRead(object):
+    """The result of a read command, shared by the callers sending it."""
+
+    def __init__(self):
+        self.done = False
+        self.result = None
+        self.error = None
+
+
+class BMCCommandQueue(object):
+    """Serializes the IPMI commands sent to a BMC.
+
+    Only one command is sent to the BMC at a time, and at least
+    [ipmi]min_command_interval seconds apart. Write commands are sent
+    before the queued read commands, and a read command identical to one
+    which is queued or being sent is not sent again: its caller gets the
+    result of the pending one.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._busy = False
+        self._writes_waiting = 0
+        self._reads = {}
+        self.last_cmd_time = 0
+
+    def wait_for_interval(self):
+        """Sleep until the next command can be sent to the BMC."""
+        # NOTE(deva): ensure that no communications are sent to a BMC more
+        #             often than once every min_command_interval seconds.
+        time_till_next_poll = CONF.ipmi.min_command_interval - (
+            time.time() - self.last_cmd_time)
+        if time_till_next_poll > 0:
+            time.sleep(time_till_next_poll)
+
+    def execute(self, func, read_key=None):
+        """Send a command to the BMC when no other command is being sent.
+
+        :param func: a callable sending the command and returning its
+                     result.
+        :param read_key: for a read command, a hashable identifying it.
+                         None for a write command.
+        :returns: the result of func.
+        :raises: any exception raised by func.
+        """
+        with self._cond:
+            if read_key is not None:
+                pending = self._reads.get(read_key)
+                if pending is not None:
+                    while not pending.done:
+                        self._cond.wait()
+                    if pending.error is not None:
+                        raise pending.error
+                    return pending.result
+                pending = self._reads[read_key] = _PendingRead()
+                while self._busy or self._writes_waiting:
+                    self._cond.wait()
+            else:
+                self._writes_waiting += 1
+                try:
+                    while self._busy:
+                        self._cond.wait()
+                finally:
+                    self._writes_waiting -= 1
+            self._busy = True
+
+        result = error = None
+        try:
+            result = func()
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            with self._cond:
+                self._busy = False
+                if read_key is not None:
+                    del self._reads[read_key]
+                    pending.result = result
+                    pending.error = error
+                    pending.done = True
+                self._cond.notify_all()
+        return result
+
+
+def _get_command_queue(driver_info):
+    """Get the command queue of the node's BMC.
+
+    :param driver_info: the ipmitool parameters for accessing a node.
+    :returns: a BMCCommandQueue object.
+    """
+    return BMC_COMMAND_QUEUES.setdefault(driver_info['address'],
+                                         BMCCommandQueue())
+
+
+def _get_read_key(driver_info, command, check_exit_code):
+    """Identify a read command for coalescing it.
+
+    :param driver_info: the ipmitool parameters for accessing a node.
+    :param command: the ipmitool command to be executed.
+    :param check_exit_code: the allowed exit codes of the command.
+    :returns: a hashable identifying the command and its target, or None
+              if the command is not a read command.
+    """
+    if check_exit_code is not None:
+        return None
+    args = command.split(' ')
+    if args[0] == '-S':
+        # Reading the SDR from a cache file
+        args = args[2:]
+    if not ' '.join(args).startswith(IPMITOOL_READ_COMMANDS):
+        return None
+    return (command,) + tuple(driver_info[param]
+                              for param in _REQUEST_TARGET_PARAMS)
+
+
+def _check_session_support(driver_name):
+    """Check that persistent IPMI sessions can be used if enabled.
+
+    :param driver_name: the name of the interface being loaded.
+    :raises: DriverLoadError if [ipmi]use_persistent_sessions is True
+             and the pyghmi library is not available.
+    """
+    if CONF.ipmi.use_persistent_sessions and not pyghmi:
+        raise exception.DriverLoadError(
+            driver=driver_name,
+            reason=_("Unable to import pyghmi library, which is required "
+                     "when [ipmi]use_persistent_sessions is True"))
+
+
+def _parse_session_command(command):
+    """Translate an ipmitool command into an IPMI request.
+
+    :param command: the ipmitool command, e.g. "power status".
+    :returns: a tuple (netfn, command, data) with the request to send, or
+              None if the command can not be sent through a persistent
+              session.
+    """
+    args = command.split()
+    if args == ['power', 'status']:
+        # Get Chassis Status
+        return 0x00, 0x01, []
+    if (len(args) == 2 and args[0] == 'power' and
+            args[1] in SESSION_POWER_COMMANDS):
+        # Chassis Control
+        return 0x00, 0x02, [SESSION_POWER_COMMANDS[args[1]][0]]
+    if len(args) >= 3 and args[0] == 'raw':
+        try:
+            request = [int(arg, 16) for arg in args[1:]]
+        except ValueError:
+            return None
+        return request[0], request[1], request[2:]
+    return None
+
+
+def _use_persistent_session(driver_info, command):
+    """Whether to send the command through a persistent session.
+
+    :param driver_info: the ipmitool parameters for accessing a node.
+    :param command: the ipmitool command to be executed.
+    :returns: True if the command can be sent through a persistent
+              session to this BMC, False if ipmitool has to be run.
+    """
+    return bool(CONF.ipmi.use_persistent_sessions and pyghmi and
+                driver_info['protocol_version'] == '2.0' and
+                driver_info['priv_level'] == 'ADMINISTRATOR' and
+                all(driver_info[name] is None
+                    for name, option in BRIDGING_OPTIONS) and
+                _parse_session_command(command) is not None)
+
+
+def _session_key(driver_info):
+    return (driver_info['address'], driver_info['dest_port'],
+            driver_info['username'], driver_info['password'])
+
+
+def _get_ipmi_session(driver_info):
+    """Get the persistent IPMI session to the node's BMC.
+
+    The session is established on first use and then kept alive by pyghmi
+    until it fails.
+
+    :param driver_info: the ipmitool parameters for accessing a node.
+    :returns: a pyghmi Command object bound to the session.
+    :raises: pyghmi IpmiException if the session can not be established.
+    """
+    key = _session_key(driver_info)
+    session = IPMI_SESSIONS.get(key)
+    if session is None:
+        LOG.debug('Establishing a persistent IPMI session to %(address)s '
+                  'for node %(node)s',
+                  {'address': driver_info['address'],
+                   'node': driver_info['uuid']})
+        session = ipmi_command.Command(
+            bmc=driver_info['address'],
+            userid=driver_info['username'] or '',
+            password=driver_info['password'] or '',
+            port=int(driver_info['dest_port'] or 623))
+        IPMI_SESSIONS[key] = session
+    return session
+
+
+def _format_session_output(command, data):
+    """Format the response to a command as ipmitool would print it.
+
+    :param command: the ipmitool command that was executed.
+    :param data: the response data bytes.
+    :returns: the output of the ipmitool command.
+    """
+    args = command.split()
+    if args[0] == 'power':
+        if args[1] == 'status':
+            state = 'on' if data and data[0] & 0x01 else 'off'
+            return 'Chassis Power is %s\n' % state
+        return ('Chassis Power Control: %s\n' %
+                SESSION_POWER_COMMANDS[args[1]][1])
+    lines = [''.join(' %02x' % byte for byte in data[i:i + 16])
+             for i in range(0, len(data), 16)]
+    return ''.join(line + '\n' for line in lines)
+
+
+def _exec_session_command(queue, driver_info, command):
+    """Send an ipmitool command through a persistent IPMI session.
+
+    :param queue: the BMCCommandQueue of the node's BMC.
+    :param driver_info: the ipmitool parameters for accessing a node.
+    :param command: the ipmitool command to be executed, it must be
+                    supported by _parse_session_command().
+    :returns: (stdout, stderr) as ipmitool would have returned them.
+    :raises: processutils.ProcessExecutionError if the session fails or
+             the BMC returns an error.
+    """
+    netfn, cmd, data = _parse_session_command(command)
+    queue.wait_for_interval()
+    try:
+        session = _get_ipmi_session(driver_info)
+        response = session.raw_command(netfn=netfn, command=cmd, data=data)
+    except pyghmi_exception.IpmiException as e:
+        # Drop the session, the next command establishes a new one
+        IPMI_SESSIONS.pop(_session_key(driver_info), None)
+        LOG.error(_LE('IPMI Error while attempting "%(cmd)s" through a '
+                      'persistent session for node %(node)s. '
+                      'Error: %(error)s'),
+                  {'node': driver_info['uuid'], 'cmd': command, 'error': e})
+        raise processutils.ProcessExecutionError(
+            stderr=six.text_type(e), cmd='ipmitool %s' % command,
+            description=_('IPMI session failure'))
+    finally:
+        queue.last_cmd_time = time.time()
+
+    if response.get('error'):
+        LOG.error(_LE('IPMI Error while attempting "%(cmd)s" for node '
+                      '%(node)s. Error: %(error)s'),
+                  {'node': driver_info['uuid'], 'cmd': command,
+                   'error': response['error']})
+        raise processutils.ProcessExecutionError(
+            stderr=response['error'], exit_code=1,
+            cmd='ipmitool %s' % command)
+
+    return _format_session_output(command, response.get('data', [])), ''
+
+
 def _exec_ipmitool(driver_info, command, check_exit_code=None):
     """Execute the ipmitool command.
 
+    The commands sent to a BMC go through its BMCCommandQueue. If
+    [ipmi]use_persistent_sessions is True, power and raw commands are sent
+    through a persistent IPMI session instead of running ipmitool.
+
     :param driver_info: the ipmitool parameters for accessing a node.
     :param command: the ipmitool command to be executed.
     :param check_exit_code: Single bool, int, or list of allowed exit codes.
@@ -372,6 +699,31 @@ def _exec_ipmitool(driver_info, command, check_exit_code=None):
     :raises: processutils.ProcessExecutionError from executing the command.
 
     """
+    queue = _get_command_queue(driver_info)
+    if _use_persistent_session(driver_info, command):
+        func = functools.partial(_exec_session_command, queue, driver_info,
+                                 command)
+    else:
+        func = functools.partial(_run_ipmitool, queue, driver_info, command,
+                                 check_exit_code)
+    return queue.execute(
+        func, read_key=_get_read_key(driver_info, command, check_exit_code))
+
+
+def _run_ipmitool(queue, driver_info, command, check_exit_code=None):
+    """Run ipmitool, retrying on the failures which can be retried.
+
+    :param queue: the BMCCommandQueue of the node's BMC.
+    :param driver_info: the ipmitool parameters for accessing a node.
+    :param command: the ipmitool command to be executed.
+    :param check_exit_code: Single bool, int, or list of allowed exit codes.
+    :returns: (stdout, stderr) from executing the command.
+    :raises: PasswordFileFailedToCreate from creating or writing to the
+             temporary file.
+    :raises: processutils.ProcessExecutionError from executing the command.
+
+    """
+
     ipmi_version = ('lanplus'
                     if driver_info['protocol_version'] == '2.0'
                     else 'lan')
@@ -411,12 +763,7 @@ def _exec_ipmitool(driver_info, command, check_exit_code=None):
 
     while True:
         num_tries = num_tries - 1
-        # NOTE(deva): ensure that no communications are sent to a BMC more
-        #             often than once every min_command_interval seconds.
-        time_till_next_poll = CONF.ipmi.min_command_interval - (
-            time.time() - LAST_CMD_TIME.get(driver_info['address'], 0))
-        if time_till_next_poll > 0:
-            time.sleep(time_till_next_poll)
+        queue.wait_for_interval()
         # Resetting the list that will be utilized so the password arguments
         # from any previous execution are preserved.
         cmd_args = args[:]
@@ -454,7 +801,7 @@ def _exec_ipmitool(driver_info, command, check_exit_code=None):
                                     'cmd': e.cmd, 'error': e
                                     })
             finally:
-                LAST_CMD_TIME[driver_info['address']] = time.time()
+                queue.last_cmd_time = time.time()
 
 
 def _sleep_time(iter):
@@ -582,20 +929,6 @@ def _power_status(driver_info):
         return states.ERROR
 
 
-def _process_sensor(sensor_data):
-    sensor_data_fields = sensor_data.split('\n')
-    sensor_data_dict = {}
-    for field in sensor_data_fields:
-        if not field:
-            continue
-        kv_value = field.split(':')
-        if len(kv_value) != 2:
-            continue
-        sensor_data_dict[kv_value[0].strip()] = kv_value[1].strip()
-
-    return sensor_data_dict
-
-
 def _get_sensor_type(node, sensor_data_dict):
     # Have only three sensor type name IDs: 'Sensor Type (Analog)'
     # 'Sensor Type (Discrete)' and 'Sensor Type (Threshold)'
@@ -622,6 +955,9 @@ def _parse_ipmi_sensors_data(node, sensors_data):
     dict-based data for Ceilometer Collector which can be sent it as payload
     out via notification bus and consumed by Ceilometer Collector.
 
+    The output is parsed in a single pass: each sensor is a block of
+    "name : value" lines, and blocks are separated by an empty line.
+
     :param sensors_data: the sensor data returned by ipmitool command.
     :returns: the sensor data with JSON format, grouped by sensor type.
     :raises: FailedToParseSensorData when error encountered during parsing.
@@ -631,9 +967,16 @@ def _parse_ipmi_sensors_data(node, sensors_data):
     if not sensors_data:
         return sensors_data_dict
 
-    sensors_data_array = sensors_data.split('\n\n')
-    for sensor_data in sensors_data_array:
-        sensor_data_dict = _process_sensor(sensor_data)
+    sensor_data_dict = {}
+    lines = sensors_data.split('\n')
+    # an empty line terminates the last sensor
+    lines.append('')
+    for line in lines:
+        if line:
+            key, sep, value = line.partition(':')
+            if sep and ':' not in value:
+                sensor_data_dict[key.strip()] = value.strip()
+            continue
         if not sensor_data_dict:
             continue
 
@@ -644,6 +987,7 @@ def _parse_ipmi_sensors_data(node, sensors_data):
             sensors_data_dict.setdefault(
                 sensor_type,
                 {})[sensor_data_dict['Sensor ID']] = sensor_data_dict
+        sensor_data_dict = {}
 
     # get nothing, no valid sensor data
     if not sensors_data_dict:
@@ -717,6 +1061,109 @@ def dump_sdr(task, file_path):
         raise exception.IPMIFailure(cmd=cmd)
 
 
+def _get_sdr_repository_key(driver_info):
+    """Identify the content of the SDR repository of the node's BMC.
+
+    :param driver_info: the ipmitool parameters for accessing a node.
+    :returns: a string which changes when the SDR repository changes, or
+              None if it can not be determined.
+    """
+    try:
+        out, err = _exec_ipmitool(driver_info, SDR_REPOSITORY_INFO_COMMAND)
+    except (exception.PasswordFileFailedToCreate,
+            processutils.ProcessExecutionError) as e:
+        LOG.debug('Unable to get the SDR repository info of node %(node)s, '
+                  'not caching the SDR. Error: %(error)s',
+                  {'node': driver_info['uuid'], 'error': e})
+        return None
+    return ''.join(out.split()) or None
+
+
+def _prune_sdr_cache(cache_dir, now):
+    """Remove the SDR dumps which were not used for a while.
+
+    :param cache_dir: the SDR cache directory.
+    :param now: the current time.
+    """
+    global _SDR_CACHE_NEXT_PRUNE
+    if now < _SDR_CACHE_NEXT_PRUNE:
+        return
+    _SDR_CACHE_NEXT_PRUNE = now + _SDR_CACHE_PRUNE_INTERVAL
+    threshold = now - _SDR_CACHE_MAX_UNUSED
+    for path in glob.glob(os.path.join(cache_dir, '*.sdr')):
+        try:
+            # NOTE: the modification time is the time of last use
+            if os.path.getmtime(path) < threshold:
+                LOG.debug('Removing unused SDR dump %s', path)
+                os.unlink(path)
+        except OSError:
+            continue
+    for node_uuid, (_address, _key, checked_at) in list(
+            SDR_REPOSITORY_KEYS.items()):
+        if checked_at < threshold:
+            SDR_REPOSITORY_KEYS.pop(node_uuid, None)
+
+
+def _get_sdr_cache_file(task, driver_info):
+    """Get the file caching the SDR repository of the node's BMC.
+
+    The SDR repository is dumped to the file if it is not cached yet, or
+    if it changed since it was cached. Whether it changed is only checked
+    every [ipmi]sdr_cache_check_interval seconds.
+
+    :param task: a TaskManager instance.
+    :param driver_info: the ipmitool parameters for accessing a node.
+    :returns: the path of the SDR cache file, or None if the SDR can not
+              be cached.
+    """
+    if not CONF.ipmi.sdr_cache_enabled:
+        return None
+
+    node_uuid = task.node.uuid
+    cache_dir = (CONF.ipmi.sdr_cache_dir or
+                 os.path.join(CONF.tempdir, 'ipmi_sdr'))
+    now = time.time()
+    _prune_sdr_cache(cache_dir, now)
+
+    address = driver_info['address']
+    cached = SDR_REPOSITORY_KEYS.get(node_uuid)
+    if (cached is not None and cached[0] == address and
+            now - cached[2] < CONF.ipmi.sdr_cache_check_interval):
+        key = cached[1]
+    else:
+        key = _get_sdr_repository_key(driver_info)
+        if key is None:
+            SDR_REPOSITORY_KEYS.pop(node_uuid, None)
+            return None
+        SDR_REPOSITORY_KEYS[node_uuid] = (address, key, now)
+
+    path = os.path.join(cache_dir, '%s-%s.sdr' % (node_uuid, key))
+    if os.path.exists(path):
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return path
+
+    tmp_path = path + '.part'
+    try:
+        fileutils.ensure_tree(cache_dir)
+        # Remove the dumps of the previous versions of the repository
+        for old_path in glob.glob(os.path.join(cache_dir,
+                                               '%s-*.sdr' % node_uuid)):
+            ironic_utils.unlink_without_raise(old_path)
+        dump_sdr(task, tmp_path)
+        os.rename(tmp_path, path)
+    except (exception.IPMIFailure, OSError) as e:
+        LOG.warning(_LW('Unable to cache the SDR repository of node '
+                        '%(node)s in %(path)s, reading it from the BMC. '
+                        'Error: %(error)s'),
+                    {'node': node_uuid, 'path': path, 'error': e})
+        ironic_utils.unlink_without_raise(tmp_path)
+        return None
+    return path
+
+
 def _check_temp_dir():
     """Check for Valid temp directory."""
     global TMP_DIR_CHECKED
@@ -750,6 +1197,7 @@ class IPMIPower(base.PowerInterface):
                 reason=_("Unable to locate usable ipmitool command in "
                          "the system path when checking ipmitool version"))
         _check_temp_dir()
+        _check_session_support(self.__class__.__name__)
 
     def get_properties(self):
         return COMMON_PROPERTIES
@@ -849,6 +1297,7 @@ class IPMIManagement(base.ManagementInterface):
                 reason=_("Unable to locate usable ipmitool command in "
                          "the system path when checking ipmitool version"))
         _check_temp_dir()
+        _check_session_support(self.__class__.__name__)
 
     @METRICS.timer('IPMIManagement.validate')
     def validate(self, task):
@@ -1028,6 +1477,24 @@ class IPMIManagement(base.ManagementInterface):
         # with '-v' option, we can get the entire sensor data including the
         # extended sensor informations
         cmd = "sdr -v"
+        sdr_file = _get_sdr_cache_file(task, driver_info)
+        if sdr_file:
+            try:
+                out, err = _exec_ipmitool(driver_info,
+                                          '-S %s %s' % (sdr_file, cmd))
+                return _parse_ipmi_sensors_data(task.node, out)
+            except (exception.PasswordFileFailedToCreate,
+                    exception.FailedToParseSensorData,
+                    processutils.ProcessExecutionError) as e:
+                LOG.warning(_LW('Getting the sensor data of node %(node)s '
+                                'using the cached SDR %(file)s failed, '
+                                'discarding it. Error: %(error)s'),
+                            {'node': task.node.uuid, 'file': sdr_file,
+                             'error': e})
+                ironic_utils.unlink_without_raise(sdr_file)
+                # Check the SDR repository again next time
+                SDR_REPOSITORY_KEYS.pop(task.node.uuid, None)
+
         try:
             out, err = _exec_ipmitool(driver_info, cmd)
         except (exception.PasswordFileFailedToCreate,
@@ -1162,7 +1629,7 @@ class IPMIConsole(base.ConsoleInterface):
 
         """
         driver_info = _parse_driver_info(task.node)
-        if not driver_info['port']:
+        if not driver_info['port'] and self._terminal_port_required():
             raise exception.MissingParameterValue(_(
                 "Missing 'ipmi_terminal_port' parameter in node's"
                 " driver_info."))
@@ -1173,6 +1640,10 @@ class IPMIConsole(base.ConsoleInterface):
                 "Check the 'ipmi_protocol_version' parameter in "
                 "node's driver_info"))
 
+    def _terminal_port_required(self):
+        """Whether the node needs its own ipmi_terminal_port."""
+        return True
+
     def _start_console(self, driver_info, start_method):
         """Start a remote console for the node.
 
@@ -1253,7 +1724,14 @@ class IPMIShellinaboxConsole(IPMIConsole):
 
 
 class IPMISocatConsole(IPMIConsole):
-    """A ConsoleInterface that uses ipmitool and socat."""
+    """A ConsoleInterface that uses ipmitool and socat.
+
+    When [console]proxy_port is set, the consoles are served by the console
+    proxy of the conductor instead of a socat process for each node.
+    """
+
+    def _terminal_port_required(self):
+        return not CONF.console.proxy_port
 
     @METRICS.timer('IPMISocatConsole.start_console')
     def start_console(self, task):
@@ -1275,6 +1753,11 @@ class IPMISocatConsole(IPMIConsole):
             # OSError is raised when sol session is already deactivated,
             # so we can ignore it.
             pass
+        if CONF.console.proxy_port:
+            # ipmitool is only started once a client connects to the proxy
+            console_proxy.ensure_started()
+            console_proxy.issue_token(task)
+            return
         self._start_console(driver_info, console_utils.start_socat_console)
 
     @METRICS.timer('IPMISocatConsole.stop_console')
@@ -1285,11 +1768,15 @@ class IPMISocatConsole(IPMIConsole):
         :raises: ConsoleError if unable to stop the console
         """
         driver_info = _parse_driver_info(task.node)
-        try:
-            console_utils.stop_socat_console(task.node.uuid)
-        finally:
-            ironic_utils.unlink_without_raise(
-                _console_pwfile_path(task.node.uuid))
+        if CONF.console.proxy_port:
+            console_proxy.revoke_token(task)
+            console_proxy.stop_session(task.node.uuid)
+        else:
+            try:
+                console_utils.stop_socat_console(task.node.uuid)
+            finally:
+                ironic_utils.unlink_without_raise(
+                    _console_pwfile_path(task.node.uuid))
         self._exec_stop_console(driver_info)
 
     def _exec_stop_console(self, driver_info):
@@ -1302,6 +1789,42 @@ class IPMISocatConsole(IPMIConsole):
 
         :param task: a task from TaskManager
         """
+        if CONF.console.proxy_port:
+            console_proxy.ensure_started()
+            return {'type': 'socat',
+                    'url': console_proxy.get_console_url(),
+                    'node': task.node.uuid,
+                    'token': console_proxy.get_token(task)}
         driver_info = _parse_driver_info(task.node)
         url = console_utils.get_socat_console_url(driver_info['port'])
         return {'type': 'socat', 'url': url}
+
+    def get_proxy_command(self, task):
+        """Get the command the console proxy runs for a client.
+
+        The password is passed in the environment, so that no password file
+        is left behind by the short-lived console sessions.
+
+        :param task: a task from TaskManager
+        :returns: a tuple with the list of arguments of the command and the
+            dict of its environment variables.
+        :raises: InvalidParameterValue if required ipmi parameters are missing
+        """
+        driver_info = _parse_driver_info(task.node)
+        args = ['ipmitool', '-H', driver_info['address'], '-I', 'lanplus',
+                '-L', driver_info['priv_level']]
+        if driver_info['dest_port']:
+            args.extend(['-p', driver_info['dest_port']])
+        if driver_info['username']:
+            args.extend(['-U', driver_info['username']])
+        args.append('-E')
+        for name, option in BRIDGING_OPTIONS:
+            if driver_info[name] is not None:
+                args.extend([option, driver_info[name]])
+        if CONF.debug:
+            args.append('-v')
+        args.extend(['sol', 'activate'])
+
+        env = dict(os.environ)
+        env['IPMI_PASSWORD'] = driver_info['password'] or ''
+        return args, env
@@ -414,6 +414,7 @@ def _attach_virtual_cd(node, bootable_iso_filename):
         irmc_client(scci.MOUNT_CD, async=False)
 
     except scci.SCCIClientError as irmc_exception:
+        irmc_common.invalidate_irmc_client(node)
         LOG.exception(_LE("Error while inserting virtual cdrom "
                           "into node %(uuid)s. Error: %(error)s"),
                       {'uuid': node.uuid, 'error': irmc_exception})
@@ -437,6 +438,7 @@ def _detach_virtual_cd(node):
         irmc_client(scci.UNMOUNT_CD)
 
     except scci.SCCIClientError as irmc_exception:
+        irmc_common.invalidate_irmc_client(node)
         LOG.exception(_LE("Error while ejecting virtual cdrom "
                           "from node %(uuid)s. Error: %(error)s"),
                       {'uuid': node.uuid, 'error': irmc_exception})
@@ -470,6 +472,7 @@ def _attach_virtual_fd(node, floppy_image_filename):
         irmc_client(scci.MOUNT_FD, async=False)
 
     except scci.SCCIClientError as irmc_exception:
+        irmc_common.invalidate_irmc_client(node)
         LOG.exception(_LE("Error while inserting virtual floppy "
                           "into node %(uuid)s. Error: %(error)s"),
                       {'uuid': node.uuid, 'error': irmc_exception})
@@ -493,6 +496,7 @@ def _detach_virtual_fd(node):
         irmc_client(scci.UNMOUNT_FD)
 
     except scci.SCCIClientError as irmc_exception:
+        irmc_common.invalidate_irmc_client(node)
         LOG.exception(_LE("Error while ejecting virtual floppy "
                           "from node %(uuid)s. Error: %(error)s"),
                       {'uuid': node.uuid, 'error': irmc_exception})
@@ -19,6 +19,7 @@ import six
 
 from oslo_utils import importutils
 
+from ironic.common import client_cache
 from ironic.common import exception
 from ironic.common.i18n import _
 from ironic.conf import CONF
@@ -136,7 +137,9 @@ def get_irmc_client(node):
     """Gets an iRMC SCCI client.
 
     Given an ironic node object, this method gives back a iRMC SCCI client
-    to do operations on the iRMC.
+    to do operations on the iRMC. The client is shared with the other
+    operations on the same iRMC for [DEFAULT]management_client_cache_ttl
+    seconds.
 
     :param node: An ironic node object.
     :returns: scci_cmd partial function which takes a SCCI command param.
@@ -146,14 +149,38 @@ def get_irmc_client(node):
     """
     driver_info = parse_driver_info(node)
 
-    scci_client = scci.get_client(
-        driver_info['irmc_address'],
-        driver_info['irmc_username'],
-        driver_info['irmc_password'],
-        port=driver_info['irmc_port'],
-        auth_method=driver_info['irmc_auth_method'],
-        client_timeout=driver_info['irmc_client_timeout'])
-    return scci_client
+    def _create():
+        return scci.get_client(
+            driver_info['irmc_address'],
+            driver_info['irmc_username'],
+            driver_info['irmc_password'],
+            port=driver_info['irmc_port'],
+            auth_method=driver_info['irmc_auth_method'],
+            client_timeout=driver_info['irmc_client_timeout'])
+
+    return client_cache.get_client('irmc', _client_params(driver_info),
+                                   _create)
+
+
+def _client_params(driver_info):
+    return (driver_info['irmc_address'],
+            driver_info['irmc_username'],
+            driver_info['irmc_password'],
+            driver_info['irmc_port'],
+            driver_info['irmc_auth_method'],
+            driver_info['irmc_client_timeout'])
+
+
+def invalidate_irmc_client(node):
+    """Drops the cached iRMC SCCI client of a node.
+
+    To be called when an operation on the iRMC failed, as the failure may
+    come from a broken connection of the client.
+
+    :param node: An ironic node object.
+    """
+    client_cache.invalidate_client(
+        'irmc', _client_params(parse_driver_info(node)))
 
 
 def update_ipmi_properties(task):
@@ -64,6 +64,7 @@ def _set_power_state(task, target_state):
         raise exception.InvalidParameterValue(msg)
 
     except scci.SCCIClientError as irmc_exception:
+        irmc_common.invalidate_irmc_client(node)
         LOG.error(_LE("iRMC set_power_state failed to set state to %(tstate)s "
                       " for node %(node_id)s with error: %(error)s"),
                   {'tstate': target_state, 'node_id': node.uuid,
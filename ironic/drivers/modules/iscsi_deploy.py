@@ -20,11 +20,14 @@ from ironic_lib import metrics_utils
 from ironic_lib import utils as ironic_utils
 from oslo_log import log as logging
 from oslo_utils import fileutils
+from oslo_utils import units
 from six.moves.urllib import parse
 
 from ironic.common import dhcp_factory
 from ironic.common import exception
+from ironic.common.glance_service import service_utils
 from ironic.common.i18n import _
+from ironic.common import images
 from ironic.common import states
 from ironic.common import utils
 from ironic.conductor import task_manager
@@ -91,9 +94,17 @@ def check_image_size(task):
     :raises: InstanceDeployFailure if size of the image is greater than root
         partition.
     """
-    i_info = deploy_utils.parse_instance_info(task.node)
-    image_path = _get_image_file_path(task.node.uuid)
-    image_mb = disk_utils.get_image_mb(image_path)
+    node = task.node
+    i_info = deploy_utils.parse_instance_info(node)
+    if node.driver_internal_info.get('stream_instance_image'):
+        # NOTE: only uncompressed raw images are streamed, so their size in
+        # the image service is their virtual size.
+        image_size = images.download_size(task.context,
+                                          i_info['image_source'])
+        image_mb = (int(image_size) + units.Mi - 1) // units.Mi
+    else:
+        image_path = _get_image_file_path(node.uuid)
+        image_mb = disk_utils.get_image_mb(image_path)
     root_mb = 1024 * int(i_info['root_gb'])
     if image_mb > root_mb:
         msg = (_('Root partition is too small for requested image. Image '
@@ -102,6 +113,31 @@ def check_image_size(task):
         raise exception.InstanceDeployFailure(msg)
 
 
+def _can_stream_image(task):
+    """Whether the instance image can be streamed to the node's disk.
+
+    Only raw whole disk images, served by Glance or over HTTP(S), are
+    streamed directly to the iSCSI target without being cached first.
+
+    :param task: a TaskManager instance containing the node to act on.
+    :returns: True if the image should be streamed, False otherwise.
+    """
+    node = task.node
+    if not (CONF.iscsi.stream_raw_images and
+            node.driver_internal_info.get('is_whole_disk_image')):
+        return False
+
+    image_source = node.instance_info.get('image_source')
+    if service_utils.is_glance_image(image_source):
+        disk_format = images.image_show(task.context,
+                                        image_source).get('disk_format')
+    elif parse.urlparse(image_source).scheme in ('http', 'https'):
+        disk_format = node.instance_info.get('image_disk_format')
+    else:
+        return False
+    return disk_format == 'raw'
+
+
 @METRICS.timer('cache_instance_image')
 def cache_instance_image(ctx, node):
     """Fetch the instance's image from Glance
@@ -238,7 +274,13 @@ def continue_deploy(task, **kwargs):
 
     uuid_dict_returned = {}
     try:
-        if node.driver_internal_info['is_whole_disk_image']:
+        if node.driver_internal_info.get('stream_instance_image'):
+            params.pop('image_path')
+            uuid_dict_returned = deploy_utils.stream_disk_image(
+                task.context,
+                image_href=node.instance_info['image_source'],
+                **params)
+        elif node.driver_internal_info['is_whole_disk_image']:
             uuid_dict_returned = deploy_utils.deploy_disk_image(**params)
         else:
             uuid_dict_returned = deploy_utils.deploy_partition_image(**params)
@@ -418,12 +460,25 @@ class ISCSIDeploy(AgentDeployMixin, base.DeployInterface):
         and issues a reboot request to the power driver.
         This causes the node to boot into the deployment ramdisk and triggers
         the next phase of PXE-based deployment via agent heartbeats.
+        Raw whole disk images are not fetched if they are to be streamed
+        to the node's disk, see [iscsi]stream_raw_images.
 
         :param task: a TaskManager instance containing the node to act on.
         :returns: deploy state DEPLOYWAIT.
         """
         node = task.node
-        cache_instance_image(task.context, node)
+        stream = _can_stream_image(task)
+        driver_internal_info = node.driver_internal_info
+        driver_internal_info['stream_instance_image'] = stream
+        node.driver_internal_info = driver_internal_info
+        node.save()
+
+        if stream:
+            LOG.debug('Image %(image)s will be streamed to node %(node)s',
+                      {'image': node.instance_info['image_source'],
+                       'node': node.uuid})
+        else:
+            cache_instance_image(task.context, node)
         check_image_size(task)
 
         manager_utils.node_power_action(task, states.REBOOT)
@@ -18,6 +18,7 @@ import re
 
 import six
 
+from ironic.common import client_cache
 from ironic.common import exception
 from ironic.common.i18n import _
 from ironic.drivers.modules.msftocs import msftocsclient
@@ -38,14 +39,33 @@ REQUIRED_PROPERTIES = {
 def get_client_info(driver_info):
     """Returns an instance of the REST API client and the blade id.
 
+    The client is shared by the blades of the same chassis manager for
+    [DEFAULT]management_client_cache_ttl seconds.
+
     :param driver_info: the node's driver_info dict.
     """
-    client = msftocsclient.MSFTOCSClientApi(driver_info['msftocs_base_url'],
-                                            driver_info['msftocs_username'],
-                                            driver_info['msftocs_password'])
+    params = _client_params(driver_info)
+    client = client_cache.get_client(
+        'msftocs', params, lambda: msftocsclient.MSFTOCSClientApi(*params))
     return client, driver_info['msftocs_blade_id']
 
 
+def _client_params(driver_info):
+    return (driver_info['msftocs_base_url'],
+            driver_info['msftocs_username'],
+            driver_info['msftocs_password'])
+
+
+def invalidate_client(driver_info):
+    """Drops the cached REST API client of the node's chassis manager.
+
+    To be called when a call to the chassis manager failed.
+
+    :param driver_info: the node's driver_info dict.
+    """
+    client_cache.invalidate_client('msftocs', _client_params(driver_info))
+
+
 def get_properties():
     """Returns the driver's properties."""
     return copy.deepcopy(REQUIRED_PROPERTIES)
@@ -83,6 +83,7 @@ class MSFTOCSPower(base.PowerInterface):
                 raise exception.InvalidParameterValue(
                     _('Unsupported target_state: %s') % pstate)
         except exception.MSFTOCSClientApiException as ex:
+            msftocs_common.invalidate_client(task.node.driver_info)
             LOG.exception(_LE("Changing the power state to %(pstate)s failed. "
                               "Error: %(err_msg)s"),
                           {"pstate": pstate, "err_msg": ex})
@@ -100,6 +101,7 @@ class MSFTOCSPower(base.PowerInterface):
         try:
             client.set_blade_power_cycle(blade_id)
         except exception.MSFTOCSClientApiException as ex:
+            msftocs_common.invalidate_client(task.node.driver_info)
             LOG.exception(_LE("Reboot failed. Error: %(err_msg)s"),
                           {"err_msg": ex})
             raise exception.PowerStateFailure(pstate=states.REBOOT)
@@ -145,6 +145,7 @@ class NeutronNetwork(base.NetworkInterface):
         portmap = neutron.get_node_portmap(task)
 
         client = neutron.get_client(task.context.auth_token)
+        updates = []
         for port_like_obj in ports + portgroups:
             vif_port_id = port_like_obj.extra.get('vif_port_id')
 
@@ -188,10 +189,13 @@ class NeutronNetwork(base.NetworkInterface):
             }
             if client_id_opt:
                 body['port']['extra_dhcp_opts'] = [client_id_opt]
+            updates.append((vif_port_id, body))
 
-            try:
-                client.update_port(vif_port_id, body)
-            except neutron_exceptions.ConnectionFailed as e:
+        results = neutron.update_ports(client, updates)
+        for (vif_port_id, _body), (_result, e) in zip(updates, results):
+            if e is None:
+                continue
+            if isinstance(e, neutron_exceptions.ConnectionFailed):
                 msg = (_('Could not add public network VIF %(vif)s '
                          'to node %(node)s, possible network issue. %(exc)s') %
                        {'vif': vif_port_id,
@@ -199,6 +203,7 @@ class NeutronNetwork(base.NetworkInterface):
                         'exc': e})
                 LOG.error(msg)
                 raise exception.NetworkError(msg)
+            raise e
 
     def unconfigure_tenant_networks(self, task):
         """Unconfigure tenant networks for a node.
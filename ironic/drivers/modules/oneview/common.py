@@ -17,6 +17,7 @@ from oslo_log import log as logging
 from oslo_utils import importutils
 from oslo_utils import strutils
 
+from ironic.common import client_cache
 from ironic.common import exception
 from ironic.common.i18n import _, _LE
 from ironic.common import states
@@ -68,19 +69,40 @@ def get_oneview_client():
     """Generates an instance of the OneView client.
 
     Generates an instance of the OneView client using the imported
-    oneview_client library.
+    oneview_client library. The instance, logged in to OneView, is shared
+    for [DEFAULT]management_client_cache_ttl seconds.
 
     :returns: an instance of the OneView client
     """
-    oneview_client = client.Client(
-        manager_url=CONF.oneview.manager_url,
-        username=CONF.oneview.username,
-        password=CONF.oneview.password,
-        allow_insecure_connections=CONF.oneview.allow_insecure_connections,
-        tls_cacert_file=CONF.oneview.tls_cacert_file,
-        max_polling_attempts=CONF.oneview.max_polling_attempts
-    )
-    return oneview_client
+    def _create():
+        return client.Client(
+            manager_url=CONF.oneview.manager_url,
+            username=CONF.oneview.username,
+            password=CONF.oneview.password,
+            allow_insecure_connections=CONF.oneview.allow_insecure_connections,
+            tls_cacert_file=CONF.oneview.tls_cacert_file,
+            max_polling_attempts=CONF.oneview.max_polling_attempts
+        )
+
+    return client_cache.get_client('oneview', _client_params(), _create)
+
+
+def _client_params():
+    return (CONF.oneview.manager_url,
+            CONF.oneview.username,
+            CONF.oneview.password,
+            CONF.oneview.allow_insecure_connections,
+            CONF.oneview.tls_cacert_file,
+            CONF.oneview.max_polling_attempts)
+
+
+def invalidate_oneview_client():
+    """Drops the cached OneView client.
+
+    To be called when a call to OneView failed, as the failure may come from
+    an expired session of the client.
+    """
+    client_cache.invalidate_client('oneview', _client_params())
 
 
 def verify_node_info(node):
@@ -190,6 +212,7 @@ def validate_oneview_resources_compatibility(task):
                 oneview_info, node_ports
             )
     except oneview_exceptions.OneViewException as oneview_exc:
+        invalidate_oneview_client()
         msg = (_("Error validating node resources with OneView: %s") %
                oneview_exc)
         raise exception.OneViewError(error=msg)
@@ -252,6 +275,7 @@ def node_has_server_profile(func):
                 oneview_client.get_server_profile_from_hardware(oneview_info)
             )
         except oneview_exceptions.OneViewException as oneview_exc:
+            invalidate_oneview_client()
             LOG.error(
                 _LE("Failed to get server profile from OneView appliance for"
                     "node %(node)s. Error: %(message)s"),
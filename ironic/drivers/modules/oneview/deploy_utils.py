@@ -304,6 +304,7 @@ def _deallocate_server_hardware_from_ironic(node):
             {"node_uuid": node.uuid, "server_profile_uuid": applied_sp_uuid}
         )
     except oneview_exception.OneViewException as e:
+        common.invalidate_oneview_client()
 
         msg = (_("Error while deleting applied Server Profile from node "
                  "%(node_uuid)s. Error: %(error)s") %
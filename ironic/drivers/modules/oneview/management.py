@@ -110,6 +110,7 @@ class OneViewManagement(base.ManagementInterface):
             device_to_oneview = BOOT_DEVICE_MAPPING_TO_OV.get(device)
             oneview_client.set_boot_device(oneview_info, device_to_oneview)
         except oneview_exceptions.OneViewException as oneview_exc:
+            common.invalidate_oneview_client()
             msg = (_(
                 "Error setting boot device on OneView. Error: %s")
                 % oneview_exc
@@ -139,6 +140,7 @@ class OneViewManagement(base.ManagementInterface):
             oneview_client = common.get_oneview_client()
             boot_order = oneview_client.get_boot_order(oneview_info)
         except oneview_exceptions.OneViewException as oneview_exc:
+            common.invalidate_oneview_client()
             msg = (_(
                 "Error getting boot device from OneView. Error: %s")
                 % oneview_exc
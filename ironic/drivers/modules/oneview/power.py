@@ -74,6 +74,7 @@ class OneViewPower(base.PowerInterface):
         try:
             power_state = oneview_client.get_node_power_state(oneview_info)
         except oneview_exceptions.OneViewException as oneview_exc:
+            common.invalidate_oneview_client()
             LOG.error(
                 _LE("Error getting power state for node %(node)s. Error:"
                     "%(error)s"),
@@ -115,6 +116,7 @@ class OneViewPower(base.PowerInterface):
                     _("set_power_state called with invalid power state %s.")
                     % power_state)
         except oneview_exceptions.OneViewException as exc:
+            common.invalidate_oneview_client()
             raise exception.OneViewError(
                 _("Error setting power state: %s") % exc
             )
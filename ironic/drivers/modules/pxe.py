@@ -51,6 +51,7 @@ REQUIRED_PROPERTIES = {
 COMMON_PROPERTIES = REQUIRED_PROPERTIES
 
 
+@driver_utils.cache_driver_info
 def _parse_driver_info(node):
     """Gets the driver specific Node deployment info.
 
@@ -24,6 +24,7 @@ models.
 """
 
 import abc
+import threading
 import time
 
 from oslo_log import log as logging
@@ -38,6 +39,7 @@ from ironic.common import utils
 from ironic.conductor import task_manager
 from ironic.conf import CONF
 from ironic.drivers import base
+from ironic.drivers import utils as driver_utils
 
 pysnmp = importutils.try_import('pysnmp')
 if pysnmp:
@@ -57,6 +59,26 @@ SNMP_V2C = '2c'
 SNMP_V3 = '3'
 SNMP_PORT = 161
 
+# Maximum number of table rows requested by a single GETBULK request.
+SNMP_BULK_MAX_REPETITIONS = 24
+
+# SNMP clients keyed by PDU and credentials, shared by the nodes powered by
+# the same PDU.
+_SNMP_CLIENTS = {}
+
+# Snapshots of the outlet power state tables of the PDUs, keyed by the client
+# key and the OID of the table. The values are tuples of the expiry time and
+# a dictionary of the outlet state values keyed by their OID.
+_OUTLET_STATES = {}
+
+
+@utils.register_reset
+def _reset():
+    """Drop the shared SNMP clients and the outlet state snapshots."""
+    _SNMP_CLIENTS.clear()
+    _OUTLET_STATES.clear()
+
+
 REQUIRED_PROPERTIES = {
     'snmp_driver': _("PDU manufacturer driver.  Required."),
     'snmp_address': _("PDU IPv4 address or hostname.  Required."),
@@ -96,6 +118,9 @@ class SNMPClient(object):
         else:
             self.community = community
         self.cmd_gen = cmdgen.CommandGenerator()
+        # The client is shared by the nodes powered by the PDU, its requests
+        # are serialized.
+        self._lock = threading.Lock()
 
     def _get_auth(self):
         """Return the authorization data for an SNMP request.
@@ -132,9 +157,10 @@ class SNMPClient(object):
         :returns: The value of the requested object.
         """
         try:
-            results = self.cmd_gen.getCmd(self._get_auth(),
-                                          self._get_transport(),
-                                          oid)
+            with self._lock:
+                results = self.cmd_gen.getCmd(self._get_auth(),
+                                              self._get_transport(),
+                                              oid)
         except snmp_error.PySnmpError as e:
             raise exception.SNMPFailure(operation="GET", error=e)
 
@@ -162,9 +188,10 @@ class SNMPClient(object):
         :returns: A list of values of the requested table object.
         """
         try:
-            results = self.cmd_gen.nextCmd(self._get_auth(),
-                                           self._get_transport(),
-                                           oid)
+            with self._lock:
+                results = self.cmd_gen.nextCmd(self._get_auth(),
+                                               self._get_transport(),
+                                               oid)
         except snmp_error.PySnmpError as e:
             raise exception.SNMPFailure(operation="GET_NEXT", error=e)
 
@@ -182,6 +209,53 @@ class SNMPClient(object):
 
         return [val for row in var_bind_table for name, val in row]
 
+    def get_table(self, oid):
+        """Use PySNMP to read all the objects of a table column.
+
+        The column is read with GETBULK requests with SNMPv2c and SNMPv3, and
+        with GET NEXT requests with SNMPv1, which has no GETBULK.
+
+        :param oid: The OID of the table column.
+        :raises: SNMPFailure if an SNMP request fails.
+        :returns: A dictionary of the values of the objects of the column,
+            keyed by their OID as a tuple of integers.
+        """
+        operation = "GET_NEXT" if self.version == SNMP_V1 else "GET_BULK"
+        try:
+            with self._lock:
+                if self.version == SNMP_V1:
+                    results = self.cmd_gen.nextCmd(self._get_auth(),
+                                                   self._get_transport(),
+                                                   oid)
+                else:
+                    results = self.cmd_gen.bulkCmd(
+                        self._get_auth(), self._get_transport(), 0,
+                        SNMP_BULK_MAX_REPETITIONS, oid)
+        except snmp_error.PySnmpError as e:
+            raise exception.SNMPFailure(operation=operation, error=e)
+
+        error_indication, error_status, error_index, var_bind_table = results
+
+        if error_indication:
+            # SNMP engine-level error.
+            raise exception.SNMPFailure(operation=operation,
+                                        error=error_indication)
+
+        if error_status:
+            # SNMP PDU error.
+            raise exception.SNMPFailure(operation=operation,
+                                        error=error_status.prettyPrint())
+
+        # The last response may contain objects following the column.
+        oid = tuple(oid)
+        table = {}
+        for row in var_bind_table:
+            for name, val in row:
+                name = tuple(name)
+                if name[:len(oid)] == oid:
+                    table[name] = val
+        return table
+
     def set(self, oid, value):
         """Use PySNMP to perform an SNMP SET operation on a single object.
 
@@ -190,9 +264,10 @@ class SNMPClient(object):
         :raises: SNMPFailure if an SNMP request fails.
         """
         try:
-            results = self.cmd_gen.setCmd(self._get_auth(),
-                                          self._get_transport(),
-                                          (oid, value))
+            with self._lock:
+                results = self.cmd_gen.setCmd(self._get_auth(),
+                                              self._get_transport(),
+                                              (oid, value))
         except snmp_error.PySnmpError as e:
             raise exception.SNMPFailure(operation="SET", error=e)
 
@@ -209,17 +284,69 @@ class SNMPClient(object):
                                         error=error_status.prettyPrint())
 
 
+def _get_client_key(snmp_info):
+    """Return the key of the SNMP client of a PDU.
+
+    :param snmp_info: SNMP driver info.
+    :returns: A tuple of the PDU address and the SNMP credentials.
+    """
+    return (snmp_info["address"], snmp_info["port"], snmp_info["version"],
+            snmp_info.get("community"), snmp_info.get("security"))
+
+
 def _get_client(snmp_info):
-    """Create and return an SNMP client object.
+    """Return an SNMP client object.
+
+    The clients are shared by the nodes powered by the same PDU.
 
     :param snmp_info: SNMP driver info.
     :returns: A :class:`SNMPClient` object.
     """
-    return SNMPClient(snmp_info["address"],
-                      snmp_info["port"],
-                      snmp_info["version"],
-                      snmp_info.get("community"),
-                      snmp_info.get("security"))
+    key = _get_client_key(snmp_info)
+    client = _SNMP_CLIENTS.get(key)
+    if client is None:
+        client = SNMPClient(snmp_info["address"],
+                            snmp_info["port"],
+                            snmp_info["version"],
+                            snmp_info.get("community"),
+                            snmp_info.get("security"))
+        _SNMP_CLIENTS[key] = client
+    return client
+
+
+def _get_outlet_states(client, snmp_info, table_oid):
+    """Return a snapshot of the outlet power state table of a PDU.
+
+    The table is read once and shared by the nodes powered by the PDU for
+    [snmp]power_state_cache_ttl seconds.
+
+    :param client: The :class:`SNMPClient` object of the PDU.
+    :param snmp_info: SNMP driver info.
+    :param table_oid: The OID of the outlet power state table.
+    :raises: SNMPFailure if an SNMP request fails.
+    :returns: A dictionary of the outlet power state values keyed by their
+        OID as a tuple of integers.
+    """
+    key = (_get_client_key(snmp_info), table_oid)
+    now = time.time()
+    cached = _OUTLET_STATES.get(key)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
+    table = client.get_table(table_oid)
+    _OUTLET_STATES[key] = (now + CONF.snmp.power_state_cache_ttl, table)
+    return table
+
+
+def _forget_outlet_states(snmp_info):
+    """Drop the snapshots of the outlet power state tables of a PDU.
+
+    :param snmp_info: SNMP driver info.
+    """
+    client_key = _get_client_key(snmp_info)
+    for key in list(_OUTLET_STATES):
+        if key[0] == client_key:
+            _OUTLET_STATES.pop(key, None)
 
 
 @six.add_metaclass(abc.ABCMeta)
@@ -238,9 +365,11 @@ class SNMPDriverBase(object):
         self.client = _get_client(snmp_info)
 
     @abc.abstractmethod
-    def _snmp_power_state(self):
+    def _snmp_power_state(self, use_snapshot=False):
         """Perform the SNMP request required to get the current power state.
 
+        :param use_snapshot: Whether the power state may be read from a recent
+            snapshot of the outlet power state table of the PDU.
         :raises: SNMPFailure if an SNMP request fails.
         :returns: power state. One of :class:`ironic.common.states`.
         """
@@ -259,6 +388,24 @@ class SNMPDriverBase(object):
         :raises: SNMPFailure if an SNMP request fails.
         """
 
+    def _snmp_get_state(self, table_oid, oid, use_snapshot=False):
+        """Get the value of the power state object of the outlet.
+
+        :param table_oid: The OID of the table of the power state objects of
+            the outlets of the PDU.
+        :param oid: The OID of the power state object of the outlet.
+        :param use_snapshot: Whether the value may be read from a recent
+            snapshot of the table, shared by the nodes powered by the PDU.
+            The object is read on its own if it is not part of the snapshot.
+        :raises: SNMPFailure if an SNMP request fails.
+        :returns: The value of the power state object.
+        """
+        if use_snapshot and CONF.snmp.power_state_cache_ttl:
+            table = _get_outlet_states(self.client, self.snmp_info, table_oid)
+            if oid in table:
+                return table[oid]
+        return self.client.get(oid)
+
     def _snmp_wait_for_state(self, goal_state):
         """Wait for the power state of the PDU outlet to change.
 
@@ -297,7 +444,7 @@ class SNMPDriverBase(object):
         :raises: SNMPFailure if an SNMP request fails.
         :returns: power state. One of :class:`ironic.common.states`.
         """
-        return self._snmp_power_state()
+        return self._snmp_power_state(use_snapshot=True)
 
     def power_on(self):
         """Set the power state to this node to ON.
@@ -306,7 +453,11 @@ class SNMPDriverBase(object):
         :returns: power state. One of :class:`ironic.common.states`.
         """
         self._snmp_power_on()
-        return self._snmp_wait_for_state(states.POWER_ON)
+        _forget_outlet_states(self.snmp_info)
+        try:
+            return self._snmp_wait_for_state(states.POWER_ON)
+        finally:
+            _forget_outlet_states(self.snmp_info)
 
     def power_off(self):
         """Set the power state to this node to OFF.
@@ -315,7 +466,11 @@ class SNMPDriverBase(object):
         :returns: power state. One of :class:`ironic.common.states`.
         """
         self._snmp_power_off()
-        return self._snmp_wait_for_state(states.POWER_OFF)
+        _forget_outlet_states(self.snmp_info)
+        try:
+            return self._snmp_wait_for_state(states.POWER_OFF)
+        finally:
+            _forget_outlet_states(self.snmp_info)
 
     def power_reset(self):
         """Reset the power to this node.
@@ -368,8 +523,9 @@ class SNMPDriverSimple(SNMPDriverBase):
         outlet = int(self.snmp_info['outlet'])
         return self.oid_enterprise + self.oid_device + (outlet,)
 
-    def _snmp_power_state(self):
-        state = self.client.get(self.oid)
+    def _snmp_power_state(self, use_snapshot=False):
+        state = self._snmp_get_state(self.oid_enterprise + self.oid_device,
+                                     self.oid, use_snapshot=use_snapshot)
 
         # Translate the state to an Ironic power state.
         if state == self.value_power_on:
@@ -533,9 +689,10 @@ class SNMPDriverEatonPower(SNMPDriverBase):
         outlet = int(self.snmp_info['outlet'])
         return self.oid_base + oid + (outlet,)
 
-    def _snmp_power_state(self):
+    def _snmp_power_state(self, use_snapshot=False):
         oid = self._snmp_oid(self.oid_status)
-        state = self.client.get(oid)
+        state = self._snmp_get_state(self.oid_base + self.oid_status, oid,
+                                     use_snapshot=use_snapshot)
 
         # Translate the state to an Ironic power state.
         if state in (self.status_on, self.status_pending_off):
@@ -576,6 +733,7 @@ DRIVER_CLASSES = {
 }
 
 
+@driver_utils.cache_driver_info
 def _parse_driver_info(node):
     """Parse a node's driver_info values.
 
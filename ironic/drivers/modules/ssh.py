@@ -28,7 +28,9 @@ Currently supported environments are:
     XenServer   (xenserver)
 """
 
+import contextlib
 import os
+import time
 
 from oslo_concurrency import processutils
 from oslo_log import log as logging
@@ -89,6 +91,25 @@ _BOOT_DEVICES_MAP = {
     boot_devices.CDROM: 'cdrom',
 }
 
+# Active SSH connections, keyed by the connection parameters.
+_SSH_CONNECTIONS = {}
+
+# Output of the list_running commands, keyed by the connection parameters
+# and the command. Values are tuples (output, expiration time).
+_RUNNING_VMS_CACHE = {}
+
+# Names of the VMs, keyed by the connection parameters and the normalized
+# MAC addresses of the VMs. Values are tuples (name, expiration time).
+_VM_NAME_CACHE = {}
+
+
+@utils.register_reset
+def _reset():
+    """Drop the shared SSH connections and the cached VM information."""
+    _SSH_CONNECTIONS.clear()
+    _RUNNING_VMS_CACHE.clear()
+    _VM_NAME_CACHE.clear()
+
 
 def _get_boot_device_map(virt_type):
     if virt_type in ('virsh', 'vmware'):
@@ -291,7 +312,8 @@ def _get_boot_device(ssh_obj, driver_info):
         base_cmd = driver_info['cmd_set']['base_cmd']
         cmd_to_exec = cmd_to_exec.replace('{_NodeName_}', node_name)
         cmd_to_exec = cmd_to_exec.replace('{_BaseCmd_}', base_cmd)
-        stdout, stderr = _ssh_execute(ssh_obj, cmd_to_exec)
+        with _forget_vm_name_on_failure(driver_info):
+            stdout, stderr = _ssh_execute(ssh_obj, cmd_to_exec)
         return next((dev for dev, hdev in boot_device_map.items()
                      if hdev == stdout), None)
     else:
@@ -318,7 +340,8 @@ def _set_boot_device(ssh_obj, driver_info, device):
         cmd_to_exec = cmd_to_exec.replace('{_NodeName_}', node_name)
         cmd_to_exec = cmd_to_exec.replace('{_BootDevice_}', device)
         cmd_to_exec = cmd_to_exec.replace('{_BaseCmd_}', base_cmd)
-        _ssh_execute(ssh_obj, cmd_to_exec)
+        with _forget_vm_name_on_failure(driver_info):
+            _ssh_execute(ssh_obj, cmd_to_exec)
     else:
         raise NotImplementedError()
 
@@ -341,11 +364,14 @@ def _ssh_execute(ssh_obj, cmd_to_exec):
     except Exception as e:
         LOG.error(_LE("Cannot execute SSH cmd %(cmd)s. Reason: %(err)s."),
                   {'cmd': cmd_to_exec, 'err': e})
+        # The connection may be broken, do not use it anymore
+        _drop_connection(ssh_obj)
         raise exception.SSHCommandFailed(cmd=cmd_to_exec)
 
     return output_list
 
 
+@driver_utils.cache_driver_info
 def _parse_driver_info(node):
     """Gets the information needed for accessing the node.
 
@@ -411,6 +437,108 @@ def _parse_driver_info(node):
     return res
 
 
+def _get_connection_key(driver_info):
+    """Identify the host and credentials used to access a node.
+
+    :param driver_info: information for accessing the node.
+    :returns: a hashable identifying the connection parameters.
+    """
+    return (driver_info['host'], driver_info['port'],
+            driver_info['username'], driver_info.get('password'),
+            driver_info.get('key_contents'), driver_info.get('key_filename'))
+
+
+def _get_running_vms(ssh_obj, driver_info, cmd_to_exec):
+    """Get the list of the VMs running on the host.
+
+    The list is cached for [ssh]running_vms_cache_ttl seconds, and shared
+    by all the nodes on the host.
+
+    :param ssh_obj: paramiko.SSHClient, an active ssh connection.
+    :param driver_info: information for accessing the node.
+    :param cmd_to_exec: the command listing the running VMs.
+    :returns: list of the lines of output from the command.
+    :raises: SSHCommandFailed on an error from ssh.
+    """
+    key = (_get_connection_key(driver_info), cmd_to_exec)
+    cached = _RUNNING_VMS_CACHE.get(key)
+    if cached is not None and cached[1] > time.time():
+        return cached[0]
+
+    running_list = _ssh_execute(ssh_obj, cmd_to_exec)
+    if CONF.ssh.running_vms_cache_ttl:
+        _RUNNING_VMS_CACHE[key] = (
+            running_list, time.time() + CONF.ssh.running_vms_cache_ttl)
+    return running_list
+
+
+def _forget_running_vms(driver_info):
+    """Forget the cached list of the VMs running on the node's host.
+
+    :param driver_info: information for accessing the node.
+    """
+    connection_key = _get_connection_key(driver_info)
+    for key in list(_RUNNING_VMS_CACHE):
+        if key[0] == connection_key:
+            _RUNNING_VMS_CACHE.pop(key, None)
+
+
+def _get_cached_vm_name(driver_info):
+    """Get the cached name of the node's VM.
+
+    :param driver_info: information for accessing the node.
+    :returns: the name of the VM, or None if it is not cached.
+    """
+    connection_key = _get_connection_key(driver_info)
+    for mac in driver_info.get('macs', []):
+        cached = _VM_NAME_CACHE.get(
+            (connection_key, driver_utils.normalize_mac(mac)))
+        if cached is not None and cached[1] > time.time():
+            return cached[0]
+
+
+def _cache_vm_name(driver_info, name, macs):
+    """Cache the name of a VM of the node's host.
+
+    :param driver_info: information for accessing the node.
+    :param name: the name of the VM.
+    :param macs: the MAC addresses of the VM.
+    """
+    if not CONF.ssh.vm_name_cache_ttl:
+        return
+    connection_key = _get_connection_key(driver_info)
+    expiration = time.time() + CONF.ssh.vm_name_cache_ttl
+    for mac in macs:
+        if mac:
+            _VM_NAME_CACHE[(connection_key,
+                            driver_utils.normalize_mac(mac))] = (name,
+                                                                 expiration)
+
+
+def _forget_vm_name(driver_info):
+    """Forget the cached name of the node's VM.
+
+    :param driver_info: information for accessing the node.
+    """
+    connection_key = _get_connection_key(driver_info)
+    for mac in driver_info.get('macs', []):
+        _VM_NAME_CACHE.pop(
+            (connection_key, driver_utils.normalize_mac(mac)), None)
+
+
+@contextlib.contextmanager
+def _forget_vm_name_on_failure(driver_info):
+    """Forget the cached name of the node's VM if a command using it fails.
+
+    :param driver_info: information for accessing the node.
+    """
+    try:
+        yield
+    except exception.SSHCommandFailed:
+        with excutils.save_and_reraise_exception():
+            _forget_vm_name(driver_info)
+
+
 def _get_power_status(ssh_obj, driver_info):
     """Returns a node's current power state.
 
@@ -427,8 +555,12 @@ def _get_power_status(ssh_obj, driver_info):
     # it, explicitly specify the desired node."
     cmd_to_exec = "%s %s" % (driver_info['cmd_set']['base_cmd'],
                              driver_info['cmd_set']['list_running'])
-    cmd_to_exec = cmd_to_exec.replace('{_NodeName_}', node_name)
-    running_list = _ssh_execute(ssh_obj, cmd_to_exec)
+    if '{_NodeName_}' in cmd_to_exec:
+        cmd_to_exec = cmd_to_exec.replace('{_NodeName_}', node_name)
+        with _forget_vm_name_on_failure(driver_info):
+            running_list = _ssh_execute(ssh_obj, cmd_to_exec)
+    else:
+        running_list = _get_running_vms(ssh_obj, driver_info, cmd_to_exec)
 
     # Command should return a list of running vms. If the current node is
     # not listed then we can assume it is not powered on.
@@ -448,14 +580,44 @@ def _get_power_status(ssh_obj, driver_info):
     return power_state
 
 
-def _get_connection(node):
+def _get_connection(node, reconnect=False):
     """Returns an SSH client connected to a node.
 
+    Connections are kept open and shared by the nodes using the same host
+    and credentials.
+
     :param node: the Node.
+    :param reconnect: whether to open a new connection even if one is
+        already open, e.g. to check that the credentials are still valid.
     :returns: paramiko.SSHClient, an active ssh connection.
 
     """
-    return utils.ssh_connect(_parse_driver_info(node))
+    driver_info = _parse_driver_info(node)
+    key = _get_connection_key(driver_info)
+    ssh_obj = _SSH_CONNECTIONS.get(key)
+    if ssh_obj is not None:
+        transport = ssh_obj.get_transport()
+        if (not reconnect and transport is not None and
+                transport.is_active()):
+            return ssh_obj
+        LOG.debug('SSH connection to %s is not active anymore or a new one '
+                  'is required, reconnecting.', driver_info['host'])
+        _drop_connection(ssh_obj)
+
+    ssh_obj = utils.ssh_connect(driver_info)
+    _SSH_CONNECTIONS[key] = ssh_obj
+    return ssh_obj
+
+
+def _drop_connection(ssh_obj):
+    """Close a shared SSH connection, the next command opens a new one.
+
+    :param ssh_obj: paramiko.SSHClient, an ssh connection.
+    """
+    for key, pooled in list(_SSH_CONNECTIONS.items()):
+        if pooled is ssh_obj:
+            _SSH_CONNECTIONS.pop(key, None)
+            ssh_obj.close()
 
 
 def _get_hosts_name_for_node(ssh_obj, driver_info):
@@ -468,6 +630,9 @@ def _get_hosts_name_for_node(ssh_obj, driver_info):
         the provided MACs
 
     """
+    cached_name = _get_cached_vm_name(driver_info)
+    if cached_name is not None:
+        return cached_name
 
     @retrying.retry(
         retry_on_result=lambda v: v is None,
@@ -489,6 +654,8 @@ def _get_hosts_name_for_node(ssh_obj, driver_info):
                                      driver_info['cmd_set']['get_node_macs'])
             cmd_to_exec = cmd_to_exec.replace('{_NodeName_}', node)
             hosts_node_mac_list = _ssh_execute(ssh_obj, cmd_to_exec)
+            # Remember the names of all the VMs checked, for the next nodes
+            _cache_vm_name(driver_info, node, hosts_node_mac_list)
 
             for host_mac in hosts_node_mac_list:
                 if not host_mac:
@@ -524,6 +691,7 @@ def _power_on(ssh_obj, driver_info):
     :returns: one of ironic.common.states POWER_ON or ERROR.
 
     """
+    _forget_running_vms(driver_info)
     current_pstate = _get_power_status(ssh_obj, driver_info)
     if current_pstate == states.POWER_ON:
         _power_off(ssh_obj, driver_info)
@@ -533,7 +701,9 @@ def _power_on(ssh_obj, driver_info):
                                  driver_info['cmd_set']['start_cmd'])
     cmd_to_power_on = cmd_to_power_on.replace('{_NodeName_}', node_name)
 
-    _ssh_execute(ssh_obj, cmd_to_power_on)
+    with _forget_vm_name_on_failure(driver_info):
+        _ssh_execute(ssh_obj, cmd_to_power_on)
+    _forget_running_vms(driver_info)
 
     current_pstate = _get_power_status(ssh_obj, driver_info)
     if current_pstate == states.POWER_ON:
@@ -550,6 +720,7 @@ def _power_off(ssh_obj, driver_info):
     :returns: one of ironic.common.states POWER_OFF or ERROR.
 
     """
+    _forget_running_vms(driver_info)
     current_pstate = _get_power_status(ssh_obj, driver_info)
     if current_pstate == states.POWER_OFF:
         return current_pstate
@@ -559,7 +730,9 @@ def _power_off(ssh_obj, driver_info):
                                   driver_info['cmd_set']['stop_cmd'])
     cmd_to_power_off = cmd_to_power_off.replace('{_NodeName_}', node_name)
 
-    _ssh_execute(ssh_obj, cmd_to_power_off)
+    with _forget_vm_name_on_failure(driver_info):
+        _ssh_execute(ssh_obj, cmd_to_power_off)
+    _forget_running_vms(driver_info)
 
     current_pstate = _get_power_status(ssh_obj, driver_info)
     if current_pstate == states.POWER_OFF:
@@ -598,7 +771,9 @@ class SSHPower(base.PowerInterface):
                 _("Node %s does not have any port associated with it."
                   ) % task.node.uuid)
         try:
-            _get_connection(task.node)
+            # NOTE: a new connection checks that the credentials are still
+            # accepted by the host.
+            _get_connection(task.node, reconnect=True)
         except exception.SSHConnectFailed as e:
             raise exception.InvalidParameterValue(_("SSH connection cannot"
                                                     " be established: %s") % e)
@@ -749,6 +924,7 @@ class SSHManagement(base.ManagementInterface):
 
         if virt_type == 'vbox':
             if use_headless:
+                _forget_running_vms(driver_info)
                 current_pstate = _get_power_status(ssh_obj, driver_info)
                 if current_pstate == states.POWER_ON:
                     LOG.debug("Forcing VBox VM %s to power off "
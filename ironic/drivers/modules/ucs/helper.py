@@ -17,9 +17,11 @@ Ironic Cisco UCSM helper functions
 """
 
 from oslo_log import log as logging
+from oslo_utils import excutils
 from oslo_utils import importutils
 import six
 
+from ironic.common import client_cache
 from ironic.common import exception
 from ironic.common.i18n import _, _LE
 from ironic.drivers.modules import deploy_utils
@@ -43,10 +45,10 @@ def requires_ucs_client(func):
     """Creates handle to connect to UCS Manager.
 
     This method is being used as a decorator method. It establishes connection
-    with UCS Manager. And creates a session. Any method that has to perform
-    operation on UCS Manager, requries this session, which can use this method
-    as decorator method. Use this method as decorator method requires having
-    helper keyword argument in the definition.
+    with UCS Manager. And creates a session, or reuses an idle one. Any method
+    that has to perform operation on UCS Manager, requries this session, which
+    can use this method as decorator method. Use this method as decorator
+    method requires having helper keyword argument in the definition.
 
     :param func: function using this as a decorator.
     :returns: a wrapper function that performs the required tasks
@@ -59,9 +61,13 @@ def requires_ucs_client(func):
             kwargs['helper'] = CiscoUcsHelper(task)
         try:
             kwargs['helper'].connect_ucsm()
-            return func(self, task, *args, **kwargs)
-        finally:
-            kwargs['helper'].logout()
+            result = func(self, task, *args, **kwargs)
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                # The session may be broken, it is not reused.
+                kwargs['helper'].logout(discard=True)
+        kwargs['helper'].logout()
+        return result
     return wrapper
 
 
@@ -101,26 +107,48 @@ class CiscoUcsHelper(object):
         self.handle = None
         self.uuid = task.node.uuid
 
+    def _session_params(self):
+        return (self.address, self.username, self.password)
+
+    def _generate_handle(self):
+        success, handle = ucs_helper.generate_ucsm_handle(
+            self.address,
+            self.username,
+            self.password)
+        return handle
+
     def connect_ucsm(self):
-        """Creates the UcsHandle
+        """Creates the UcsHandle, or reuses an idle one.
 
         :raises: UcsConnectionError, if ucs helper failes to establish session
             with UCS Manager.
         """
 
         try:
-            success, self.handle = ucs_helper.generate_ucsm_handle(
-                self.address,
-                self.username,
-                self.password)
+            self.handle = client_cache.acquire_session(
+                'ucs', self._session_params(), self._generate_handle,
+                close=_logout_handle)
         except ucs_error.UcsConnectionError as ucs_exception:
             LOG.error(_LE("Cisco client: service unavailable for node "
                           "%(uuid)s."), {'uuid': self.uuid})
             raise exception.UcsConnectionError(error=ucs_exception,
                                                node=self.uuid)
 
-    def logout(self):
-        """Logouts the current active session."""
+    def logout(self, discard=False):
+        """Releases the current active session.
+
+        The session is kept for reuse, unless the management client cache is
+        disabled or the session is discarded, in which case it is logged out.
+
+        :param discard: whether the session must not be reused.
+        """
 
         if self.handle:
-            self.handle.Logout()
+            client_cache.release_session(
+                'ucs', self._session_params(), self.handle,
+                close=_logout_handle, discard=discard)
+            self.handle = None
+
+
+def _logout_handle(handle):
+    handle.Logout()
@@ -13,17 +13,22 @@
 # under the License.
 
 import base64
+import collections
+import copy
 import os
 import tempfile
+import time
 
 from oslo_config import cfg
 from oslo_log import log as logging
+from oslo_serialization import jsonutils
 from oslo_utils import timeutils
 import six
 
 from ironic.common import exception
 from ironic.common.i18n import _, _LE, _LW
 from ironic.common import swift
+from ironic.common import utils as common_utils
 from ironic.conductor import utils
 from ironic.drivers import base
 from ironic.drivers.modules import agent_client
@@ -33,6 +38,13 @@ LOG = logging.getLogger(__name__)
 
 CONF = cfg.CONF
 
+DriverInfoCacheElement = collections.namedtuple(
+    'DriverInfoCacheElement', ['fingerprint', 'info', 'expires_at'])
+
+# Parsed driver_info in format
+# {(<parsing function>, <node UUID>): DriverInfoCacheElement}
+_DRIVER_INFO_CACHE = {}
+
 
 class MixinVendorInterface(base.VendorInterface):
     """Wrapper around multiple VendorInterfaces."""
@@ -262,6 +274,49 @@ def normalize_mac(mac):
     return mac.replace('-', '').replace(':', '').lower()
 
 
+@common_utils.register_reset
+def _reset():
+    """Drop the cached driver_info of all the nodes."""
+    _DRIVER_INFO_CACHE.clear()
+
+
+def cache_driver_info(func):
+    """Decorator caching the result of a driver_info parsing function.
+
+    The decorated function takes a node and returns a dictionary built from
+    its driver_info. Its result is kept for [DEFAULT]driver_info_cache_ttl
+    seconds and returned again for the same node as long as its driver_info
+    is unchanged. Errors are not cached.
+
+    :param func: the parsing function, taking a node as its only argument.
+    :returns: a wrapper function returning a copy of the parsed driver_info.
+    """
+    @six.wraps(func)
+    def wrapper(node):
+        ttl = CONF.driver_info_cache_ttl
+        if not ttl:
+            return func(node)
+
+        try:
+            fingerprint = jsonutils.dumps(node.driver_info or {},
+                                          sort_keys=True)
+        except (TypeError, ValueError):
+            return func(node)
+
+        key = (func, node.uuid)
+        element = _DRIVER_INFO_CACHE.get(key)
+        if (element is not None and element.fingerprint == fingerprint and
+                element.expires_at > time.time()):
+            return copy.copy(element.info)
+
+        info = func(node)
+        _DRIVER_INFO_CACHE[key] = DriverInfoCacheElement(
+            fingerprint=fingerprint, info=copy.copy(info),
+            expires_at=time.time() + ttl)
+        return info
+    return wrapper
+
+
 def get_ramdisk_logs_file_name(node):
     """Construct the log file name.
 
@@ -327,7 +382,7 @@ def collect_ramdisk_logs(node):
     :param node: A node object.
 
     """
-    client = agent_client.AgentClient()
+    client = agent_client.get_client()
     try:
         result = client.collect_system_logs(node)
     except exception.IronicException as e:
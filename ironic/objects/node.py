@@ -57,7 +57,8 @@ class Node(base.IronicObject, object_base.VersionedObjectDictCompat):
     # Version 1.16: Add network_interface field
     # Version 1.17: Add resource_class field
     # Version 1.18: Add default setting for network_interface
-    VERSION = '1.18'
+    # Version 1.19: Add record_heartbeat()
+    VERSION = '1.19'
 
     dbapi = db_api.get_instance()
 
@@ -383,6 +384,43 @@ class Node(base.IronicObject, object_base.VersionedObjectDictCompat):
         """Touch the database record to mark the provisioning as alive."""
         self.dbapi.touch_node_provisioning(self.id)
 
+    # NOTE(xek): We don't want to enable RPC on this call just yet. Remotable
+    # methods can be used in the future to replace current explicit RPC calls.
+    # Implications of calling new remote procedures should be thought through.
+    # @object_base.remotable
+    def record_heartbeat(self, agent_url, timestamp, touch_provisioning=False,
+                         context=None):
+        """Record an agent heartbeat with a single database update.
+
+        Only the 'agent_url' and 'agent_last_heartbeat' keys of
+        driver_internal_info are written, so this does not require an
+        exclusive lock on the node. The in-memory copy is updated to match.
+
+        :param agent_url: agent HTTP API URL.
+        :param timestamp: time of the heartbeat, in seconds since the epoch.
+        :param touch_provisioning: whether to also mark the provisioning
+                                   as alive, see touch_provisioning().
+        :param context: Security context. NOTE: This should only
+                        be used internally by the indirection_api.
+                        Unfortunately, RPC requires context as the first
+                        argument, even though we don't use it.
+                        A context should be set when instantiating the
+                        object, e.g.: Node(context)
+        """
+        values = {'agent_url': agent_url,
+                  'agent_last_heartbeat': timestamp}
+        db_node = self.dbapi.record_node_heartbeat(
+            self.id, values, touch_provisioning=touch_provisioning)
+
+        info = self.driver_internal_info
+        info.update(values)
+        self.driver_internal_info = info
+        fields = ['driver_internal_info']
+        if touch_provisioning:
+            self.provision_updated_at = db_node.provision_updated_at
+            fields.append('provision_updated_at')
+        self.obj_reset_changes(fields)
+
     @classmethod
     def get_by_port_addresses(cls, context, addresses):
         """Get a node by associated port addresses.
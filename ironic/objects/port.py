@@ -35,7 +35,8 @@ class Port(base.IronicObject, object_base.VersionedObjectDictCompat):
     # Version 1.5: Add list_by_portgroup_id() and new fields
     #              local_link_connection, portgroup_id and pxe_enabled
     # Version 1.6: Add internal_info field
-    VERSION = '1.6'
+    # Version 1.7: Add list_by_addresses()
+    VERSION = '1.7'
 
     dbapi = dbapi.get_instance()
 
@@ -159,6 +160,26 @@ class Port(base.IronicObject, object_base.VersionedObjectDictCompat):
                                            sort_dir=sort_dir)
         return Port._from_db_object_list(db_ports, cls, context)
 
+    # NOTE(xek): We don't want to enable RPC on this call just yet. Remotable
+    # methods can be used in the future to replace current explicit RPC calls.
+    # Implications of calling new remote procedures should be thought through.
+    # @object_base.remotable_classmethod
+    @classmethod
+    def list_by_addresses(cls, context, addresses):
+        """Return a list of Port objects with any of the given MAC addresses.
+
+        The ports are found with a single database query. MAC addresses are
+        normalized to lower case first, as they are stored this way.
+
+        :param context: Security context.
+        :param addresses: a list of MAC addresses.
+        :returns: a list of :class:`Port` object.
+
+        """
+        addresses = [address.lower() for address in addresses]
+        db_ports = cls.dbapi.get_ports_by_addresses(addresses)
+        return Port._from_db_object_list(db_ports, cls, context)
+
     # NOTE(xek): We don't want to enable RPC on this call just yet. Remotable
     # methods can be used in the future to replace current explicit RPC calls.
     # Implications of calling new remote procedures should be thought through.
@@ -38,6 +38,7 @@ import testtools
 from ironic.common import config as ironic_config
 from ironic.common import context as ironic_context
 from ironic.common import hash_ring
+from ironic.common import utils
 from ironic.conf import CONF
 from ironic.objects import base as objects_base
 from ironic.tests.unit import policy_fixture
@@ -107,6 +108,8 @@ class TestCase(testtools.TestCase):
 
         self.addCleanup(self._clear_attrs)
         self.addCleanup(hash_ring.HashRingManager().reset)
+        # Caches and connections kept in module-level variables
+        self.addCleanup(utils.reset_state)
         self.useFixture(fixtures.EnvironmentVariable('http_proxy'))
         self.policy = self.useFixture(policy_fixture.PolicyFixture())
 
@@ -33,6 +33,7 @@ from ironic.api.controllers.v1 import port as api_port
 from ironic.api.controllers.v1 import utils as api_utils
 from ironic.api.controllers.v1 import versions
 from ironic.common import exception
+from ironic.common import lookup_cache
 from ironic.conductor import rpcapi
 from ironic.tests import base
 from ironic.tests.unit.api import base as test_api_base
@@ -451,6 +452,28 @@ class TestPatch(test_api_base.BaseApiTest):
         kargs = mock_upd.call_args[0][1]
         self.assertEqual(address, kargs.address)
 
+    @mock.patch.object(lookup_cache, 'invalidate', autospec=True)
+    def test_replace_address_invalidates_lookup_cache(self, mock_invalidate,
+                                                      mock_upd):
+        mock_upd.return_value = self.port
+        response = self.patch_json('/ports/%s' % self.port.uuid,
+                                   [{'path': '/address',
+                                     'value': 'aa:aa:aa:aa:aa:aa',
+                                     'op': 'replace'}])
+        self.assertEqual(http_client.OK, response.status_code)
+        mock_invalidate.assert_called_once_with()
+
+    @mock.patch.object(lookup_cache, 'invalidate', autospec=True)
+    def test_update_extra_keeps_lookup_cache(self, mock_invalidate,
+                                             mock_upd):
+        mock_upd.return_value = self.port
+        response = self.patch_json('/ports/%s' % self.port.uuid,
+                                   [{'path': '/extra/foo',
+                                     'value': 'bar',
+                                     'op': 'add'}])
+        self.assertEqual(http_client.OK, response.status_code)
+        self.assertFalse(mock_invalidate.called)
+
     def test_replace_node_uuid(self, mock_upd):
         mock_upd.return_value = self.port
         response = self.patch_json('/ports/%s' % self.port.uuid,
@@ -738,13 +761,15 @@ class TestPost(test_api_base.BaseApiTest):
         self.headers = {api_base.Version.string: str(
             versions.MAX_VERSION_STRING)}
 
+    @mock.patch.object(lookup_cache, 'invalidate', autospec=True)
     @mock.patch.object(timeutils, 'utcnow')
-    def test_create_port(self, mock_utcnow):
+    def test_create_port(self, mock_utcnow, mock_invalidate):
         pdict = post_get_test_port()
         test_time = datetime.datetime(2000, 1, 1, 0, 0)
         mock_utcnow.return_value = test_time
         response = self.post_json('/ports', pdict, headers=self.headers)
         self.assertEqual(http_client.CREATED, response.status_int)
+        mock_invalidate.assert_called_once_with()
         result = self.get_json('/ports/%s' % pdict['uuid'],
                                headers=self.headers)
         self.assertEqual(pdict['uuid'], result['uuid'])
@@ -963,9 +988,11 @@ class TestDelete(test_api_base.BaseApiTest):
         self.assertEqual('application/json', response.content_type)
         self.assertIn(self.port.address, response.json['error_message'])
 
-    def test_delete_port_byid(self, mock_dpt):
+    @mock.patch.object(lookup_cache, 'invalidate', autospec=True)
+    def test_delete_port_byid(self, mock_invalidate, mock_dpt):
         self.delete('/ports/%s' % self.port.uuid, expect_errors=True)
         self.assertTrue(mock_dpt.called)
+        mock_invalidate.assert_called_once_with()
 
     def test_delete_port_node_locked(self, mock_dpt):
         self.node.reserve(self.context, 'fake', self.node.uuid)
@@ -23,7 +23,9 @@ from six.moves import http_client
 from ironic.api.controllers import base as api_base
 from ironic.api.controllers import v1 as api_v1
 from ironic.api.controllers.v1 import ramdisk
+from ironic.common import lookup_cache
 from ironic.conductor import rpcapi
+from ironic import objects
 from ironic.tests.unit.api import base as test_api_base
 from ironic.tests.unit.objects import utils as obj_utils
 
@@ -100,6 +102,35 @@ class TestLookup(test_api_base.BaseApiTest):
                          set(data['node']))
         self._check_config(data)
 
+    def test_found_by_addresses_cached(self):
+        obj_utils.create_test_port(self.context,
+                                   node_id=self.node.id,
+                                   address=self.addresses[1])
+        self.get_json(
+            '/lookup?addresses=%s' % ','.join(self.addresses),
+            headers={api_base.Version.string: str(api_v1.MAX_VER)})
+
+        with mock.patch.object(objects.Node, 'get_by_port_addresses',
+                               autospec=True) as mock_get:
+            data = self.get_json(
+                '/lookup?addresses=%s' % ','.join(reversed(self.addresses)),
+                headers={api_base.Version.string: str(api_v1.MAX_VER)})
+            self.assertFalse(mock_get.called)
+        self.assertEqual(self.node.uuid, data['node']['uuid'])
+        self._check_config(data)
+
+    def test_found_by_addresses_cached_node_deleted(self):
+        obj_utils.create_test_port(self.context,
+                                   node_id=self.node.id,
+                                   address=self.addresses[1])
+        lookup_cache.add(self.addresses, uuidutils.generate_uuid())
+
+        data = self.get_json(
+            '/lookup?addresses=%s' % ','.join(self.addresses),
+            headers={api_base.Version.string: str(api_v1.MAX_VER)})
+        self.assertEqual(self.node.uuid, data['node']['uuid'])
+        self.assertEqual(self.node.uuid, lookup_cache.get(self.addresses))
+
     def test_found_by_uuid(self):
         data = self.get_json(
             '/lookup?addresses=%s&node_uuid=%s' %
@@ -169,4 +200,41 @@ class TestHeartbeat(test_api_base.BaseApiTest):
         self.assertEqual(b'', response.body)
         mock_heartbeat.assert_called_once_with(mock.ANY, mock.ANY,
                                                node.uuid, 'url',
+                                               commands_status=None,
                                                topic='test-topic')
+
+    @mock.patch.object(rpcapi.ConductorAPI, 'heartbeat', autospec=True)
+    def test_ok_commands_status(self, mock_heartbeat):
+        node = obj_utils.create_test_node(self.context)
+        commands_status = [{'command_name': 'prepare_image',
+                            'command_status': 'RUNNING'}]
+        response = self.post_json(
+            '/heartbeat/%s' % node.uuid,
+            {'callback_url': 'url', 'commands_status': commands_status},
+            headers={api_base.Version.string: str(api_v1.MAX_VER)})
+        self.assertEqual(http_client.ACCEPTED, response.status_int)
+        mock_heartbeat.assert_called_once_with(
+            mock.ANY, mock.ANY, node.uuid, 'url',
+            commands_status=commands_status, topic='test-topic')
+
+    @mock.patch.object(rpcapi.ConductorAPI, 'heartbeat', autospec=True)
+    def test_commands_status_old_api_version(self, mock_heartbeat):
+        node = obj_utils.create_test_node(self.context)
+        response = self.post_json(
+            '/heartbeat/%s' % node.uuid,
+            {'callback_url': 'url', 'commands_status': []},
+            headers={api_base.Version.string: '1.22'},
+            expect_errors=True)
+        self.assertEqual(http_client.NOT_ACCEPTABLE, response.status_int)
+        self.assertFalse(mock_heartbeat.called)
+
+    @mock.patch.object(rpcapi.ConductorAPI, 'heartbeat', autospec=True)
+    def test_commands_status_not_list(self, mock_heartbeat):
+        node = obj_utils.create_test_node(self.context)
+        response = self.post_json(
+            '/heartbeat/%s' % node.uuid,
+            {'callback_url': 'url', 'commands_status': {'foo': 'bar'}},
+            headers={api_base.Version.string: str(api_v1.MAX_VER)},
+            expect_errors=True)
+        self.assertEqual(http_client.BAD_REQUEST, response.status_int)
+        self.assertFalse(mock_heartbeat.called)
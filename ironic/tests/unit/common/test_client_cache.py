@@ -0,0 +1,221 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import time
+
+import eventlet
+import mock
+
+from ironic.common import client_cache
+from ironic.tests import base
+
+
+class SharedClientTestCase(base.TestCase):
+
+    def setUp(self):
+        super(SharedClientTestCase, self).setUp()
+        self.create = mock.Mock(side_effect=['client1', 'client2'])
+
+    def test_get_client(self):
+        self.assertEqual('client1',
+                         client_cache.get_client('kind', ('a',), self.create))
+        self.assertEqual('client1',
+                         client_cache.get_client('kind', ('a',), self.create))
+        self.create.assert_called_once_with()
+
+    def test_get_client_different_params(self):
+        client_cache.get_client('kind', ('a',), self.create)
+        self.assertEqual('client2',
+                         client_cache.get_client('kind', ('b',), self.create))
+
+    def test_get_client_different_kind(self):
+        client_cache.get_client('kind', ('a',), self.create)
+        self.assertEqual('client2',
+                         client_cache.get_client('other', ('a',),
+                                                 self.create))
+
+    @mock.patch.object(time, 'time', autospec=True)
+    def test_get_client_expired(self, mock_time):
+        mock_time.return_value = 1000
+        client_cache.get_client('kind', ('a',), self.create)
+        mock_time.return_value = 1300
+        self.assertEqual('client2',
+                         client_cache.get_client('kind', ('a',), self.create))
+
+    def test_get_client_check_failed(self):
+        check = mock.Mock(return_value=False)
+        client_cache.get_client('kind', ('a',), self.create, check=check)
+        self.assertEqual('client2',
+                         client_cache.get_client('kind', ('a',), self.create,
+                                                 check=check))
+        check.assert_called_once_with('client1')
+
+    def test_get_client_disabled(self):
+        self.config(management_client_cache_ttl=0)
+        client_cache.get_client('kind', ('a',), self.create)
+        self.assertEqual('client2',
+                         client_cache.get_client('kind', ('a',), self.create))
+
+    def test_get_client_ttl(self):
+        self.config(management_client_cache_ttl=0)
+        client_cache.get_client('kind', ('a',), self.create, ttl=60)
+        self.assertEqual('client1',
+                         client_cache.get_client('kind', ('a',), self.create,
+                                                 ttl=60))
+
+    def test_get_client_ttl_disabled(self):
+        client_cache.get_client('kind', ('a',), self.create, ttl=0)
+        self.assertEqual('client2',
+                         client_cache.get_client('kind', ('a',), self.create,
+                                                 ttl=0))
+
+    @mock.patch.object(client_cache, '_PURGE_THRESHOLD', 2)
+    @mock.patch.object(time, 'time', autospec=True)
+    def test_get_client_purge_expired(self, mock_time):
+        self.create.side_effect = ['client1', 'client2', 'client3']
+        mock_time.return_value = 1000
+        client_cache.get_client('kind', ('a',), self.create)
+        mock_time.return_value = 1200
+        client_cache.get_client('kind', ('b',), self.create)
+        mock_time.return_value = 1400
+        client_cache.get_client('kind', ('c',), self.create)
+        self.assertEqual({('kind', ('b',)), ('kind', ('c',))},
+                         set(client_cache._SHARED_CLIENTS))
+
+    def test_invalidate_client(self):
+        client_cache.get_client('kind', ('a',), self.create)
+        client_cache.invalidate_client('kind', ('a',))
+        self.assertEqual('client2',
+                         client_cache.get_client('kind', ('a',), self.create))
+
+
+class SessionTestCase(base.TestCase):
+
+    def setUp(self):
+        super(SessionTestCase, self).setUp()
+        self.sessions = [mock.Mock(name='session1'),
+                         mock.Mock(name='session2')]
+        self.create = mock.Mock(side_effect=self.sessions)
+        self.close = mock.Mock()
+
+    def _session(self, check=None):
+        return client_cache.session('kind', ('a',), self.create,
+                                    close=self.close, check=check)
+
+    def test_session_reused(self):
+        with self._session() as session:
+            self.assertEqual(self.sessions[0], session)
+        with self._session() as session:
+            self.assertEqual(self.sessions[0], session)
+        self.create.assert_called_once_with()
+        self.assertFalse(self.close.called)
+
+    def test_session_not_shared(self):
+        with self._session() as session1:
+            with self._session() as session2:
+                self.assertEqual(self.sessions[1], session2)
+            self.assertEqual(self.sessions[0], session1)
+        self.assertEqual(2, len(client_cache._IDLE_SESSIONS[('kind',
+                                                             ('a',))]))
+
+    def test_session_error(self):
+        def _fail():
+            with self._session():
+                raise RuntimeError('boom')
+
+        self.assertRaises(RuntimeError, _fail)
+        self.close.assert_called_once_with(self.sessions[0])
+        with self._session() as session:
+            self.assertEqual(self.sessions[1], session)
+
+    def test_session_close_error(self):
+        self.config(management_client_cache_ttl=0)
+        self.close.side_effect = RuntimeError('boom')
+        with self._session():
+            pass
+        self.close.assert_called_once_with(self.sessions[0])
+
+    def test_session_disabled(self):
+        self.config(management_client_cache_ttl=0)
+        with self._session():
+            pass
+        self.close.assert_called_once_with(self.sessions[0])
+        with self._session() as session:
+            self.assertEqual(self.sessions[1], session)
+
+    @mock.patch.object(time, 'time', autospec=True)
+    def test_session_expired(self, mock_time):
+        mock_time.return_value = 1000
+        with self._session():
+            pass
+        mock_time.return_value = 1300
+        with self._session() as session:
+            self.assertEqual(self.sessions[1], session)
+        self.close.assert_called_once_with(self.sessions[0])
+
+    def test_session_check_failed(self):
+        check = mock.Mock(return_value=False)
+        with self._session(check=check):
+            pass
+        with self._session(check=check) as session:
+            self.assertEqual(self.sessions[1], session)
+        check.assert_called_once_with(self.sessions[0])
+        self.close.assert_called_once_with(self.sessions[0])
+
+
+@mock.patch.object(eventlet, 'spawn_after', autospec=True)
+@mock.patch.object(time, 'time', autospec=True)
+class PurgeTestCase(base.TestCase):
+
+    def setUp(self):
+        super(PurgeTestCase, self).setUp()
+        self.close = mock.Mock()
+
+    def _release(self, params, client):
+        client_cache.release_session('kind', params, client,
+                                     close=self.close)
+
+    def test_purge(self, mock_time, mock_spawn):
+        mock_time.return_value = 1000
+        self._release(('a',), 'session1')
+        mock_spawn.assert_called_once_with(300, client_cache._purge)
+
+        mock_time.return_value = 1300
+        client_cache._purge()
+
+        self.close.assert_called_once_with('session1')
+        self.assertEqual({}, client_cache._IDLE_SESSIONS)
+        self.assertEqual(1, mock_spawn.call_count)
+
+    def test_purge_rescheduled(self, mock_time, mock_spawn):
+        mock_time.return_value = 1000
+        self._release(('a',), 'session1')
+        mock_time.return_value = 1200
+        self._release(('b',), 'session2')
+        # A purge is already pending
+        self.assertEqual(1, mock_spawn.call_count)
+
+        mock_time.return_value = 1300
+        client_cache._purge()
+
+        self.close.assert_called_once_with('session1')
+        self.assertEqual([('kind', ('b',))],
+                         list(client_cache._IDLE_SESSIONS))
+        mock_spawn.assert_called_with(200, client_cache._purge)
+
+    def test_purge_shared_clients(self, mock_time, mock_spawn):
+        mock_time.return_value = 1000
+        client_cache.get_client('kind', ('a',), lambda: 'client1')
+        self._release(('b',), 'session1')
+        mock_time.return_value = 1301
+        client_cache._purge()
+        self.assertEqual({}, client_cache._SHARED_CLIENTS)
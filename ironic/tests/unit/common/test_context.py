@@ -95,6 +95,7 @@ class RequestContextTestCase(tests_base.TestCase):
     def test_get_admin_context(self):
         admin_context = context.get_admin_context()
         self.assertTrue(admin_context.is_admin)
+        self.assertIsNone(admin_context.image_metadata_cache)
 
     @mock.patch.object(oslo_context, 'get_current')
     def test_thread_without_context(self, context_get_mock):
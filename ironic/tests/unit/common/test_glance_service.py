@@ -15,6 +15,9 @@
 
 
 import datetime
+import os
+import shutil
+import tempfile
 import time
 
 from glanceclient import client as glance_client
@@ -405,6 +408,58 @@ class TestGlanceImageService(base.TestCase):
         }
         self.assertEqual(expected, image_meta)
 
+    def test_show_cached(self):
+        fixture = self._make_fixture(name='image1', is_public=True)
+        image_id = self.service.create(fixture)['id']
+
+        with mock.patch.object(self.service.client.images, 'get',
+                               wraps=self.service.client.images.get) as get:
+            image_meta = self.service.show(image_id)
+            image_meta['name'] = 'modified'
+            self.assertEqual('image1', self.service.show(image_id)['name'])
+            # The cache is shared by all the services of the project
+            other_service = service.GlanceImageService(
+                self.service.client, 1, context.RequestContext(
+                    auth_token=True, tenant='fake'))
+            self.assertEqual('image1', other_service.show(image_id)['name'])
+            get.assert_called_once_with(image_id)
+
+    def test_show_cached_per_project(self):
+        fixture = self._make_fixture(name='image1', is_public=True)
+        image_id = self.service.create(fixture)['id']
+
+        with mock.patch.object(self.service.client.images, 'get',
+                               wraps=self.service.client.images.get) as get:
+            self.service.show(image_id)
+            other_service = service.GlanceImageService(
+                self.service.client, 1, context.RequestContext(
+                    auth_token=True, tenant='other'))
+            other_service.show(image_id)
+            self.assertEqual(2, get.call_count)
+
+    def test_show_cached_per_admin_flag(self):
+        fixture = self._make_fixture(name='image1', is_public=False)
+        image_id = self.service.create(fixture)['id']
+        admin_context = context.RequestContext(is_admin=True, tenant='fake')
+        admin_service = service.GlanceImageService(self.service.client, 1,
+                                                   admin_context)
+        user_context = context.RequestContext(tenant='fake')
+        user_service = service.GlanceImageService(self.service.client, 1,
+                                                  user_context)
+
+        self.assertEqual('image1', admin_service.show(image_id)['name'])
+        # The image is not visible without a token, unless admin
+        self.assertRaises(exception.ImageNotFound,
+                          user_service.show, image_id)
+
+    def test_update_invalidates_cached_metadata(self):
+        fixture = self._make_fixture(name='image1', is_public=True)
+        image_id = self.service.create(fixture)['id']
+        self.service.show(image_id)
+
+        self.service.update(image_id, {'name': 'image2'})
+        self.assertEqual('image2', self.service.show(image_id)['name'])
+
     def test_show_raises_when_no_authtoken_in_the_context(self):
         fixture = self._make_fixture(name='image1',
                                      is_public=False,
@@ -1085,6 +1140,143 @@ class TestSwiftTempUrlCache(base.TestCase):
         self.assertFalse(rm_expired.called)
         self.assertNotIn(fake_image['id'], self.glance_service._cache)
 
+    @mock.patch.object(glance_v2.METRICS, 'send_counter', autospec=True)
+    @mock.patch('swiftclient.utils.generate_temp_url', autospec=True)
+    def test_swift_temp_url_cache_hit_rate(self, tempurl_mock, counter_mock):
+        self.glance_service._cache.clear()
+        fake_image = {
+            'id': uuidutils.generate_uuid()
+        }
+        tempurl_mock.return_value = (
+            '/v1/AUTH_a/glance/%s?temp_url_sig=hmacsig&temp_url_expires=%d'
+            % (fake_image['id'], int(time.time()) + 1200))
+        self.glance_service._validate_temp_url_config = mock.Mock()
+
+        first = self.glance_service.swift_temp_url(image_info=fake_image)
+        second = self.glance_service.swift_temp_url(image_info=fake_image)
+
+        self.assertEqual(first, second)
+        self.assertEqual(1, tempurl_mock.call_count)
+        self.assertEqual(0.5, self.glance_service._cache.hit_rate)
+        counter_mock.assert_has_calls([
+            mock.call('GlanceImageService.temp_url_cache.miss', 1),
+            mock.call('GlanceImageService.temp_url_cache.hit', 1)])
+
+
+class TestTempUrlCache(base.TestCase):
+
+    def setUp(self):
+        super(TestTempUrlCache, self).setUp()
+        self.cache = glance_v2.TempUrlCache()
+        self.now = int(time.time())
+
+    def _element(self, name, expires_in=1000):
+        return glance_v2.TempUrlCacheElement(
+            url='http://swift/%s' % name,
+            url_expires_at=self.now + expires_in)
+
+    def test_get(self):
+        element = self._element('a')
+        self.cache.set('a', element)
+        self.assertEqual(element, self.cache.get('a', self.now))
+        self.assertIsNone(self.cache.get('b', self.now))
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual(1, self.cache.misses)
+
+    def test_get_expires_too_soon(self):
+        self.cache.set('a', self._element('a', expires_in=10))
+        self.assertIsNone(self.cache.get('a', self.now + 100))
+        self.assertEqual(1, self.cache.misses)
+
+    def test_lru_eviction(self):
+        self.config(swift_temp_url_cache_max_size=2, group='glance')
+        self.cache.set('a', self._element('a'))
+        self.cache.set('b', self._element('b'))
+        # Use 'a', so that 'b' is the least recently used
+        self.cache.get('a', self.now)
+        self.cache.set('c', self._element('c'))
+        self.assertEqual(2, len(self.cache))
+        self.assertIn('a', self.cache)
+        self.assertNotIn('b', self.cache)
+        self.assertIn('c', self.cache)
+
+    def test_remove_expired(self):
+        self.cache.set('a', self._element('a', expires_in=10))
+        self.cache.set('b', self._element('b', expires_in=1000))
+        # 'c' is renewed, its first expiration time is left in the heap
+        self.cache.set('c', self._element('c', expires_in=10))
+        self.cache.set('c', self._element('c2', expires_in=1000))
+        self.cache.remove_expired(self.now + 100)
+        self.assertNotIn('a', self.cache)
+        self.assertIn('b', self.cache)
+        self.assertEqual('http://swift/c2', self.cache['c'].url)
+
+    def test_expiry_heap_compacted(self):
+        for i in range(100):
+            self.cache.set('a', self._element('a%d' % i))
+        self.assertLessEqual(len(self.cache._expiry_heap), 18)
+        self.cache.remove_expired(self.now + 2000)
+        self.assertEqual(0, len(self.cache))
+
+
+class TestTempUrlCacheDir(base.TestCase):
+
+    def setUp(self):
+        super(TestTempUrlCacheDir, self).setUp()
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        self.config(swift_temp_url_cache_dir=self.cache_dir, group='glance')
+        self.now = int(time.time())
+
+    def test_shared_between_caches(self):
+        element = glance_v2.TempUrlCacheElement(
+            url='http://swift/a', url_expires_at=self.now + 1000)
+        glance_v2.TempUrlCache().set('a', element)
+        other = glance_v2.TempUrlCache()
+        self.assertEqual(element, other.get('a', self.now))
+        # Now cached in memory as well
+        self.assertIn('a', other)
+
+    def test_shared_expired(self):
+        element = glance_v2.TempUrlCacheElement(
+            url='http://swift/a', url_expires_at=self.now + 10)
+        glance_v2.TempUrlCache().set('a', element)
+        self.assertIsNone(glance_v2.TempUrlCache().get('a', self.now + 100))
+
+    def test_loaded_evicts(self):
+        self.config(swift_temp_url_cache_max_size=1, group='glance')
+        glance_v2.TempUrlCache().set('a', glance_v2.TempUrlCacheElement(
+            url='http://swift/a', url_expires_at=self.now + 1000))
+        cache = glance_v2.TempUrlCache()
+        cache.set('b', glance_v2.TempUrlCacheElement(
+            url='http://swift/b', url_expires_at=self.now + 1000))
+        self.assertIsNotNone(cache.get('a', self.now))
+        self.assertEqual(1, len(cache))
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+
+    def test_prune(self):
+        self.config(swift_temp_url_cache_max_size=1, group='glance')
+        cache = glance_v2.TempUrlCache()
+        cache.set('a', glance_v2.TempUrlCacheElement(
+            url='http://swift/a', url_expires_at=self.now + 1000))
+        # Pruning happens once per swift_temp_url_duration
+        cache.set('expired', glance_v2.TempUrlCacheElement(
+            url='http://swift/e', url_expires_at=self.now - 10))
+        self.assertEqual(['a', 'expired'], sorted(os.listdir(self.cache_dir)))
+        cache._next_store_prune = 0
+        cache.set('b', glance_v2.TempUrlCacheElement(
+            url='http://swift/b', url_expires_at=self.now + 1000))
+        self.assertEqual(1, len(os.listdir(self.cache_dir)))
+
+    def test_store_failure(self):
+        self.config(swift_temp_url_cache_dir='/nonexistent', group='glance')
+        cache = glance_v2.TempUrlCache()
+        element = glance_v2.TempUrlCacheElement(
+            url='http://swift/a', url_expires_at=self.now + 1000)
+        cache.set('a', element)
+        self.assertEqual(element, cache.get('a', self.now))
+
 
 class TestGlanceUrl(base.TestCase):
 
@@ -13,6 +13,7 @@
 import datetime
 import os
 import shutil
+import time
 
 import mock
 from oslo_config import cfg
@@ -99,6 +100,91 @@ class HttpImageServiceTestCase(base.TestCase):
                           self.service.show, self.href)
         head_mock.assert_called_with(self.href)
 
+    @mock.patch.object(requests, 'head', autospec=True)
+    def test_show_cached(self, head_mock):
+        head_mock.return_value.status_code = http_client.OK
+        head_mock.return_value.headers = {'Content-Length': 100}
+        result = self.service.show(self.href)
+        result['size'] = 42
+        self.assertEqual(
+            {'size': 100, 'updated_at': None, 'properties': {}},
+            image_service.HttpImageService().show(self.href))
+        head_mock.assert_called_once_with(self.href)
+
+    @mock.patch.object(time, 'time', autospec=True)
+    @mock.patch.object(requests, 'head', autospec=True)
+    def test_show_revalidate_not_modified(self, head_mock, time_mock):
+        time_mock.return_value = 1000
+        head_mock.return_value.status_code = http_client.OK
+        head_mock.return_value.headers = {
+            'Content-Length': 100,
+            'ETag': '"abc"',
+            'Last-Modified': 'Tue, 15 Nov 2014 08:12:31 GMT'
+        }
+        expected = {'size': 100,
+                    'updated_at': datetime.datetime(2014, 11, 15, 8, 12, 31),
+                    'properties': {}}
+        self.assertEqual(expected, self.service.show(self.href))
+
+        time_mock.return_value = 2000
+        head_mock.return_value.status_code = http_client.NOT_MODIFIED
+        head_mock.return_value.headers = {}
+        self.assertEqual(expected, self.service.show(self.href))
+        head_mock.assert_called_with(
+            self.href,
+            headers={'If-None-Match': '"abc"',
+                     'If-Modified-Since': 'Tue, 15 Nov 2014 08:12:31 GMT'})
+        self.assertEqual(2, head_mock.call_count)
+        # The metadata is cached again after being revalidated
+        self.assertEqual(expected, self.service.show(self.href))
+        self.assertEqual(2, head_mock.call_count)
+
+    @mock.patch.object(time, 'time', autospec=True)
+    @mock.patch.object(requests, 'head', autospec=True)
+    def test_show_revalidate_modified(self, head_mock, time_mock):
+        time_mock.return_value = 1000
+        head_mock.return_value.status_code = http_client.OK
+        head_mock.return_value.headers = {'Content-Length': 100,
+                                          'ETag': '"abc"'}
+        self.service.show(self.href)
+
+        time_mock.return_value = 2000
+        head_mock.return_value.headers = {'Content-Length': 200,
+                                          'ETag': '"def"'}
+        self.assertEqual(200, self.service.show(self.href)['size'])
+        head_mock.assert_called_with(self.href,
+                                     headers={'If-None-Match': '"abc"'})
+
+    @mock.patch.object(requests, 'head', autospec=True)
+    def test_show_cache_disabled(self, head_mock):
+        self.config(image_metadata_cache_ttl=0)
+        head_mock.return_value.status_code = http_client.OK
+        head_mock.return_value.headers = {'Content-Length': 100}
+        self.service.show(self.href)
+        self.service.show(self.href)
+        self.assertEqual(2, head_mock.call_count)
+
+    @mock.patch.object(requests, 'head', autospec=True)
+    def test_show_cache_disabled_same_request(self, head_mock):
+        self.config(image_metadata_cache_ttl=0)
+        head_mock.return_value.status_code = http_client.OK
+        head_mock.return_value.headers = {'Content-Length': 100}
+        service = image_service.HttpImageService(context=self.context)
+        service.show(self.href)
+        service.show(self.href)
+        head_mock.assert_called_once_with(self.href)
+        image_service.HttpImageService().show(self.href)
+        self.assertEqual(2, head_mock.call_count)
+
+    @mock.patch.object(requests, 'head', autospec=True)
+    def test_validate_href_conditional(self, head_mock):
+        head_mock.return_value.status_code = http_client.NOT_MODIFIED
+        headers = {'If-None-Match': '"abc"'}
+        self.service.validate_href(self.href, headers=headers)
+        head_mock.assert_called_once_with(self.href, headers=headers)
+        self.assertRaises(exception.ImageRefValidationFailed,
+                          self.service.validate_href, self.href)
+
     @mock.patch.object(shutil, 'copyfileobj', autospec=True)
     @mock.patch.object(requests, 'get', autospec=True)
     def test_download_success(self, req_get_mock, shutil_mock):
@@ -312,15 +398,16 @@ class ServiceGetterTestCase(base.TestCase):
                        return_value=None, autospec=True)
     def test_get_http_image_service(self, http_service_mock):
         image_href = 'http://127.0.0.1/image.qcow2'
-        image_service.get_image_service(image_href)
-        http_service_mock.assert_called_once_with()
+        image_service.get_image_service(image_href, context=self.context)
+        http_service_mock.assert_called_once_with(mock.ANY,
+                                                  context=self.context)
 
     @mock.patch.object(image_service.HttpImageService, '__init__',
                        return_value=None, autospec=True)
     def test_get_https_image_service(self, http_service_mock):
         image_href = 'https://127.0.0.1/image.qcow2'
         image_service.get_image_service(image_href)
-        http_service_mock.assert_called_once_with()
+        http_service_mock.assert_called_once_with(mock.ANY, context=None)
 
     @mock.patch.object(image_service.FileImageService, '__init__',
                        return_value=None, autospec=True)
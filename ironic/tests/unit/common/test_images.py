@@ -17,10 +17,13 @@
 
 import os
 import shutil
+import tempfile
+import time
 
 from ironic_lib import disk_utils
 from ironic_lib import utils as ironic_utils
 import mock
+from oslo_concurrency import lockutils
 from oslo_concurrency import processutils
 from oslo_config import cfg
 import six
@@ -252,6 +255,258 @@ class IronicImagesTestCase(base.TestCase):
         mock_igi.assert_called_once_with(instance_info['image_source'])
 
 
+class StreamToDeviceTestCase(base.TestCase):
+
+    def setUp(self):
+        super(StreamToDeviceTestCase, self).setUp()
+        execute_patcher = mock.patch.object(utils, 'execute', autospec=True)
+        self.execute_mock = execute_patcher.start()
+        self.addCleanup(execute_patcher.stop)
+        self.written = []
+
+        def _execute(*cmd, **kwargs):
+            self.written.append(kwargs['process_input'])
+            return '', ''
+
+        self.execute_mock.side_effect = _execute
+
+    def _writer(self, block_size=8192, total_size=None):
+        return images._BlockDeviceWriter('image_href', '/dev/fake',
+                                         block_size, total_size=total_size)
+
+    def _dd_call(self, seek, data, block_size=8192):
+        return mock.call('dd', 'of=/dev/fake', 'bs=%d' % block_size,
+                         'seek=%d' % seek, 'oflag=direct', 'iflag=fullblock',
+                         'conv=notrunc', process_input=data,
+                         run_as_root=True)
+
+    def test_writer_aligned_writes(self):
+        writer = self._writer(block_size=8192 + 100)
+        writer.write(b'a' * 5000)
+        self.assertEqual([], self.written)
+        writer.write(b'b' * 12000)
+        self.assertEqual([b'a' * 5000 + b'b' * 11384], self.written)
+        writer.write(b'c' * 100)
+        writer.close()
+        self.assertEqual(
+            [self._dd_call(0, b'a' * 5000 + b'b' * 11384),
+             self._dd_call(2, b'b' * 616 + b'c' * 100)],
+            self.execute_mock.call_args_list)
+        self.assertEqual(17100, writer.bytes_written)
+        # Closing again writes nothing
+        writer.close()
+        self.assertEqual(2, self.execute_mock.call_count)
+
+    def test_writer_gzip_unacceptable(self):
+        writer = self._writer()
+        # Split the header to check it is sniffed across writes
+        writer.write(b'\x1f')
+        self.assertRaises(exception.ImageUnacceptable,
+                          writer.write, b'\x8b' + b'\0' * 100)
+        self.assertFalse(self.execute_mock.called)
+
+    def test_writer_qcow2_unacceptable(self):
+        writer = self._writer()
+        self.assertRaises(exception.ImageUnacceptable,
+                          writer.write, b'QFI\xfb' + b'\0' * 100)
+        self.assertFalse(self.execute_mock.called)
+
+    def test_writer_larger_than_total_size(self):
+        writer = self._writer(total_size=10000)
+        writer.write(b'a' * 9000)
+        self.assertRaises(exception.ImageUnacceptable,
+                          writer.write, b'a' * 1001)
+        self.assertEqual([b'a' * 8192], self.written)
+
+    def test_writer_dd_fails(self):
+        self.execute_mock.side_effect = processutils.ProcessExecutionError(
+            stderr='No space left')
+        writer = self._writer()
+        writer.write(b'a' * 100)
+        self.assertRaises(processutils.ProcessExecutionError, writer.close)
+
+    @mock.patch.object(images, 'download_size', autospec=True)
+    @mock.patch.object(image_service, 'get_image_service', autospec=True)
+    def test_stream_to_device(self, image_service_mock, size_mock):
+        size_mock.return_value = 10000
+
+        def _download(image_href, image_file):
+            image_file.write(b'a' * 10000)
+
+        download_mock = image_service_mock.return_value.download
+        download_mock.side_effect = _download
+
+        written = images.stream_to_device('context', 'image_href',
+                                          '/dev/fake', 8192)
+
+        self.assertEqual(10000, written)
+        image_service_mock.assert_called_once_with('image_href',
+                                                   context='context')
+        size_mock.assert_called_once_with('context', 'image_href',
+                                          image_service_mock.return_value)
+        download_mock.assert_called_once_with('image_href', mock.ANY)
+        self.assertEqual([b'a' * 8192, b'a' * 1808], self.written)
+
+    @mock.patch.object(images, 'download_size', autospec=True)
+    def test_stream_to_device_download_fails(self, size_mock):
+        image_service_mock = mock.MagicMock()
+        image_service_mock.download.side_effect = (
+            exception.ImageDownloadFailed(image_href='image_href',
+                                          reason='boom'))
+
+        self.assertRaises(exception.ImageDownloadFailed,
+                          images.stream_to_device, 'context', 'image_href',
+                          '/dev/fake', 8192, image_service_mock)
+        self.assertFalse(self.execute_mock.called)
+
+
+class BootImageCacheTestCase(base.TestCase):
+
+    def setUp(self):
+        super(BootImageCacheTestCase, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.cache_dir = os.path.join(self.tmpdir, 'cache')
+        self.config(boot_image_cache_dir=self.cache_dir)
+        self.create_mock = mock.Mock(side_effect=self._create)
+
+    def _create(self, path):
+        with open(path, 'w') as f:
+            f.write('image')
+
+    def _output(self, name):
+        return os.path.join(self.tmpdir, name)
+
+    def _cached(self):
+        return sorted(name for name in os.listdir(self.cache_dir)
+                      if not name.startswith('.'))
+
+    def test_create_cached_image_shared(self):
+        images._create_cached_image(self._output('node1'), 'iso',
+                                    {'a': 1}, self.create_mock)
+        images._create_cached_image(self._output('node2'), 'iso',
+                                    {'a': 1}, self.create_mock)
+
+        self.assertEqual(1, self.create_mock.call_count)
+        self.assertEqual([images._get_cache_key('iso', {'a': 1})],
+                         self._cached())
+        # Linked from the cache and from both nodes
+        self.assertEqual(3, os.stat(self._output('node1')).st_nlink)
+        with open(self._output('node2')) as f:
+            self.assertEqual('image', f.read())
+
+    def test_create_cached_image_different_inputs(self):
+        images._create_cached_image(self._output('node1'), 'iso',
+                                    {'a': 1}, self.create_mock)
+        images._create_cached_image(self._output('node2'), 'iso',
+                                    {'a': 2}, self.create_mock)
+
+        self.assertEqual(2, self.create_mock.call_count)
+        self.assertEqual(2, len(self._cached()))
+
+    def test_create_cached_image_replaces_output(self):
+        self._create(self._output('node1'))
+        images._create_cached_image(self._output('node1'), 'iso',
+                                    {'a': 1}, self.create_mock)
+        self.assertEqual(2, os.stat(self._output('node1')).st_nlink)
+        self.assertEqual(['cache', 'node1'], sorted(os.listdir(self.tmpdir)))
+
+    def test_create_cached_image_fails(self):
+        self.create_mock.side_effect = exception.ImageCreationFailed(
+            image_type='iso', error='boom')
+        self.assertRaises(exception.ImageCreationFailed,
+                          images._create_cached_image, self._output('node1'),
+                          'iso', {'a': 1}, self.create_mock)
+        self.assertEqual(['.locks'], os.listdir(self.cache_dir))
+
+    def test_create_cached_image_disabled(self):
+        self.config(boot_image_cache_dir=None)
+        images._create_cached_image(self._output('node1'), 'iso',
+                                    {'a': 1}, self.create_mock)
+        self.create_mock.assert_called_once_with(self._output('node1'))
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+    def test_clean_up_boot_image_cache(self):
+        self.config(boot_image_cache_ttl=100)
+        images._create_cached_image(self._output('used'), 'iso',
+                                    {'a': 1}, self.create_mock)
+        images._create_cached_image(self._output('unused'), 'iso',
+                                    {'a': 2}, self.create_mock)
+        images._create_cached_image(self._output('recent'), 'iso',
+                                    {'a': 3}, self.create_mock)
+        os.unlink(self._output('unused'))
+        os.unlink(self._output('recent'))
+        old = time.time() - 200
+        for inputs in ({'a': 1}, {'a': 2}):
+            os.utime(os.path.join(self.cache_dir,
+                                  images._get_cache_key('iso', inputs)),
+                     (old, old))
+
+        images.clean_up_boot_image_cache()
+
+        self.assertEqual(
+            sorted([images._get_cache_key('iso', {'a': 1}),
+                    images._get_cache_key('iso', {'a': 3})]),
+            self._cached())
+
+    @mock.patch.object(shutil, 'copyfile', autospec=True)
+    @mock.patch.object(os, 'link', autospec=True)
+    def test_link_or_copy_cross_device(self, link_mock, copy_mock):
+        link_mock.side_effect = OSError(18, 'Invalid cross-device link')
+        images.link_or_copy('/cache/image', '/share/image')
+        copy_mock.assert_called_once_with('/cache/image', '/share/image')
+
+    @mock.patch.object(images, 'image_show', autospec=True)
+    @mock.patch.object(images, '_create_boot_iso', autospec=True)
+    def test_create_boot_iso_cached(self, create_mock, show_mock):
+        create_mock.side_effect = lambda ctx, path, **kw: self._create(path)
+        show_mock.return_value = {'updated_at': 'time1', 'size': 1,
+                                  'checksum': 'abc'}
+        for node in ('node1', 'node2'):
+            images.create_boot_iso('ctx', self._output(node), 'kernel-uuid',
+                                   'ramdisk-uuid', 'deploy_iso-uuid',
+                                   'root-uuid', 'kernel-params', 'bios')
+        create_mock.assert_called_once_with(
+            'ctx', mock.ANY, kernel_href='kernel-uuid',
+            ramdisk_href='ramdisk-uuid', deploy_iso_href='deploy_iso-uuid',
+            root_uuid='root-uuid', kernel_params='kernel-params',
+            boot_mode='bios')
+        show_mock.assert_has_calls([mock.call('ctx', 'kernel-uuid'),
+                                    mock.call('ctx', 'ramdisk-uuid')] * 2)
+
+        # The kernel was updated in the image service
+        show_mock.return_value = {'updated_at': 'time2', 'size': 1,
+                                  'checksum': 'def'}
+        images.create_boot_iso('ctx', self._output('node3'), 'kernel-uuid',
+                               'ramdisk-uuid', 'deploy_iso-uuid',
+                               'root-uuid', 'kernel-params', 'bios')
+        self.assertEqual(2, create_mock.call_count)
+
+    @mock.patch.object(lockutils, 'lock', autospec=True)
+    def test_create_cached_image_external_lock(self, lock_mock):
+        images._create_cached_image(self._output('node1'), 'iso',
+                                    {'a': 1}, self.create_mock)
+        lock_mock.assert_called_once_with(
+            'boot-image:%s' % images._get_cache_key('iso', {'a': 1}),
+            'ironic-', external=True,
+            lock_path=os.path.join(self.cache_dir, '.locks'))
+
+    @mock.patch.object(images, '_create_cached_image', autospec=True)
+    @mock.patch.object(ironic_utils, 'dd', autospec=True)
+    @mock.patch.object(utils, 'umount', autospec=True)
+    @mock.patch.object(utils, 'mount', autospec=True)
+    @mock.patch.object(ironic_utils, 'mkfs', autospec=True)
+    def test_create_vfat_image_not_cached(self, mkfs_mock, mount_mock,
+                                          umount_mock, dd_mock,
+                                          cached_mock):
+        # The floppy image contains node specific parameters
+        images.create_vfat_image(self._output('node1'),
+                                 parameters={'a': 'b'})
+        self.assertFalse(cached_mock.called)
+        dd_mock.assert_called_once_with('/dev/zero', self._output('node1'),
+                                        'count=1', 'bs=100KiB')
+
+
 class FsImageTestCase(base.TestCase):
 
     @mock.patch.object(shutil, 'copyfile', autospec=True)
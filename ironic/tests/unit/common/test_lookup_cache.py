@@ -0,0 +1,61 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import time
+
+import mock
+
+from ironic.common import lookup_cache
+from ironic.tests import base
+
+
+class LookupCacheTestCase(base.TestCase):
+
+    def test_add_get(self):
+        lookup_cache.add(['aa:bb:cc:dd:ee:ff', '11:22:33:44:55:66'],
+                         'node-uuid')
+        self.assertEqual('node-uuid', lookup_cache.get(
+            ['11:22:33:44:55:66', 'AA:BB:CC:DD:EE:FF']))
+
+    def test_get_different_addresses(self):
+        lookup_cache.add(['aa:bb:cc:dd:ee:ff', '11:22:33:44:55:66'],
+                         'node-uuid')
+        self.assertIsNone(lookup_cache.get(['aa:bb:cc:dd:ee:ff']))
+
+    @mock.patch.object(time, 'time', autospec=True)
+    def test_get_expired(self, mock_time):
+        self.config(lookup_cache_ttl=10, group='api')
+        mock_time.return_value = 100
+        lookup_cache.add(['aa:bb:cc:dd:ee:ff'], 'node-uuid')
+        mock_time.return_value = 111
+        self.assertIsNone(lookup_cache.get(['aa:bb:cc:dd:ee:ff']))
+
+    def test_add_disabled(self):
+        self.config(lookup_cache_ttl=0, group='api')
+        lookup_cache.add(['aa:bb:cc:dd:ee:ff'], 'node-uuid')
+        self.assertIsNone(lookup_cache.get(['aa:bb:cc:dd:ee:ff']))
+
+    @mock.patch.object(time, 'time', autospec=True)
+    def test_add_purges_expired(self, mock_time):
+        self.config(lookup_cache_ttl=10, group='api')
+        mock_time.return_value = 100
+        lookup_cache.add(['aa:bb:cc:dd:ee:ff'], 'node-uuid')
+        mock_time.return_value = 111
+        with mock.patch.object(lookup_cache, '_PURGE_THRESHOLD', 1):
+            lookup_cache.add(['11:22:33:44:55:66'], 'node-uuid2')
+        self.assertEqual([('11:22:33:44:55:66',)],
+                         list(lookup_cache._CACHE))
+
+    def test_invalidate(self):
+        lookup_cache.add(['aa:bb:cc:dd:ee:ff'], 'node-uuid')
+        lookup_cache.invalidate()
+        self.assertIsNone(lookup_cache.get(['aa:bb:cc:dd:ee:ff']))
@@ -104,6 +104,29 @@ class TestNeutronClient(base.TestCase):
         neutron.get_client(token=None)
         mock_client_init.assert_called_once_with(**expected)
 
+    def test_get_neutron_client_cached(self, mock_client_init, mock_session):
+        mock_client_init.return_value = None
+        client1 = neutron.get_client(token='test-token-123')
+        client2 = neutron.get_client(token='test-token-123')
+        self.assertIs(client1, client2)
+        self.assertEqual(1, mock_client_init.call_count)
+
+    def test_get_neutron_client_cached_per_token(self, mock_client_init,
+                                                 mock_session):
+        mock_client_init.return_value = None
+        client1 = neutron.get_client(token='test-token-123')
+        client2 = neutron.get_client(token='test-token-456')
+        self.assertIsNot(client1, client2)
+        self.assertEqual(2, mock_client_init.call_count)
+
+    def test_get_neutron_client_cache_disabled(self, mock_client_init,
+                                               mock_session):
+        self.config(client_cache_ttl=0, group='neutron')
+        mock_client_init.return_value = None
+        neutron.get_client(token='test-token-123')
+        neutron.get_client(token='test-token-123')
+        self.assertEqual(2, mock_client_init.call_count)
+
     def test_out_range_auth_strategy(self, mock_client_init, mock_session):
         self.assertRaises(ValueError, cfg.CONF.set_override,
                           'auth_strategy', 'fake', 'neutron',
@@ -269,14 +292,46 @@ class TestNeutronNetworkActions(db_base.DbTestCase):
             address='52:54:55:cf:2d:32',
             extra={'vif_port_id': uuidutils.generate_uuid()}
         )
+        # The bulk creation fails, then the ports are created one by one
         self.client_mock.create_port.side_effect = [
+            neutron_client_exc.ConnectionFailed,
             {'port': self.neutron_port}, neutron_client_exc.ConnectionFailed]
         with task_manager.acquire(self.context, self.node.uuid) as task:
-            neutron.add_ports_to_network(task, self.network_uuid)
+            ports = neutron.add_ports_to_network(task, self.network_uuid)
+            self.assertEqual({self.ports[0].uuid: self.neutron_port['id']},
+                             ports)
             self.assertIn("Could not create neutron port for node's",
                           log_mock.warning.call_args_list[0][0][0])
             self.assertIn("Some errors were encountered when updating",
                           log_mock.warning.call_args_list[1][0][0])
+        self.assertEqual(3, self.client_mock.create_port.call_count)
+
+    def test_add_ports_to_network_bulk(self):
+        port2 = object_utils.create_test_port(
+            self.context, node_id=self.node.id,
+            uuid=uuidutils.generate_uuid(),
+            address='52:54:55:cf:2d:32',
+            extra={'client-id': self._CLIENT_ID}
+        )
+        neutron_port2 = {'id': uuidutils.generate_uuid(),
+                         'mac_address': port2.address}
+        self.client_mock.create_port.return_value = {
+            'ports': [self.neutron_port, neutron_port2]}
+        expected = {self.ports[0].uuid: self.neutron_port['id'],
+                    port2.uuid: neutron_port2['id']}
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            ports = neutron.add_ports_to_network(task, self.network_uuid,
+                                                 is_flat=True)
+        self.assertEqual(expected, ports)
+        self.client_mock.create_port.assert_called_once_with(
+            {'ports': [mock.ANY, mock.ANY]})
+        bodies = self.client_mock.create_port.call_args[0][0]['ports']
+        self.assertEqual([self.ports[0].address, port2.address],
+                         [body['mac_address'] for body in bodies])
+        self.assertNotIn('extra_dhcp_opts', bodies[0])
+        self.assertEqual(
+            [{'opt_name': 'client-id', 'opt_value': self._CLIENT_ID}],
+            bodies[1]['extra_dhcp_opts'])
 
     @mock.patch.object(neutron, 'remove_neutron_ports')
     def test_remove_ports_from_network(self, remove_mock):
@@ -338,6 +393,36 @@ class TestNeutronNetworkActions(db_base.DbTestCase):
         self.client_mock.delete_port.assert_called_once_with(
             self.neutron_port['id'])
 
+    def test_remove_neutron_ports_some_delete_fail(self):
+        neutron_port2 = {'id': uuidutils.generate_uuid()}
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            self.client_mock.delete_port.side_effect = [
+                neutron_client_exc.ConnectionFailed, None]
+            self.client_mock.list_ports.return_value = {
+                'ports': [self.neutron_port, neutron_port2]}
+            self.assertRaisesRegex(
+                exception.NetworkError, 'Could not remove VIF',
+                neutron.remove_neutron_ports, task, {'param': 'value'})
+        # The other port is deleted nevertheless
+        self.client_mock.delete_port.assert_has_calls(
+            [mock.call(self.neutron_port['id']),
+             mock.call(neutron_port2['id'])])
+
+    def test_update_ports(self):
+        self.client_mock.update_port.side_effect = [
+            {'port': self.neutron_port}, neutron_client_exc.ConnectionFailed]
+        results = neutron.update_ports(
+            self.client_mock, [('port1', {'port': {}}),
+                               ('port2', {'port': {}})])
+        self.assertEqual({'port': self.neutron_port}, results[0][0])
+        self.assertIsNone(results[0][1])
+        self.assertIsNone(results[1][0])
+        self.assertIsInstance(results[1][1],
+                              neutron_client_exc.ConnectionFailed)
+        self.client_mock.update_port.assert_has_calls(
+            [mock.call('port1', {'port': {}}),
+             mock.call('port2', {'port': {}})])
+
     def test_get_node_portmap(self):
         with task_manager.acquire(self.context, self.node.uuid) as task:
             portmap = neutron.get_node_portmap(task)
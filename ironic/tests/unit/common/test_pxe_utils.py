@@ -566,6 +566,10 @@ class TestPXEUtils(db_base.DbTestCase):
         self.assertItemsEqual(expected_info,
                               pxe_utils.dhcp_options_for_instance(task))
 
+        self.config(dhcp_provider='dnsmasq', group='dhcp')
+        self.assertItemsEqual(expected_info,
+                              pxe_utils.dhcp_options_for_instance(task))
+
     def test_dhcp_options_for_instance_ipxe_bios(self):
         boot_file = 'fake-bootfile-bios'
         self.config(pxe_bootfile_name=boot_file, group='pxe')
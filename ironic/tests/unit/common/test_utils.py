@@ -748,3 +748,10 @@ class GetUpdatedCapabilitiesTestCase(base.TestCase):
                                'Port "invalid" is not a valid integer.',
                                utils.validate_network_port,
                                'invalid')
+
+    @mock.patch.object(utils, '_RESET_FUNCTIONS', [])
+    def test_reset_state(self):
+        reset_mock = mock.Mock()
+        self.assertIs(reset_mock, utils.register_reset(reset_mock))
+        utils.reset_state()
+        reset_mock.assert_called_once_with()
@@ -19,6 +19,7 @@
 """Test class for Ironic ManagerService."""
 
 import datetime
+import time
 
 import eventlet
 import mock
@@ -39,6 +40,7 @@ from ironic.conductor import task_manager
 from ironic.conductor import utils as conductor_utils
 from ironic.db import api as dbapi
 from ironic.drivers import base as drivers_base
+from ironic.drivers.modules import agent_client
 from ironic.drivers.modules import fake
 from ironic import objects
 from ironic.objects import base as obj_base
@@ -3011,6 +3013,7 @@ class UpdatePortTestCase(mgr_utils.ServiceSetUpMixin,
                                               iter_nodes_mock):
         CONF.set_override('send_sensor_data', True, group='conductor')
         iter_nodes_mock.return_value = [('fake_uuid1', 'fake', 'fake_uuid2')]
+        self._start_service()
         self.driver.management = None
         acquire_mock.return_value.__enter__.return_value.driver = self.driver
 
@@ -3025,6 +3028,109 @@ class UpdatePortTestCase(mgr_utils.ServiceSetUpMixin,
         self.assertFalse(get_sensors_data_mock.called)
         self.assertFalse(validate_mock.called)
 
+    @mock.patch.object(manager.waiters, 'wait_for_all', autospec=True)
+    @mock.patch.object(manager.ConductorManager, '_spawn_worker',
+                       autospec=True)
+    @mock.patch.object(manager.ConductorManager, 'iter_nodes', autospec=True)
+    def test___send_sensor_data_workers(self, iter_nodes_mock,
+                                        spawn_worker_mock, wait_mock):
+        CONF.set_override('send_sensor_data', True, group='conductor')
+        CONF.set_override('send_sensor_data_workers', 2, group='conductor')
+        iter_nodes_mock.return_value = [
+            ('fake_uuid%d' % i, 'fake', None) for i in range(3)]
+        wait_mock.return_value = (set(), set())
+
+        self.service._send_sensor_data(self.context)
+
+        self.assertEqual(2, spawn_worker_mock.call_count)
+        wait_mock.assert_called_once_with(
+            [spawn_worker_mock.return_value] * 2, timeout=300)
+        spawn_worker_mock.assert_called_with(
+            self.service, self.service._sensors_nodes_task, self.context,
+            mock.ANY)
+        nodes = spawn_worker_mock.call_args[0][3]
+        self.assertEqual(3, nodes.qsize())
+
+    @mock.patch.object(manager.ConductorManager, '_sensors_nodes_task',
+                       autospec=True)
+    @mock.patch.object(manager.ConductorManager, '_spawn_worker',
+                       autospec=True)
+    @mock.patch.object(manager.ConductorManager, 'iter_nodes', autospec=True)
+    def test___send_sensor_data_no_free_worker(self, iter_nodes_mock,
+                                               spawn_worker_mock,
+                                               nodes_task_mock):
+        CONF.set_override('send_sensor_data', True, group='conductor')
+        iter_nodes_mock.return_value = [('fake_uuid1', 'fake', None)]
+        spawn_worker_mock.side_effect = exception.NoFreeConductorWorker()
+
+        self.service._send_sensor_data(self.context)
+
+        nodes_task_mock.assert_called_once_with(self.service, self.context,
+                                                mock.ANY)
+
+    def _test__sensors_nodes_task(self, messages):
+        nodes = manager.queue.Queue()
+        for i in range(len(messages)):
+            nodes.put_nowait(('fake_uuid%d' % i, 'fake', None))
+        with mock.patch.object(self.service, '_get_sensors_data_message',
+                               autospec=True) as get_message_mock:
+            get_message_mock.side_effect = messages
+            with mock.patch.object(self.service.sensors_notifier, 'info',
+                                   autospec=True) as notify_mock:
+                self.service._sensors_nodes_task(self.context, nodes)
+        self.assertTrue(nodes.empty())
+        return notify_mock
+
+    def test__sensors_nodes_task(self):
+        messages = [{'node_uuid': 'fake_uuid0'}, None,
+                    {'node_uuid': 'fake_uuid2'}]
+        notify_mock = self._test__sensors_nodes_task(messages)
+        notify_mock.assert_has_calls([
+            mock.call(self.context, 'hardware.ipmi.metrics', messages[0]),
+            mock.call(self.context, 'hardware.ipmi.metrics', messages[2])])
+        self.assertEqual(2, notify_mock.call_count)
+
+    def test__sensors_nodes_task_batch(self):
+        CONF.set_override('send_sensor_data_batch_size', 2,
+                          group='conductor')
+        messages = [{'node_uuid': 'fake_uuid%d' % i} for i in range(3)]
+        notify_mock = self._test__sensors_nodes_task(messages)
+        self.assertEqual(2, notify_mock.call_count)
+        batch = notify_mock.call_args_list[0][0][2]
+        self.assertEqual('hardware.ipmi.metrics.batch_update',
+                         batch['event_type'])
+        self.assertEqual(messages[:2], batch['payload'])
+        notify_mock.assert_called_with(self.context, 'hardware.ipmi.metrics',
+                                       messages[2])
+
+    @mock.patch.object(task_manager, 'acquire', autospec=True)
+    def test__get_sensors_data_message_changes_only(self, acquire_mock):
+        CONF.set_override('send_sensor_data_changes_only', True,
+                          group='conductor')
+        acquire_mock.return_value.__enter__.return_value.driver = self.driver
+        sensors_data = [
+            {'Fan': {'FAN1': {'Sensor Reading': '1000 RPM'},
+                     'FAN2': {'Sensor Reading': '2000 RPM'}},
+             'Power': {'PS1': {'Sensor Reading': '100 W'}}},
+            {'Fan': {'FAN1': {'Sensor Reading': '1000 RPM'},
+                     'FAN2': {'Sensor Reading': '2100 RPM'}},
+             'Power': {'PS1': {'Sensor Reading': '100 W'}}},
+        ]
+        with mock.patch.object(fake.FakeManagement, 'get_sensors_data',
+                               autospec=True) as get_sensors_data_mock:
+            get_sensors_data_mock.side_effect = sensors_data + sensors_data[1:]
+            message = self.service._get_sensors_data_message(
+                self.context, 'fake_uuid', 'fake', None)
+            self.assertEqual(sensors_data[0], message['payload'])
+
+            message = self.service._get_sensors_data_message(
+                self.context, 'fake_uuid', 'fake', None)
+            self.assertEqual({'Fan': {'FAN2': {'Sensor Reading': '2100 RPM'}}},
+                             message['payload'])
+
+            self.assertIsNone(self.service._get_sensors_data_message(
+                self.context, 'fake_uuid', 'fake', None))
+
     def test_set_boot_device(self):
         node = obj_utils.create_test_node(self.context, driver='fake')
         with mock.patch.object(self.driver.management, 'validate') as mock_val:
@@ -5204,5 +5310,148 @@ class DoNodeAdoptionTestCase(
 
         self._start_service()
         self.service.heartbeat(self.context, node.uuid, 'http://callback')
-        mock_spawn.assert_called_with(self.driver.deploy.heartbeat,
-                                      mock.ANY, 'http://callback')
+        mock_spawn.assert_called_with(self.service._process_heartbeats,
+                                      node.uuid, mock.ANY, 'http://callback',
+                                      None, mock.ANY)
+        self.assertEqual({node.uuid: None}, self.service._heartbeats)
+
+    @mock.patch('ironic.conductor.manager.ConductorManager._spawn_worker')
+    def test_heartbeat_merged(self, mock_spawn):
+        node = obj_utils.create_test_node(
+            self.context, driver='fake',
+            provision_state=states.DEPLOYING,
+            target_provision_state=states.ACTIVE)
+
+        self._start_service()
+        self.service._heartbeats[node.uuid] = None
+        self.service.heartbeat(self.context, node.uuid, 'http://callback1')
+        self.service.heartbeat(self.context, node.uuid, 'http://callback2')
+        self.assertFalse(mock_spawn.called)
+        self.assertEqual({node.uuid: ('http://callback2', None, mock.ANY)},
+                         self.service._heartbeats)
+        self.assertEqual({'merged': 1, 'dropped': 1},
+                         self.service.heartbeat_counters)
+
+    @mock.patch('ironic.conductor.manager.ConductorManager._spawn_worker')
+    def test_heartbeat_no_free_worker(self, mock_spawn):
+        mock_spawn.side_effect = exception.NoFreeConductorWorker()
+        node = obj_utils.create_test_node(
+            self.context, driver='fake',
+            provision_state=states.DEPLOYING,
+            target_provision_state=states.ACTIVE)
+
+        self._start_service()
+        exc = self.assertRaises(messaging.rpc.ExpectedException,
+                                self.service.heartbeat, self.context,
+                                node.uuid, 'http://callback')
+        self.assertEqual(exception.NoFreeConductorWorker, exc.exc_info[0])
+        self.assertEqual({}, self.service._heartbeats)
+
+    @mock.patch.object(fake.FakeDeploy, 'heartbeat', autospec=True)
+    def test__process_heartbeats(self, mock_heartbeat):
+        node = obj_utils.create_test_node(
+            self.context, driver='fake',
+            provision_state=states.DEPLOYING,
+            target_provision_state=states.ACTIVE)
+        self._start_service()
+
+        def _heartbeat(deploy, task, callback_url):
+            if callback_url == 'http://callback1':
+                # Simulate a heartbeat arriving while processing this one
+                self.service.heartbeat(self.context, node.uuid,
+                                       'http://callback2')
+
+        mock_heartbeat.side_effect = _heartbeat
+        self.service._heartbeats[node.uuid] = None
+        task = task_manager.acquire(self.context, node.uuid, shared=True)
+        self.service._process_heartbeats(node.uuid, task, 'http://callback1')
+
+        mock_heartbeat.assert_has_calls([
+            mock.call(mock.ANY, mock.ANY, 'http://callback1'),
+            mock.call(mock.ANY, mock.ANY, 'http://callback2')])
+        self.assertEqual(2, mock_heartbeat.call_count)
+        self.assertEqual({}, self.service._heartbeats)
+        self.assertEqual({'merged': 1}, self.service.heartbeat_counters)
+
+    @mock.patch.object(fake.FakeDeploy, 'heartbeat', autospec=True)
+    def test__process_heartbeats_fails(self, mock_heartbeat):
+        node = obj_utils.create_test_node(
+            self.context, driver='fake',
+            provision_state=states.DEPLOYING,
+            target_provision_state=states.ACTIVE)
+        self._start_service()
+
+        mock_heartbeat.side_effect = exception.IronicException('boom')
+        self.service._heartbeats[node.uuid] = ('http://callback2', None,
+                                               100)
+        task = task_manager.acquire(self.context, node.uuid, shared=True)
+        self.assertRaises(exception.IronicException,
+                          self.service._process_heartbeats,
+                          node.uuid, task, 'http://callback1')
+        mock_heartbeat.assert_called_once_with(mock.ANY, task,
+                                               'http://callback1')
+        self.assertEqual({}, self.service._heartbeats)
+
+    @mock.patch.object(fake.FakeDeploy, 'heartbeat', autospec=True)
+    def test__process_heartbeats_commands_status(self, mock_heartbeat):
+        node = obj_utils.create_test_node(
+            self.context, driver='fake',
+            provision_state=states.DEPLOYING,
+            target_provision_state=states.ACTIVE)
+        self._start_service()
+
+        def _heartbeat(deploy, task, callback_url, commands_status=None,
+                       received_at=None):
+            if commands_status == []:
+                # Simulate a heartbeat arriving while processing this one
+                self.service.heartbeat(self.context, node.uuid,
+                                       'http://callback', ['status'])
+
+        mock_heartbeat.side_effect = _heartbeat
+        self.service._heartbeats[node.uuid] = None
+        task = task_manager.acquire(self.context, node.uuid, shared=True)
+        with mock.patch.object(manager.time, 'time', autospec=True,
+                               return_value=200):
+            self.service._process_heartbeats(node.uuid, task,
+                                             'http://callback', [], 100)
+
+        mock_heartbeat.assert_has_calls([
+            mock.call(mock.ANY, mock.ANY, 'http://callback',
+                      commands_status=[], received_at=100),
+            mock.call(mock.ANY, mock.ANY, 'http://callback',
+                      commands_status=['status'], received_at=200)])
+        self.assertEqual({}, self.service._heartbeats)
+
+    @mock.patch.object(fake.FakeDeploy, 'heartbeat', autospec=True)
+    def test__process_heartbeats_merged_before_command(self, mock_heartbeat):
+        node = obj_utils.create_test_node(
+            self.context, driver='fake',
+            provision_state=states.DEPLOYWAIT,
+            target_provision_state=states.ACTIVE,
+            driver_internal_info={'agent_url': 'http://callback'})
+        self._start_service()
+        client = agent_client.AgentClient()
+        client.session = mock.Mock()
+        client.session.post.return_value = mock.Mock(
+            status_code=200, **{'json.return_value': {}})
+
+        def _heartbeat(deploy, task, callback_url, commands_status=None,
+                       received_at=None):
+            agent_client.record_commands_status(task.node, commands_status,
+                                                received_at)
+            if commands_status == []:
+                # A heartbeat arrives while this one is processed, which
+                # then sends a command to the agent
+                self.service.heartbeat(self.context, node.uuid,
+                                       'http://callback', ['stale'])
+                client._command(task.node, 'standby.prepare_image', {})
+
+        mock_heartbeat.side_effect = _heartbeat
+        self.service._heartbeats[node.uuid] = None
+        task = task_manager.acquire(self.context, node.uuid, shared=True)
+        self.service._process_heartbeats(node.uuid, task, 'http://callback',
+                                         [], time.time())
+
+        self.assertEqual(2, mock_heartbeat.call_count)
+        # The merged status does not include the command, it is not used
+        self.assertNotIn(node.uuid, agent_client._COMMANDS_STATUS)
@@ -400,3 +400,27 @@ class RPCAPITestCase(base.DbTestCase):
                           node_id='fake-node',
                           callback_url='http://ramdisk.url:port',
                           version='1.34')
+
+    def test_heartbeat_commands_status(self):
+        self._test_rpcapi('heartbeat',
+                          'call',
+                          node_id='fake-node',
+                          callback_url='http://ramdisk.url:port',
+                          commands_status=[],
+                          version='1.35')
+
+    def test_heartbeat_commands_status_pinned(self):
+        rpcapi = conductor_rpcapi.ConductorAPI(topic='fake-topic')
+        with mock.patch.object(rpcapi.client, 'can_send_version',
+                               autospec=True) as mock_can_send_version:
+            mock_can_send_version.return_value = False
+            with mock.patch.object(rpcapi.client,
+                                   'prepare') as mock_prepare:
+                rpcapi.heartbeat(self.context, 'fake-node',
+                                 'http://ramdisk.url:port',
+                                 commands_status=[])
+                mock_prepare.assert_called_once_with(topic='fake-topic',
+                                                     version='1.34')
+                mock_prepare.return_value.call.assert_called_once_with(
+                    self.context, 'heartbeat', node_id='fake-node',
+                    callback_url='http://ramdisk.url:port')
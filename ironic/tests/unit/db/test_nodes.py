@@ -574,6 +574,37 @@ class DbNodeTestCase(base.DbTestCase):
             exception.NodeNotFound,
             self.dbapi.touch_node_provisioning, uuidutils.generate_uuid())
 
+    @mock.patch.object(timeutils, 'utcnow', autospec=True)
+    def test_record_node_heartbeat(self, mock_utcnow):
+        test_time = datetime.datetime(2000, 1, 1, 0, 0)
+        mock_utcnow.return_value = test_time
+        node = utils.create_test_node(
+            driver_internal_info={'agent_url': 'http://old', 'foo': 'bar'})
+
+        res = self.dbapi.record_node_heartbeat(
+            node.id, {'agent_url': 'http://new', 'agent_last_heartbeat': 42},
+            touch_provisioning=True)
+        node = self.dbapi.get_node_by_uuid(node.uuid)
+        expected = {'agent_url': 'http://new', 'agent_last_heartbeat': 42,
+                    'foo': 'bar'}
+        self.assertEqual(expected, res.driver_internal_info)
+        self.assertEqual(expected, node.driver_internal_info)
+        self.assertEqual(test_time,
+                         timeutils.normalize_time(node.provision_updated_at))
+
+    def test_record_node_heartbeat_no_touch(self):
+        node = utils.create_test_node()
+        self.dbapi.record_node_heartbeat(
+            node.id, {'agent_last_heartbeat': 42})
+        node = self.dbapi.get_node_by_uuid(node.uuid)
+        self.assertEqual(42, node.driver_internal_info['agent_last_heartbeat'])
+        self.assertIsNone(node.provision_updated_at)
+
+    def test_record_node_heartbeat_not_found(self):
+        self.assertRaises(
+            exception.NodeNotFound,
+            self.dbapi.record_node_heartbeat, uuidutils.generate_uuid(), {})
+
     def test_get_node_by_port_addresses(self):
         wrong_node = utils.create_test_node(
             driver='driver-one',
@@ -73,6 +73,18 @@ class DbPortTestCase(base.DbTestCase):
         self.assertRaises(exception.InvalidParameterValue,
                           self.dbapi.get_port_list, sort_key='foo')
 
+    def test_get_ports_by_addresses(self):
+        port = db_utils.create_test_port(uuid=uuidutils.generate_uuid(),
+                                         address='52:54:00:cf:2d:41')
+        res = self.dbapi.get_ports_by_addresses(
+            [self.port.address, port.address, '52:54:00:cf:2d:42'])
+        self.assertEqual(sorted([self.port.id, port.id]),
+                         sorted(p.id for p in res))
+
+    def test_get_ports_by_addresses_no_match(self):
+        self.assertEqual(
+            [], self.dbapi.get_ports_by_addresses(['52:54:00:cf:2d:42']))
+
     def test_get_ports_by_node_id(self):
         res = self.dbapi.get_ports_by_node_id(self.node.id)
         self.assertEqual(self.port.address, res[0].address)
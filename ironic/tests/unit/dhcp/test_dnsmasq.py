@@ -0,0 +1,195 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import shutil
+import signal
+import tempfile
+
+import eventlet
+import mock
+from oslo_utils import uuidutils
+
+from ironic.common import dhcp_factory
+from ironic.common import exception
+from ironic.conductor import task_manager
+from ironic.dhcp import dnsmasq
+from ironic.tests.unit.conductor import mgr_utils
+from ironic.tests.unit.db import base as db_base
+from ironic.tests.unit.objects import utils as object_utils
+
+
+OPTS = [{'opt_name': 'bootfile-name',
+         'opt_value': 'pxelinux.0',
+         'ip_version': 4},
+        {'opt_name': 'tag:!ipxe,bootfile-name',
+         'opt_value': 'undionly.kpxe',
+         'ip_version': 4},
+        {'opt_name': 'tftp-server',
+         'opt_value': '192.0.2.1',
+         'ip_version': 4}]
+
+
+@mock.patch.object(eventlet, 'spawn_after', autospec=True)
+class TestDnsmasq(db_base.DbTestCase):
+
+    def setUp(self):
+        super(TestDnsmasq, self).setUp()
+        mgr_utils.mock_the_extension_manager(driver='fake')
+        self.config(enabled_drivers=['fake'])
+        self.config(dhcp_provider='dnsmasq', group='dhcp')
+        self.tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tempdir)
+        self.hostsdir = os.path.join(self.tempdir, 'hosts')
+        self.optsdir = os.path.join(self.tempdir, 'opts')
+        os.mkdir(self.hostsdir)
+        os.mkdir(self.optsdir)
+        self.leasefile = os.path.join(self.tempdir, 'leases')
+        self.config(dhcp_hostsdir=self.hostsdir,
+                    dhcp_optsdir=self.optsdir,
+                    dhcp_leasefile=self.leasefile,
+                    pid_file=os.path.join(self.tempdir, 'pid'),
+                    group='dnsmasq')
+        patcher = mock.patch.object(dnsmasq, '_RELOAD_PENDING', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.node = object_utils.create_test_node(self.context)
+        self.port = object_utils.create_test_port(
+            self.context, node_id=self.node.id,
+            uuid=uuidutils.generate_uuid(),
+            address='52:54:00:CF:2D:32')
+        object_utils.create_test_port(
+            self.context, node_id=self.node.id,
+            uuid=uuidutils.generate_uuid(),
+            address='52:54:00:cf:2d:33', pxe_enabled=False)
+        dhcp_factory.DHCPFactory._dhcp_provider = None
+        self.api = dhcp_factory.DHCPFactory().provider
+
+    def _read(self, directory, address='52:54:00:cf:2d:32'):
+        with open(os.path.join(directory, address)) as f:
+            return f.read()
+
+    def test_provider(self, mock_spawn):
+        self.assertIsInstance(self.api, dnsmasq.DnsmasqDHCPApi)
+
+    def test_update_dhcp_opts(self, mock_spawn):
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            self.api.update_dhcp_opts(task, OPTS)
+        self.assertEqual('52:54:00:cf:2d:32,set:ironic-525400cf2d32\n',
+                         self._read(self.hostsdir))
+        self.assertEqual(
+            'tag:ironic-525400cf2d32,option:bootfile-name,pxelinux.0\n'
+            'tag:ironic-525400cf2d32,tag:!ipxe,option:bootfile-name,'
+            'undionly.kpxe\n'
+            'tag:ironic-525400cf2d32,option:tftp-server,192.0.2.1\n',
+            self._read(self.optsdir))
+        # Only the PXE enabled ports get DHCP options
+        self.assertEqual(['52:54:00:cf:2d:32'], os.listdir(self.hostsdir))
+        self.assertEqual(['52:54:00:cf:2d:32'], os.listdir(self.optsdir))
+        mock_spawn.assert_called_once_with(1, dnsmasq._reload)
+
+    def test_update_dhcp_opts_ipv6(self, mock_spawn):
+        opts = [{'opt_name': 'bootfile-name',
+                 'opt_value': 'pxelinux.0',
+                 'ip_version': 6},
+                {'opt_name': '67',
+                 'opt_value': 'pxelinux.0',
+                 'ip_version': 6}]
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            self.api.update_dhcp_opts(task, opts)
+        self.assertEqual(
+            'tag:ironic-525400cf2d32,option6:bootfile-name,pxelinux.0\n'
+            'tag:ironic-525400cf2d32,67,pxelinux.0\n',
+            self._read(self.optsdir))
+
+    def test_update_dhcp_opts_unchanged(self, mock_spawn):
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            self.api.update_dhcp_opts(task, OPTS)
+            dnsmasq._RELOAD_PENDING = False
+            self.api.update_dhcp_opts(task, OPTS)
+        mock_spawn.assert_called_once_with(1, dnsmasq._reload)
+
+    def test_update_dhcp_opts_reload_coalesced(self, mock_spawn):
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            self.api.update_dhcp_opts(task, OPTS)
+            self.api.update_dhcp_opts(task, OPTS[:1])
+        self.assertEqual(
+            'tag:ironic-525400cf2d32,option:bootfile-name,pxelinux.0\n',
+            self._read(self.optsdir))
+        mock_spawn.assert_called_once_with(1, dnsmasq._reload)
+
+    def test_update_dhcp_opts_no_ports(self, mock_spawn):
+        node = object_utils.create_test_node(
+            self.context, uuid=uuidutils.generate_uuid())
+        with task_manager.acquire(self.context, node.uuid) as task:
+            self.assertRaises(exception.FailedToUpdateDHCPOptOnPort,
+                              self.api.update_dhcp_opts, task, OPTS)
+        self.assertFalse(mock_spawn.called)
+
+    def test_update_dhcp_opts_write_error(self, mock_spawn):
+        self.config(dhcp_optsdir=os.path.join(self.tempdir, 'missing'),
+                    group='dnsmasq')
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            self.assertRaises(exception.FailedToUpdateDHCPOptOnPort,
+                              self.api.update_dhcp_opts, task, OPTS)
+        self.assertFalse(mock_spawn.called)
+
+    def test_clean_dhcp_opts(self, mock_spawn):
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            self.api.update_dhcp_opts(task, OPTS)
+            dnsmasq._RELOAD_PENDING = False
+            self.api.clean_dhcp_opts(task)
+        self.assertEqual([], os.listdir(self.hostsdir))
+        self.assertEqual([], os.listdir(self.optsdir))
+        self.assertEqual(2, mock_spawn.call_count)
+
+    def test_clean_dhcp_opts_nothing_to_clean(self, mock_spawn):
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            self.api.clean_dhcp_opts(task)
+        self.assertFalse(mock_spawn.called)
+
+    def test_get_ip_addresses(self, mock_spawn):
+        with open(self.leasefile, 'w') as f:
+            f.write('1476000000 52:54:00:cf:2d:32 192.0.2.10 node1 *\n'
+                    '1476000000 52:54:00:cf:2d:40 192.0.2.11 node2 *\n')
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            self.assertEqual(['192.0.2.10'],
+                             self.api.get_ip_addresses(task))
+
+    @mock.patch.object(dnsmasq, 'LOG', autospec=True)
+    def test_get_ip_addresses_no_lease(self, mock_log, mock_spawn):
+        with open(self.leasefile, 'w') as f:
+            f.write('1476000000 52:54:00:cf:2d:40 192.0.2.11 node2 *\n')
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            self.assertEqual([], self.api.get_ip_addresses(task))
+        self.assertTrue(mock_log.warning.called)
+
+    def test_get_ip_addresses_no_lease_file(self, mock_spawn):
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            self.assertEqual([], self.api.get_ip_addresses(task))
+
+    @mock.patch.object(os, 'kill', autospec=True)
+    def test__reload(self, mock_kill, mock_spawn):
+        with open(os.path.join(self.tempdir, 'pid'), 'w') as f:
+            f.write('4242\n')
+        dnsmasq._RELOAD_PENDING = True
+        dnsmasq._reload()
+        mock_kill.assert_called_once_with(4242, signal.SIGHUP)
+        self.assertFalse(dnsmasq._RELOAD_PENDING)
+
+    @mock.patch.object(dnsmasq, 'LOG', autospec=True)
+    @mock.patch.object(os, 'kill', autospec=True)
+    def test__reload_no_pid_file(self, mock_kill, mock_log, mock_spawn):
+        dnsmasq._reload()
+        self.assertFalse(mock_kill.called)
+        self.assertTrue(mock_log.warning.called)
@@ -78,8 +78,10 @@ class TestNeutron(db_base.DbTestCase):
         expected = {'port': {'extra_dhcp_opts': opts}}
 
         mock_client_init.return_value = None
+        mock_update_port.return_value = {'port': {'id': port_id}}
         api = dhcp_factory.DHCPFactory()
-        api.provider.update_port_dhcp_opts(port_id, opts)
+        self.assertEqual({'id': port_id},
+                         api.provider.update_port_dhcp_opts(port_id, opts))
         mock_update_port.assert_called_once_with(port_id, expected)
 
     @mock.patch.object(client.Client, 'update_port')
@@ -223,12 +225,27 @@ class TestNeutron(db_base.DbTestCase):
             mock_gnvi.assert_called_once_with(task)
         self.assertEqual(2, mock_updo.call_count)
 
-    @mock.patch('time.sleep', autospec=True)
+    @mock.patch('ironic.dhcp.neutron.NeutronDHCPApi.update_port_dhcp_opts')
+    @mock.patch('ironic.common.network.get_node_vif_ids')
+    def test_update_dhcp_single_worker(self, mock_gnvi, mock_updo):
+        self.config(dhcp_update_workers=1, group='neutron')
+        mock_gnvi.return_value = {'ports': {'p1': 'v1', 'p2': 'v2'},
+                                  'portgroups': {'pg1': 'v3'}}
+        with task_manager.acquire(self.context,
+                                  self.node.uuid) as task:
+            api = dhcp_factory.DHCPFactory()
+            api.update_dhcp(task, self.node)
+        mock_updo.assert_has_calls(
+            [mock.call(vif, self.node, token=self.context.auth_token)
+             for vif in ('v1', 'v2', 'v3')], any_order=True)
+
+    @mock.patch.object(neutron.NeutronDHCPApi, '_wait_for_ports_active',
+                       autospec=True)
     @mock.patch.object(neutron.NeutronDHCPApi, 'update_port_dhcp_opts',
                        autospec=True)
     @mock.patch('ironic.common.network.get_node_vif_ids', autospec=True)
     def test_update_dhcp_set_sleep_and_ssh(self, mock_gnvi, mock_updo,
-                                           mock_ts):
+                                           mock_wait):
         mock_gnvi.return_value = {'ports': {'port-uuid': 'vif-uuid'},
                                   'portgroups': {}}
         self.config(port_setup_delay=30, group='neutron')
@@ -238,17 +255,19 @@ class TestNeutron(db_base.DbTestCase):
             opts = pxe_utils.dhcp_options_for_instance(task)
             api = dhcp_factory.DHCPFactory()
             api.update_dhcp(task, opts)
-            mock_ts.assert_called_with(30)
+            mock_wait.assert_called_once_with(mock.ANY, task, ['vif-uuid'],
+                                              30)
         mock_updo.assert_called_once_with(mock.ANY, 'vif-uuid', opts,
                                           token=self.context.auth_token)
 
     @mock.patch.object(neutron, 'LOG', autospec=True)
-    @mock.patch('time.sleep', autospec=True)
+    @mock.patch.object(neutron.NeutronDHCPApi, '_wait_for_ports_active',
+                       autospec=True)
     @mock.patch.object(neutron.NeutronDHCPApi, 'update_port_dhcp_opts',
                        autospec=True)
     @mock.patch('ironic.common.network.get_node_vif_ids', autospec=True)
     def test_update_dhcp_unset_sleep_and_ssh(self, mock_gnvi, mock_updo,
-                                             mock_ts, mock_log):
+                                             mock_wait, mock_log):
         mock_gnvi.return_value = {'ports': {'port-uuid': 'vif-uuid'},
                                   'portgroups': {}}
         with task_manager.acquire(self.context,
@@ -260,38 +279,60 @@ class TestNeutron(db_base.DbTestCase):
             self.assertTrue(mock_log.warning.called)
             self.assertIn('Setting the port delay to 15 for SSH',
                           mock_log.warning.call_args[0][0])
-            mock_ts.assert_called_with(15)
+            mock_wait.assert_called_once_with(mock.ANY, task, ['vif-uuid'],
+                                              15)
         mock_updo.assert_called_once_with(mock.ANY, 'vif-uuid', opts,
                                           token=self.context.auth_token)
 
-    @mock.patch.object(neutron, 'LOG', autospec=True)
-    @mock.patch('time.sleep', autospec=True)
+    @mock.patch.object(neutron.NeutronDHCPApi, '_wait_for_ports_active',
+                       autospec=True)
     @mock.patch.object(neutron.NeutronDHCPApi, 'update_port_dhcp_opts',
                        autospec=True)
     @mock.patch('ironic.common.network.get_node_vif_ids', autospec=True)
     def test_update_dhcp_set_sleep_and_fake(self, mock_gnvi, mock_updo,
-                                            mock_ts, mock_log):
-        mock_gnvi.return_value = {'ports': {'port-uuid': 'vif-uuid'},
+                                            mock_wait):
+        mock_gnvi.return_value = {'ports': {'p1': 'v1', 'p2': 'v2'},
                                   'portgroups': {}}
         self.config(port_setup_delay=30, group='neutron')
+        exc = exception.FailedToUpdateDHCPOptOnPort('fake exception')
+        mock_updo.side_effect = [None, exc]
         with task_manager.acquire(self.context,
                                   self.node.uuid) as task:
-            opts = pxe_utils.dhcp_options_for_instance(task)
             api = dhcp_factory.DHCPFactory()
-            api.update_dhcp(task, opts)
-            mock_log.debug.assert_called_once_with(
-                "Waiting %d seconds for Neutron.", 30)
-            mock_log.warning.assert_not_called()
-            mock_ts.assert_called_with(30)
-        mock_updo.assert_called_once_with(mock.ANY, 'vif-uuid', opts,
-                                          token=self.context.auth_token)
+            api.update_dhcp(task, self.node)
+            # Only the ports which were updated are waited for
+            mock_wait.assert_called_once_with(mock.ANY, task, ['v1'], 30)
+
+    @mock.patch('time.sleep', autospec=True)
+    @mock.patch.object(neutron.NeutronDHCPApi, '_wait_for_ports_active',
+                       autospec=True)
+    @mock.patch.object(neutron.NeutronDHCPApi, 'update_port_dhcp_opts',
+                       autospec=True)
+    @mock.patch('ironic.common.network.get_node_vif_ids', autospec=True)
+    def test_update_dhcp_set_sleep_active_port(self, mock_gnvi, mock_updo,
+                                               mock_wait, mock_sleep):
+        mock_gnvi.return_value = {'ports': {'p1': 'v1', 'p2': 'v2'},
+                                  'portgroups': {}}
+        self.config(port_setup_delay=30, group='neutron')
+        mock_updo.side_effect = [{'id': 'v1', 'status': 'DOWN'},
+                                 {'id': 'v2', 'status': 'ACTIVE'}]
+        with task_manager.acquire(self.context,
+                                  self.node.uuid) as task:
+            api = dhcp_factory.DHCPFactory()
+            api.update_dhcp(task, self.node)
+        # The status of an active port does not tell whether its new
+        # options were applied, the whole delay is waited for.
+        mock_sleep.assert_called_once_with(30)
+        self.assertFalse(mock_wait.called)
 
     @mock.patch.object(neutron, 'LOG', autospec=True)
+    @mock.patch.object(neutron.NeutronDHCPApi, '_wait_for_ports_active',
+                       autospec=True)
     @mock.patch.object(neutron.NeutronDHCPApi, 'update_port_dhcp_opts',
                        autospec=True)
     @mock.patch('ironic.common.network.get_node_vif_ids', autospec=True)
     def test_update_dhcp_unset_sleep_and_fake(self, mock_gnvi, mock_updo,
-                                              mock_log):
+                                              mock_wait, mock_log):
         mock_gnvi.return_value = {'ports': {'port-uuid': 'vif-uuid'},
                                   'portgroups': {}}
         with task_manager.acquire(self.context,
@@ -299,11 +340,55 @@ class TestNeutron(db_base.DbTestCase):
             opts = pxe_utils.dhcp_options_for_instance(task)
             api = dhcp_factory.DHCPFactory()
             api.update_dhcp(task, opts)
-            mock_log.debug.assert_not_called()
             mock_log.warning.assert_not_called()
+        self.assertFalse(mock_wait.called)
         mock_updo.assert_called_once_with(mock.ANY, 'vif-uuid', opts,
                                           token=self.context.auth_token)
 
+    @mock.patch('time.sleep', autospec=True)
+    @mock.patch('ironic.common.neutron.get_client', autospec=True)
+    def test__wait_for_ports_active(self, mock_client, mock_sleep):
+        list_ports = mock_client.return_value.list_ports
+        list_ports.side_effect = [
+            {'ports': [{'id': 'v1', 'status': 'ACTIVE'},
+                       {'id': 'v2', 'status': 'DOWN'}]},
+            neutron_client_exc.NeutronClientException(),
+            {'ports': [{'id': 'v2', 'status': 'ACTIVE'}]}]
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            api = dhcp_factory.DHCPFactory().provider
+            api._wait_for_ports_active(task, ['v1', 'v2'], 30)
+        list_ports.assert_has_calls([mock.call(id=mock.ANY),
+                                     mock.call(id=['v2']),
+                                     mock.call(id=['v2'])])
+        mock_sleep.assert_has_calls([mock.call(2), mock.call(2)])
+
+    @mock.patch('time.sleep', autospec=True)
+    @mock.patch('ironic.common.neutron.get_client', autospec=True)
+    def test__wait_for_ports_active_timeout(self, mock_client, mock_sleep):
+        list_ports = mock_client.return_value.list_ports
+        list_ports.return_value = {'ports': [{'id': 'v1', 'status': 'DOWN'}]}
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            api = dhcp_factory.DHCPFactory().provider
+            with mock.patch('time.time', autospec=True,
+                            side_effect=[100, 101, 129, 130]):
+                api._wait_for_ports_active(task, ['v1'], 30)
+        self.assertEqual(3, list_ports.call_count)
+        mock_sleep.assert_has_calls([mock.call(2), mock.call(1)])
+
+    @mock.patch.object(neutron, 'LOG', autospec=True)
+    @mock.patch('time.sleep', autospec=True)
+    @mock.patch('ironic.common.neutron.get_client', autospec=True)
+    def test__wait_for_ports_active_no_polling(self, mock_client, mock_sleep,
+                                               mock_log):
+        self.config(port_status_poll_interval=0, group='neutron')
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            api = dhcp_factory.DHCPFactory().provider
+            api._wait_for_ports_active(task, ['v1'], 30)
+        mock_log.debug.assert_called_once_with(
+            "Waiting %d seconds for Neutron.", 30)
+        mock_sleep.assert_called_once_with(30)
+        self.assertFalse(mock_client.called)
+
     def test__get_fixed_ip_address(self):
         port_id = 'fake-port-id'
         expected = "192.168.1.3"
@@ -479,8 +564,9 @@ class TestNeutron(db_base.DbTestCase):
             result = api._get_ip_addresses(task, [pg], mock.sentinel.client)
         self.assertEqual(expected, result)
 
+    @mock.patch('ironic.common.neutron.get_client', autospec=True)
     @mock.patch('ironic.dhcp.neutron.NeutronDHCPApi._get_port_ip_address')
-    def test_get_ip_addresses(self, get_ip_mock):
+    def test_get_ip_addresses(self, get_ip_mock, client_mock):
         ip_address = '10.10.0.1'
         expected = [ip_address]
 
@@ -490,23 +576,94 @@ class TestNeutron(db_base.DbTestCase):
             api = dhcp_factory.DHCPFactory().provider
             result = api.get_ip_addresses(task)
             get_ip_mock.assert_called_once_with(task, task.ports[0],
-                                                mock.ANY)
+                                                mock.ANY, neutron_ports={})
         self.assertEqual(expected, result)
+        self.assertFalse(client_mock.return_value.list_ports.called)
 
+    @mock.patch('ironic.common.neutron.get_client', autospec=True)
     @mock.patch('ironic.dhcp.neutron.NeutronDHCPApi._get_port_ip_address')
-    def test_get_ip_addresses_for_port_and_portgroup(self, get_ip_mock):
+    def test_get_ip_addresses_for_port_and_portgroup(self, get_ip_mock,
+                                                     client_mock):
         object_utils.create_test_portgroup(self.context,
                                            node_id=self.node.id,
                                            address='aa:bb:cc:dd:ee:ff',
                                            uuid=uuidutils.generate_uuid(),
                                            extra={'vif_port_id':
                                                   'test-vif-A'})
+        client_mock.return_value.list_ports.return_value = {
+            'ports': [{'id': 'test-vif-A'}]}
         with task_manager.acquire(self.context, self.node.uuid) as task:
             api = dhcp_factory.DHCPFactory().provider
             api.get_ip_addresses(task)
+            neutron_ports = {'test-vif-A': {'id': 'test-vif-A'}}
             get_ip_mock.assert_has_calls(
-                [mock.call(task, task.ports[0], mock.ANY),
-                 mock.call(task, task.portgroups[0], mock.ANY)])
+                [mock.call(task, task.ports[0], mock.ANY,
+                           neutron_ports=neutron_ports),
+                 mock.call(task, task.portgroups[0], mock.ANY,
+                           neutron_ports=neutron_ports)])
+        client_mock.return_value.list_ports.assert_called_once_with(
+            id=['test-vif-A'])
+
+    def test__get_port_ip_address_listed(self):
+        port = object_utils.create_test_port(self.context,
+                                             node_id=self.node.id,
+                                             address='aa:bb:cc:dd:ee:ff',
+                                             uuid=uuidutils.generate_uuid(),
+                                             extra={'vif_port_id':
+                                                    'test-vif-A'})
+        neutron_ports = {'test-vif-A': {
+            'id': 'test-vif-A',
+            'fixed_ips': [{'ip_address': '10.10.0.1'}]}}
+        fake_client = mock.Mock()
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            api = dhcp_factory.DHCPFactory().provider
+            result = api._get_port_ip_address(task, port, fake_client,
+                                              neutron_ports=neutron_ports)
+        self.assertEqual('10.10.0.1', result)
+        self.assertFalse(fake_client.show_port.called)
+
+    def test__get_port_ip_address_not_listed(self):
+        port = object_utils.create_test_port(self.context,
+                                             node_id=self.node.id,
+                                             address='aa:bb:cc:dd:ee:ff',
+                                             uuid=uuidutils.generate_uuid(),
+                                             extra={'vif_port_id':
+                                                    'test-vif-A'})
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            api = dhcp_factory.DHCPFactory().provider
+            self.assertRaises(exception.FailedToGetIPAddressOnPort,
+                              api._get_port_ip_address, task, port,
+                              mock.sentinel.client, neutron_ports={})
+
+    def test__list_neutron_ports(self):
+        object_utils.create_test_portgroup(self.context,
+                                           node_id=self.node.id,
+                                           address='aa:bb:cc:dd:ee:ff',
+                                           uuid=uuidutils.generate_uuid(),
+                                           extra={'vif_port_id':
+                                                  'test-vif-B'})
+        self.ports[0].extra = {'vif_port_id': 'test-vif-A'}
+        self.ports[0].save()
+        fake_client = mock.Mock()
+        fake_client.list_ports.return_value = {
+            'ports': [{'id': 'test-vif-A'}, {'id': 'test-vif-B'}]}
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            api = dhcp_factory.DHCPFactory().provider
+            result = api._list_neutron_ports(task, fake_client)
+        self.assertEqual({'test-vif-A': {'id': 'test-vif-A'},
+                          'test-vif-B': {'id': 'test-vif-B'}}, result)
+        fake_client.list_ports.assert_called_once_with(
+            id=['test-vif-A', 'test-vif-B'])
+
+    def test__list_neutron_ports_with_exception(self):
+        self.ports[0].extra = {'vif_port_id': 'test-vif-A'}
+        self.ports[0].save()
+        fake_client = mock.Mock()
+        fake_client.list_ports.side_effect = (
+            neutron_client_exc.NeutronClientException())
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            api = dhcp_factory.DHCPFactory().provider
+            self.assertIsNone(api._list_neutron_ports(task, fake_client))
 
     @mock.patch.object(neutron, 'create_cleaning_ports_deprecation', False)
     @mock.patch.object(neutron, 'LOG', autospec=True)
@@ -111,6 +111,7 @@ class CIMCHandleTestCase(CIMCBaseTestCase):
     @mock.patch.object(imcsdk, 'ImcHandle', autospec=True)
     @mock.patch.object(cimc_common, 'handle_login', autospec=True)
     def test_cimc_handle(self, mock_login, mock_handle):
+        self.config(management_client_cache_ttl=0)
         mo_hand = mock.MagicMock()
         mo_hand.username = self.node.driver_info['cimc_username']
         mo_hand.password = self.node.driver_info['cimc_password']
@@ -126,3 +127,34 @@ class CIMCHandleTestCase(CIMCBaseTestCase):
         mock_login.assert_called_once_with(task, mock_handle.return_value,
                                            info)
         mock_handle.return_value.logout.assert_called_once_with()
+
+    @mock.patch.object(imcsdk, 'ImcHandle', autospec=True)
+    @mock.patch.object(cimc_common, 'handle_login', autospec=True)
+    def test_cimc_handle_reuse(self, mock_login, mock_handle):
+        with task_manager.acquire(self.context, self.node.uuid,
+                                  shared=False) as task:
+            with cimc_common.cimc_handle(task) as handle:
+                self.assertEqual(mock_handle.return_value, handle)
+            with cimc_common.cimc_handle(task) as handle:
+                self.assertEqual(mock_handle.return_value, handle)
+
+        mock_handle.assert_called_once_with()
+        self.assertEqual(1, mock_login.call_count)
+        self.assertFalse(mock_handle.return_value.logout.called)
+
+    @mock.patch.object(imcsdk, 'ImcHandle', autospec=True)
+    @mock.patch.object(cimc_common, 'handle_login', autospec=True)
+    def test_cimc_handle_error(self, mock_login, mock_handle):
+        with task_manager.acquire(self.context, self.node.uuid,
+                                  shared=False) as task:
+            def _fail():
+                with cimc_common.cimc_handle(task):
+                    raise exception.CIMCException(node=task.node.uuid,
+                                                  error='Boom')
+            self.assertRaises(exception.CIMCException, _fail)
+            mock_handle.return_value.logout.assert_called_once_with()
+
+            with cimc_common.cimc_handle(task):
+                pass
+
+        self.assertEqual(2, mock_login.call_count)
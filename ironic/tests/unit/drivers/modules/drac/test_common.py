@@ -120,3 +120,14 @@ class DracCommonMethodsTestCase(db_base.DbTestCase):
         drac_common.get_drac_client(node)
 
         self.assertEqual(mock_dracclient.mock_calls, [expected_call])
+
+    @mock.patch.object(dracclient.client, 'DRACClient', autospec=True)
+    def test_invalidate_drac_client(self, mock_dracclient):
+        node = obj_utils.create_test_node(self.context,
+                                          driver='fake_drac',
+                                          driver_info=INFO_DICT)
+        mock_dracclient.side_effect = ['client', 'new_client']
+
+        self.assertEqual('client', drac_common.get_drac_client(node))
+        drac_common.invalidate_drac_client(node)
+        self.assertEqual('new_client', drac_common.get_drac_client(node))
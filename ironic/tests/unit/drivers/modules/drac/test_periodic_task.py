@@ -15,9 +15,11 @@
 Test class for DRAC periodic tasks
 """
 
+import futurist
 import mock
 
 from ironic.common import driver_factory
+from ironic.common import exception
 from ironic.conductor import task_manager
 from ironic.drivers.modules import agent_base_vendor
 from ironic.drivers.modules.drac import common as drac_common
@@ -61,6 +63,8 @@ class DracPeriodicTaskTestCase(db_base.DbTestCase):
             'span_length': 2,
             'pending_operations': None
         }
+        self.executor = futurist.SynchronousExecutor()
+        self.addCleanup(self.executor.shutdown)
 
     @mock.patch.object(task_manager, 'acquire', autospec=True)
     def test__query_raid_config_job_status(self, mock_acquire):
@@ -70,6 +74,7 @@ class DracPeriodicTaskTestCase(db_base.DbTestCase):
         self.node.save()
         # mock manager
         mock_manager = mock.Mock()
+        mock_manager._spawn_worker.side_effect = self.executor.submit
         node_list = [(self.node.uuid, 'pxe_drac',
                       {'raid_config_job_ids': ['42']})]
         mock_manager.iter_nodes.return_value = node_list
@@ -90,6 +95,7 @@ class DracPeriodicTaskTestCase(db_base.DbTestCase):
     def test__query_raid_config_job_status_no_config_jobs(self, mock_acquire):
         # mock manager
         mock_manager = mock.Mock()
+        mock_manager._spawn_worker.side_effect = self.executor.submit
         node_list = [(self.node.uuid, 'pxe_drac', {})]
         mock_manager.iter_nodes.return_value = node_list
         # mock task_manager.acquire
@@ -104,9 +110,44 @@ class DracPeriodicTaskTestCase(db_base.DbTestCase):
 
         self.assertEqual(0, self.driver.raid._check_node_raid_jobs.call_count)
 
+    @mock.patch.object(drac_raid.LOG, 'exception', autospec=True)
+    @mock.patch.object(task_manager, 'acquire', autospec=True)
+    def test__query_raid_config_job_status_multiple_nodes(self, mock_acquire,
+                                                          mock_log):
+        node2 = obj_utils.create_test_node(
+            self.context, uuid='1be26c0b-03f2-4d2e-ae87-c02d7f33c781',
+            driver='fake_drac', driver_info=INFO_DICT)
+        # mock manager
+        mock_manager = mock.Mock()
+        mock_manager._spawn_worker.side_effect = self.executor.submit
+        node_list = [(self.node.uuid, 'pxe_drac',
+                      {'raid_config_job_ids': ['42']}),
+                     (node2.uuid, 'pxe_drac',
+                      {'raid_config_job_ids': ['36']})]
+        mock_manager.iter_nodes.return_value = node_list
+        # mock task_manager.acquire
+        tasks = {self.node.uuid: mock.Mock(node=self.node,
+                                           driver=self.driver),
+                 node2.uuid: mock.Mock(node=node2, driver=self.driver)}
+        mock_acquire.side_effect = lambda context, node_uuid, **kwargs: (
+            mock.MagicMock(__enter__=mock.MagicMock(
+                return_value=tasks[node_uuid])))
+        # mock _check_node_raid_jobs, failing for the first node
+        self.driver.raid._check_node_raid_jobs = mock.Mock(
+            side_effect=[exception.DracOperationError(error='boom'), None])
+
+        self.driver.raid._query_raid_config_job_status(mock_manager,
+                                                       self.context)
+
+        self.driver.raid._check_node_raid_jobs.assert_has_calls(
+            [mock.call(tasks[self.node.uuid]), mock.call(tasks[node2.uuid])],
+            any_order=True)
+        self.assertEqual(1, mock_log.call_count)
+
     def test__query_raid_config_job_status_no_nodes(self):
         # mock manager
         mock_manager = mock.Mock()
+        mock_manager._spawn_worker.side_effect = self.executor.submit
         node_list = []
         mock_manager.iter_nodes.return_value = node_list
         # mock _check_node_raid_jobs
@@ -116,6 +157,39 @@ class DracPeriodicTaskTestCase(db_base.DbTestCase):
 
         self.assertEqual(0, self.driver.raid._check_node_raid_jobs.call_count)
 
+    @mock.patch.object(drac_raid.DracRAID,
+                       '_query_node_raid_config_job_status', autospec=True)
+    def test__query_raid_config_job_status_workers(self, mock_query):
+        self.config(query_raid_config_job_status_workers=2, group='drac')
+        mock_manager = mock.Mock()
+        mock_manager._spawn_worker.side_effect = self.executor.submit
+        mock_manager.iter_nodes.return_value = [
+            ('uuid%d' % i, 'pxe_drac', {'raid_config_job_ids': ['42']})
+            for i in range(3)]
+
+        self.driver.raid._query_raid_config_job_status(mock_manager,
+                                                       self.context)
+
+        self.assertEqual(2, mock_manager._spawn_worker.call_count)
+        mock_query.assert_has_calls(
+            [mock.call(self.driver.raid, self.context, 'uuid%d' % i)
+             for i in range(3)])
+
+    @mock.patch.object(drac_raid.DracRAID,
+                       '_query_node_raid_config_job_status', autospec=True)
+    def test__query_raid_config_job_status_no_free_worker(self, mock_query):
+        mock_manager = mock.Mock()
+        mock_manager._spawn_worker.side_effect = (
+            exception.NoFreeConductorWorker())
+        mock_manager.iter_nodes.return_value = [
+            (self.node.uuid, 'pxe_drac', {'raid_config_job_ids': ['42']})]
+
+        self.driver.raid._query_raid_config_job_status(mock_manager,
+                                                       self.context)
+
+        mock_query.assert_called_once_with(self.driver.raid, self.context,
+                                           self.node.uuid)
+
     @mock.patch.object(drac_common, 'get_drac_client', spec_set=True,
                        autospec=True)
     def test__check_node_raid_jobs_without_update(self, mock_get_drac_client):
@@ -125,15 +199,17 @@ class DracPeriodicTaskTestCase(db_base.DbTestCase):
         self.node.save()
         # mock task
         task = mock.Mock(node=self.node)
-        # mock dracclient.get_job
+        # mock dracclient.list_jobs
+        self.job['id'] = '42'
         mock_client = mock.Mock()
         mock_get_drac_client.return_value = mock_client
-        mock_client.get_job.return_value = test_utils.dict_to_namedtuple(
-            values=self.job)
+        mock_client.list_jobs.return_value = [
+            test_utils.dict_to_namedtuple(values=self.job)]
 
         self.driver.raid._check_node_raid_jobs(task)
 
-        mock_client.get_job.assert_called_once_with('42')
+        mock_client.list_jobs.assert_called_once_with(only_unfinished=True)
+        self.assertFalse(mock_client.get_job.called)
         self.assertEqual(0, mock_client.list_virtual_disks.call_count)
         self.node.refresh()
         self.assertEqual(['42'],
@@ -158,10 +234,11 @@ class DracPeriodicTaskTestCase(db_base.DbTestCase):
         self.node.save()
         # mock task
         task = mock.Mock(node=self.node, context=self.context)
-        # mock dracclient.get_job
+        # mock dracclient.list_jobs and dracclient.get_job
         self.job['state'] = 'Completed'
         mock_client = mock.Mock()
         mock_get_drac_client.return_value = mock_client
+        mock_client.list_jobs.return_value = []
         mock_client.get_job.return_value = test_utils.dict_to_namedtuple(
             values=self.job)
         # mock driver.raid.get_logical_disks
@@ -188,11 +265,12 @@ class DracPeriodicTaskTestCase(db_base.DbTestCase):
         self.node.save()
         # mock task
         task = mock.Mock(node=self.node, context=self.context)
-        # mock dracclient.get_job
+        # mock dracclient.list_jobs and dracclient.get_job
         self.job['state'] = 'Failed'
         self.job['message'] = 'boom'
         mock_client = mock.Mock()
         mock_get_drac_client.return_value = mock_client
+        mock_client.list_jobs.return_value = []
         mock_client.get_job.return_value = test_utils.dict_to_namedtuple(
             values=self.job)
         # mock dracclient.list_virtual_disks
@@ -227,10 +305,11 @@ class DracPeriodicTaskTestCase(db_base.DbTestCase):
         self.node.save()
         # mock task
         task = mock.Mock(node=self.node, context=self.context)
-        # mock dracclient.get_job
+        # mock dracclient.list_jobs and dracclient.get_job
         self.job['state'] = 'Completed'
         mock_client = mock.Mock()
         mock_get_drac_client.return_value = mock_client
+        mock_client.list_jobs.return_value = []
         mock_client.get_job.return_value = test_utils.dict_to_namedtuple(
             values=self.job)
         # mock driver.raid.get_logical_disks
@@ -266,10 +345,11 @@ class DracPeriodicTaskTestCase(db_base.DbTestCase):
         self.node.save()
         # mock task
         task = mock.Mock(node=self.node, context=self.context)
-        # mock dracclient.get_job
+        # mock dracclient.list_jobs and dracclient.get_job
         self.job['state'] = 'Completed'
         mock_client = mock.Mock()
         mock_get_drac_client.return_value = mock_client
+        mock_client.list_jobs.return_value = []
         mock_client.get_job.return_value = test_utils.dict_to_namedtuple(
             values=self.job)
         # mock driver.raid.get_logical_disks
@@ -307,13 +387,14 @@ class DracPeriodicTaskTestCase(db_base.DbTestCase):
         self.node.save()
         # mock task
         task = mock.Mock(node=self.node, context=self.context)
-        # mock dracclient.get_job
+        # mock dracclient.list_jobs and dracclient.get_job
         self.job['state'] = 'Completed'
         failed_job = self.job.copy()
         failed_job['state'] = 'Failed'
         failed_job['message'] = 'boom'
         mock_client = mock.Mock()
         mock_get_drac_client.return_value = mock_client
+        mock_client.list_jobs.return_value = []
         mock_client.get_job.side_effect = [
             test_utils.dict_to_namedtuple(values=failed_job),
             test_utils.dict_to_namedtuple(values=self.job)]
@@ -333,3 +414,33 @@ class DracPeriodicTaskTestCase(db_base.DbTestCase):
                          self.node.driver_internal_info)
         self.assertNotIn('logical_disks', self.node.raid_config)
         task.process_event.assert_called_once_with('fail')
+
+    @mock.patch.object(drac_common, 'get_drac_client', spec_set=True,
+                       autospec=True)
+    @mock.patch.object(agent_base_vendor, '_notify_conductor_resume_clean')
+    def test__check_node_raid_jobs_with_unfinished_job(
+            self, mock_notify_conductor_resume_clean, mock_get_drac_client):
+        # mock node.driver_internal_info
+        driver_internal_info = {'raid_config_job_ids': ['42', '36']}
+        self.node.driver_internal_info = driver_internal_info
+        self.node.save()
+        # mock task
+        task = mock.Mock(node=self.node, context=self.context)
+        # mock dracclient.list_jobs and dracclient.get_job
+        unfinished_job = dict(self.job, id='36')
+        self.job['state'] = 'Completed'
+        mock_client = mock.Mock()
+        mock_get_drac_client.return_value = mock_client
+        mock_client.list_jobs.return_value = [
+            test_utils.dict_to_namedtuple(values=unfinished_job)]
+        mock_client.get_job.return_value = test_utils.dict_to_namedtuple(
+            values=self.job)
+
+        self.driver.raid._check_node_raid_jobs(task)
+
+        mock_client.get_job.assert_called_once_with('42')
+        self.node.refresh()
+        self.assertEqual(['36'],
+                         self.node.driver_internal_info['raid_config_job_ids'])
+        self.assertFalse(mock_notify_conductor_resume_clean.called)
+        self.assertFalse(task.process_event.called)
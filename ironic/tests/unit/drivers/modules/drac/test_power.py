@@ -59,7 +59,10 @@ class DracPowerTestCase(base.DbTestCase):
         self.assertEqual(states.POWER_ON, power_state)
         mock_client.get_power_state.assert_called_once_with()
 
-    def test_get_power_state_fail(self, mock_get_drac_client):
+    @mock.patch.object(drac_common, 'invalidate_drac_client', spec_set=True,
+                       autospec=True)
+    def test_get_power_state_fail(self, mock_invalidate,
+                                  mock_get_drac_client):
         mock_client = mock_get_drac_client.return_value
         exc = drac_exceptions.BaseClientException('boom')
         mock_client.get_power_state.side_effect = exc
@@ -68,6 +71,7 @@ class DracPowerTestCase(base.DbTestCase):
                                   shared=True) as task:
             self.assertRaises(exception.DracOperationError,
                               task.driver.power.get_power_state, task)
+            mock_invalidate.assert_called_once_with(task.node)
 
         mock_client.get_power_state.assert_called_once_with()
 
@@ -523,6 +523,59 @@ class DracCreateRaidConfigurationHelpersTestCase(db_base.DbTestCase):
                  'Disk.Bay.3:Enclosure.Internal.0-1:RAID.Integrated.1-1']},
             logical_disks)
 
+    @mock.patch.object(drac_raid, '_calculate_volume_props',
+                       wraps=drac_raid._calculate_volume_props)
+    def test__find_configuration_no_solution(self,
+                                             mock_calculate_volume_props):
+        for i in range(8, 24):
+            disk = self.physical_disk.copy()
+            disk['id'] = ('Disk.Bay.%s:Enclosure.Internal.0-1:'
+                          'RAID.Integrated.1-1' % i)
+            self.physical_disks.append(disk)
+        logical_disks = [
+            {'size_mb': 512000,
+             'raid_level': '5'},
+            {'size_mb': 512000,
+             'raid_level': '5'},
+            {'size_mb': 20000000,
+             'raid_level': '0'}
+        ]
+        physical_disks = self._generate_physical_disks()
+
+        self.assertRaises(exception.DracOperationError,
+                          drac_raid._find_configuration, logical_disks,
+                          physical_disks)
+        # the disk assignments leaving the same number of unused disks are
+        # only explored once
+        self.assertLess(mock_calculate_volume_props.call_count, 1000)
+
+    def test__disks_state(self):
+        physical_disks = self._generate_physical_disks()
+        disk_type = ('RAID.Integrated.1-1', 'hdd', 'sas', 571776)
+        physical_disks_by_type = {disk_type: physical_disks}
+        logical_disks = [{'size_mb': 102400, 'raid_level': '1'}]
+        free_space_mb = dict((disk, disk.free_size_mb)
+                             for disk in physical_disks)
+        free_space_mb1 = dict(free_space_mb)
+        free_space_mb1[physical_disks[0]] = 0
+        free_space_mb2 = dict(free_space_mb)
+        free_space_mb2[physical_disks[1]] = 1024
+
+        # only the number of unused disks matters to volumes which do not
+        # share physical disks
+        self.assertEqual(
+            drac_raid._disks_state(logical_disks, physical_disks_by_type,
+                                   free_space_mb1),
+            drac_raid._disks_state(logical_disks, physical_disks_by_type,
+                                   free_space_mb2))
+
+        logical_disks[0]['share_physical_disks'] = True
+        self.assertNotEqual(
+            drac_raid._disks_state(logical_disks, physical_disks_by_type,
+                                   free_space_mb1),
+            drac_raid._disks_state(logical_disks, physical_disks_by_type,
+                                   free_space_mb2))
+
 
 class DracRaidInterfaceTestCase(db_base.DbTestCase):
 
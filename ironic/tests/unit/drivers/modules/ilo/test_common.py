@@ -173,6 +173,28 @@ class IloCommonMethodsTestCase(db_base.DbTestCase):
     def test_get_ilo_object_no_cafile(self):
         self._test_get_ilo_object()
 
+    @mock.patch.object(ilo_client, 'IloClient', spec_set=True,
+                       autospec=True)
+    def test_get_ilo_object_cached(self, ilo_client_mock):
+        ilo_client_mock.side_effect = ['ilo_object', 'new_ilo_object']
+        self.assertEqual('ilo_object', ilo_common.get_ilo_object(self.node))
+        self.assertEqual('ilo_object', ilo_common.get_ilo_object(self.node))
+        self.assertEqual(1, ilo_client_mock.call_count)
+
+        # A change of the driver_info gives a new client.
+        self.node.driver_info['ilo_password'] = 'new_password'
+        self.assertEqual('new_ilo_object',
+                         ilo_common.get_ilo_object(self.node))
+
+    @mock.patch.object(ilo_client, 'IloClient', spec_set=True,
+                       autospec=True)
+    def test_invalidate_ilo_object(self, ilo_client_mock):
+        ilo_client_mock.side_effect = ['ilo_object', 'new_ilo_object']
+        self.assertEqual('ilo_object', ilo_common.get_ilo_object(self.node))
+        ilo_common.invalidate_ilo_object(self.node)
+        self.assertEqual('new_ilo_object',
+                         ilo_common.get_ilo_object(self.node))
+
     @mock.patch.object(ilo_common, 'get_ilo_object', spec_set=True,
                        autospec=True)
     def test_get_ilo_license(self, get_ilo_object_mock):
@@ -742,6 +764,24 @@ class IloCommonMethodsTestCase(db_base.DbTestCase):
         copy_mock.assert_called_once_with(source, image_path)
         chmod_mock.assert_called_once_with(image_path, 0o644)
 
+    @mock.patch.object(os, 'chmod', spec_set=True,
+                       autospec=True)
+    @mock.patch.object(images, 'link_or_copy', spec_set=True,
+                       autospec=True)
+    def test_copy_image_to_web_server_boot_image_cache(self, link_mock,
+                                                       chmod_mock):
+        self.config(boot_image_cache_dir='/cache')
+        CONF.deploy.http_url = "http://x.y.z.a/webserver/"
+        CONF.deploy.http_root = "/webserver"
+        expected_url = "http://x.y.z.a/webserver/image-UUID"
+        source = 'tmp_image_file'
+        destination = "image-UUID"
+        image_path = "/webserver/image-UUID"
+        actual_url = ilo_common.copy_image_to_web_server(source, destination)
+        self.assertEqual(expected_url, actual_url)
+        link_mock.assert_called_once_with(source, image_path)
+        chmod_mock.assert_called_once_with(image_path, 0o644)
+
     @mock.patch.object(os, 'chmod', spec_set=True,
                        autospec=True)
     @mock.patch.object(shutil, 'copyfile', spec_set=True,
@@ -66,7 +66,10 @@ class IloPowerInternalMethodsTestCase(db_base.DbTestCase):
         ilo_mock_object.get_host_power_status.return_value = 'ERROR'
         self.assertEqual(states.ERROR, ilo_power._get_power_state(self.node))
 
-    def test__get_power_state_fail(self, get_ilo_object_mock):
+    @mock.patch.object(ilo_common, 'invalidate_ilo_object', spec_set=True,
+                       autospec=True)
+    def test__get_power_state_fail(self, invalidate_mock,
+                                   get_ilo_object_mock):
         ilo_mock_object = get_ilo_object_mock.return_value
         exc = ilo_error.IloError('error')
         ilo_mock_object.get_host_power_status.side_effect = exc
@@ -75,6 +78,7 @@ class IloPowerInternalMethodsTestCase(db_base.DbTestCase):
                           ilo_power._get_power_state,
                           self.node)
         ilo_mock_object.get_host_power_status.assert_called_once_with()
+        invalidate_mock.assert_called_once_with(self.node)
 
     def test__set_power_state_invalid_state(self, get_ilo_object_mock):
         with task_manager.acquire(self.context, self.node.uuid,
@@ -170,6 +170,28 @@ class IRMCCommonMethodsTestCase(db_base.DbTestCase):
             client_timeout=self.info['irmc_client_timeout'])
         self.assertEqual('get_client', returned_mock_scci_get_client)
 
+    @mock.patch.object(irmc_common, 'scci',
+                       spec_set=mock_specs.SCCICLIENT_IRMC_SCCI_SPEC)
+    def test_get_irmc_client_cached(self, mock_scci):
+        mock_scci.get_client.side_effect = ['client', 'new_client']
+        self.assertEqual('client', irmc_common.get_irmc_client(self.node))
+        self.assertEqual('client', irmc_common.get_irmc_client(self.node))
+        self.assertEqual(1, mock_scci.get_client.call_count)
+
+        # A change of the driver_info gives a new client.
+        self.node.driver_info['irmc_password'] = 'new_password'
+        self.assertEqual('new_client',
+                         irmc_common.get_irmc_client(self.node))
+
+    @mock.patch.object(irmc_common, 'scci',
+                       spec_set=mock_specs.SCCICLIENT_IRMC_SCCI_SPEC)
+    def test_invalidate_irmc_client(self, mock_scci):
+        mock_scci.get_client.side_effect = ['client', 'new_client']
+        self.assertEqual('client', irmc_common.get_irmc_client(self.node))
+        irmc_common.invalidate_irmc_client(self.node)
+        self.assertEqual('new_client',
+                         irmc_common.get_irmc_client(self.node))
+
     def test_update_ipmi_properties(self):
         with task_manager.acquire(self.context, self.node.uuid,
                                   shared=False) as task:
@@ -137,6 +137,16 @@ class NeutronInterfaceTestCase(db_base.DbTestCase):
                 self.interface.configure_tenant_networks, task)
             client_mock.assert_called_once_with(task.context.auth_token)
 
+    @mock.patch.object(neutron_common, 'get_client')
+    def test_configure_tenant_networks_update_error(self, client_mock):
+        client = client_mock.return_value
+        client.update_port.side_effect = (
+            neutron_exceptions.NeutronClientException())
+        with task_manager.acquire(self.context, self.node.id) as task:
+            self.assertRaises(
+                neutron_exceptions.NeutronClientException,
+                self.interface.configure_tenant_networks, task)
+
     @mock.patch.object(neutron_common, 'get_client')
     def _test_configure_tenant_networks(self, client_mock, is_client_id=False):
         upd_mock = mock.Mock()
@@ -12,6 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+import shutil
+import tempfile
 import types
 
 import mock
@@ -30,6 +33,7 @@ from ironic.drivers.modules import agent_base_vendor
 from ironic.drivers.modules import agent_client
 from ironic.drivers.modules import deploy_utils
 from ironic.drivers.modules import fake
+from ironic.drivers.modules import iscsi_deploy
 from ironic.drivers.modules import pxe
 from ironic.drivers import utils as driver_utils
 from ironic.tests.unit.conductor import mgr_utils
@@ -231,6 +235,120 @@ class TestAgentMethods(db_base.DbTestCase):
             self.assertRaises(exception.ImageRefValidationFailed,
                               agent.build_instance_info_for_deploy, task)
 
+    @mock.patch.object(agent, '_get_http_image_checksum', autospec=True)
+    @mock.patch.object(agent, '_publish_instance_image', autospec=True)
+    @mock.patch.object(image_service, 'GlanceImageService', autospec=True)
+    def _test_build_instance_info_for_deploy_http(
+            self, glance_mock, publish_mock, checksum_mock,
+            disk_format='qcow2', force_raw=True):
+        self.config(image_download_source='http', group='agent')
+        self.config(force_raw_images=force_raw)
+        i_info = self.node.instance_info
+        i_info['image_source'] = '733d1c44-a2ea-414b-aca7-69decf20d810'
+        driver_internal_info = self.node.driver_internal_info
+        driver_internal_info['is_whole_disk_image'] = True
+        self.node.driver_internal_info = driver_internal_info
+        self.node.instance_info = i_info
+        self.node.save()
+
+        image_info = {'checksum': 'aa', 'disk_format': disk_format,
+                      'container_format': 'bare'}
+        glance_mock.return_value.show = mock.MagicMock(spec_set=[],
+                                                       return_value=image_info)
+        publish_mock.return_value = ('http://conductor/agent_images/node',
+                                     '/images/node/disk')
+        checksum_mock.return_value = 'bb'
+
+        mgr_utils.mock_the_extension_manager(driver='fake_agent')
+        with task_manager.acquire(
+                self.context, self.node.uuid, shared=False) as task:
+
+            info = agent.build_instance_info_for_deploy(task)
+
+            self.assertFalse(glance_mock.return_value.swift_temp_url.called)
+            publish_mock.assert_called_once_with(task)
+            self.assertEqual('http://conductor/agent_images/node',
+                             info['image_url'])
+            return info, checksum_mock
+
+    def test_build_instance_info_for_deploy_http_converted(self):
+        info, checksum_mock = self._test_build_instance_info_for_deploy_http()
+        checksum_mock.assert_called_once_with('/images/node/disk')
+        self.assertEqual('bb', info['image_checksum'])
+        self.assertEqual('raw', info['image_disk_format'])
+
+    def test_build_instance_info_for_deploy_http_raw(self):
+        info, checksum_mock = self._test_build_instance_info_for_deploy_http(
+            disk_format='raw')
+        self.assertFalse(checksum_mock.called)
+        self.assertEqual('aa', info['image_checksum'])
+        self.assertEqual('raw', info['image_disk_format'])
+
+    def test_build_instance_info_for_deploy_http_no_force_raw(self):
+        info, checksum_mock = self._test_build_instance_info_for_deploy_http(
+            force_raw=False)
+        self.assertFalse(checksum_mock.called)
+        self.assertEqual('aa', info['image_checksum'])
+        self.assertEqual('qcow2', info['image_disk_format'])
+
+    @mock.patch.object(os, 'chmod', autospec=True)
+    @mock.patch.object(images, 'link_or_copy', autospec=True)
+    @mock.patch.object(agent.fileutils, 'ensure_tree', autospec=True)
+    @mock.patch.object(iscsi_deploy, 'cache_instance_image', autospec=True)
+    def test__publish_instance_image(self, cache_mock, ensure_tree_mock,
+                                     link_mock, chmod_mock):
+        self.config(http_url='http://conductor:8080/', http_root='/httpboot',
+                    group='deploy')
+        cache_mock.return_value = ('image-uuid', '/images/node/disk')
+        http_path = '/httpboot/agent_images/%s' % self.node.uuid
+        with task_manager.acquire(
+                self.context, self.node.uuid, shared=False) as task:
+            url, path = agent._publish_instance_image(task)
+
+            cache_mock.assert_called_once_with(task.context, task.node)
+        self.assertEqual(
+            'http://conductor:8080/agent_images/%s' % self.node.uuid, url)
+        self.assertEqual('/images/node/disk', path)
+        ensure_tree_mock.assert_called_once_with('/httpboot/agent_images')
+        link_mock.assert_called_once_with('/images/node/disk', http_path)
+        chmod_mock.assert_called_once_with(http_path, 0o644)
+
+    @mock.patch.object(agent.utils, 'execute', autospec=True)
+    def test__get_http_image_checksum(self, execute_mock):
+        execute_mock.return_value = ('bb  /images/disk\n', '')
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        self.addCleanup(agent._HTTP_IMAGE_CHECKSUMS.clear)
+        image_path = os.path.join(tmpdir, 'disk')
+        with open(image_path, 'w') as f:
+            f.write('image')
+        link_path = os.path.join(tmpdir, 'link')
+        os.link(image_path, link_path)
+
+        self.assertEqual('bb', agent._get_http_image_checksum(image_path))
+        # Another link to the same cached image
+        self.assertEqual('bb', agent._get_http_image_checksum(link_path))
+        execute_mock.assert_called_once_with('md5sum', image_path)
+
+    @mock.patch.object(iscsi_deploy, 'destroy_images', autospec=True)
+    @mock.patch.object(agent.ironic_utils, 'unlink_without_raise',
+                       autospec=True)
+    def test__destroy_published_image(self, unlink_mock, destroy_mock):
+        self.config(image_download_source='http', group='agent')
+        self.config(http_root='/httpboot', group='deploy')
+        agent._destroy_published_image(self.node)
+        unlink_mock.assert_called_once_with(
+            '/httpboot/agent_images/%s' % self.node.uuid)
+        destroy_mock.assert_called_once_with(self.node.uuid)
+
+    @mock.patch.object(iscsi_deploy, 'destroy_images', autospec=True)
+    @mock.patch.object(agent.ironic_utils, 'unlink_without_raise',
+                       autospec=True)
+    def test__destroy_published_image_swift(self, unlink_mock, destroy_mock):
+        agent._destroy_published_image(self.node)
+        self.assertFalse(unlink_mock.called)
+        self.assertFalse(destroy_mock.called)
+
     @mock.patch.object(images, 'image_show', autospec=True)
     def test_check_image_size(self, show_mock):
         show_mock.return_value = {
@@ -353,6 +471,16 @@ class TestAgentDeploy(db_base.DbTestCase):
             show_mock.assert_called_once_with(self.context, 'fake-image')
             validate_capability_mock.assert_called_once_with(task.node)
 
+    @mock.patch.object(pxe.PXEBoot, 'validate', autospec=True)
+    def test_validate_http_download_no_http_url(self,
+                                                pxe_boot_validate_mock):
+        self.config(image_download_source='http', group='agent')
+        self.config(http_url=None, group='deploy')
+        with task_manager.acquire(
+                self.context, self.node['uuid'], shared=False) as task:
+            self.assertRaises(exception.MissingParameterValue,
+                              self.driver.validate, task)
+
     @mock.patch.object(deploy_utils, 'validate_capabilities',
                        spec_set=True, autospec=True)
     @mock.patch.object(images, 'image_show', autospec=True)
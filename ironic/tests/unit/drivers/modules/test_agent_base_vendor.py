@@ -201,11 +201,11 @@ class TestBaseAgentVendor(db_base.DbTestCase):
                          mock.call(self.context, 'fake-uuid')],
                          mock_get_node.call_args_list)
 
-    @mock.patch.object(objects.port.Port, 'get_by_address',
+    @mock.patch.object(objects.port.Port, 'list_by_addresses',
                        spec_set=types.FunctionType)
-    def test_find_ports_by_macs(self, mock_get_port):
+    def test_find_ports_by_macs(self, mock_list_ports):
         fake_port = object_utils.get_test_port(self.context)
-        mock_get_port.return_value = fake_port
+        mock_list_ports.return_value = [fake_port]
 
         macs = ['aa:bb:cc:dd:ee:ff']
 
@@ -215,11 +215,12 @@ class TestBaseAgentVendor(db_base.DbTestCase):
         self.assertEqual(1, len(ports))
         self.assertEqual(fake_port.uuid, ports[0].uuid)
         self.assertEqual(fake_port.node_id, ports[0].node_id)
+        mock_list_ports.assert_called_once_with(task, macs)
 
-    @mock.patch.object(objects.port.Port, 'get_by_address',
+    @mock.patch.object(objects.port.Port, 'list_by_addresses',
                        spec_set=types.FunctionType)
-    def test_find_ports_by_macs_bad_params(self, mock_get_port):
-        mock_get_port.side_effect = exception.PortNotFound(port="123")
+    def test_find_ports_by_macs_bad_params(self, mock_list_ports):
+        mock_list_ports.return_value = []
 
         macs = ['aa:bb:cc:dd:ee:ff']
         with task_manager.acquire(
@@ -431,14 +432,14 @@ class TestHeartbeat(AgentDeployMixinBaseTest):
             '1be26c0b-03f2-4d2e-ae87-c02d7f33c123: Failed checking if deploy '
             'is done. Exception: LlamaException')
 
-    @mock.patch.object(objects.node.Node, 'touch_provisioning', autospec=True)
+    @mock.patch.object(objects.node.Node, 'record_heartbeat', autospec=True)
     @mock.patch.object(agent_base_vendor.AgentDeployMixin,
                        '_refresh_clean_steps', autospec=True)
     @mock.patch.object(manager_utils, 'set_node_cleaning_steps', autospec=True)
     @mock.patch.object(agent_base_vendor, '_notify_conductor_resume_clean',
                        autospec=True)
     def test_heartbeat_resume_clean(self, mock_notify, mock_set_steps,
-                                    mock_refresh, mock_touch):
+                                    mock_refresh, mock_record):
         self.node.clean_step = {}
         self.node.provision_state = states.CLEANWAIT
         self.node.save()
@@ -446,20 +447,22 @@ class TestHeartbeat(AgentDeployMixinBaseTest):
                 self.context, self.node.uuid, shared=False) as task:
             self.deploy.heartbeat(task, 'http://127.0.0.1:8080')
 
-        mock_touch.assert_called_once_with(mock.ANY)
+        mock_record.assert_called_once_with(
+            mock.ANY, 'http://127.0.0.1:8080', mock.ANY,
+            touch_provisioning=True)
         mock_refresh.assert_called_once_with(mock.ANY, task)
         mock_notify.assert_called_once_with(task)
         mock_set_steps.assert_called_once_with(task)
 
     @mock.patch.object(manager_utils, 'cleaning_error_handler')
-    @mock.patch.object(objects.node.Node, 'touch_provisioning', autospec=True)
+    @mock.patch.object(objects.node.Node, 'record_heartbeat', autospec=True)
     @mock.patch.object(agent_base_vendor.AgentDeployMixin,
                        '_refresh_clean_steps', autospec=True)
     @mock.patch.object(manager_utils, 'set_node_cleaning_steps', autospec=True)
     @mock.patch.object(agent_base_vendor, '_notify_conductor_resume_clean',
                        autospec=True)
     def test_heartbeat_resume_clean_fails(self, mock_notify, mock_set_steps,
-                                          mock_refresh, mock_touch,
+                                          mock_refresh, mock_record,
                                           mock_handler):
         mocks = [mock_refresh, mock_set_steps, mock_notify]
         self.node.clean_step = {}
@@ -474,7 +477,9 @@ class TestHeartbeat(AgentDeployMixinBaseTest):
                     self.context, self.node.uuid, shared=False) as task:
                 self.deploy.heartbeat(task, 'http://127.0.0.1:8080')
 
-            mock_touch.assert_called_once_with(mock.ANY)
+            mock_record.assert_called_once_with(
+            mock.ANY, 'http://127.0.0.1:8080', mock.ANY,
+            touch_provisioning=True)
             mock_handler.assert_called_once_with(task, mock.ANY)
             for called in before_failed_mocks + [failed_mock]:
                 self.assertTrue(called.called)
@@ -482,14 +487,14 @@ class TestHeartbeat(AgentDeployMixinBaseTest):
                 self.assertFalse(not_called.called)
 
             # Reset mocks for the next interaction
-            for m in mocks + [mock_touch, mock_handler]:
+            for m in mocks + [mock_record, mock_handler]:
                 m.reset_mock()
             failed_mock.side_effect = None
 
-    @mock.patch.object(objects.node.Node, 'touch_provisioning', autospec=True)
+    @mock.patch.object(objects.node.Node, 'record_heartbeat', autospec=True)
     @mock.patch.object(agent_base_vendor.AgentDeployMixin,
                        'continue_cleaning', autospec=True)
-    def test_heartbeat_continue_cleaning(self, mock_continue, mock_touch):
+    def test_heartbeat_continue_cleaning(self, mock_continue, mock_record):
         self.node.clean_step = {
             'priority': 10,
             'interface': 'deploy',
@@ -502,7 +507,9 @@ class TestHeartbeat(AgentDeployMixinBaseTest):
                 self.context, self.node.uuid, shared=False) as task:
             self.deploy.heartbeat(task, 'http://127.0.0.1:8080')
 
-        mock_touch.assert_called_once_with(mock.ANY)
+        mock_record.assert_called_once_with(
+            mock.ANY, 'http://127.0.0.1:8080', mock.ANY,
+            touch_provisioning=True)
         mock_continue.assert_called_once_with(mock.ANY, task)
 
     @mock.patch.object(manager_utils, 'cleaning_error_handler')
@@ -528,6 +535,38 @@ class TestHeartbeat(AgentDeployMixinBaseTest):
         mock_continue.assert_called_once_with(mock.ANY, task)
         mock_handler.assert_called_once_with(task, mock.ANY)
 
+    @mock.patch.object(task_manager.TaskManager, 'upgrade_lock',
+                       autospec=True)
+    @mock.patch.object(agent_base_vendor.LOG, 'warning', autospec=True)
+    @mock.patch.object(manager_utils, 'cleaning_error_handler')
+    @mock.patch.object(agent_base_vendor.AgentDeployMixin,
+                       'continue_cleaning', autospec=True)
+    def test_heartbeat_continue_cleaning_fails_node_locked(
+            self, mock_continue, mock_handler, mock_warning, mock_upgrade):
+        self.node.clean_step = {
+            'priority': 10,
+            'interface': 'deploy',
+            'step': 'foo',
+            'reboot_requested': False
+        }
+
+        mock_continue.side_effect = Exception()
+        mock_upgrade.side_effect = exception.NodeLocked(node=self.node.uuid,
+                                                        host='host')
+
+        self.node.provision_state = states.CLEANWAIT
+        self.node.save()
+        with task_manager.acquire(
+                self.context, self.node.uuid, shared=True) as task:
+            self.deploy.heartbeat(task, 'http://127.0.0.1:8080')
+
+        mock_continue.assert_called_once_with(mock.ANY, task)
+        mock_upgrade.assert_called_once_with(task)
+        self.assertTrue(mock_warning.called)
+        self.assertFalse(mock_handler.called)
+        self.node.refresh()
+        self.assertEqual(states.CLEANWAIT, self.node.provision_state)
+
     @mock.patch.object(manager_utils, 'cleaning_error_handler')
     @mock.patch.object(agent_base_vendor.AgentDeployMixin,
                        'continue_cleaning', autospec=True)
@@ -573,11 +612,11 @@ class TestHeartbeat(AgentDeployMixinBaseTest):
         self.assertEqual(0, rti_mock.call_count)
         self.assertEqual(0, cd_mock.call_count)
 
-    @mock.patch.object(objects.node.Node, 'touch_provisioning', autospec=True)
+    @mock.patch.object(objects.node.Node, 'record_heartbeat', autospec=True)
     @mock.patch.object(agent_base_vendor.AgentDeployMixin,
                        'deploy_has_started', autospec=True)
     def test_heartbeat_touch_provisioning(self, mock_deploy_started,
-                                          mock_touch):
+                                          mock_record):
         mock_deploy_started.return_value = True
 
         self.node.provision_state = states.DEPLOYWAIT
@@ -586,7 +625,114 @@ class TestHeartbeat(AgentDeployMixinBaseTest):
                 self.context, self.node.uuid, shared=False) as task:
             self.deploy.heartbeat(task, 'http://127.0.0.1:8080')
 
-        mock_touch.assert_called_once_with(mock.ANY)
+        mock_record.assert_called_once_with(
+            mock.ANY, 'http://127.0.0.1:8080', mock.ANY,
+            touch_provisioning=True)
+
+    @mock.patch.object(task_manager.TaskManager, 'upgrade_lock',
+                       autospec=True)
+    @mock.patch.object(agent_base_vendor.AgentDeployMixin, 'deploy_is_done',
+                       autospec=True)
+    @mock.patch.object(agent_base_vendor.AgentDeployMixin,
+                       'deploy_has_started', autospec=True)
+    def test_heartbeat_shared_lock(self, mock_deploy_started, mock_done,
+                                   mock_upgrade):
+        mock_deploy_started.return_value = True
+        mock_done.return_value = False
+        self.node.provision_state = states.DEPLOYWAIT
+        self.node.save()
+        with task_manager.acquire(
+                self.context, self.node.uuid, shared=True) as task:
+            self.deploy.heartbeat(task, 'http://127.0.0.1/foo')
+            self.assertTrue(task.shared)
+
+        self.assertFalse(mock_upgrade.called)
+        self.node.refresh()
+        self.assertIn('agent_last_heartbeat', self.node.driver_internal_info)
+        self.assertEqual('http://127.0.0.1/foo',
+                         self.node.driver_internal_info['agent_url'])
+        self.assertTrue(self.node.driver_internal_info['is_whole_disk_image'])
+        self.assertIsNotNone(self.node.provision_updated_at)
+
+    @mock.patch.object(agent_base_vendor.AgentDeployMixin, 'deploy_is_done',
+                       autospec=True)
+    @mock.patch.object(agent_base_vendor.AgentDeployMixin,
+                       'deploy_has_started', autospec=True)
+    def test_heartbeat_new_agent_url(self, mock_deploy_started, mock_done):
+        mock_deploy_started.return_value = True
+        mock_done.return_value = False
+        self.node.provision_state = states.DEPLOYWAIT
+        self.node.save()
+        with task_manager.acquire(
+                self.context, self.node.uuid, shared=True) as task:
+            self.deploy.heartbeat(task, 'http://127.0.0.1:8080')
+            self.assertFalse(task.shared)
+
+        self.node.refresh()
+        self.assertEqual('http://127.0.0.1:8080',
+                         self.node.driver_internal_info['agent_url'])
+
+    @mock.patch.object(agent_base_vendor.AgentDeployMixin, 'deploy_is_done',
+                       autospec=True)
+    @mock.patch.object(agent_base_vendor.AgentDeployMixin,
+                       'deploy_has_started', autospec=True)
+    @mock.patch.object(agent_client, 'record_commands_status', autospec=True)
+    def test_heartbeat_commands_status(self, mock_record, mock_deploy_started,
+                                       mock_done):
+        commands_status = [{'command_name': 'prepare_image',
+                            'command_status': 'RUNNING'}]
+        # The reported status must be recorded before checking the deploy
+        mock_deploy_started.side_effect = lambda *args: mock_record.called
+        mock_done.return_value = False
+        self.node.provision_state = states.DEPLOYWAIT
+        self.node.save()
+        with task_manager.acquire(
+                self.context, self.node.uuid, shared=True) as task:
+            self.deploy.heartbeat(task, 'http://127.0.0.1/foo',
+                                  commands_status=commands_status,
+                                  received_at=100)
+            mock_record.assert_called_once_with(task.node, commands_status,
+                                                100)
+            self.assertTrue(mock_done.called)
+
+    @mock.patch.object(agent_base_vendor.AgentDeployMixin, 'continue_deploy',
+                       autospec=True)
+    @mock.patch.object(agent_base_vendor.AgentDeployMixin,
+                       'deploy_has_started', autospec=True)
+    def test_heartbeat_upgrades_lock_for_action(self, mock_deploy_started,
+                                                mock_continue):
+        mock_deploy_started.return_value = False
+        self.node.provision_state = states.DEPLOYWAIT
+        self.node.save()
+        with task_manager.acquire(
+                self.context, self.node.uuid, shared=True) as task:
+            self.deploy.heartbeat(task, 'http://127.0.0.1/foo')
+            self.assertFalse(task.shared)
+
+        mock_continue.assert_called_once_with(mock.ANY, task)
+
+    @mock.patch.object(task_manager.TaskManager, 'upgrade_lock',
+                       autospec=True)
+    @mock.patch.object(agent_base_vendor.AgentDeployMixin, 'continue_deploy',
+                       autospec=True)
+    @mock.patch.object(agent_base_vendor.AgentDeployMixin,
+                       'deploy_has_started', autospec=True)
+    def test_heartbeat_state_changed_while_upgrading(
+            self, mock_deploy_started, mock_continue, mock_upgrade):
+        mock_deploy_started.return_value = False
+        self.node.provision_state = states.DEPLOYWAIT
+        self.node.save()
+
+        def _upgrade(task, purpose=None):
+            task.node.provision_state = states.DEPLOYFAIL
+
+        mock_upgrade.side_effect = _upgrade
+        with task_manager.acquire(
+                self.context, self.node.uuid, shared=True) as task:
+            self.deploy.heartbeat(task, 'http://127.0.0.1/foo')
+
+        mock_upgrade.assert_called_once_with(task)
+        self.assertFalse(mock_continue.called)
 
     @mock.patch.object(driver_utils, 'collect_ramdisk_logs', autospec=True)
     @mock.patch.object(time, 'sleep', lambda seconds: None)
@@ -1207,6 +1353,27 @@ class TestHeartbeat(AgentDeployMixinBaseTest):
             self.deploy.continue_cleaning(task)
             self.assertFalse(notify_mock.called)
 
+    @mock.patch.object(task_manager.TaskManager, 'upgrade_lock',
+                       autospec=True)
+    @mock.patch.object(agent_base_vendor,
+                       '_notify_conductor_resume_clean', autospec=True)
+    @mock.patch.object(agent_client.AgentClient, 'get_commands_status',
+                       autospec=True)
+    def test_continue_cleaning_running_shared_lock(self, status_mock,
+                                                   notify_mock,
+                                                   upgrade_mock):
+        # Test that the lock is not upgraded while a clean step is executing
+        status_mock.return_value = [{
+            'command_status': 'RUNNING',
+            'command_name': 'execute_clean_step',
+            'command_result': None
+        }]
+        with task_manager.acquire(self.context, self.node['uuid'],
+                                  shared=True) as task:
+            self.deploy.continue_cleaning(task)
+            self.assertFalse(notify_mock.called)
+            self.assertFalse(upgrade_mock.called)
+
     @mock.patch.object(manager_utils, 'cleaning_error_handler', autospec=True)
     @mock.patch.object(agent_client.AgentClient, 'get_commands_status',
                        autospec=True)
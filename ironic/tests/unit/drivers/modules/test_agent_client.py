@@ -13,9 +13,11 @@
 # limitations under the License.
 
 import json
+import time
 
 import mock
 import requests
+from requests.packages.urllib3 import exceptions as urllib3_exceptions
 import six
 from six.moves import http_client
 
@@ -24,6 +26,12 @@ from ironic.drivers.modules import agent_client
 from ironic.tests import base
 
 
+def _new_connection_error():
+    reason = urllib3_exceptions.NewConnectionError(None, 'refused')
+    return requests.ConnectionError(
+        urllib3_exceptions.MaxRetryError(None, '/v1/commands', reason))
+
+
 class MockResponse(object):
     status_code = http_client.OK
 
@@ -64,6 +72,20 @@ class TestAgentClient(base.TestCase):
         self.assertEqual('application/json',
                          client.session.headers['Content-Type'])
 
+    def test_connection_pool(self):
+        self.config(connection_pool_size=8, max_connection_pools=50,
+                    group='agent')
+        client = agent_client.AgentClient()
+        for prefix in ('http://', 'https://'):
+            adapter = client.session.get_adapter(prefix + '127.0.0.1')
+            self.assertEqual(8, adapter._pool_maxsize)
+            self.assertEqual(50, adapter._pool_connections)
+
+    def test_get_client(self):
+        client = agent_client.get_client()
+        self.assertIsInstance(client, agent_client.AgentClient)
+        self.assertIs(client, agent_client.get_client())
+
     def test__get_command_url(self):
         command_url = self.client._get_command_url(self.node)
         expected = self.node.driver_internal_info['agent_url'] + '/v1/commands'
@@ -96,7 +118,8 @@ class TestAgentClient(base.TestCase):
         self.client.session.post.assert_called_once_with(
             url,
             data=body,
-            params={'wait': 'false'})
+            params={'wait': 'false'},
+            timeout=(10, 300))
 
     def test__command_fail_json(self):
         response_text = 'this be not json matey!'
@@ -114,7 +137,63 @@ class TestAgentClient(base.TestCase):
         self.client.session.post.assert_called_once_with(
             url,
             data=body,
-            params={'wait': 'false'})
+            params={'wait': 'false'},
+            timeout=(10, 300))
+
+    def test__command_retry_connection_error(self):
+        self.config(command_retry_interval=0, group='agent')
+        self.client.session.post.side_effect = [
+            _new_connection_error(),
+            MockResponse(json.dumps({'status': 'ok'}))]
+
+        response = self.client._command(self.node, 'foo.bar', {})
+        self.assertEqual({'status': 'ok'}, response)
+        self.assertEqual(2, self.client.session.post.call_count)
+
+    def test__command_retry_connect_timeout(self):
+        self.config(command_retry_interval=0, group='agent')
+        self.client.session.post.side_effect = [
+            requests.ConnectTimeout('boom'),
+            MockResponse(json.dumps({'status': 'ok'}))]
+
+        response = self.client._command(self.node, 'foo.bar', {})
+        self.assertEqual({'status': 'ok'}, response)
+        self.assertEqual(2, self.client.session.post.call_count)
+
+    def test__command_retry_connection_error_exhausted(self):
+        self.config(command_retry_interval=0, group='agent')
+        self.client.session.post.side_effect = _new_connection_error()
+
+        self.assertRaises(exception.IronicException,
+                          self.client._command, self.node, 'foo.bar', {})
+        self.assertEqual(3, self.client.session.post.call_count)
+
+    def test__command_no_retry_connection_reset(self):
+        self.config(command_retry_interval=0, group='agent')
+        self.client.session.post.side_effect = requests.ConnectionError(
+            'connection reset by peer')
+
+        self.assertRaises(exception.IronicException,
+                          self.client._command, self.node, 'foo.bar', {})
+        self.assertEqual(1, self.client.session.post.call_count)
+
+    def test_get_commands_status_retry_connection_reset(self):
+        self.config(command_retry_interval=0, group='agent')
+        res = mock.MagicMock(spec_set=['json'])
+        res.json.return_value = {'commands': []}
+        self.client.session.get.side_effect = [
+            requests.ConnectionError('connection reset by peer'), res]
+
+        self.assertEqual([], self.client.get_commands_status(self.node))
+        self.assertEqual(2, self.client.session.get.call_count)
+
+    def test__command_no_retry_read_timeout(self):
+        self.config(command_retry_interval=0, group='agent')
+        self.client.session.post.side_effect = requests.ReadTimeout('boom')
+
+        self.assertRaises(exception.IronicException,
+                          self.client._command, self.node, 'foo.bar', {})
+        self.assertEqual(1, self.client.session.post.call_count)
 
     def test__command_fail_post(self):
         error = 'Boom'
@@ -141,6 +220,99 @@ class TestAgentClient(base.TestCase):
             mock_get.return_value = res
             self.assertEqual([], self.client.get_commands_status(self.node))
 
+    def test_get_commands_status_reported(self):
+        reported = [{'command_name': 'prepare_image',
+                     'command_status': 'SUCCEEDED'}]
+        agent_client.record_commands_status(self.node, reported)
+        with mock.patch.object(self.client.session, 'get',
+                               autospec=True) as mock_get:
+            self.assertEqual(reported,
+                             self.client.get_commands_status(self.node))
+            self.assertFalse(mock_get.called)
+
+    @mock.patch.object(time, 'time', autospec=True)
+    def test_get_commands_status_reported_too_old(self, mock_time):
+        self.config(commands_status_max_age=10, group='agent')
+        mock_time.return_value = 100
+        agent_client.record_commands_status(self.node, [{'foo': 'bar'}])
+        mock_time.return_value = 111
+        with mock.patch.object(self.client.session, 'get',
+                               autospec=True) as mock_get:
+            res = mock.MagicMock(spec_set=['json'])
+            res.json.return_value = {'commands': []}
+            mock_get.return_value = res
+            self.assertEqual([], self.client.get_commands_status(self.node))
+            self.assertTrue(mock_get.called)
+        self.assertNotIn(self.node.uuid, agent_client._COMMANDS_STATUS)
+
+    @mock.patch.object(time, 'time', autospec=True)
+    def test_record_commands_status_prunes_expired(self, mock_time):
+        self.config(commands_status_max_age=10, group='agent')
+        other_node = MockNode()
+        other_node.uuid = 'other-uuid'
+        mock_time.return_value = 100
+        agent_client.record_commands_status(other_node, [])
+        mock_time.return_value = 105
+        agent_client.record_commands_status(self.node, [])
+        # Not pruned before max age seconds since the last pruning
+        self.assertIn(other_node.uuid, agent_client._COMMANDS_STATUS)
+        mock_time.return_value = 111
+        agent_client.record_commands_status(self.node, [])
+        self.assertEqual([self.node.uuid],
+                         list(agent_client._COMMANDS_STATUS))
+
+    def test_record_commands_status_disabled(self):
+        self.config(commands_status_max_age=0, group='agent')
+        agent_client.record_commands_status(self.node, [])
+        self.assertEqual({}, agent_client._COMMANDS_STATUS)
+
+    def test_get_commands_status_reported_before_command(self):
+        agent_client.record_commands_status(self.node, [{'foo': 'bar'}])
+        self.client.session.post.return_value = MockResponse('{}')
+        self.client._command(self.node, 'foo.bar', {})
+        with mock.patch.object(self.client.session, 'get',
+                               autospec=True) as mock_get:
+            res = mock.MagicMock(spec_set=['json'])
+            res.json.return_value = {'commands': []}
+            mock_get.return_value = res
+            self.assertEqual([], self.client.get_commands_status(self.node))
+            self.assertTrue(mock_get.called)
+
+    @mock.patch.object(time, 'time', autospec=True)
+    def test_record_commands_status_received_before_command(self, mock_time):
+        mock_time.return_value = 100
+        self.client.session.post.return_value = MockResponse('{}')
+        self.client._command(self.node, 'foo.bar', {})
+        mock_time.return_value = 101
+        # Received before the command was sent, but processed after
+        agent_client.record_commands_status(self.node, [{'foo': 'bar'}], 99)
+        self.assertNotIn(self.node.uuid, agent_client._COMMANDS_STATUS)
+        agent_client.record_commands_status(self.node, [{'foo': 'bar'}], 101)
+        self.assertEqual(([{'foo': 'bar'}], 101),
+                         agent_client._COMMANDS_STATUS[self.node.uuid])
+
+    @mock.patch.object(agent_client.AgentClient, 'get_clean_steps',
+                       autospec=True)
+    def test_batch(self, mock_steps):
+        other_node = MockNode()
+        other_node.uuid = 'other-uuid'
+        error = exception.IronicException('boom')
+
+        def _get_clean_steps(client, node, ports):
+            if node is other_node:
+                raise error
+            return {'node': node.uuid, 'ports': ports}
+
+        mock_steps.side_effect = _get_clean_steps
+        result = self.client.batch('get_clean_steps',
+                                   [(self.node, ['port1']),
+                                    (other_node, ['port2'])])
+        self.assertEqual([({'node': 'uuid', 'ports': ['port1']}, None),
+                          (None, error)], result)
+        mock_steps.assert_has_calls(
+            [mock.call(self.client, self.node, ['port1']),
+             mock.call(self.client, other_node, ['port2'])], any_order=True)
+
     def test_prepare_image(self):
         self.client._command = mock.MagicMock(spec_set=[])
         image_info = {'image_id': 'image'}
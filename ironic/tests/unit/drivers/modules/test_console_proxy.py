@@ -0,0 +1,265 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Test class for the console proxy."""
+
+import socket
+import time
+
+import eventlet
+import mock
+
+from ironic.common import exception
+from ironic.conductor import task_manager
+from ironic.drivers.modules import console_proxy
+from ironic.drivers.modules import ipmitool as ipmi
+from ironic.tests import base
+from ironic.tests.unit.conductor import mgr_utils
+from ironic.tests.unit.db import base as db_base
+from ironic.tests.unit.db import utils as db_utils
+from ironic.tests.unit.objects import utils as obj_utils
+
+NODE_UUID = '1be26c0b-03f2-4d2e-ae87-c02d7f33c123'
+
+
+def _fake_conn(data):
+    conn = mock.Mock(spec=['recv', 'sendall', 'close'])
+    chunks = [data[i:i + 1] for i in range(len(data))]
+    conn.recv.side_effect = chunks + [b''] * 10
+    return conn
+
+
+class ConsoleProxyTestCase(base.TestCase):
+
+    def setUp(self):
+        super(ConsoleProxyTestCase, self).setUp()
+        self.config(proxy_port=4200, group='console')
+        self.config(my_ip='192.0.2.1')
+        patcher = mock.patch.object(console_proxy, '_SERVER', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_get_console_url(self):
+        self.assertEqual('tcp://192.0.2.1:4200',
+                         console_proxy.get_console_url())
+
+    def test_get_console_url_ipv6(self):
+        self.config(my_ip='2001:db8::1')
+        self.assertEqual('tcp://[2001:db8::1]:4200',
+                         console_proxy.get_console_url())
+
+    @mock.patch.object(eventlet, 'spawn', autospec=True)
+    @mock.patch.object(eventlet, 'listen', autospec=True)
+    def test_ensure_started(self, mock_listen, mock_spawn):
+        console_proxy.ensure_started()
+        console_proxy.ensure_started()
+        mock_listen.assert_called_once_with(('192.0.2.1', 4200),
+                                            family=socket.AF_INET)
+        mock_spawn.assert_called_once_with(console_proxy._serve,
+                                           mock_listen.return_value)
+
+    @mock.patch.object(eventlet, 'spawn', autospec=True)
+    @mock.patch.object(eventlet, 'listen', autospec=True)
+    def test_ensure_started_fail(self, mock_listen, mock_spawn):
+        mock_listen.side_effect = socket.error('boom')
+        self.assertRaises(exception.ConsoleError,
+                          console_proxy.ensure_started)
+        self.assertFalse(mock_spawn.called)
+        self.assertIsNone(console_proxy._SERVER)
+
+    @mock.patch.object(console_proxy, '_Session', autospec=True)
+    @mock.patch.object(console_proxy, '_get_command', autospec=True)
+    def test__handle(self, mock_get_command, mock_session):
+        mock_get_command.return_value = (['ipmitool'], {})
+        conn = _fake_conn(('%s token\n' % NODE_UUID).encode())
+
+        console_proxy._handle(conn)
+
+        mock_get_command.assert_called_once_with(NODE_UUID, 'token')
+        mock_session.assert_called_once_with(NODE_UUID, ['ipmitool'], {})
+        session = mock_session.return_value
+        session.attach.assert_called_once_with(conn)
+        self.assertIs(session, console_proxy._SESSIONS[NODE_UUID])
+
+    @mock.patch.object(console_proxy, '_Session', autospec=True)
+    @mock.patch.object(console_proxy, '_get_command', autospec=True)
+    def test__handle_existing_session(self, mock_get_command, mock_session):
+        mock_get_command.return_value = (['ipmitool'], {})
+        session = mock.Mock(running=True)
+        console_proxy._SESSIONS[NODE_UUID] = session
+        conn = _fake_conn(('%s token\n' % NODE_UUID).encode())
+
+        console_proxy._handle(conn)
+
+        mock_get_command.assert_called_once_with(NODE_UUID, 'token')
+        session.attach.assert_called_once_with(conn)
+        self.assertFalse(mock_session.called)
+
+    @mock.patch.object(console_proxy, '_Session', autospec=True)
+    @mock.patch.object(console_proxy, '_get_command', autospec=True)
+    def test__handle_concurrent(self, mock_get_command, mock_session):
+        # The second client must find the session of the first one, even
+        # though getting the command of the node yields to it.
+        def get_command(node_uuid, token):
+            eventlet.sleep(0)
+            return ['ipmitool'], {}
+
+        mock_get_command.side_effect = get_command
+        mock_session.return_value.running = True
+        conns = [_fake_conn(('%s token\n' % NODE_UUID).encode())
+                 for i in range(2)]
+
+        pool = eventlet.GreenPool()
+        for conn in conns:
+            pool.spawn(console_proxy._handle, conn)
+        pool.waitall()
+
+        mock_session.assert_called_once_with(NODE_UUID, ['ipmitool'], {})
+        session = mock_session.return_value
+        session.attach.assert_has_calls([mock.call(conn) for conn in conns])
+
+    @mock.patch.object(console_proxy, '_get_command', autospec=True)
+    def test__handle_invalid_token(self, mock_get_command):
+        mock_get_command.side_effect = exception.NotAuthorized()
+        session = mock.Mock(running=True)
+        console_proxy._SESSIONS[NODE_UUID] = session
+        conn = _fake_conn(('%s abc\n' % NODE_UUID).encode())
+
+        console_proxy._handle(conn)
+
+        self.assertTrue(conn.close.called)
+        self.assertFalse(session.attach.called)
+
+    @mock.patch.object(console_proxy, '_get_command', autospec=True)
+    def test__handle_invalid_node(self, mock_get_command):
+        conn = _fake_conn(b'node token\n')
+
+        console_proxy._handle(conn)
+
+        self.assertFalse(mock_get_command.called)
+        self.assertTrue(conn.close.called)
+
+    @mock.patch.object(console_proxy, '_get_command', autospec=True)
+    def test__handle_bad_handshake(self, mock_get_command):
+        conn = _fake_conn(b'garbage')
+
+        console_proxy._handle(conn)
+
+        self.assertFalse(mock_get_command.called)
+        self.assertTrue(conn.close.called)
+
+    @mock.patch.object(console_proxy, '_get_command', autospec=True)
+    def test__handle_console_not_enabled(self, mock_get_command):
+        mock_get_command.side_effect = exception.NodeConsoleNotEnabled(
+            node=NODE_UUID)
+        conn = _fake_conn(('%s token\n' % NODE_UUID).encode())
+
+        console_proxy._handle(conn)
+
+        self.assertTrue(conn.close.called)
+        self.assertNotIn(NODE_UUID, console_proxy._SESSIONS)
+
+    def test_stop_session(self):
+        session = mock.Mock()
+        console_proxy._SESSIONS[NODE_UUID] = session
+        console_proxy.stop_session(NODE_UUID)
+        session.stop.assert_called_once_with()
+        self.assertNotIn(NODE_UUID, console_proxy._SESSIONS)
+        # Stopping again does nothing
+        console_proxy.stop_session(NODE_UUID)
+
+
+class ConsoleProxyTokenTestCase(db_base.DbTestCase):
+
+    def setUp(self):
+        super(ConsoleProxyTokenTestCase, self).setUp()
+        self.config(proxy_token_ttl=600, group='console')
+        mgr_utils.mock_the_extension_manager(driver='fake_ipmitool_socat')
+        self.node = obj_utils.create_test_node(
+            self.context, driver='fake_ipmitool_socat',
+            driver_info=db_utils.get_test_ipmi_info(),
+            console_enabled=True)
+
+    def _set_token(self, token, expires_at):
+        self.node.driver_internal_info = {
+            'console_proxy_token': token,
+            'console_proxy_token_expires_at': expires_at}
+        self.node.save()
+
+    @mock.patch.object(time, 'time', autospec=True, return_value=1000)
+    def test_issue_token(self, mock_time):
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            token = console_proxy.issue_token(task)
+            self.assertNotEqual(token, console_proxy.issue_token(task))
+        self.node.refresh()
+        info = self.node.driver_internal_info
+        self.assertNotEqual(token, info['console_proxy_token'])
+        self.assertEqual(1600, info['console_proxy_token_expires_at'])
+
+    def test_revoke_token(self):
+        self._set_token('token', time.time() + 600)
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            console_proxy.revoke_token(task)
+        self.node.refresh()
+        self.assertNotIn('console_proxy_token',
+                         self.node.driver_internal_info)
+        self.assertNotIn('console_proxy_token_expires_at',
+                         self.node.driver_internal_info)
+
+    @mock.patch.object(console_proxy, 'issue_token', autospec=True)
+    def test_get_token(self, mock_issue):
+        self._set_token('token', time.time() + 600)
+        with task_manager.acquire(self.context, self.node.uuid,
+                                  shared=True) as task:
+            self.assertEqual('token', console_proxy.get_token(task))
+            self.assertTrue(task.shared)
+        self.assertFalse(mock_issue.called)
+
+    @mock.patch.object(console_proxy, 'issue_token', autospec=True)
+    def test_get_token_expired(self, mock_issue):
+        self._set_token('token', time.time() - 1)
+        mock_issue.return_value = 'new'
+        with task_manager.acquire(self.context, self.node.uuid,
+                                  shared=True) as task:
+            self.assertEqual('new', console_proxy.get_token(task))
+            self.assertFalse(task.shared)
+            mock_issue.assert_called_once_with(task)
+
+    @mock.patch.object(ipmi.IPMISocatConsole, 'get_proxy_command',
+                       autospec=True)
+    def test__get_command(self, mock_get_proxy_command):
+        self._set_token('token', time.time() + 600)
+        mock_get_proxy_command.return_value = (['ipmitool'], {})
+        self.assertEqual((['ipmitool'], {}),
+                         console_proxy._get_command(self.node.uuid, 'token'))
+        self.assertTrue(mock_get_proxy_command.called)
+
+    def test__get_command_invalid_token(self):
+        self._set_token('token', time.time() + 600)
+        self.assertRaises(exception.NotAuthorized,
+                          console_proxy._get_command, self.node.uuid, 'abc')
+
+    def test__get_command_expired_token(self):
+        self._set_token('token', time.time() - 1)
+        self.assertRaises(exception.NotAuthorized,
+                          console_proxy._get_command, self.node.uuid, 'token')
+
+    def test__get_command_no_token(self):
+        self.assertRaises(exception.NotAuthorized,
+                          console_proxy._get_command, self.node.uuid, 'token')
+
+    def test__get_command_not_enabled(self):
+        self._set_token('token', time.time() + 600)
+        self.node.console_enabled = False
+        self.node.save()
+        self.assertRaises(exception.NodeConsoleNotEnabled,
+                          console_proxy._get_command, self.node.uuid, 'token')
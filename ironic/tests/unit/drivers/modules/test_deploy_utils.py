@@ -31,6 +31,7 @@ from ironic.common import boot_devices
 from ironic.common import dhcp_factory
 from ironic.common import exception
 from ironic.common import image_service
+from ironic.common import images
 from ironic.common import states
 from ironic.common import utils as common_utils
 from ironic.conductor import task_manager
@@ -910,6 +911,46 @@ class PhysicalWorkTestCase(tests_base.TestCase):
         self.assertEqual(disk_utils_calls_expected, disk_utils_mock.mock_calls)
         self.assertEqual('0x12345678', uuid_dict_returned['disk identifier'])
 
+    @mock.patch.object(images, 'stream_to_device', autospec=True)
+    @mock.patch.object(disk_utils, 'get_disk_identifier', autospec=True)
+    def test_stream_disk_image(self, mock_gdi, mock_stream):
+        """Check loosely all functions are called with right args."""
+        self.config(stream_block_size=2, group='iscsi')
+        address = '127.0.0.1'
+        port = 3306
+        iqn = 'iqn.xyz'
+        lun = 1
+        image_href = 'glance://image_uuid'
+        node_uuid = "12345678-1234-1234-1234-1234567890abcxyz"
+
+        dev = '/dev/fake'
+        utils_name_list = ['get_dev', 'discovery', 'login_iscsi',
+                           'logout_iscsi', 'delete_iscsi']
+        disk_utils_name_list = ['is_block_device', 'populate_image']
+
+        utils_mock = self._mock_calls(utils_name_list, utils)
+        utils_mock.get_dev.return_value = dev
+
+        disk_utils_mock = self._mock_calls(disk_utils_name_list, disk_utils)
+        disk_utils_mock.is_block_device.return_value = True
+        mock_gdi.return_value = '0x12345678'
+        mock_stream.return_value = 1024
+        utils_calls_expected = [mock.call.get_dev(address, port, iqn, lun),
+                                mock.call.discovery(address, port),
+                                mock.call.login_iscsi(address, port, iqn),
+                                mock.call.logout_iscsi(address, port, iqn),
+                                mock.call.delete_iscsi(address, port, iqn)]
+        disk_utils_calls_expected = [mock.call.is_block_device(dev)]
+
+        uuid_dict_returned = utils.stream_disk_image(
+            'context', address, port, iqn, lun, image_href, node_uuid)
+
+        self.assertEqual(utils_calls_expected, utils_mock.mock_calls)
+        self.assertEqual(disk_utils_calls_expected, disk_utils_mock.mock_calls)
+        mock_stream.assert_called_once_with('context', image_href, dev,
+                                            2 * 1024 * 1024)
+        self.assertEqual('0x12345678', uuid_dict_returned['disk identifier'])
+
     @mock.patch.object(common_utils, 'execute', autospec=True)
     def test_verify_iscsi_connection_raises(self, mock_exec):
         iqn = 'iqn.xyz'
@@ -21,10 +21,12 @@
 """Test class for IPMITool driver module."""
 
 import contextlib
+import functools
 import os
 import stat
 import subprocess
 import tempfile
+import threading
 import time
 import types
 
@@ -41,6 +43,7 @@ from ironic.common import states
 from ironic.common import utils
 from ironic.conductor import task_manager
 import ironic.conf
+from ironic.drivers.modules import console_proxy
 from ironic.drivers.modules import console_utils
 from ironic.drivers.modules import deploy_utils
 from ironic.drivers.modules import ipmitool as ipmi
@@ -55,6 +58,14 @@ CONF = ironic.conf.CONF
 
 INFO_DICT = db_utils.get_test_ipmi_info()
 
+SENSORS_DATA = """Sensor ID              : Temp (0x1)
+ Entity ID             : 3.1 (Processor)
+ Sensor Type (Analog)  : Temperature
+ Sensor Reading        : 50 (+/- 1) degrees C
+ Status                : ok
+
+"""
+
 # BRIDGE_INFO_DICT will have all the bridging parameters appended
 BRIDGE_INFO_DICT = INFO_DICT.copy()
 BRIDGE_INFO_DICT.update(db_utils.get_test_ipmi_bridging_parameters())
@@ -674,7 +685,7 @@ class IPMIToolPrivateMethodTestCase(db_base.DbTestCase):
     @mock.patch.object(utils, 'execute', autospec=True)
     def test__exec_ipmitool_first_call_to_address(self, mock_exec,
                                                   mock_support, mock_sleep):
-        ipmi.LAST_CMD_TIME = {}
+        ipmi.BMC_COMMAND_QUEUES = {}
         args = [
             'ipmitool',
             '-I', 'lanplus',
@@ -699,7 +710,7 @@ class IPMIToolPrivateMethodTestCase(db_base.DbTestCase):
     @mock.patch.object(utils, 'execute', autospec=True)
     def test__exec_ipmitool_second_call_to_address_sleep(
             self, mock_exec, mock_support, mock_sleep):
-        ipmi.LAST_CMD_TIME = {}
+        ipmi.BMC_COMMAND_QUEUES = {}
         args = [[
             'ipmitool',
             '-I', 'lanplus',
@@ -736,7 +747,7 @@ class IPMIToolPrivateMethodTestCase(db_base.DbTestCase):
     @mock.patch.object(utils, 'execute', autospec=True)
     def test__exec_ipmitool_second_call_to_address_no_sleep(
             self, mock_exec, mock_support, mock_sleep):
-        ipmi.LAST_CMD_TIME = {}
+        ipmi.BMC_COMMAND_QUEUES = {}
         args = [[
             'ipmitool',
             '-I', 'lanplus',
@@ -763,7 +774,7 @@ class IPMIToolPrivateMethodTestCase(db_base.DbTestCase):
         ipmi._exec_ipmitool(self.info, 'A B C')
         mock_exec.assert_called_with(*args[0])
         # act like enough time has passed
-        ipmi.LAST_CMD_TIME[self.info['address']] = (
+        ipmi.BMC_COMMAND_QUEUES[self.info['address']].last_cmd_time = (
             time.time() - CONF.ipmi.min_command_interval)
         ipmi._exec_ipmitool(self.info, 'D E F')
         self.assertFalse(mock_sleep.called)
@@ -775,7 +786,7 @@ class IPMIToolPrivateMethodTestCase(db_base.DbTestCase):
     @mock.patch.object(utils, 'execute', autospec=True)
     def test__exec_ipmitool_two_calls_to_diff_address(
             self, mock_exec, mock_support, mock_sleep):
-        ipmi.LAST_CMD_TIME = {}
+        ipmi.BMC_COMMAND_QUEUES = {}
         args = [[
             'ipmitool',
             '-I', 'lanplus',
@@ -1059,7 +1070,7 @@ class IPMIToolPrivateMethodTestCase(db_base.DbTestCase):
     def test__exec_ipmitool_exception_retry(
             self, mock_exec, mock_support, mock_sleep):
 
-        ipmi.LAST_CMD_TIME = {}
+        ipmi.BMC_COMMAND_QUEUES = {}
         mock_support.return_value = False
         mock_exec.side_effect = [
             processutils.ProcessExecutionError(
@@ -1083,7 +1094,7 @@ class IPMIToolPrivateMethodTestCase(db_base.DbTestCase):
     def test__exec_ipmitool_exception_retries_exceeded(
             self, mock_exec, mock_support, mock_sleep):
 
-        ipmi.LAST_CMD_TIME = {}
+        ipmi.BMC_COMMAND_QUEUES = {}
         mock_support.return_value = False
 
         mock_exec.side_effect = [processutils.ProcessExecutionError(
@@ -1106,7 +1117,7 @@ class IPMIToolPrivateMethodTestCase(db_base.DbTestCase):
     def test__exec_ipmitool_exception_non_retryable_failure(
             self, mock_exec, mock_support, mock_sleep):
 
-        ipmi.LAST_CMD_TIME = {}
+        ipmi.BMC_COMMAND_QUEUES = {}
         mock_support.return_value = False
 
         # Return a retryable error, then an error that cannot
@@ -1162,7 +1173,7 @@ class IPMIToolPrivateMethodTestCase(db_base.DbTestCase):
     def test__exec_ipmitool_with_port(self, mock_exec, mock_pass,
                                       mock_support):
         self.info['dest_port'] = '1623'
-        ipmi.LAST_CMD_TIME = {}
+        ipmi.BMC_COMMAND_QUEUES = {}
         args = [
             'ipmitool',
             '-I', 'lanplus',
@@ -1260,6 +1271,276 @@ class IPMIToolPrivateMethodTestCase(db_base.DbTestCase):
         self.assertEqual(states.ERROR, state)
 
 
+class IPMIFakeException(Exception):
+    pass
+
+
+@mock.patch.object(time, 'sleep', autospec=True)
+class IPMIToolPersistentSessionTestCase(db_base.DbTestCase):
+
+    def setUp(self):
+        super(IPMIToolPersistentSessionTestCase, self).setUp()
+        self.config(use_persistent_sessions=True, group='ipmi')
+        self.node = obj_utils.get_test_node(
+            self.context,
+            driver='fake_ipmitool',
+            driver_info=INFO_DICT)
+        self.info = ipmi._parse_driver_info(self.node)
+        patchers = [mock.patch.object(ipmi, 'pyghmi', create=True),
+                    mock.patch.object(ipmi, 'pyghmi_exception', create=True),
+                    mock.patch.object(ipmi, 'ipmi_command', create=True)]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        ipmi.pyghmi_exception.IpmiException = IPMIFakeException
+        self.mock_command = ipmi.ipmi_command.Command
+        self.mock_raw = self.mock_command.return_value.raw_command
+        self.mock_raw.return_value = {'netfn': 1, 'command': 1, 'code': 0,
+                                      'data': [0x01, 0x00, 0x00, 0x00]}
+        ipmi.IPMI_SESSIONS.clear()
+        self.addCleanup(ipmi.IPMI_SESSIONS.clear)
+
+    @mock.patch.object(ipmi, '_check_option_support', autospec=True)
+    @mock.patch.object(ipmi, '_check_temp_dir', autospec=True)
+    def test_init_without_pyghmi(self, mock_temp_dir, mock_support,
+                                 mock_sleep):
+        ipmi.pyghmi = None
+        self.assertRaises(exception.DriverLoadError, ipmi.IPMIPower)
+        self.assertRaises(exception.DriverLoadError, ipmi.IPMIManagement)
+
+    def test__parse_session_command(self, mock_sleep):
+        self.assertEqual((0x00, 0x01, []),
+                         ipmi._parse_session_command('power status'))
+        self.assertEqual((0x00, 0x02, [0x05]),
+                         ipmi._parse_session_command('power soft'))
+        self.assertEqual((0x00, 0x08, [0x05, 0xe0, 0x04]),
+                         ipmi._parse_session_command('raw 0x00 0x08 0x05 '
+                                                     '0xe0 0x04'))
+        self.assertIsNone(ipmi._parse_session_command('raw 0x00 foo'))
+        self.assertIsNone(ipmi._parse_session_command('power diag'))
+        self.assertIsNone(ipmi._parse_session_command('chassis bootdev pxe'))
+
+    @mock.patch.object(utils, 'execute', autospec=True)
+    def test__exec_ipmitool_power_status(self, mock_exec, mock_sleep):
+        for i in range(2):
+            self.assertEqual(('Chassis Power is on\n', ''),
+                             ipmi._exec_ipmitool(self.info, 'power status'))
+        # the session is established once and reused
+        self.mock_command.assert_called_once_with(
+            bmc=self.info['address'], userid=self.info['username'],
+            password=self.info['password'], port=623)
+        self.mock_raw.assert_called_with(netfn=0x00, command=0x01, data=[])
+        self.assertEqual(2, self.mock_raw.call_count)
+        self.assertFalse(mock_exec.called)
+
+    @mock.patch.object(utils, 'execute', autospec=True)
+    def test__exec_ipmitool_power_off(self, mock_exec, mock_sleep):
+        self.mock_raw.return_value = {'netfn': 1, 'command': 2, 'code': 0,
+                                      'data': []}
+        self.assertEqual(('Chassis Power Control: Down/Off\n', ''),
+                         ipmi._exec_ipmitool(self.info, 'power off'))
+        self.mock_raw.assert_called_once_with(netfn=0x00, command=0x02,
+                                              data=[0x00])
+        self.assertFalse(mock_exec.called)
+
+    def test__exec_ipmitool_raw(self, mock_sleep):
+        self.mock_raw.return_value = {'netfn': 7, 'command': 1, 'code': 0,
+                                      'data': list(range(18))}
+        out, err = ipmi._exec_ipmitool(self.info, 'raw 0x06 0x01')
+        self.assertEqual(' 00 01 02 03 04 05 06 07 08 09 0a 0b 0c 0d 0e 0f\n'
+                         ' 10 11\n', out)
+        self.mock_raw.assert_called_once_with(netfn=0x06, command=0x01,
+                                              data=[])
+
+    @mock.patch.object(ipmi, '_is_option_supported', autospec=True)
+    @mock.patch.object(utils, 'execute', autospec=True)
+    def test__exec_ipmitool_unsupported(self, mock_exec, mock_support,
+                                        mock_sleep):
+        mock_support.return_value = False
+        mock_exec.return_value = ('out', 'err')
+        self.assertEqual(('out', 'err'),
+                         ipmi._exec_ipmitool(self.info, 'chassis bootdev pxe'))
+        self.assertTrue(mock_exec.called)
+        self.assertFalse(self.mock_command.called)
+
+    @mock.patch.object(ipmi, '_is_option_supported', autospec=True)
+    @mock.patch.object(utils, 'execute', autospec=True)
+    def test__exec_ipmitool_bridging(self, mock_exec, mock_support,
+                                     mock_sleep):
+        mock_support.return_value = True
+        mock_exec.return_value = ('Chassis Power is on\n', '')
+        node = obj_utils.get_test_node(self.context,
+                                       driver_info=BRIDGE_INFO_DICT)
+        info = ipmi._parse_driver_info(node)
+        ipmi._exec_ipmitool(info, 'power status')
+        self.assertTrue(mock_exec.called)
+        self.assertFalse(self.mock_command.called)
+
+    @mock.patch.object(ipmi, '_is_option_supported', autospec=True)
+    @mock.patch.object(utils, 'execute', autospec=True)
+    def test__exec_ipmitool_disabled(self, mock_exec, mock_support,
+                                     mock_sleep):
+        self.config(use_persistent_sessions=False, group='ipmi')
+        mock_support.return_value = False
+        mock_exec.return_value = ('Chassis Power is on\n', '')
+        ipmi._exec_ipmitool(self.info, 'power status')
+        self.assertTrue(mock_exec.called)
+        self.assertFalse(self.mock_command.called)
+
+    def test__exec_ipmitool_session_failure(self, mock_sleep):
+        ipmi._exec_ipmitool(self.info, 'power status')
+        self.mock_raw.side_effect = IPMIFakeException('timeout')
+        self.assertRaises(processutils.ProcessExecutionError,
+                          ipmi._exec_ipmitool, self.info, 'power status')
+        self.assertEqual({}, ipmi.IPMI_SESSIONS)
+        # a new session is established for the next command
+        self.mock_raw.side_effect = None
+        ipmi._exec_ipmitool(self.info, 'power status')
+        self.assertEqual(2, self.mock_command.call_count)
+
+    def test__exec_ipmitool_completion_code_error(self, mock_sleep):
+        self.mock_raw.return_value = {'netfn': 1, 'command': 2, 'code': 0xc1,
+                                      'error': 'Invalid command'}
+        self.assertRaises(processutils.ProcessExecutionError,
+                          ipmi._exec_ipmitool, self.info, 'power on')
+        self.assertEqual(1, len(ipmi.IPMI_SESSIONS))
+
+    def test__exec_ipmitool_min_command_interval(self, mock_sleep):
+        self.config(min_command_interval=5, group='ipmi')
+        ipmi._get_command_queue(self.info).last_cmd_time = time.time()
+        ipmi._exec_ipmitool(self.info, 'power status')
+        self.assertTrue(mock_sleep.called)
+
+
+class _WaitCountingCondition(object):
+    """A threading.Condition counting the waiting threads."""
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.waits = 0
+
+    def __enter__(self):
+        return self.cond.__enter__()
+
+    def __exit__(self, *args):
+        return self.cond.__exit__(*args)
+
+    def wait(self):
+        self.waits += 1
+        self.cond.wait()
+
+    def notify_all(self):
+        self.cond.notify_all()
+
+
+class BMCCommandQueueTestCase(base.TestCase):
+
+    def setUp(self):
+        super(BMCCommandQueueTestCase, self).setUp()
+        self.queue = ipmi.BMCCommandQueue()
+        self.queue._cond = _WaitCountingCondition()
+        self.release = threading.Event()
+        self.sent = []
+        self.results = {}
+
+    def _command(self, name, result=None, error=None):
+        def func():
+            self.sent.append(name)
+            if name == 'first':
+                # keep the BMC busy until the other commands are queued
+                self.release.wait(10)
+            if error is not None:
+                raise error
+            return result
+        return func
+
+    def _execute(self, name, func, read_key=None):
+        def run():
+            try:
+                self.results[name] = self.queue.execute(func,
+                                                        read_key=read_key)
+            except Exception as e:
+                self.results[name] = e
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread
+
+    def _wait_for_waits(self, count):
+        for i in range(1000):
+            if self.queue._cond.waits >= count:
+                return
+            time.sleep(0.01)
+        self.fail('Commands were not queued')
+
+    def test_execute(self):
+        self.assertEqual('out', self.queue.execute(lambda: 'out'))
+        self.assertEqual('out', self.queue.execute(lambda: 'out',
+                                                   read_key='key'))
+        self.assertEqual({}, self.queue._reads)
+
+    def test_execute_coalesce_reads(self):
+        threads = [self._execute('first', self._command('first', 'on'),
+                                 read_key='power status')]
+        threads.append(self._execute('second', self._command('second'),
+                                     read_key='power status'))
+        self._wait_for_waits(1)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(['first'], self.sent)
+        self.assertEqual({'first': 'on', 'second': 'on'}, self.results)
+
+    def test_execute_coalesce_reads_error(self):
+        error = processutils.ProcessExecutionError()
+        threads = [self._execute('first',
+                                 self._command('first', error=error),
+                                 read_key='power status')]
+        threads.append(self._execute('second', self._command('second'),
+                                     read_key='power status'))
+        self._wait_for_waits(1)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(['first'], self.sent)
+        self.assertEqual({'first': error, 'second': error}, self.results)
+
+    def test_execute_writes_first(self):
+        threads = [self._execute('first', self._command('first'))]
+        threads.append(self._execute('read', self._command('read'),
+                                     read_key='sdr -v'))
+        self._wait_for_waits(1)
+        threads.append(self._execute('write', self._command('write')))
+        self._wait_for_waits(2)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(['first', 'write', 'read'], self.sent)
+        self.assertEqual({}, self.queue._reads)
+
+    @mock.patch.object(time, 'sleep', autospec=True)
+    def test_wait_for_interval(self, mock_sleep):
+        self.config(min_command_interval=5, group='ipmi')
+        self.queue.wait_for_interval()
+        self.assertFalse(mock_sleep.called)
+        self.queue.last_cmd_time = time.time()
+        self.queue.wait_for_interval()
+        self.assertTrue(mock_sleep.called)
+
+    def test__get_read_key(self):
+        info = {param: None for param in ipmi._REQUEST_TARGET_PARAMS}
+        self.assertIsNotNone(ipmi._get_read_key(info, 'power status', None))
+        self.assertIsNotNone(ipmi._get_read_key(
+            info, 'chassis bootparam get 5', None))
+        self.assertIsNotNone(ipmi._get_read_key(
+            info, '-S /tmp/node.sdr sdr -v', None))
+        self.assertIsNone(ipmi._get_read_key(info, 'power on', None))
+        self.assertIsNone(ipmi._get_read_key(info, 'power status', [0, 1]))
+        other_info = dict(info, target_address='0x20')
+        self.assertNotEqual(
+            ipmi._get_read_key(info, 'power status', None),
+            ipmi._get_read_key(other_info, 'power status', None))
+
+
 class IPMIToolDriverTestCase(db_base.DbTestCase):
 
     def setUp(self, terminal=None):
@@ -2131,6 +2412,120 @@ class IPMIToolDriverTestCase(db_base.DbTestCase):
                               'foo_file')
         mock_exec.assert_called_once_with(self.info, 'sdr dump foo_file')
 
+    def _fake_sdr_exec(self, driver_info, command, sdr_info=' 51 3e\n',
+                       sensors_error=None):
+        if command == ipmi.SDR_REPOSITORY_INFO_COMMAND:
+            return sdr_info, ''
+        if command.startswith('sdr dump '):
+            with open(command.split()[2], 'w') as f:
+                f.write('sdr')
+            return '', ''
+        if command.startswith('-S ') and sensors_error is not None:
+            raise sensors_error
+        return SENSORS_DATA, ''
+
+    def _sdr_cache_dir(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(utils.rmtree_without_raise, cache_dir)
+        self.config(sdr_cache_dir=cache_dir, group='ipmi')
+        return cache_dir
+
+    @mock.patch.object(ipmi, '_exec_ipmitool', autospec=True)
+    def test_get_sensors_data_sdr_cache(self, mock_exec):
+        cache_dir = self._sdr_cache_dir()
+        mock_exec.side_effect = self._fake_sdr_exec
+        sdr_file = os.path.join(cache_dir, '%s-513e.sdr' % self.node.uuid)
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            for i in range(2):
+                ret = task.driver.management.get_sensors_data(task)
+                self.assertEqual(['Temp (0x1)'],
+                                 list(ret['Temperature']))
+
+        # the SDR is dumped once, then read from the cache without checking
+        # the SDR repository again
+        mock_exec.assert_has_calls([
+            mock.call(self.info, ipmi.SDR_REPOSITORY_INFO_COMMAND),
+            mock.call(self.info, 'sdr dump %s.part' % sdr_file),
+            mock.call(self.info, '-S %s sdr -v' % sdr_file),
+            mock.call(self.info, '-S %s sdr -v' % sdr_file)])
+        self.assertEqual(4, mock_exec.call_count)
+        self.assertEqual([os.path.basename(sdr_file)], os.listdir(cache_dir))
+
+    @mock.patch.object(ipmi, '_exec_ipmitool', autospec=True)
+    def test_get_sensors_data_sdr_cache_check_interval(self, mock_exec):
+        self.config(sdr_cache_check_interval=0, group='ipmi')
+        cache_dir = self._sdr_cache_dir()
+        mock_exec.side_effect = self._fake_sdr_exec
+        sdr_file = os.path.join(cache_dir, '%s-513e.sdr' % self.node.uuid)
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            for i in range(2):
+                task.driver.management.get_sensors_data(task)
+
+        mock_exec.assert_has_calls([
+            mock.call(self.info, ipmi.SDR_REPOSITORY_INFO_COMMAND),
+            mock.call(self.info, 'sdr dump %s.part' % sdr_file),
+            mock.call(self.info, '-S %s sdr -v' % sdr_file),
+            mock.call(self.info, ipmi.SDR_REPOSITORY_INFO_COMMAND),
+            mock.call(self.info, '-S %s sdr -v' % sdr_file)])
+        self.assertEqual(5, mock_exec.call_count)
+
+    @mock.patch.object(ipmi, '_exec_ipmitool', autospec=True)
+    def test_get_sensors_data_sdr_cache_pruned(self, mock_exec):
+        cache_dir = self._sdr_cache_dir()
+        deleted_file = os.path.join(cache_dir, 'deleted-uuid-513e.sdr')
+        open(deleted_file, 'w').close()
+        old = time.time() - 2 * ipmi._SDR_CACHE_MAX_UNUSED
+        os.utime(deleted_file, (old, old))
+        ipmi.SDR_REPOSITORY_KEYS['deleted-uuid'] = ('address', '513e', old)
+        mock_exec.side_effect = self._fake_sdr_exec
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            task.driver.management.get_sensors_data(task)
+        self.assertEqual(['%s-513e.sdr' % self.node.uuid],
+                         os.listdir(cache_dir))
+        self.assertEqual([self.node.uuid], list(ipmi.SDR_REPOSITORY_KEYS))
+
+    @mock.patch.object(ipmi, '_exec_ipmitool', autospec=True)
+    def test_get_sensors_data_sdr_changed(self, mock_exec):
+        cache_dir = self._sdr_cache_dir()
+        old_file = os.path.join(cache_dir, '%s-513d.sdr' % self.node.uuid)
+        open(old_file, 'w').close()
+        mock_exec.side_effect = self._fake_sdr_exec
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            task.driver.management.get_sensors_data(task)
+        self.assertEqual(['%s-513e.sdr' % self.node.uuid],
+                         os.listdir(cache_dir))
+
+    @mock.patch.object(ipmi, '_exec_ipmitool', autospec=True)
+    def test_get_sensors_data_sdr_cache_disabled(self, mock_exec):
+        self.config(sdr_cache_enabled=False, group='ipmi')
+        mock_exec.return_value = (SENSORS_DATA, '')
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            task.driver.management.get_sensors_data(task)
+        mock_exec.assert_called_once_with(self.info, 'sdr -v')
+
+    @mock.patch.object(ipmi, '_exec_ipmitool', autospec=True)
+    def test_get_sensors_data_sdr_info_unsupported(self, mock_exec):
+        self._sdr_cache_dir()
+        mock_exec.side_effect = [processutils.ProcessExecutionError(),
+                                 (SENSORS_DATA, '')]
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            task.driver.management.get_sensors_data(task)
+        mock_exec.assert_called_with(self.info, 'sdr -v')
+        self.assertEqual(2, mock_exec.call_count)
+
+    @mock.patch.object(ipmi, '_exec_ipmitool', autospec=True)
+    def test_get_sensors_data_sdr_cache_invalid(self, mock_exec):
+        cache_dir = self._sdr_cache_dir()
+        mock_exec.side_effect = functools.partial(
+            self._fake_sdr_exec,
+            sensors_error=processutils.ProcessExecutionError())
+        with task_manager.acquire(self.context, self.node.uuid) as task:
+            ret = task.driver.management.get_sensors_data(task)
+        self.assertIn('Temperature', ret)
+        mock_exec.assert_called_with(self.info, 'sdr -v')
+        self.assertEqual([], os.listdir(cache_dir))
+        self.assertNotIn(self.node.uuid, ipmi.SDR_REPOSITORY_KEYS)
+
     @mock.patch.object(ipmi, '_exec_ipmitool', autospec=True)
     def test_send_raw_bytes_returns(self, mock_exec):
         fake_ret = ('foo', 'bar')
@@ -2291,3 +2686,77 @@ class IPMIToolSocatDriverTestCase(IPMIToolDriverTestCase):
 
         self.assertEqual(expected, console_info)
         mock_get_url.assert_called_once_with(self.info['port'])
+
+    def test_console_validate_proxy_no_terminal_port(self):
+        self.config(proxy_port=4200, group='console')
+        with task_manager.acquire(
+                self.context, self.node.uuid, shared=True) as task:
+            task.node.driver_info.pop('ipmi_terminal_port', None)
+            task.driver.console.validate(task)
+
+    @mock.patch.object(console_proxy, 'issue_token', autospec=True)
+    @mock.patch.object(console_proxy, 'ensure_started', autospec=True)
+    @mock.patch.object(ipmi.IPMIConsole, '_start_console', autospec=True)
+    @mock.patch.object(ipmi.IPMISocatConsole, '_exec_stop_console',
+                       autospec=True)
+    def test_start_console_proxy(self, mock_stop, mock_start,
+                                 mock_ensure_started, mock_issue):
+        self.config(proxy_port=4200, group='console')
+        with task_manager.acquire(self.context,
+                                  self.node.uuid) as task:
+            self.driver.console.start_console(task)
+            driver_info = ipmi._parse_driver_info(task.node)
+            mock_issue.assert_called_once_with(task)
+        mock_stop.assert_called_once_with(self.driver.console, driver_info)
+        mock_ensure_started.assert_called_once_with()
+        self.assertFalse(mock_start.called)
+
+    @mock.patch.object(console_proxy, 'revoke_token', autospec=True)
+    @mock.patch.object(console_proxy, 'stop_session', autospec=True)
+    @mock.patch.object(ipmi.IPMISocatConsole, '_exec_stop_console',
+                       autospec=True)
+    @mock.patch.object(console_utils, 'stop_socat_console',
+                       autospec=True)
+    def test_stop_console_proxy(self, mock_stop, mock_exec_stop,
+                                mock_stop_session, mock_revoke):
+        self.config(proxy_port=4200, group='console')
+        with task_manager.acquire(self.context,
+                                  self.node.uuid) as task:
+            driver_info = ipmi._parse_driver_info(task.node)
+            self.driver.console.stop_console(task)
+            mock_revoke.assert_called_once_with(task)
+
+        mock_stop_session.assert_called_once_with(self.node.uuid)
+        mock_exec_stop.assert_called_once_with(self.driver.console,
+                                               driver_info)
+        self.assertFalse(mock_stop.called)
+
+    @mock.patch.object(console_proxy, 'get_token', autospec=True)
+    @mock.patch.object(console_proxy, 'ensure_started', autospec=True)
+    def test_get_console_proxy(self, mock_ensure_started, mock_get_token):
+        self.config(my_ip='192.0.2.1')
+        self.config(proxy_port=4200, group='console')
+        mock_get_token.return_value = 'token'
+        with task_manager.acquire(self.context,
+                                  self.node.uuid) as task:
+            console_info = self.driver.console.get_console(task)
+            mock_get_token.assert_called_once_with(task)
+
+        expected = {'type': 'socat',
+                    'url': 'tcp://192.0.2.1:4200',
+                    'node': self.node.uuid,
+                    'token': 'token'}
+        self.assertEqual(expected, console_info)
+        mock_ensure_started.assert_called_once_with()
+
+    @mock.patch.dict(os.environ, {}, clear=True)
+    def test_get_proxy_command(self):
+        with task_manager.acquire(self.context,
+                                  self.node.uuid) as task:
+            args, env = self.driver.console.get_proxy_command(task)
+
+        self.assertEqual(['ipmitool', '-H', self.info['address'],
+                          '-I', 'lanplus', '-L', 'ADMINISTRATOR',
+                          '-U', self.info['username'], '-E',
+                          'sol', 'activate'], args)
+        self.assertEqual({'IPMI_PASSWORD': self.info['password']}, env)
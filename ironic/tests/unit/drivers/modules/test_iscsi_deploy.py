@@ -27,6 +27,7 @@ from oslo_utils import fileutils
 from ironic.common import dhcp_factory
 from ironic.common import driver_factory
 from ironic.common import exception
+from ironic.common import images
 from ironic.common import pxe_utils
 from ironic.common import states
 from ironic.common import utils
@@ -115,6 +116,22 @@ class IscsiDeployMethodsTestCase(db_base.DbTestCase):
             get_image_mb_mock.assert_called_once_with(
                 iscsi_deploy._get_image_file_path(task.node.uuid))
 
+    @mock.patch.object(images, 'download_size', autospec=True)
+    @mock.patch.object(disk_utils, 'get_image_mb', autospec=True)
+    def test_check_image_size_stream_image(self, get_image_mb_mock,
+                                           download_size_mock):
+        download_size_mock.return_value = 1025 * 1024 * 1024
+        with task_manager.acquire(self.context, self.node.uuid,
+                                  shared=False) as task:
+            task.node.instance_info['root_gb'] = 1
+            task.node.driver_internal_info['stream_instance_image'] = True
+            self.assertRaises(exception.InstanceDeployFailure,
+                              iscsi_deploy.check_image_size,
+                              task)
+            download_size_mock.assert_called_once_with(
+                task.context, 'glance://image_uuid')
+            self.assertFalse(get_image_mb_mock.called)
+
     @mock.patch.object(disk_utils, 'get_image_mb', autospec=True)
     def test_check_image_size_fails(self, get_image_mb_mock):
         get_image_mb_mock.return_value = 1025
@@ -345,6 +362,97 @@ class IscsiDeployMethodsTestCase(db_base.DbTestCase):
             mock_image_cache.return_value.clean_up.assert_called_once_with()
             self.assertEqual(uuid_dict_returned, retval)
 
+    @mock.patch.object(iscsi_deploy, 'LOG', autospec=True)
+    @mock.patch.object(iscsi_deploy, 'get_deploy_info', autospec=True)
+    @mock.patch.object(iscsi_deploy, 'InstanceImageCache', autospec=True)
+    @mock.patch.object(deploy_utils, 'deploy_disk_image', autospec=True)
+    @mock.patch.object(deploy_utils, 'stream_disk_image', autospec=True)
+    def test_continue_deploy_stream_image(
+            self, stream_mock, deploy_mock, mock_image_cache,
+            mock_deploy_info, mock_log):
+        kwargs = {'address': '123456', 'iqn': 'aaa-bbb'}
+        self.node.provision_state = states.DEPLOYWAIT
+        self.node.target_provision_state = states.ACTIVE
+        self.node.save()
+
+        mock_deploy_info.return_value = {
+            'address': '123456',
+            'image_path': (u'/var/lib/ironic/images/1be26c0b-03f2-4d2e-ae87-'
+                           u'c02d7f33c123/disk'),
+            'iqn': 'aaa-bbb',
+            'lun': '1',
+            'node_uuid': u'1be26c0b-03f2-4d2e-ae87-c02d7f33c123',
+            'port': '3260',
+        }
+        uuid_dict_returned = {'disk identifier': '87654321'}
+        stream_mock.return_value = uuid_dict_returned
+        with task_manager.acquire(self.context, self.node.uuid,
+                                  shared=False) as task:
+            task.node.driver_internal_info['is_whole_disk_image'] = True
+            task.node.driver_internal_info['stream_instance_image'] = True
+            retval = iscsi_deploy.continue_deploy(task, **kwargs)
+            self.assertEqual(uuid_dict_returned, retval)
+            stream_mock.assert_called_once_with(
+                task.context, image_href='glance://image_uuid',
+                address='123456', iqn='aaa-bbb', lun='1', port='3260',
+                node_uuid=u'1be26c0b-03f2-4d2e-ae87-c02d7f33c123')
+            self.assertFalse(deploy_mock.called)
+            mock_image_cache.return_value.clean_up.assert_called_once_with()
+
+    def _test_can_stream_image(self, expected, image_source=None,
+                               whole_disk=True, image_disk_format=None):
+        self.config(stream_raw_images=True, group='iscsi')
+        with task_manager.acquire(self.context, self.node.uuid,
+                                  shared=False) as task:
+            if image_source:
+                task.node.instance_info['image_source'] = image_source
+            if image_disk_format:
+                task.node.instance_info['image_disk_format'] = (
+                    image_disk_format)
+            task.node.driver_internal_info['is_whole_disk_image'] = (
+                whole_disk)
+            self.assertEqual(expected, iscsi_deploy._can_stream_image(task))
+
+    @mock.patch.object(images, 'image_show', autospec=True)
+    def test__can_stream_image_glance_raw(self, image_show_mock):
+        image_show_mock.return_value = {'disk_format': 'raw'}
+        self._test_can_stream_image(True)
+        image_show_mock.assert_called_once_with(mock.ANY,
+                                                'glance://image_uuid')
+
+    @mock.patch.object(images, 'image_show', autospec=True)
+    def test__can_stream_image_glance_qcow2(self, image_show_mock):
+        image_show_mock.return_value = {'disk_format': 'qcow2'}
+        self._test_can_stream_image(False)
+
+    @mock.patch.object(images, 'image_show', autospec=True)
+    def test__can_stream_image_disabled(self, image_show_mock):
+        self.config(stream_raw_images=False, group='iscsi')
+        with task_manager.acquire(self.context, self.node.uuid,
+                                  shared=False) as task:
+            task.node.driver_internal_info['is_whole_disk_image'] = True
+            self.assertFalse(iscsi_deploy._can_stream_image(task))
+        self.assertFalse(image_show_mock.called)
+
+    @mock.patch.object(images, 'image_show', autospec=True)
+    def test__can_stream_image_partition_image(self, image_show_mock):
+        self._test_can_stream_image(False, whole_disk=False)
+        self.assertFalse(image_show_mock.called)
+
+    def test__can_stream_image_http_raw(self):
+        self._test_can_stream_image(True,
+                                    image_source='http://host/image.raw',
+                                    image_disk_format='raw')
+
+    def test__can_stream_image_http_unknown_format(self):
+        self._test_can_stream_image(False,
+                                    image_source='http://host/image.raw')
+
+    def test__can_stream_image_file(self):
+        self._test_can_stream_image(False,
+                                    image_source='file:///images/image.raw',
+                                    image_disk_format='raw')
+
     def _test_get_deploy_info(self, extra_instance_info=None):
         if extra_instance_info is None:
             extra_instance_info = {}
@@ -583,6 +691,25 @@ class ISCSIDeployTestCase(db_base.DbTestCase):
             mock_check_image_size.assert_called_once_with(task)
             mock_node_power_action.assert_called_once_with(task, states.REBOOT)
 
+    @mock.patch.object(manager_utils, 'node_power_action', autospec=True)
+    @mock.patch.object(iscsi_deploy, 'check_image_size', autospec=True)
+    @mock.patch.object(iscsi_deploy, 'cache_instance_image', autospec=True)
+    @mock.patch.object(iscsi_deploy, '_can_stream_image', autospec=True)
+    def test_deploy_stream_image(self, mock_can_stream,
+                                 mock_cache_instance_image,
+                                 mock_check_image_size,
+                                 mock_node_power_action):
+        mock_can_stream.return_value = True
+        with task_manager.acquire(self.context,
+                                  self.node.uuid, shared=False) as task:
+            state = task.driver.deploy.deploy(task)
+            self.assertEqual(state, states.DEPLOYWAIT)
+            self.assertFalse(mock_cache_instance_image.called)
+            self.assertTrue(
+                task.node.driver_internal_info['stream_instance_image'])
+            mock_check_image_size.assert_called_once_with(task)
+            mock_node_power_action.assert_called_once_with(task, states.REBOOT)
+
     @mock.patch('ironic.drivers.modules.network.flat.FlatNetwork.'
                 'unconfigure_tenant_networks', autospec=True)
     @mock.patch.object(manager_utils, 'node_power_action', autospec=True)
@@ -20,6 +20,7 @@ import time
 
 import mock
 from oslo_config import cfg
+from oslo_utils import uuidutils
 from pysnmp.entity.rfc3413.oneliner import cmdgen
 from pysnmp import error as snmp_error
 
@@ -196,6 +197,53 @@ class SNMPClientTestCase(base.TestCase):
         mock_cmdgenerator.setCmd.assert_called_once_with(mock.ANY, mock.ANY,
                                                          var_bind)
 
+    @mock.patch.object(snmp.SNMPClient, '_get_transport', autospec=True)
+    @mock.patch.object(snmp.SNMPClient, '_get_auth', autospec=True)
+    def test_get_table_bulk(self, mock_auth, mock_transport, mock_cmdgen):
+        mock_cmdgenerator = mock_cmdgen.return_value
+        mock_cmdgenerator.bulkCmd.return_value = (
+            "", None, 0, [[((1, 2, 1), 1)], [((1, 2, 2), 2)],
+                          [((1, 3, 1), 3)]])
+        client = snmp.SNMPClient(self.address, self.port, snmp.SNMP_V2C)
+        table = client.get_table((1, 2))
+        self.assertEqual({(1, 2, 1): 1, (1, 2, 2): 2}, table)
+        mock_cmdgenerator.bulkCmd.assert_called_once_with(
+            mock.ANY, mock.ANY, 0, snmp.SNMP_BULK_MAX_REPETITIONS, (1, 2))
+        self.assertFalse(mock_cmdgenerator.nextCmd.called)
+
+    @mock.patch.object(snmp.SNMPClient, '_get_transport', autospec=True)
+    @mock.patch.object(snmp.SNMPClient, '_get_auth', autospec=True)
+    def test_get_table_v1(self, mock_auth, mock_transport, mock_cmdgen):
+        mock_cmdgenerator = mock_cmdgen.return_value
+        mock_cmdgenerator.nextCmd.return_value = (
+            "", None, 0, [[((1, 2, 1), 1)], [((1, 2, 2), 2)]])
+        client = snmp.SNMPClient(self.address, self.port, snmp.SNMP_V1)
+        table = client.get_table((1, 2))
+        self.assertEqual({(1, 2, 1): 1, (1, 2, 2): 2}, table)
+        mock_cmdgenerator.nextCmd.assert_called_once_with(mock.ANY, mock.ANY,
+                                                          (1, 2))
+        self.assertFalse(mock_cmdgenerator.bulkCmd.called)
+
+    @mock.patch.object(snmp.SNMPClient, '_get_transport', autospec=True)
+    @mock.patch.object(snmp.SNMPClient, '_get_auth', autospec=True)
+    def test_get_table_err_engine(self, mock_auth, mock_transport,
+                                  mock_cmdgen):
+        mock_cmdgenerator = mock_cmdgen.return_value
+        mock_cmdgenerator.bulkCmd.return_value = ("engine error", None, 0,
+                                                  [])
+        client = snmp.SNMPClient(self.address, self.port, snmp.SNMP_V3)
+        self.assertRaises(exception.SNMPFailure, client.get_table, (1, 2))
+
+    @mock.patch.object(snmp.SNMPClient, '_get_transport', autospec=True)
+    @mock.patch.object(snmp.SNMPClient, '_get_auth', autospec=True)
+    def test_get_table_err_transport(self, mock_auth, mock_transport,
+                                     mock_cmdgen):
+        mock_transport.side_effect = snmp_error.PySnmpError
+        mock_cmdgenerator = mock_cmdgen.return_value
+        client = snmp.SNMPClient(self.address, self.port, snmp.SNMP_V2C)
+        self.assertRaises(exception.SNMPFailure, client.get_table, (1, 2))
+        self.assertFalse(mock_cmdgenerator.bulkCmd.called)
+
 
 class SNMPValidateParametersTestCase(db_base.DbTestCase):
 
@@ -415,6 +463,8 @@ class SNMPDeviceDriverTestCase(db_base.DbTestCase):
 
     def setUp(self):
         super(SNMPDeviceDriverTestCase, self).setUp()
+        # These tests cover reading the power state of a single outlet.
+        self.config(power_state_cache_ttl=0, group='snmp')
         self.node = obj_utils.get_test_node(
             self.context,
             driver='fake_snmp',
@@ -1312,3 +1362,153 @@ class SNMPDriverTestCase(db_base.DbTestCase):
             self.assertRaises(exception.PowerStateFailure,
                               task.driver.power.reboot, task)
         mock_driver.power_reset.assert_called_once_with()
+
+
+class FakePDUAgent(object):
+    """SNMP agent of a PDU answering the requests from an in-memory MIB.
+
+    Stands in for the command generator of pysnmp talking to a simulated PDU,
+    in the way of snmpsim, and records the requests it receives.
+    """
+
+    def __init__(self, mib):
+        self.mib = dict(mib)
+        self.requests = []
+
+    def _rows(self, oid, overshoot):
+        names = sorted(name for name in self.mib if name > oid)
+        rows = []
+        for name in names:
+            if name[:len(oid)] != oid:
+                # GETBULK responses may contain objects past the column.
+                if overshoot:
+                    rows.append([(name, self.mib[name])])
+                break
+            rows.append([(name, self.mib[name])])
+        return rows
+
+    def getCmd(self, auth, transport, oid):
+        self.requests.append(('GET', oid))
+        if oid not in self.mib:
+            return ("noSuchName", 0, 0, [])
+        return (None, 0, 0, [(oid, self.mib[oid])])
+
+    def nextCmd(self, auth, transport, oid):
+        self.requests.append(('GET_NEXT', oid))
+        return (None, 0, 0, self._rows(oid, overshoot=False))
+
+    def bulkCmd(self, auth, transport, non_repeaters, max_repetitions, oid):
+        self.requests.append(('GET_BULK', oid))
+        return (None, 0, 0, self._rows(oid, overshoot=True))
+
+    def setCmd(self, auth, transport, var_bind):
+        oid, value = var_bind
+        self.requests.append(('SET', oid))
+        self.mib[oid] = value
+        return (None, 0, 0, [var_bind])
+
+
+class SNMPOutletStatesTestCase(db_base.DbTestCase):
+    """Tests for the power state snapshots shared by the nodes of a PDU."""
+
+    def setUp(self):
+        super(SNMPOutletStatesTestCase, self).setUp()
+        mgr_utils.mock_the_extension_manager(driver='fake_snmp')
+        snmp._SNMP_CLIENTS.clear()
+        snmp._OUTLET_STATES.clear()
+        self.addCleanup(snmp._SNMP_CLIENTS.clear)
+        self.addCleanup(snmp._OUTLET_STATES.clear)
+
+        # APC MasterSwitch: 1=On, 2=Off. The next column is part of the MIB
+        # to check that the snapshot stops at the end of the table.
+        self.table_oid = (1, 3, 6, 1, 4, 1) + (
+            snmp.SNMPDriverAPCMasterSwitch.oid_device)
+        self.mib = {self.table_oid + (1,): 1,
+                    self.table_oid + (2,): 2,
+                    self.table_oid + (3,): 1,
+                    self.table_oid[:-1] + (4, 1): 42}
+        self.agent = FakePDUAgent(self.mib)
+        patcher = mock.patch.object(cmdgen, 'CommandGenerator',
+                                    autospec=True,
+                                    return_value=self.agent)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.nodes = [
+            obj_utils.create_test_node(
+                self.context, uuid=uuidutils.generate_uuid(),
+                driver='fake_snmp',
+                driver_info=db_utils.get_test_snmp_info(
+                    snmp_driver='apc', snmp_version='2c',
+                    snmp_outlet=str(outlet)))
+            for outlet in (1, 2, 3)]
+
+    def _get_power_states(self):
+        result = []
+        for node in self.nodes:
+            with task_manager.acquire(self.context, node.uuid,
+                                      shared=True) as task:
+                result.append(task.driver.power.get_power_state(task))
+        return result
+
+    def test_get_power_state(self):
+        self.assertEqual([states.POWER_ON, states.POWER_OFF, states.POWER_ON],
+                         self._get_power_states())
+        self.assertEqual([('GET_BULK', self.table_oid)], self.agent.requests)
+        self.assertEqual(1, len(snmp._SNMP_CLIENTS))
+
+    def test_get_power_state_v1(self):
+        for node in self.nodes:
+            node.driver_info = dict(node.driver_info, snmp_version='1')
+            node.save()
+        self.assertEqual([states.POWER_ON, states.POWER_OFF, states.POWER_ON],
+                         self._get_power_states())
+        self.assertEqual([('GET_NEXT', self.table_oid)], self.agent.requests)
+
+    @mock.patch.object(time, 'time', autospec=True)
+    def test_get_power_state_expired(self, mock_time):
+        mock_time.return_value = 100
+        self._get_power_states()
+        self.agent.mib[self.table_oid + (2,)] = 1
+        mock_time.return_value = 100 + CONF.snmp.power_state_cache_ttl
+        self.assertEqual([states.POWER_ON] * 3, self._get_power_states())
+        self.assertEqual([('GET_BULK', self.table_oid)] * 2,
+                         self.agent.requests)
+
+    def test_get_power_state_cache_disabled(self):
+        self.config(power_state_cache_ttl=0, group='snmp')
+        self.assertEqual([states.POWER_ON, states.POWER_OFF, states.POWER_ON],
+                         self._get_power_states())
+        self.assertEqual([('GET', self.table_oid + (outlet,))
+                          for outlet in (1, 2, 3)],
+                         self.agent.requests)
+
+    def test_get_power_state_outlet_not_in_table(self):
+        self.nodes = self.nodes[2:]
+        # The outlet is added after the snapshot is taken.
+        snmp._OUTLET_STATES[(snmp._get_client_key(
+            snmp._parse_driver_info(self.nodes[0])), self.table_oid)] = (
+            time.time() + 60, {})
+        self.assertEqual([states.POWER_ON], self._get_power_states())
+        self.assertEqual([('GET', self.table_oid + (3,))],
+                         self.agent.requests)
+
+    def test_set_power_state(self):
+        self._get_power_states()
+        with task_manager.acquire(self.context, self.nodes[1].uuid) as task:
+            task.driver.power.set_power_state(task, states.POWER_ON)
+        self.assertEqual([states.POWER_ON] * 3, self._get_power_states())
+        self.assertEqual([('GET_BULK', self.table_oid),
+                          ('SET', self.table_oid + (2,)),
+                          ('GET', self.table_oid + (2,)),
+                          ('GET_BULK', self.table_oid)],
+                         self.agent.requests)
+
+    def test_different_pdus(self):
+        node = self.nodes[0]
+        node.driver_info = dict(node.driver_info, snmp_address='5.6.7.8')
+        node.save()
+        self._get_power_states()
+        self.assertEqual([('GET_BULK', self.table_oid)] * 2,
+                         self.agent.requests)
+        self.assertEqual(2, len(snmp._SNMP_CLIENTS))
@@ -193,6 +193,10 @@ class SSHPrivateMethodsTestCase(db_base.DbTestCase):
 
     def setUp(self):
         super(SSHPrivateMethodsTestCase, self).setUp()
+        for cache in (ssh._SSH_CONNECTIONS, ssh._RUNNING_VMS_CACHE,
+                      ssh._VM_NAME_CACHE):
+            cache.clear()
+            self.addCleanup(cache.clear)
         self.node = obj_utils.get_test_node(
             self.context,
             driver='fake_ssh',
@@ -216,6 +220,39 @@ class SSHPrivateMethodsTestCase(db_base.DbTestCase):
         driver_info = ssh._parse_driver_info(self.node)
         ssh_connect_mock.assert_called_once_with(driver_info)
 
+    @mock.patch.object(utils, 'ssh_connect', autospec=True)
+    def test__get_connection_reused(self, ssh_connect_mock):
+        sshclient = mock.Mock(spec=paramiko.SSHClient)
+        sshclient.get_transport.return_value.is_active.return_value = True
+        ssh_connect_mock.return_value = sshclient
+        self.assertEqual(sshclient, ssh._get_connection(self.node))
+        self.assertEqual(sshclient, ssh._get_connection(self.node))
+        self.assertEqual(1, ssh_connect_mock.call_count)
+
+    @mock.patch.object(utils, 'ssh_connect', autospec=True)
+    def test__get_connection_inactive(self, ssh_connect_mock):
+        old_sshclient = mock.Mock(spec=paramiko.SSHClient)
+        old_sshclient.get_transport.return_value.is_active.return_value = (
+            False)
+        new_sshclient = mock.Mock(spec=paramiko.SSHClient)
+        ssh_connect_mock.side_effect = [old_sshclient, new_sshclient]
+        self.assertEqual(old_sshclient, ssh._get_connection(self.node))
+        self.assertEqual(new_sshclient, ssh._get_connection(self.node))
+        old_sshclient.close.assert_called_once_with()
+        self.assertEqual(2, ssh_connect_mock.call_count)
+
+    @mock.patch.object(utils, 'ssh_connect', autospec=True)
+    def test__get_connection_reconnect(self, ssh_connect_mock):
+        old_sshclient = mock.Mock(spec=paramiko.SSHClient)
+        old_sshclient.get_transport.return_value.is_active.return_value = True
+        new_sshclient = mock.Mock(spec=paramiko.SSHClient)
+        ssh_connect_mock.side_effect = [old_sshclient, new_sshclient]
+        self.assertEqual(old_sshclient, ssh._get_connection(self.node))
+        self.assertEqual(new_sshclient,
+                         ssh._get_connection(self.node, reconnect=True))
+        old_sshclient.close.assert_called_once_with()
+        self.assertEqual([new_sshclient], list(ssh._SSH_CONNECTIONS.values()))
+
     @mock.patch.object(processutils, 'ssh_execute', autospec=True)
     def test__ssh_execute(self, exec_ssh_mock):
         ssh_cmd = "somecmd"
@@ -235,6 +272,20 @@ class SSHPrivateMethodsTestCase(db_base.DbTestCase):
                           ssh_cmd)
         exec_ssh_mock.assert_called_once_with(self.sshclient, ssh_cmd)
 
+    @mock.patch.object(processutils, 'ssh_execute', autospec=True)
+    @mock.patch.object(utils, 'ssh_connect', autospec=True)
+    def test__ssh_execute_exception_drops_connection(self, ssh_connect_mock,
+                                                     exec_ssh_mock):
+        sshclient = mock.Mock(spec=paramiko.SSHClient)
+        sshclient.get_transport.return_value.is_active.return_value = True
+        ssh_connect_mock.return_value = sshclient
+        exec_ssh_mock.side_effect = paramiko.SSHException('boom')
+        ssh_obj = ssh._get_connection(self.node)
+        self.assertRaises(exception.SSHCommandFailed,
+                          ssh._ssh_execute, ssh_obj, 'somecmd')
+        sshclient.close.assert_called_once_with()
+        self.assertEqual({}, ssh._SSH_CONNECTIONS)
+
     @mock.patch.object(processutils, 'ssh_execute', autospec=True)
     @mock.patch.object(ssh, '_get_hosts_name_for_node', autospec=True)
     def test__get_power_status_on_unquoted(self, get_hosts_name_mock,
@@ -334,6 +385,89 @@ class SSHPrivateMethodsTestCase(db_base.DbTestCase):
         self.assertEqual('NodeName', found_name)
         self.assertEqual(expected, exec_ssh_mock.call_args_list)
 
+    @mock.patch.object(processutils, 'ssh_execute', autospec=True)
+    @mock.patch.object(ssh, '_get_hosts_name_for_node', autospec=True)
+    def test__get_power_status_running_vms_cached(self, get_hosts_name_mock,
+                                                  exec_ssh_mock):
+        info = ssh._parse_driver_info(self.node)
+        exec_ssh_mock.return_value = ('"NodeName"\n"OtherNode"', '')
+        get_hosts_name_mock.side_effect = ['NodeName', 'OtherNode',
+                                           'OffNode', 'NodeName']
+
+        self.assertEqual(states.POWER_ON,
+                         ssh._get_power_status(self.sshclient, info))
+        self.assertEqual(states.POWER_ON,
+                         ssh._get_power_status(self.sshclient, info))
+        self.assertEqual(states.POWER_OFF,
+                         ssh._get_power_status(self.sshclient, info))
+
+        ssh_cmd = "%s %s" % (info['cmd_set']['base_cmd'],
+                             info['cmd_set']['list_running'])
+        exec_ssh_mock.assert_called_once_with(self.sshclient, ssh_cmd)
+
+        ssh._forget_running_vms(info)
+        ssh._get_power_status(self.sshclient, info)
+        self.assertEqual(2, exec_ssh_mock.call_count)
+
+    @mock.patch.object(processutils, 'ssh_execute', autospec=True)
+    @mock.patch.object(ssh, '_get_hosts_name_for_node', autospec=True)
+    def test__get_power_status_running_vms_cache_disabled(
+            self, get_hosts_name_mock, exec_ssh_mock):
+        self.config(group='ssh', running_vms_cache_ttl=0)
+        info = ssh._parse_driver_info(self.node)
+        exec_ssh_mock.return_value = ('"NodeName"', '')
+        get_hosts_name_mock.return_value = 'NodeName'
+
+        ssh._get_power_status(self.sshclient, info)
+        ssh._get_power_status(self.sshclient, info)
+        self.assertEqual(2, exec_ssh_mock.call_count)
+
+    @mock.patch.object(processutils, 'ssh_execute', autospec=True)
+    def test__get_hosts_name_for_node_cached(self, exec_ssh_mock):
+        info = ssh._parse_driver_info(self.node)
+        info['macs'] = ["52:54:00:cf:2d:31"]
+        other_info = dict(info, macs=["52:54:00:cf:2d:30"])
+        exec_ssh_mock.side_effect = [('OtherNode\nNodeName', ''),
+                                     ('52:54:00:cf:2d:30', ''),
+                                     ('52:54:00:cf:2d:31', '')]
+
+        self.assertEqual('NodeName',
+                         ssh._get_hosts_name_for_node(self.sshclient, info))
+        self.assertEqual('NodeName',
+                         ssh._get_hosts_name_for_node(self.sshclient, info))
+        # the VMs checked while looking for the node are cached too
+        self.assertEqual('OtherNode',
+                         ssh._get_hosts_name_for_node(self.sshclient,
+                                                      other_info))
+        self.assertEqual(3, exec_ssh_mock.call_count)
+
+    @mock.patch.object(processutils, 'ssh_execute', autospec=True)
+    def test__get_hosts_name_for_node_cache_disabled(self, exec_ssh_mock):
+        self.config(group='ssh', vm_name_cache_ttl=0)
+        info = ssh._parse_driver_info(self.node)
+        info['macs'] = ["52:54:00:cf:2d:31"]
+        exec_ssh_mock.side_effect = [('NodeName', ''),
+                                     ('52:54:00:cf:2d:31', '')] * 2
+
+        ssh._get_hosts_name_for_node(self.sshclient, info)
+        ssh._get_hosts_name_for_node(self.sshclient, info)
+        self.assertEqual(4, exec_ssh_mock.call_count)
+
+    @mock.patch.object(processutils, 'ssh_execute', autospec=True)
+    @mock.patch.object(ssh, '_get_power_status', autospec=True)
+    def test__power_on_forget_vm_name(self, get_power_status_mock,
+                                      exec_ssh_mock):
+        info = ssh._parse_driver_info(self.node)
+        info['macs'] = ["52:54:00:cf:2d:31"]
+        get_power_status_mock.return_value = states.POWER_OFF
+        exec_ssh_mock.side_effect = [('NodeName', ''),
+                                     ('52:54:00:cf:2d:31', ''),
+                                     processutils.ProcessExecutionError]
+
+        self.assertRaises(exception.SSHCommandFailed,
+                          ssh._power_on, self.sshclient, info)
+        self.assertEqual({}, ssh._VM_NAME_CACHE)
+
     @mock.patch.object(processutils, 'ssh_execute', autospec=True)
     def test__get_hosts_name_for_node_no_match(self, exec_ssh_mock):
         self.config(group='ssh', get_vm_name_attempts=2)
@@ -550,6 +684,10 @@ class SSHDriverTestCase(db_base.DbTestCase):
 
     def setUp(self):
         super(SSHDriverTestCase, self).setUp()
+        for cache in (ssh._SSH_CONNECTIONS, ssh._RUNNING_VMS_CACHE,
+                      ssh._VM_NAME_CACHE):
+            cache.clear()
+            self.addCleanup(cache.clear)
         mgr_utils.mock_the_extension_manager(driver="fake_ssh")
         self.driver = driver_factory.get_driver("fake_ssh")
         self.node = obj_utils.create_test_node(
@@ -569,6 +707,22 @@ class SSHDriverTestCase(db_base.DbTestCase):
             driver_info = ssh._parse_driver_info(task.node)
             ssh_connect_mock.assert_called_once_with(driver_info)
 
+    @mock.patch.object(utils, 'ssh_connect', autospec=True)
+    def test__validate_info_ssh_connect_failed_pooled(self,
+                                                      ssh_connect_mock):
+        sshclient = mock.Mock(spec=paramiko.SSHClient)
+        sshclient.get_transport.return_value.is_active.return_value = True
+        ssh_connect_mock.side_effect = [
+            sshclient, exception.SSHConnectFailed(host='fake')]
+        with task_manager.acquire(self.context, self.node.uuid,
+                                  shared=False) as task:
+            ssh._get_connection(task.node)
+            # The credentials are checked again with a new connection
+            self.assertRaises(exception.InvalidParameterValue,
+                              task.driver.power.validate, task)
+        self.assertEqual(2, ssh_connect_mock.call_count)
+        sshclient.close.assert_called_once_with()
+
     def test_get_properties(self):
         expected = ssh.COMMON_PROPERTIES
         expected2 = list(ssh.COMMON_PROPERTIES) + list(ssh.CONSOLE_PROPERTIES)
@@ -110,6 +110,45 @@ class UcsValidateParametersTestCase(db_base.DbTestCase):
     def test_logout(self, mock_helper):
         self.helper.logout()
 
+    @mock.patch('ironic.drivers.modules.ucs.helper.ucs_helper',
+                spec_set=True, autospec=True)
+    def test_logout_reuse(self, mock_helper):
+        handle = mock.Mock()
+        mock_helper.generate_ucsm_handle.return_value = (True, handle)
+        self.helper.connect_ucsm()
+        self.helper.logout()
+        self.assertFalse(handle.Logout.called)
+        self.assertIsNone(self.helper.handle)
+
+        self.helper.connect_ucsm()
+        self.assertEqual(handle, self.helper.handle)
+        mock_helper.generate_ucsm_handle.assert_called_once_with(
+            self.node.driver_info['ucs_address'],
+            self.node.driver_info['ucs_username'],
+            self.node.driver_info['ucs_password'])
+
+    @mock.patch('ironic.drivers.modules.ucs.helper.ucs_helper',
+                spec_set=True, autospec=True)
+    def test_logout_discard(self, mock_helper):
+        handle = mock.Mock()
+        mock_helper.generate_ucsm_handle.return_value = (True, handle)
+        self.helper.connect_ucsm()
+        self.helper.logout(discard=True)
+        handle.Logout.assert_called_once_with()
+
+        self.helper.connect_ucsm()
+        self.assertEqual(2, mock_helper.generate_ucsm_handle.call_count)
+
+    @mock.patch('ironic.drivers.modules.ucs.helper.ucs_helper',
+                spec_set=True, autospec=True)
+    def test_logout_cache_disabled(self, mock_helper):
+        self.config(management_client_cache_ttl=0)
+        handle = mock.Mock()
+        mock_helper.generate_ucsm_handle.return_value = (True, handle)
+        self.helper.connect_ucsm()
+        self.helper.logout()
+        handle.Logout.assert_called_once_with()
+
 
 class UcsCommonMethodsTestcase(db_base.DbTestCase):
 
@@ -157,4 +196,4 @@ class UcsCommonMethodsTestcase(db_base.DbTestCase):
             will_error = ucs_helper.requires_ucs_client(mock_broken_function)
             self.assertRaises(exception.IronicException,
                               will_error, will_error, task)
-            mock_helper.logout.assert_called_once_with()
+            mock_helper.logout.assert_called_once_with(discard=True)
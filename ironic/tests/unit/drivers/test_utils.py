@@ -15,6 +15,7 @@
 
 import datetime
 import os
+import time
 
 import mock
 from oslo_config import cfg
@@ -247,6 +248,68 @@ class UtilsTestCase(db_base.DbTestCase):
         self.assertEqual("0a1b2c3d4f", mac_clean)
 
 
+class CacheDriverInfoTestCase(db_base.DbTestCase):
+
+    def setUp(self):
+        super(CacheDriverInfoTestCase, self).setUp()
+        self.node = obj_utils.get_test_node(self.context,
+                                            driver_info={'foo': 'bar'})
+        self.parse = mock.Mock(side_effect=lambda node: dict(
+            node.driver_info))
+
+        @driver_utils.cache_driver_info
+        def _parse_driver_info(node):
+            return self.parse(node)
+
+        self.cached_parse = _parse_driver_info
+
+    def test_cache_driver_info(self):
+        self.assertEqual({'foo': 'bar'}, self.cached_parse(self.node))
+        self.assertEqual({'foo': 'bar'}, self.cached_parse(self.node))
+        self.parse.assert_called_once_with(self.node)
+
+    def test_cache_driver_info_returns_copy(self):
+        self.cached_parse(self.node)['foo'] = 'baz'
+        self.cached_parse(self.node)['foo'] = 'baz'
+        self.assertEqual({'foo': 'bar'}, self.cached_parse(self.node))
+
+    def test_cache_driver_info_changed(self):
+        self.cached_parse(self.node)
+        self.node.driver_info['foo'] = 'baz'
+        self.assertEqual({'foo': 'baz'}, self.cached_parse(self.node))
+        self.assertEqual(2, self.parse.call_count)
+
+    def test_cache_driver_info_other_node(self):
+        self.cached_parse(self.node)
+        node = obj_utils.get_test_node(
+            self.context, uuid='1be26c0b-03f2-4d2e-ae87-c02d7f33c781',
+            driver_info={'foo': 'bar'})
+        self.cached_parse(node)
+        self.assertEqual(2, self.parse.call_count)
+
+    @mock.patch.object(time, 'time', autospec=True)
+    def test_cache_driver_info_expired(self, mock_time):
+        mock_time.return_value = 1000
+        self.cached_parse(self.node)
+        mock_time.return_value = 1060
+        self.cached_parse(self.node)
+        self.assertEqual(2, self.parse.call_count)
+
+    def test_cache_driver_info_error_not_cached(self):
+        self.parse.side_effect = [exception.InvalidParameterValue('boom'),
+                                  {'foo': 'bar'}]
+        self.assertRaises(exception.InvalidParameterValue,
+                          self.cached_parse, self.node)
+        self.assertEqual({'foo': 'bar'}, self.cached_parse(self.node))
+        self.assertEqual(2, self.parse.call_count)
+
+    def test_cache_driver_info_disabled(self):
+        self.config(driver_info_cache_ttl=0)
+        self.cached_parse(self.node)
+        self.cached_parse(self.node)
+        self.assertEqual(2, self.parse.call_count)
+
+
 class UtilsRamdiskLogsTestCase(tests_base.TestCase):
 
     def setUp(self):
@@ -13,7 +13,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import datetime
+
 import mock
+from oslo_utils import timeutils
 from testtools import matchers
 
 from ironic.common import context
@@ -164,6 +167,30 @@ class TestNodeObject(base.DbTestCase):
                 node.touch_provisioning()
                 mock_touch.assert_called_once_with(node.id)
 
+    def test_record_heartbeat(self):
+        with mock.patch.object(self.dbapi, 'get_node_by_uuid',
+                               autospec=True) as mock_get_node:
+            mock_get_node.return_value = self.fake_node
+            with mock.patch.object(self.dbapi, 'record_node_heartbeat',
+                                   autospec=True) as mock_record:
+                test_time = datetime.datetime(2000, 1, 1, 0, 0)
+                mock_record.return_value = mock.Mock(
+                    provision_updated_at=test_time)
+                node = objects.Node.get(self.context, self.fake_node['uuid'])
+                node.record_heartbeat('http://agent', 42,
+                                      touch_provisioning=True)
+                mock_record.assert_called_once_with(
+                    node.id, {'agent_url': 'http://agent',
+                              'agent_last_heartbeat': 42},
+                    touch_provisioning=True)
+                self.assertEqual('http://agent',
+                                 node.driver_internal_info['agent_url'])
+                self.assertEqual(
+                    42, node.driver_internal_info['agent_last_heartbeat'])
+                self.assertEqual(test_time, timeutils.normalize_time(
+                    node.provision_updated_at))
+                self.assertEqual(set(), node.obj_what_changed())
+
     def test_create_with_invalid_properties(self):
         node = objects.Node(self.context, **self.fake_node)
         node.properties = {"local_gb": "5G"}
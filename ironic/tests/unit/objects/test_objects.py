@@ -404,10 +404,10 @@ class TestObject(_LocalTest, _TestObject):
 # version bump. It is md5 hash of object fields and remotable methods.
 # The fingerprint values should only be changed if there is a version bump.
 expected_object_fingerprints = {
-    'Node': '1.18-37a1d39ba8a4957f505dda936ac9146b',
+    'Node': '1.19-37a1d39ba8a4957f505dda936ac9146b',
     'MyObj': '1.5-4f5efe8f0fcaf182bbe1c7fe3ba858db',
     'Chassis': '1.3-d656e039fd8ae9f34efc232ab3980905',
-    'Port': '1.6-609504503d68982a10f495659990084b',
+    'Port': '1.7-609504503d68982a10f495659990084b',
     'Portgroup': '1.2-37b374b19bfd25db7e86aebc364e611e',
     'Conductor': '1.1-5091f249719d4a465062a1b3dc7f860d',
     'EventType': '1.0-3daeec50c6deb956990255f92b863333',
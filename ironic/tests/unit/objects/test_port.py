@@ -112,3 +112,14 @@ class TestPortObject(base.DbTestCase):
             self.assertThat(ports, matchers.HasLength(1))
             self.assertIsInstance(ports[0], objects.Port)
             self.assertEqual(self.context, ports[0]._context)
+
+    def test_list_by_addresses(self):
+        with mock.patch.object(self.dbapi, 'get_ports_by_addresses',
+                               autospec=True) as mock_get_list:
+            mock_get_list.return_value = [self.fake_port]
+            ports = objects.Port.list_by_addresses(self.context,
+                                                   ['52:54:00:CF:2D:31'])
+            mock_get_list.assert_called_once_with(['52:54:00:cf:2d:31'])
+            self.assertThat(ports, matchers.HasLength(1))
+            self.assertIsInstance(ports[0], objects.Port)
+            self.assertEqual(self.context, ports[0]._context)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Measure the time taken by the DRAC driver to plan RAID configurations.
+
+The physical disks to RAID volumes matching of the DRAC RAID interface is
+run against synthetic disk inventories: shelves of identical disks, and
+shelves mixing disk types and sizes on two controllers. Every layout is
+planned --count times, and the layouts without any solution are reported
+as such.
+"""
+
+import collections
+import copy
+import optparse
+import os
+import sys
+import time
+
+top_dir = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                       os.pardir))
+sys.path.insert(0, top_dir)
+
+from ironic.common import exception  # noqa
+from ironic.drivers.modules.drac import raid  # noqa
+
+PhysicalDisk = collections.namedtuple(
+    'PhysicalDisk', ['id', 'controller', 'media_type', 'interface_type',
+                     'size_mb', 'free_size_mb'])
+
+DISK_MODELS = [('hdd', 'sas', 571776),
+               ('hdd', 'sata', 1906394),
+               ('ssd', 'sas', 380416)]
+
+LAYOUTS = {
+    'root + 2 RAID-5': [
+        {'size_mb': 51200, 'raid_level': '1', 'is_root_volume': True},
+        {'size_mb': 1024000, 'raid_level': '5'},
+        {'size_mb': 1024000, 'raid_level': '5'}],
+    'RAID-1+0 + RAID-6 + RAID-0': [
+        {'size_mb': 2048000, 'raid_level': '1+0'},
+        {'size_mb': 4096000, 'raid_level': '6'},
+        {'size_mb': 512000, 'raid_level': '0'}],
+    'shared RAID-5 volumes': [
+        {'size_mb': 512000, 'raid_level': '5',
+         'share_physical_disks': True},
+        {'size_mb': 512000, 'raid_level': '5',
+         'share_physical_disks': True},
+        {'size_mb': 1024000, 'raid_level': '6'}],
+    'no solution': [
+        {'size_mb': 512000, 'raid_level': '5'},
+        {'size_mb': 512000, 'raid_level': '6'},
+        {'size_mb': 1024000, 'raid_level': '1+0'},
+        {'size_mb': 1000000000, 'raid_level': '0'}],
+}
+
+
+def shelf(disks_count, mixed=False):
+    """Generate the inventory of a shelf of disks."""
+    disks = []
+    for i in range(disks_count):
+        if mixed:
+            controller = 'RAID.Integrated.1-%d' % (i % 2 + 1)
+            media_type, interface_type, size_mb = (
+                DISK_MODELS[i % len(DISK_MODELS)])
+        else:
+            controller = 'RAID.Integrated.1-1'
+            media_type, interface_type, size_mb = DISK_MODELS[0]
+        disk_id = 'Disk.Bay.%d:Enclosure.Internal.0-1:%s' % (i, controller)
+        disks.append(PhysicalDisk(disk_id, controller, media_type,
+                                  interface_type, size_mb, size_mb))
+    return disks
+
+
+def run(logical_disks, physical_disks, count):
+    """Plan a layout count times and return the mean time in seconds."""
+    start = time.time()
+    for i in range(count):
+        try:
+            raid._find_configuration(copy.deepcopy(logical_disks),
+                                     physical_disks)
+        except exception.DracOperationError:
+            result = 'no solution'
+        else:
+            result = 'ok'
+    return (time.time() - start) / count, result
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option("-n", "--count", dest="count", type="int",
+                      help="number of runs of every layout (default: 10)",
+                      default=10)
+    parser.add_option("-d", "--disks", dest="disks",
+                      help="comma separated numbers of disks of the "
+                           "shelves (default: 12,24,60)",
+                      default='12,24,60')
+    (options, args) = parser.parse_args()
+
+    for disks_count in [int(count) for count in options.disks.split(',')]:
+        for mixed in (False, True):
+            physical_disks = shelf(disks_count, mixed=mixed)
+            inventory = '%d %s disks' % (disks_count,
+                                         'mixed' if mixed else 'identical')
+            for name, logical_disks in sorted(LAYOUTS.items()):
+                duration, result = run(logical_disks, physical_disks,
+                                       options.count)
+                print("%-20s %-28s %10.2f ms  %s" % (
+                    inventory, name, duration * 1000, result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Measure the IPMI commands per second of the ipmitool driver.
+
+A fake BMC answering the chassis commands is started on the local host,
+then the same command is sent to it repeatedly by running ipmitool for
+every command and through a persistent IPMI session
+([ipmi]use_persistent_sessions). Requires the pyghmi library; the ipmitool
+measurement is skipped if ipmitool is not installed.
+"""
+
+import multiprocessing
+import optparse
+import os
+import sys
+import time
+
+from oslo_concurrency import processutils
+from pyghmi.ipmi import bmc
+
+top_dir = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                       os.pardir))
+sys.path.insert(0, top_dir)
+
+from ironic.conf import CONF  # noqa
+from ironic.drivers.modules import ipmitool  # noqa
+
+USERNAME = 'admin'
+PASSWORD = 'password'
+
+
+class FakeBmc(bmc.Bmc):
+    """A BMC keeping the power state of a fake server in memory."""
+
+    def __init__(self, port):
+        super(FakeBmc, self).__init__({USERNAME: PASSWORD}, port=port,
+                                      address='127.0.0.1')
+        self.powerstate = 0
+
+    def get_power_state(self):
+        return self.powerstate
+
+    def power_off(self):
+        self.powerstate = 0
+
+    def power_on(self):
+        self.powerstate = 1
+
+    def power_reset(self):
+        pass
+
+    def power_cycle(self):
+        self.powerstate = 1
+
+    def power_shutdown(self):
+        self.powerstate = 0
+
+
+def serve(port):
+    FakeBmc(port).listen()
+
+
+def run(driver_info, command, count):
+    """Send a command count times and return the commands per second."""
+    start = time.time()
+    for i in range(count):
+        # NOTE: only the cost of the commands is measured, not the
+        # [ipmi]min_command_interval throttling.
+        ipmitool.BMC_COMMAND_QUEUES.clear()
+        ipmitool._exec_ipmitool(driver_info, command)
+    return count / (time.time() - start)
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option("-n", "--count", dest="count", type="int",
+                      help="number of commands to send (default: 100)",
+                      default=100)
+    parser.add_option("-p", "--port", dest="port", type="int",
+                      help="UDP port of the fake BMC (default: 6230)",
+                      default=6230)
+    parser.add_option("-c", "--command", dest="command",
+                      help="ipmitool command to send "
+                           "(default: 'power status')",
+                      default='power status')
+    (options, args) = parser.parse_args()
+
+    server = multiprocessing.Process(target=serve, args=(options.port,))
+    server.daemon = True
+    server.start()
+    time.sleep(1)
+
+    driver_info = {'address': '127.0.0.1',
+                   'dest_port': str(options.port),
+                   'username': USERNAME,
+                   'password': PASSWORD,
+                   'uuid': 'fake-bmc',
+                   'priv_level': 'ADMINISTRATOR',
+                   'protocol_version': '2.0',
+                   'local_address': None,
+                   'transit_channel': None,
+                   'transit_address': None,
+                   'target_channel': None,
+                   'target_address': None}
+
+    try:
+        for persistent in (False, True):
+            CONF.set_override('use_persistent_sessions', persistent,
+                              group='ipmi')
+            mode = 'persistent session' if persistent else 'ipmitool'
+            try:
+                rate = run(driver_info, options.command, options.count)
+            except (OSError, processutils.ProcessExecutionError) as e:
+                print("%-20s skipped: %s" % (mode, e))
+                continue
+            print("%-20s %8.1f commands/sec" % (mode, rate))
+    finally:
+        server.terminate()
+
+
+if __name__ == '__main__':
+    main()